@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from .models import Processamento
+from .processamento import cancelar
+
+
+@admin.action(description='Cancelar processamentos selecionados')
+def cancelar_processamentos(modeladmin, request, queryset):
+    for processamento in queryset.exclude(status__in=Processamento.STATUS_FINAIS):
+        cancelar(processamento)
+
+
+@admin.register(Processamento)
+class ProcessamentoAdmin(admin.ModelAdmin):
+    list_display = ('descricao', 'tarefa', 'status', 'progresso', 'solicitado_por', 'criado_em', 'concluido_em')
+    list_filter = ('status', 'tarefa')
+    search_fields = ('descricao', 'tarefa')
+    readonly_fields = [campo.name for campo in Processamento._meta.fields]
+    actions = [cancelar_processamentos]
+
+    def has_add_permission(self, request):
+        return False
@@ -1,8 +1,13 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class coreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
 
-    
\ No newline at end of file
+    # Conecta os signals (ajustes de conexão do SQLite, cache do dashboard) e registra as tarefas
+    # de segundo plano dos módulos tarefas.py de cada app
+    def ready(self):
+        import core.signals
+        autodiscover_modules('tarefas')
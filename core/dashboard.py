@@ -0,0 +1,98 @@
+# core/dashboard.py
+"""
+Blocos do dashboard.
+
+A página inicial só monta o esqueleto; cada bloco é buscado em paralelo em
+/dashboard/bloco/<nome>/ (DashboardFragmentoView). O HTML de cada bloco fica em
+cache pelo próprio TTL e sai com ETag, para que um indicador lento não atrase
+os demais nem a primeira pintura da página.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from financeiro.models import Venda
+from manejo.services import ReproducaoService
+from rebanho.models import Animal, BaixaAnimal
+
+from .services import ZootecnicoService
+
+
+def _rebanho():
+    return Animal.objects.filter(situacao='VIVO').aggregate(
+        total_animais=Count('pk'),
+        total_machos=Count('pk', filter=Q(sexo='M')),
+        total_femeas=Count('pk', filter=Q(sexo='F')),
+        alerta_genealogia=Count('pk', filter=Q(mae__isnull=True)),
+    )
+
+
+def _saidas():
+    ano_atual = timezone.localdate().year
+    vendas = Venda.objects.filter(data_entrada__year=ano_atual)
+    total_baixa = BaixaAnimal.objects.filter(animal__situacao='MORTO', data_baixa__year=ano_atual).count()
+    total_vivos = Animal.objects.filter(situacao='VIVO').count()
+    return {
+        'total_vendido': vendas.filter(animal__situacao='VENDIDO').count(),
+        'receita_vendas': vendas.aggregate(total=Coalesce(Sum('valor_total'), Decimal(0)))['total'],
+        'total_baixa': total_baixa,
+        # Mesmo cálculo de ZootecnicoService.obter_indicadores_performance
+        'taxa_mortalidade': round(
+            BaixaAnimal.objects.filter(data_baixa__year=ano_atual).count() / total_vivos * 100, 1
+        ) if total_vivos else 0,
+    }
+
+
+class Fragmento:
+
+    def __init__(self, nome, template, ttl, contexto):
+        self.nome = nome
+        self.template = template
+        self.ttl = ttl  # segundos
+        self.contexto = contexto
+
+    @property
+    def chave_cache(self):
+        # A data entra na chave: indicadores "do ano" e "dos próximos dias" viram à meia-noite
+        return f"dashboard:{self.nome}:{timezone.localdate():%Y%m%d}"
+
+    def obter(self):
+        """{'html', 'etag'} do cache ou recalculado. Retorna (conteudo, veio_do_cache)."""
+        conteudo = cache.get(self.chave_cache)
+        if conteudo is not None:
+            return conteudo, True
+
+        html = render_to_string(self.template, self.contexto())
+        conteudo = {'html': html, 'etag': f'"{hashlib.md5(html.encode()).hexdigest()}"'}
+        cache.set(self.chave_cache, conteudo, self.ttl)
+        return conteudo, False
+
+
+FRAGMENTOS = {
+    fragmento.nome: fragmento
+    for fragmento in [
+        Fragmento('rebanho', 'includes/_dashboard_rebanho.html', 60, _rebanho),
+        Fragmento(
+            'desmame', 'includes/_card_alerta_desmame.html', 300,
+            lambda: {'alerta_desmame': ZootecnicoService.obter_alertas_desmame()},
+        ),
+        Fragmento(
+            'paricoes', 'includes/_card_proximas_paricoes.html', 300,
+            lambda: {'alertas_paricao': ZootecnicoService.obter_alertas_paricao()},
+        ),
+        Fragmento('saidas', 'includes/_dashboard_saidas.html', 300, _saidas),
+        Fragmento(
+            'estacao', 'includes/_dashboard_estacao.html', 600,
+            lambda: ReproducaoService.obter_dados_estacao(timezone.localdate().year - 1),
+        ),
+    ]
+}
+
+
+def invalidar_dashboard():
+    cache.delete_many([fragmento.chave_cache for fragmento in FRAGMENTOS.values()])
@@ -0,0 +1,14 @@
+# core/datas.py
+"""Leitura de datas vindas da requisição (GET/POST)."""
+from django.utils.dateparse import parse_date
+
+
+def ler_data(valor, padrao=None):
+    """
+    parse_date tolerante: vazio, formato inválido ("abc") ou data impossível
+    (2023-02-30, em que parse_date levanta ValueError) devolvem `padrao`.
+    """
+    try:
+        return parse_date(valor or '') or padrao
+    except ValueError:
+        return padrao
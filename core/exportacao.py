@@ -0,0 +1,221 @@
+# core/exportacao.py
+"""
+Exportação CSV/XLSX em streaming para as ListViews.
+
+As linhas saem de `values_list(...).iterator(chunk_size=...)`, sem instanciar
+models e sem montar a resposta inteira em memória:
+- CSV: StreamingHttpResponse (padrão Excel BR: ';', datas dd/mm/aaaa, utf-8 com BOM)
+- XLSX: openpyxl em modo write-only, gravado em arquivo temporário e enviado com FileResponse
+Com ?segundo_plano=1 a exportação vira um Processamento (core/tarefas.py).
+"""
+import csv
+import io
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils import timezone
+from openpyxl import Workbook
+
+
+TAMANHO_BLOCO = 2000
+
+FORMATOS = ('csv', 'xlsx')
+
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve a linha em vez de gravar."""
+
+    def write(self, valor):
+        return valor
+
+
+def _campo(model, lookup):
+    """Campo do model apontado por um lookup como 'matriz__identificacao'."""
+    campo = None
+    for parte in lookup.split('__'):
+        try:
+            campo = model._meta.get_field(parte)
+        except FieldDoesNotExist:
+            return None
+        if campo.is_relation and campo.related_model:
+            model = campo.related_model
+    return campo
+
+
+def conversores(model, lookups):
+    """Para cada coluna, troca o código pelo rótulo quando o campo tem choices."""
+    resultado = []
+    for lookup in lookups:
+        campo = _campo(model, lookup)
+        escolhas = dict(campo.flatchoices) if campo is not None and campo.choices else None
+        resultado.append(escolhas)
+    return resultado
+
+
+def _aplicar(linha, escolhas):
+    return [
+        mapa.get(valor, valor) if mapa is not None else valor
+        for valor, mapa in zip(linha, escolhas)
+    ]
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).strftime('%d/%m/%Y %H:%M') if timezone.is_aware(valor) else valor.strftime('%d/%m/%Y %H:%M')
+    if isinstance(valor, date):
+        return valor.strftime('%d/%m/%Y')
+    if isinstance(valor, (Decimal, float)):
+        return str(valor).replace('.', ',')
+    if isinstance(valor, bool):
+        return 'Sim' if valor else 'Não'
+    return valor
+
+
+def _valor_xlsx(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, datetime) and timezone.is_aware(valor):
+        return timezone.localtime(valor).replace(tzinfo=None)
+    return valor
+
+
+def resposta_csv(nome_arquivo, cabecalho, linhas):
+    """StreamingHttpResponse com as linhas (iterável) já projetadas."""
+    escritor = csv.writer(_Eco(), delimiter=';')
+
+    def gerar():
+        yield '\ufeff'  # BOM: o Excel abre acentos corretamente
+        yield escritor.writerow(cabecalho)
+        for linha in linhas:
+            yield escritor.writerow([_valor_csv(valor) for valor in linha])
+
+    response = StreamingHttpResponse(gerar(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}.csv"'
+    return response
+
+
+def escrever_csv(arquivo, cabecalho, linhas):
+    """Grava o CSV no arquivo binário `arquivo` (usado pelos processamentos)."""
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    escritor = csv.writer(texto, delimiter=';')
+    escritor.writerow(cabecalho)
+    for linha in linhas:
+        escritor.writerow([_valor_csv(valor) for valor in linha])
+    texto.flush()
+    texto.detach()
+
+
+def escrever_xlsx(arquivo, cabecalho, linhas, titulo='Dados'):
+    """XLSX em modo write-only: memória constante, independente do número de linhas."""
+    livro = Workbook(write_only=True)
+    planilha = livro.create_sheet(title=titulo[:31])
+    planilha.append(cabecalho)
+    for linha in linhas:
+        planilha.append([_valor_xlsx(valor) for valor in linha])
+    livro.save(arquivo)
+
+
+def resposta_xlsx(nome_arquivo, cabecalho, linhas, titulo='Dados'):
+    arquivo = tempfile.TemporaryFile()
+    escrever_xlsx(arquivo, cabecalho, linhas, titulo=titulo)
+    arquivo.seek(0)
+    return FileResponse(
+        arquivo,
+        as_attachment=True,
+        filename=f'{nome_arquivo}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def linhas_exportacao(queryset, colunas):
+    """Cabeçalho e gerador de linhas do queryset nas `colunas` [(lookup, 'Cabeçalho'), ...]."""
+    lookups = [lookup for lookup, _ in colunas]
+    cabecalho = [rotulo for _, rotulo in colunas]
+    escolhas = conversores(queryset.model, lookups)
+    linhas = (
+        _aplicar(linha, escolhas)
+        for linha in queryset.values_list(*lookups).iterator(chunk_size=TAMANHO_BLOCO)
+    )
+    return cabecalho, linhas
+
+
+def exportar_queryset(queryset, colunas, nome_arquivo, formato='csv', titulo='Dados'):
+    """Exporta o queryset nas `colunas` no formato pedido."""
+    cabecalho, linhas = linhas_exportacao(queryset, colunas)
+
+    nome_arquivo = f"{nome_arquivo}_{timezone.localdate():%Y-%m-%d}"
+    if formato == 'xlsx':
+        return resposta_xlsx(nome_arquivo, cabecalho, linhas, titulo=titulo)
+    return resposta_csv(nome_arquivo, cabecalho, linhas)
+
+
+class ExportacaoMixin:
+    """
+    ListView + ?exportar=csv|xlsx: exporta o mesmo get_queryset() da tela (com o
+    filtro e a ordenação atuais), sem paginação. Com &segundo_plano=1 enfileira
+    a exportação e leva o usuário à página do processamento.
+    """
+    colunas_exportacao = []
+    nome_arquivo_exportacao = 'exportacao'
+
+    def get(self, request, *args, **kwargs):
+        formato = request.GET.get('exportar')
+        if formato in FORMATOS and request.GET.get('segundo_plano'):
+            return self.exportar_em_segundo_plano(formato)
+        if formato in FORMATOS:
+            return exportar_queryset(
+                self.get_queryset(),
+                self.colunas_exportacao,
+                self.nome_arquivo_exportacao,
+                formato=formato,
+                titulo=str(self.model._meta.verbose_name_plural),
+            )
+        return super().get(request, *args, **kwargs)
+
+    def exportar_em_segundo_plano(self, formato):
+        from .processamento import enfileirar
+
+        filtros = self.request.GET.copy()
+        for parametro in ('exportar', 'segundo_plano', 'page'):
+            filtros.pop(parametro, None)
+        processamento = enfileirar(
+            'core.exportar_lista',
+            {
+                'visao': f"{type(self).__module__}.{type(self).__qualname__}",
+                'filtros': filtros.urlencode(),
+                'formato': formato,
+            },
+            usuario=self.request.user,
+            descricao=f"Exportação de {self.model._meta.verbose_name_plural} ({formato.upper()})",
+        )
+        return redirect(processamento)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        parametros = self.request.GET.copy()
+        parametros.pop('page', None)
+        urls = {}
+        for formato in FORMATOS:
+            parametros['exportar'] = formato
+            urls[formato] = f"?{parametros.urlencode()}"
+        urls['segundo_plano'] = f"{urls['xlsx']}&segundo_plano=1"
+        context['urls_exportacao'] = urls
+        return context
+
+
+def acao_exportar_csv(colunas, nome_arquivo):
+    """
+    Action do admin que exporta os selecionados em streaming (o export do
+    django-import-export monta o arquivo inteiro em memória).
+    """
+    def exportar_csv(modeladmin, request, queryset):
+        return exportar_queryset(queryset, colunas, nome_arquivo)
+
+    exportar_csv.short_description = 'Exportar selecionados (CSV)'
+    return exportar_csv
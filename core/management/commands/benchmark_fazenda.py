@@ -0,0 +1,217 @@
+import csv
+import json
+import statistics
+import subprocess
+import time
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.dashboard import FRAGMENTOS
+from core.services import ZootecnicoService
+from financeiro.services import CalculadorIndices, calcular_performance_rebanho, obter_detalhe_lucratividade_animais
+from manejo.eficiencia import EficienciaReprodutivaService
+from manejo.ganho import GanhoPesoService
+from manejo.models import Pesagem
+from manejo.services import EstacaoMontaService
+from rebanho.crescimento import CrescimentoService
+from rebanho.estoque import EstoqueService
+from rebanho.genetica import AvaliacaoGeneticaService
+from rebanho.safra import SafraService
+from rebanho.models import Animal
+
+
+# Cache só do benchmark: limpar entre as execuções não mexe no cache compartilhado da fazenda
+CACHE_BENCHMARK = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'}}
+
+
+def _casos(ano):
+    """(nome, tipo, alvo): alvo é o nome da URL, ou (nome, args), nas views e uma função sem argumentos nos serviços."""
+    # Ficha do animal com mais pesagens (o pior caso da linha do tempo)
+    animal_id = (
+        Pesagem.objects.values('animal_id').annotate(total=Count('pk')).order_by('-total')
+        .values_list('animal_id', flat=True).first()
+    )
+    casos = [
+        ('dashboard', 'view', 'dashboard'),
+        *[(f'dashboard.{nome}', 'view', ('dashboard_fragmento', [nome])) for nome in FRAGMENTOS],
+        ('zootecnico', 'view', 'zootecnico_stats'),
+        ('analise_por_idade', 'view', 'rebanho:analise_por_idade'),
+        ('analise_lotes', 'view', 'rebanho:analise_lotes'),
+        ('estoque', 'view', 'rebanho:estoque'),
+        ('safras', 'view', 'rebanho:safras'),
+        ('avaliacao_genetica', 'view', 'rebanho:avaliacao_genetica'),
+        ('ganho_peso', 'view', 'ganho_peso'),
+        ('eficiencia_reprodutiva', 'view', 'eficiencia_reprodutiva'),
+        ('pastos', 'view', 'pasto_list'),
+        ('dashboard_financeiro', 'view', 'dashboard_financeiro'),
+        ('lucratividade_animais', 'view', 'detalhe_lucratividade_animais'),
+        ('alertas_risco', 'view', 'alertas_risco'),
+        ('alertas_manejo', 'view', 'alertas_de_manejo'),
+        ('servico.indicadores_performance', 'servico', ZootecnicoService.obter_indicadores_performance),
+        ('servico.alertas_desmame', 'servico', ZootecnicoService.obter_alertas_desmame),
+        ('servico.alertas_paricao', 'servico', ZootecnicoService.obter_alertas_paricao),
+        ('servico.estatisticas_financeiras', 'servico', lambda: CalculadorIndices.obter_estatisticas_financeiras(ano_filtro=ano)),
+        ('servico.lucratividade_animais', 'servico', lambda: obter_detalhe_lucratividade_animais(ano)),
+        ('servico.performance_rebanho', 'servico', lambda: calcular_performance_rebanho(ano)),
+        ('servico.estacao_monta', 'servico', lambda: EstacaoMontaService.analisar(ano - 1)),
+        ('servico.estoque_serie', 'servico', lambda: EstoqueService.serie_mensal(date(ano - 5, 1, 1), date(ano, 12, 31))),
+        ('servico.curvas_crescimento', 'servico', CrescimentoService.ajustar),
+        ('servico.indices_reprodutivos', 'servico', EficienciaReprodutivaService.recalcular),
+        ('servico.ganho_peso', 'servico', lambda: GanhoPesoService.relatorio('safra', 'mes', date(ano - 5, 1, 1), date(ano, 12, 31))),
+        ('servico.safras', 'servico', lambda: SafraService.analisar(range(ano - 5, ano + 1), 'pai')),
+        ('servico.avaliacao_genetica', 'servico', AvaliacaoGeneticaService.avaliar),
+    ]
+    if animal_id:
+        casos.append(('ficha_animal', 'view', ('rebanho:animal_detail', [animal_id])))
+    return casos
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o tempo e o número de consultas das principais telas e serviços sobre o banco atual "
+        "(use gerar_fazenda para ter volume) e grava um relatório JSON/CSV para comparar commits. "
+        "Tudo roda em uma transação desfeita no fim (curvas, índices e DEPs recalculados não ficam "
+        "gravados) e com um cache em memória próprio."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=3, help="Execuções de cada caso.")
+        parser.add_argument('--usuario', help="Usuário que acessa as telas (padrão: o primeiro superusuário ativo).")
+        parser.add_argument('--ano', type=int, help="Ano dos relatórios financeiros (padrão: ano atual).")
+        parser.add_argument('--apenas', nargs='+', metavar='CASO', help="Executa só os casos informados.")
+        parser.add_argument('--com-cache', action='store_true', help="Não limpa o cache entre as execuções.")
+        parser.add_argument('--saida', help="Arquivo do relatório (.json ou .csv).")
+        parser.add_argument('--comparar', help="Relatório JSON anterior para calcular a variação.")
+
+    def handle(self, *args, **options):
+        ano = options['ano'] or timezone.localdate().year
+        casos = _casos(ano)
+        if options['apenas']:
+            casos = [caso for caso in casos if caso[0] in options['apenas']]
+            if not casos:
+                raise CommandError("Nenhum caso com esses nomes.")
+
+        anterior = {}
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as arquivo:
+                anterior = {r['nome']: r for r in json.load(arquivo)['resultados']}
+
+        usuario = self.usuario(options['usuario'])
+        setup_test_environment()
+        try:
+            with override_settings(CACHES=CACHE_BENCHMARK), transaction.atomic():
+                # Telas com erro entram no relatório com o status 500 em vez de interromper a medição
+                cliente = Client(raise_request_exception=False)
+                cliente.force_login(usuario)
+                resultados = [self.medir(cliente, *caso, **options) for caso in casos]
+                # Desfaz sessão, last_login e o que os casos de serviço gravaram
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        relatorio = {
+            'commit': self.commit(),
+            'data': timezone.now().isoformat(timespec='seconds'),
+            'banco': connection.vendor,
+            'animais': Animal.objects.count(),
+            'pesagens': Pesagem.objects.count(),
+            'repeticoes': options['repeticoes'],
+            'resultados': resultados,
+        }
+        self.imprimir(relatorio, anterior)
+        if options['saida']:
+            self.gravar(relatorio, options['saida'])
+            self.stdout.write(self.style.SUCCESS(f"Relatório gravado em {options['saida']}"))
+
+    def usuario(self, nome):
+        usuarios = get_user_model().objects.filter(is_active=True)
+        if nome:
+            usuario = usuarios.filter(username=nome).first()
+            if usuario is None:
+                raise CommandError(f"Usuário ativo '{nome}' não encontrado.")
+            return usuario
+        usuario = usuarios.filter(is_superuser=True).order_by('pk').first()
+        if usuario is None:
+            raise CommandError("Nenhum superusuário ativo: crie um (createsuperuser) ou informe --usuario.")
+        return usuario
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
+
+    def medir(self, cliente, nome, tipo, alvo, repeticoes, com_cache, **kwargs):
+        tempos = []
+        consultas = 0
+        status = None
+        for _ in range(repeticoes):
+            if not com_cache:
+                cache.clear()
+            # Cada execução parte do mesmo banco: o que o caso gravar é desfeito
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as capturadas:
+                    inicio = time.perf_counter()
+                    if tipo == 'view':
+                        url = reverse(alvo[0], args=alvo[1]) if isinstance(alvo, tuple) else reverse(alvo)
+                        response = cliente.get(url)
+                        if getattr(response, 'streaming', False):
+                            b''.join(response.streaming_content)
+                        status = response.status_code
+                    else:
+                        alvo()
+                    tempos.append((time.perf_counter() - inicio) * 1000)
+                transaction.set_rollback(True)
+            consultas = len(capturadas)
+        return {
+            'nome': nome,
+            'tipo': tipo,
+            'min_ms': round(min(tempos), 2),
+            'mediana_ms': round(statistics.median(tempos), 2),
+            'max_ms': round(max(tempos), 2),
+            'consultas': consultas,
+            'status': status,
+        }
+
+    def imprimir(self, relatorio, anterior):
+        self.stdout.write(
+            f"commit {relatorio['commit'] or '?'} | {relatorio['banco']} | "
+            f"{relatorio['animais']} animais, {relatorio['pesagens']} pesagens"
+        )
+        self.stdout.write(f"{'Caso':<34} {'Mediana (ms)':>13} {'Mín (ms)':>10} {'Consultas':>10} {'Variação':>9}")
+        for r in relatorio['resultados']:
+            variacao = ''
+            base = anterior.get(r['nome'])
+            if base and base['mediana_ms']:
+                variacao = f"{(r['mediana_ms'] / base['mediana_ms'] - 1) * 100:+.0f}%"
+            nome = r['nome'] if r['status'] in (None, 200) else f"{r['nome']} [{r['status']}]"
+            self.stdout.write(
+                f"{nome:<34} {r['mediana_ms']:>13.1f} {r['min_ms']:>10.1f} {r['consultas']:>10} {variacao:>9}"
+            )
+
+    def gravar(self, relatorio, caminho):
+        if caminho.endswith('.csv'):
+            campos = ['commit', 'data', 'banco', 'animais', 'nome', 'tipo', 'min_ms', 'mediana_ms', 'max_ms', 'consultas', 'status']
+            with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+                escritor = csv.DictWriter(arquivo, fieldnames=campos, extrasaction='ignore')
+                escritor.writeheader()
+                for resultado in relatorio['resultados']:
+                    escritor.writerow({**relatorio, **resultado})
+        else:
+            with open(caminho, 'w', encoding='utf-8') as arquivo:
+                json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sqlite import aplicar_pragmas
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de concorrência no SQLite: um escritor faz uma carga longa em uma transação "
+        "enquanto leitores medem a latência das consultas. Compara o modo padrão (rollback journal) "
+        "com as PRAGMAs de settings.SQLITE_PRAGMAS (WAL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=200000, help="Linhas inseridas pelo escritor.")
+        parser.add_argument('--lote', type=int, default=5000, help="Linhas por INSERT em lote.")
+        parser.add_argument('--leitores', type=int, default=4, help="Número de threads leitoras.")
+
+    def handle(self, *args, **options):
+        resultados = []
+        with tempfile.TemporaryDirectory() as diretorio:
+            for modo, pragmas in (
+                ('PADRAO', {'journal_mode': 'DELETE'}),
+                ('CONFIGURADO', settings.SQLITE_PRAGMAS),
+            ):
+                caminho = os.path.join(diretorio, f"bench_{modo.lower()}.sqlite3")
+                resultados.append((modo, self.executar(caminho, pragmas, **options)))
+
+        self.stdout.write("")
+        self.stdout.write(f"{'Modo':<12} {'Escrita (s)':>12} {'Leituras':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'Máx (ms)':>9} {'Bloqueios':>10}")
+        for modo, r in resultados:
+            self.stdout.write(
+                f"{modo:<12} {r['escrita_s']:>12.2f} {r['leituras']:>9} {r['p50_ms']:>9.2f} "
+                f"{r['p99_ms']:>9.2f} {r['max_ms']:>9.1f} {r['bloqueios']:>10}"
+            )
+
+    def conectar(self, caminho, pragmas):
+        conexao = sqlite3.connect(caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        aplicar_pragmas(conexao.cursor(), pragmas)
+        return conexao
+
+    def executar(self, caminho, pragmas, linhas, lote, leitores, **kwargs):
+        # Base inicial que os leitores consultam (simula pesagens existentes)
+        conexao = self.conectar(caminho, pragmas)
+        conexao.execute(
+            "CREATE TABLE pesagem (id INTEGER PRIMARY KEY, animal_id INTEGER, data TEXT, peso REAL)"
+        )
+        conexao.execute("CREATE INDEX pesagem_animal ON pesagem(animal_id)")
+        conexao.execute("BEGIN")
+        conexao.executemany(
+            "INSERT INTO pesagem (animal_id, data, peso) VALUES (?, '2025-01-01', 300)",
+            ((i % 1000,) for i in range(20000)),
+        )
+        conexao.execute("COMMIT")
+        conexao.close()
+
+        latencias = []
+        bloqueios = [0]
+        fim = threading.Event()
+        trava = threading.Lock()
+
+        def leitor(numero):
+            con = self.conectar(caminho, pragmas)
+            while not fim.is_set():
+                inicio = time.perf_counter()
+                try:
+                    con.execute("SELECT COUNT(*), AVG(peso) FROM pesagem WHERE animal_id = ?", (numero,)).fetchone()
+                except sqlite3.OperationalError:
+                    with trava:
+                        bloqueios[0] += 1
+                    continue
+                with trava:
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+            con.close()
+
+        threads = [threading.Thread(target=leitor, args=(n,)) for n in range(leitores)]
+        for t in threads:
+            t.start()
+
+        # Escritor: uma única transação longa, como o mover_pasto_animais em lotes grandes
+        escritor = self.conectar(caminho, pragmas)
+        inicio = time.perf_counter()
+        escritor.execute("BEGIN IMMEDIATE")
+        for inicio_lote in range(0, linhas, lote):
+            fim_lote = min(inicio_lote + lote, linhas)
+            escritor.executemany(
+                "INSERT INTO pesagem (animal_id, data, peso) VALUES (?, '2025-06-01', 320)",
+                ((i % 1000,) for i in range(inicio_lote, fim_lote)),
+            )
+        escritor.execute("COMMIT")
+        escrita_s = time.perf_counter() - inicio
+        escritor.close()
+
+        fim.set()
+        for t in threads:
+            t.join()
+
+        latencias.sort()
+        total = len(latencias)
+
+        def percentil(p):
+            return latencias[min(total - 1, int(total * p))] if total else 0.0
+
+        return {
+            'escrita_s': escrita_s,
+            'leituras': total,
+            'p50_ms': percentil(0.50),
+            'p99_ms': percentil(0.99),
+            'max_ms': latencias[-1] if total else 0.0,
+            'bloqueios': bloqueios[0],
+        }
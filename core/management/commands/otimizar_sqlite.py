@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.sqlite import otimizar
+
+
+class Command(BaseCommand):
+    help = "Roda PRAGMA optimize (e opcionalmente um checkpoint do WAL) no banco SQLite. Indicado para o cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--checkpoint',
+            action='store_true',
+            help="Também executa wal_checkpoint(TRUNCATE) para encolher o arquivo -wal.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Este comando só se aplica ao SQLite.")
+
+        with connection.cursor() as cursor:
+            otimizar(cursor, forcar=True)
+            self.stdout.write("PRAGMA optimize executado.")
+
+            if options['checkpoint']:
+                cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                ocupado, paginas_log, paginas_copiadas = cursor.fetchone()
+                self.stdout.write(
+                    f"Checkpoint: ocupado={ocupado} páginas no log={paginas_log} copiadas={paginas_copiadas}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("SQLite otimizado."))
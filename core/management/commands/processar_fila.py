@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.processamento import executar, marcar_erro, recuperar_orfaos, reservar
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker da fila de processamentos (relatórios, exportações e ações em lote). "
+        "Rode ao lado do gunicorn, ex: python manage.py processar_fila --processos 2"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processos', type=int, default=2,
+            help="Tamanho do pool de processos. 0 executa no próprio processo, um de cada vez.",
+        )
+        parser.add_argument('--intervalo', type=float, default=2.0, help="Segundos entre consultas à fila vazia.")
+        parser.add_argument('--uma-vez', action='store_true', help="Esvazia a fila e termina (útil no cron).")
+        parser.add_argument(
+            '--orfaos-minutos', type=int, default=30,
+            help="Processamentos em execução sem progresso há mais tempo que isso são marcados como erro.",
+        )
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+
+        orfaos = recuperar_orfaos(options['orfaos_minutos'])
+        if orfaos:
+            self.stdout.write(self.style.WARNING(f"{orfaos} processamento(s) interrompido(s) marcado(s) como erro."))
+
+        if options['processos'] <= 0:
+            self._executar_em_serie(worker, options)
+        else:
+            self._executar_em_pool(worker, options)
+
+    def _executar_em_serie(self, worker, options):
+        while True:
+            pk = reservar(worker)
+            if pk is None:
+                if options['uma_vez']:
+                    return
+                time.sleep(options['intervalo'])
+                continue
+            self._relatar(pk, executar(pk))
+
+    def _executar_em_pool(self, worker, options):
+        limite = options['processos']
+        # 'spawn': cada processo abre a própria conexão, nada herdado do pai
+        contexto = multiprocessing.get_context('spawn')
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=limite, mp_context=contexto, initializer=django.setup) as pool:
+            em_execucao = {}
+            while True:
+                while len(em_execucao) < limite:
+                    pk = reservar(worker)
+                    if pk is None:
+                        break
+                    em_execucao[pool.submit(executar, pk)] = pk
+
+                if not em_execucao:
+                    if options['uma_vez']:
+                        return
+                    time.sleep(options['intervalo'])
+                    continue
+
+                prontos, _ = wait(em_execucao, timeout=options['intervalo'], return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    pk = em_execucao.pop(futuro)
+                    erro = futuro.exception()
+                    if erro:
+                        marcar_erro(pk, f"O processo do worker falhou: {erro!r}")
+                    self._relatar(pk, 'ERRO' if erro else futuro.result(), erro)
+
+    def _relatar(self, pk, status, erro=None):
+        mensagem = f"Processamento {pk}: {status}"
+        if erro:
+            mensagem += f" ({erro})"
+        estilo = self.style.SUCCESS if status == 'CONCLUIDO' else self.style.WARNING
+        self.stdout.write(estilo(mensagem))
@@ -0,0 +1,136 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Processamento",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tarefa", models.CharField(max_length=100, verbose_name="Tarefa")),
+                (
+                    "descricao",
+                    models.CharField(
+                        blank=True, max_length=200, verbose_name="Descrição"
+                    ),
+                ),
+                (
+                    "parametros",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="Parâmetros"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDENTE", "Na fila"),
+                            ("EXECUTANDO", "Em execução"),
+                            ("CONCLUIDO", "Concluído"),
+                            ("ERRO", "Erro"),
+                            ("CANCELADO", "Cancelado"),
+                        ],
+                        default="PENDENTE",
+                        max_length=10,
+                        verbose_name="Situação",
+                    ),
+                ),
+                (
+                    "progresso",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Progresso (%)"
+                    ),
+                ),
+                (
+                    "mensagem",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="Mensagem"
+                    ),
+                ),
+                (
+                    "resultado",
+                    models.JSONField(blank=True, null=True, verbose_name="Resultado"),
+                ),
+                (
+                    "arquivo",
+                    models.FileField(
+                        blank=True,
+                        upload_to="processamentos/%Y/%m/",
+                        verbose_name="Arquivo",
+                    ),
+                ),
+                ("erro", models.TextField(blank=True, verbose_name="Erro")),
+                (
+                    "cancelamento_solicitado",
+                    models.BooleanField(
+                        default=False, verbose_name="Cancelamento Solicitado"
+                    ),
+                ),
+                (
+                    "worker",
+                    models.CharField(blank=True, max_length=100, verbose_name="Worker"),
+                ),
+                (
+                    "criado_em",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Criado em"),
+                ),
+                (
+                    "iniciado_em",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Iniciado em"
+                    ),
+                ),
+                (
+                    "concluido_em",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Concluído em"
+                    ),
+                ),
+                (
+                    "atualizado_em",
+                    models.DateTimeField(auto_now=True, verbose_name="Atualizado em"),
+                ),
+                (
+                    "solicitado_por",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="processamentos",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Solicitado por",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Processamento",
+                "verbose_name_plural": "Processamentos",
+                "ordering": ["-criado_em"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "criado_em"],
+                        name="core_proces_status_e04b30_idx",
+                    )
+                ],
+            },
+        ),
+    ]
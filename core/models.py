@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db import models
+from django.urls import reverse
+
+
+class Processamento(models.Model):
+    """Tarefa demorada executada fora da requisição pelo comando processar_fila."""
+
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Na fila'),
+        ('EXECUTANDO', 'Em execução'),
+        ('CONCLUIDO', 'Concluído'),
+        ('ERRO', 'Erro'),
+        ('CANCELADO', 'Cancelado'),
+    ]
+    STATUS_FINAIS = ('CONCLUIDO', 'ERRO', 'CANCELADO')
+
+    tarefa = models.CharField(max_length=100, verbose_name="Tarefa")
+    descricao = models.CharField(max_length=200, blank=True, verbose_name="Descrição")
+    parametros = models.JSONField(default=dict, blank=True, verbose_name="Parâmetros")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDENTE', verbose_name="Situação")
+    progresso = models.PositiveSmallIntegerField(default=0, verbose_name="Progresso (%)")
+    mensagem = models.CharField(max_length=255, blank=True, verbose_name="Mensagem")
+    resultado = models.JSONField(null=True, blank=True, verbose_name="Resultado")
+    arquivo = models.FileField(upload_to='processamentos/%Y/%m/', blank=True, verbose_name="Arquivo")
+    erro = models.TextField(blank=True, verbose_name="Erro")
+    cancelamento_solicitado = models.BooleanField(default=False, verbose_name="Cancelamento Solicitado")
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='processamentos',
+        verbose_name="Solicitado por",
+    )
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    criado_em = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    iniciado_em = models.DateTimeField(null=True, blank=True, verbose_name="Iniciado em")
+    concluido_em = models.DateTimeField(null=True, blank=True, verbose_name="Concluído em")
+    # Batimento do worker: atualizado a cada aviso de progresso
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Processamento"
+        verbose_name_plural = "Processamentos"
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['status', 'criado_em']),
+        ]
+
+    def __str__(self):
+        return f"{self.descricao or self.tarefa} ({self.get_status_display()})"
+
+    @property
+    def finalizado(self):
+        return self.status in self.STATUS_FINAIS
+
+    def get_absolute_url(self):
+        return reverse('processamento_detail', args=[self.pk])
@@ -0,0 +1,172 @@
+# core/perfil.py
+"""
+Perfil de SQL por requisição.
+
+O PerfilSQLMiddleware instala um execute_wrapper em todas as conexões e, ao fim
+da requisição, registra: número de consultas, tempo total de SQL, consultas
+repetidas (mesma "impressão digital", o sinal clássico de N+1) e as mais
+lentas. O resumo vai no cabeçalho X-SQL-Perfil / Server-Timing e o histórico
+recente (por processo) aparece em /debug/perf/.
+
+Nos testes, OrcamentoConsultasMixin fixa o máximo de consultas de cada view.
+"""
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+_NUMEROS = re.compile(r'\b\d+(\.\d+)?\b')
+_TEXTOS = re.compile(r"'(?:[^']|'')*'")
+_LISTAS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_ESPACOS = re.compile(r'\s+')
+
+
+def impressao_digital(sql):
+    """SQL sem os valores: consultas iguais com parâmetros diferentes caem na mesma impressão."""
+    sql = _TEXTOS.sub('?', sql)
+    sql = _NUMEROS.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _LISTAS.sub('(...)', sql)
+    return _ESPACOS.sub(' ', sql).strip()
+
+
+class ColetorConsultas:
+    """execute_wrapper que guarda (sql, duração em ms) de cada consulta."""
+
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append((sql, (time.perf_counter() - inicio) * 1000))
+
+    def resumo(self, lentas=5):
+        repeticoes = Counter(impressao_digital(sql) for sql, _ in self.consultas)
+        return {
+            'consultas': len(self.consultas),
+            'tempo_ms': round(sum(duracao for _, duracao in self.consultas), 2),
+            'duplicadas': [(sql, total) for sql, total in repeticoes.most_common() if total > 1],
+            'lentas': [
+                (sql, round(duracao, 2))
+                for sql, duracao in sorted(self.consultas, key=lambda c: c[1], reverse=True)[:lentas]
+            ],
+        }
+
+
+class HistoricoPerfil:
+    """Últimas requisições e agregado por view, em memória (por processo)."""
+
+    def __init__(self, tamanho=200):
+        self._lock = threading.Lock()
+        self.recentes = deque(maxlen=tamanho)
+        self.por_view = OrderedDict()
+
+    def registrar(self, registro):
+        with self._lock:
+            self.recentes.appendleft(registro)
+            agregado = self.por_view.setdefault(registro['view'], {
+                'view': registro['view'], 'requisicoes': 0, 'consultas': 0,
+                'max_consultas': 0, 'tempo_ms': 0.0, 'max_tempo_ms': 0.0, 'duplicadas': 0,
+            })
+            agregado['requisicoes'] += 1
+            agregado['consultas'] += registro['consultas']
+            agregado['max_consultas'] = max(agregado['max_consultas'], registro['consultas'])
+            agregado['tempo_ms'] += registro['tempo_ms']
+            agregado['max_tempo_ms'] = max(agregado['max_tempo_ms'], registro['tempo_ms'])
+            agregado['duplicadas'] += sum(total - 1 for _, total in registro['duplicadas'])
+
+    def views(self):
+        with self._lock:
+            linhas = [dict(a) for a in self.por_view.values()]
+        for linha in linhas:
+            linha['media_consultas'] = round(linha['consultas'] / linha['requisicoes'], 1)
+            linha['media_tempo_ms'] = round(linha['tempo_ms'] / linha['requisicoes'], 2)
+        return sorted(linhas, key=lambda linha: linha['media_consultas'], reverse=True)
+
+    def limpar(self):
+        with self._lock:
+            self.recentes.clear()
+            self.por_view.clear()
+
+
+historico = HistoricoPerfil(getattr(settings, 'PERFIL_SQL_HISTORICO', 200))
+
+
+class PerfilSQLMiddleware:
+    """Liga com settings.PERFIL_SQL (padrão: DEBUG)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.ativo = getattr(settings, 'PERFIL_SQL', settings.DEBUG)
+
+    def __call__(self, request):
+        if not self.ativo or request.path.startswith(settings.STATIC_URL):
+            return self.get_response(request)
+
+        coletor = ColetorConsultas()
+        with ExitStack() as pilha:
+            for conexao in connections.all(initialized_only=False):
+                pilha.enter_context(conexao.execute_wrapper(coletor))
+            response = self.get_response(request)
+
+        resumo = coletor.resumo()
+        match = getattr(request, 'resolver_match', None)
+        historico.registrar({
+            'view': (match.view_name or match._func_path) if match else request.path,
+            'metodo': request.method,
+            'caminho': request.get_full_path()[:200],
+            'status': response.status_code,
+            'momento': time.time(),
+            **resumo,
+        })
+
+        # O histórico registra todos; os cabeçalhos (que expõem o SQL da tela) só vão para staff
+        usuario = getattr(request, 'user', None)
+        if not (usuario and usuario.is_staff):
+            return response
+        response['X-SQL-Perfil'] = (
+            f"consultas={resumo['consultas']}; tempo={resumo['tempo_ms']}ms; duplicadas={len(resumo['duplicadas'])}"
+        )
+        timing = f'sql;dur={resumo["tempo_ms"]};desc="{resumo["consultas"]} consultas"'
+        response['Server-Timing'] = f"{response['Server-Timing']}, {timing}" if response.has_header('Server-Timing') else timing
+        return response
+
+
+class OrcamentoConsultasMixin:
+    """
+    Para TestCase: falha se a requisição passar do número de consultas
+    permitido, listando as repetidas (quase sempre um N+1).
+
+        self.assertOrcamentoConsultas(12, reverse('alertas_risco'))
+    """
+
+    def assertOrcamentoConsultas(self, maximo, url, metodo='get', **kwargs):
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connections['default']) as capturadas:
+            response = getattr(self.client, metodo)(url, **kwargs)
+            if hasattr(response, 'streaming_content'):
+                b''.join(response.streaming_content)
+
+        consultas = [c['sql'] for c in capturadas.captured_queries]
+        if len(consultas) > maximo:
+            repetidas = Counter(impressao_digital(sql) for sql in consultas).most_common(3)
+            detalhe = '\n'.join(f"  {total}x {sql[:300]}" for sql, total in repetidas if total > 1)
+            self.fail(
+                f"{url}: {len(consultas)} consultas, orçamento de {maximo}."
+                + (f"\nMais repetidas:\n{detalhe}" if detalhe else '')
+            )
+        return response
+
+
+# Para testes que contam consultas: com o DatabaseCache padrão cada leitura e
+# gravação do cache também é uma consulta, e o orçamento mede só o cálculo.
+CACHE_EM_MEMORIA = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'TIMEOUT': None}}
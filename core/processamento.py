@@ -0,0 +1,206 @@
+# core/processamento.py
+"""
+Fila de processamentos em segundo plano gravada no próprio banco (sem broker).
+
+- As tarefas são funções registradas com @tarefa('app.nome') em módulos
+  `tarefas.py` de cada app (carregados no AppConfig.ready do core).
+- A view/action chama enfileirar(...) e devolve o usuário para a página do
+  processamento; o comando `processar_fila` reserva e executa.
+- A função recebe uma Execucao: parâmetros, aviso de progresso (que também
+  verifica o cancelamento) e gravação do arquivo de resultado.
+"""
+import time
+import traceback
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.utils import timezone
+
+from .models import Processamento
+
+
+TAREFAS = {}
+
+# Intervalo mínimo entre gravações de progresso (segundos)
+INTERVALO_PROGRESSO = 1.0
+
+
+class ProcessamentoCancelado(Exception):
+    pass
+
+
+def tarefa(nome, descricao=''):
+    """Registra a função como tarefa de segundo plano."""
+    def registrar(funcao):
+        TAREFAS[nome] = (funcao, descricao or nome)
+        return funcao
+    return registrar
+
+
+def enfileirar(nome, parametros=None, usuario=None, descricao=''):
+    if nome not in TAREFAS:
+        raise ValueError(f"Tarefa desconhecida: {nome}")
+    return Processamento.objects.create(
+        tarefa=nome,
+        descricao=descricao or TAREFAS[nome][1],
+        parametros=parametros or {},
+        solicitado_por=usuario if usuario is not None and usuario.is_authenticated else None,
+    )
+
+
+def cancelar(processamento):
+    """Na fila: cancela na hora. Em execução: pede ao worker para parar no próximo aviso de progresso."""
+    agora = timezone.now()
+    if Processamento.objects.filter(pk=processamento.pk, status='PENDENTE').update(
+        status='CANCELADO', concluido_em=agora, atualizado_em=agora
+    ):
+        return
+    Processamento.objects.filter(pk=processamento.pk, status='EXECUTANDO').update(cancelamento_solicitado=True)
+
+
+class Execucao:
+    """
+    O que a função da tarefa enxerga do processamento.
+
+    Progresso e cancelamento usam uma conexão própria: a da tarefa pode estar no
+    meio de um iterator(), e no SQLite uma escrita nessa conexão só é confirmada
+    quando a leitura termina, segurando o lock de escrita do banco o tempo todo.
+    """
+
+    def __init__(self, processamento):
+        self.processamento = processamento
+        self._ultimo_aviso = 0.0
+        self._conexao = None
+
+    def _conexao_controle(self):
+        if connection.vendor == 'sqlite' and connection.in_atomic_block:
+            # A tarefa já segura o lock de escrita: outra conexão só ficaria esperando
+            return connection
+        if self._conexao is None:
+            self._conexao = connections.create_connection(DEFAULT_DB_ALIAS)
+        return self._conexao
+
+    def _gravar(self, **campos):
+        conexao = self._conexao_controle()
+        opts = Processamento._meta
+        colunas = ', '.join(f"{conexao.ops.quote_name(opts.get_field(nome).column)} = %s" for nome in campos)
+        valores = [opts.get_field(nome).get_db_prep_save(valor, conexao) for nome, valor in campos.items()]
+        with conexao.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {conexao.ops.quote_name(opts.db_table)} SET {colunas} WHERE {conexao.ops.quote_name(opts.pk.column)} = %s",
+                valores + [self.processamento.pk],
+            )
+
+    def fechar(self):
+        if self._conexao is not None:
+            self._conexao.close()
+            self._conexao = None
+
+    @property
+    def parametros(self):
+        return self.processamento.parametros
+
+    @property
+    def usuario(self):
+        return self.processamento.solicitado_por
+
+    def progresso(self, atual, total=None, mensagem='', forcar=False):
+        """
+        Registra o andamento (atual/total ou percentual direto) e interrompe a
+        tarefa com ProcessamentoCancelado se o usuário cancelou.
+        """
+        agora = time.monotonic()
+        if not forcar and agora - self._ultimo_aviso < INTERVALO_PROGRESSO:
+            return
+        self._ultimo_aviso = agora
+
+        percentual = int(atual * 100 / total) if total else int(atual)
+        campos = {'progresso': max(0, min(percentual, 99)), 'atualizado_em': timezone.now()}
+        if mensagem:
+            campos['mensagem'] = mensagem[:255]
+        self._gravar(**campos)
+        self.verificar_cancelamento()
+
+    def verificar_cancelamento(self):
+        conexao = self._conexao_controle()
+        opts = Processamento._meta
+        with conexao.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {conexao.ops.quote_name(opts.get_field('cancelamento_solicitado').column)} "
+                f"FROM {conexao.ops.quote_name(opts.db_table)} WHERE {conexao.ops.quote_name(opts.pk.column)} = %s",
+                [self.processamento.pk],
+            )
+            linha = cursor.fetchone()
+        if linha and linha[0]:
+            raise ProcessamentoCancelado()
+
+    def acompanhar(self, iteravel, total, mensagem=''):
+        """Repassa os itens avisando o progresso pelo caminho."""
+        for indice, item in enumerate(iteravel, start=1):
+            yield item
+            self.progresso(indice, total, mensagem)
+
+    def salvar_arquivo(self, nome, arquivo):
+        """Guarda o arquivo de resultado (objeto de arquivo aberto, posicionado no início)."""
+        self.processamento.arquivo.save(nome, File(arquivo), save=False)
+
+
+def reservar(worker):
+    """
+    Marca como EXECUTANDO o processamento pendente mais antigo e retorna o pk.
+    O UPDATE condicionado ao status garante que dois workers não peguem o mesmo.
+    """
+    pendentes = Processamento.objects.filter(status='PENDENTE').order_by('criado_em').values_list('pk', flat=True)
+    for pk in pendentes[:10]:
+        agora = timezone.now()
+        if Processamento.objects.filter(pk=pk, status='PENDENTE').update(
+            status='EXECUTANDO', worker=worker[:100], iniciado_em=agora, atualizado_em=agora
+        ):
+            return pk
+    return None
+
+
+def executar(pk):
+    """Executa um processamento já reservado (no worker ou no próprio processo)."""
+    processamento = Processamento.objects.select_related('solicitado_por').get(pk=pk)
+    execucao = Execucao(processamento)
+    campos = {}
+
+    try:
+        if processamento.tarefa not in TAREFAS:
+            raise ValueError(f"Tarefa desconhecida: {processamento.tarefa}")
+        funcao, _ = TAREFAS[processamento.tarefa]
+        resultado = funcao(execucao)
+    except ProcessamentoCancelado:
+        campos.update(status='CANCELADO', mensagem='Cancelado pelo usuário.')
+    except Exception:
+        campos.update(status='ERRO', erro=traceback.format_exc())
+    else:
+        campos.update(status='CONCLUIDO', progresso=100, resultado=resultado)
+        if processamento.arquivo:
+            campos['arquivo'] = processamento.arquivo.name
+    finally:
+        execucao.fechar()
+
+    agora = timezone.now()
+    Processamento.objects.filter(pk=pk).update(concluido_em=agora, atualizado_em=agora, **campos)
+    return campos['status']
+
+
+def recuperar_orfaos(minutos=30):
+    """Processamentos 'em execução' sem sinal de vida (worker morto) viram erro."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return Processamento.objects.filter(status='EXECUTANDO', atualizado_em__lt=limite).update(
+        status='ERRO',
+        erro='Interrompido: o worker parou antes de concluir.',
+        concluido_em=timezone.now(),
+    )
+
+
+def marcar_erro(pk, mensagem):
+    """Usado pelo worker quando o processo filho morre sem gravar o desfecho."""
+    agora = timezone.now()
+    Processamento.objects.filter(pk=pk, status='EXECUTANDO').update(
+        status='ERRO', erro=mensagem, concluido_em=agora, atualizado_em=agora
+    )
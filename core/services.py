@@ -1,19 +1,17 @@
 # core/services.py
-from django.db.models import Sum
+from django.db.models import Count, Sum
 from django.utils import timezone
 from datetime import timedelta
 
 from infraestrutura.models import Pasto
-from manejo.models import Reproducao
-from manejo.services import ReproducaoService
+from manejo.services import PrevisaoPartoService, ReproducaoService
 from rebanho.models import Animal, BaixaAnimal
-from datetime import date
 
 class ZootecnicoService:
     @staticmethod
     def obter_alertas_desmame(meses_min=6, meses_max=8):
         """Retorna animais em idade de desmame calculando via banco/datas."""
-        today = date.today()
+        today = timezone.localdate()
         # Calcula as datas limite em dias (30.4 dias/mês)
         data_min = today - timedelta(days=int(meses_max * 30.4))
         data_max = today - timedelta(days=int(meses_min * 30.4))
@@ -21,42 +19,51 @@ class ZootecnicoService:
         animais = Animal.objects.filter(
             situacao='VIVO',
             data_nascimento__range=(data_min, data_max)
-        )
+        ).com_idade_meses(today)
 
-        return [
-            {
-                'pk': animal.pk,
-                'identificacao': animal.identificacao,
-                'idade_meses': animal.idade_em_meses,
-                'data_nascimento': animal.data_nascimento
-            }
-            for animal in animais
-        ]
+        return list(animais.values('pk', 'identificacao', 'idade_meses', 'data_nascimento'))
 
     @staticmethod
     def obter_alertas_paricao(dias_ahead=30):
-        """Retorna matrizes com previsão de parto nos próximos N dias."""
-        today = date.today()
-        data_limite = today + timedelta(days=dias_ahead)
-
-        alertas_paricao = Reproducao.objects.filter(
-            bezerro__isnull=True,
-            data_parto_prevista__gte=today,
-            data_parto_prevista__lte=data_limite
-        ).select_related('matriz').order_by('data_parto_prevista')
-
+        """Retorna matrizes prenhes com previsão de parto nos próximos N dias."""
         return [
             {
-                # Troque reprod.animal por reprod.matriz:
                 'pk': reprod.pk,
-                'matriz': reprod.matriz.identificacao if reprod.matriz else "N/A",
+                'id': reprod.pk,
+                'matriz': reprod.matriz.identificacao,
                 'dpp': reprod.data_parto_prevista,
                 'dias_restantes': reprod.dias_para_parir(),
-                'link_animal': reprod.matriz.get_absolute_url() if reprod.matriz and hasattr(reprod.matriz, 'get_absolute_url') else '#',
+                'link_animal': reprod.matriz.get_absolute_url(),
             }
-            for reprod in alertas_paricao
+            for reprod in PrevisaoPartoService.pendentes(dias_ahead)
         ]
 
+    @staticmethod
+    def obter_prenhez():
+        """
+        Prenhezes da última estação sobre as matrizes ativas (fêmeas vivas com 2 anos
+        ou mais): {'prenhezes', 'total_matrizes', 'taxa_prenhez'}.
+        """
+        # 1. Pegamos os dados da estação (prenhezes confirmadas)
+        indice_reproducao = ReproducaoService.obter_dados_estacao(timezone.localdate().year - 1)
+        prenhezes = indice_reproducao['prenhezes']
+
+        # 2. Buscamos o total de matrizes (fêmeas ativas) que poderiam ter emprenhado
+        # Filtramos por sexo 'F' e status 'Ativo'
+        # Usamos 426 dias como aproximação de 14 meses (14 * 30.4)
+        # Exemplo: Apenas fêmeas ativas com mais de 2 anos (730 dias)
+        data_limite_14_meses = timezone.now().date() - timedelta(days=730)
+        total_matrizes_ativas = Animal.objects.filter(
+            sexo='F', 
+            situacao='VIVO', 
+            data_nascimento__lte=data_limite_14_meses
+        ).count()
+
+        # 3. Cálculo da Taxa de Prenhez sobre o rebanho vivo
+        # A fórmula é: (Prenhezes / Matrizes Ativas) * 100
+        taxa_prenhez = (prenhezes / total_matrizes_ativas * 100) if total_matrizes_ativas > 0 else 0
+        return {'prenhezes': prenhezes, 'total_matrizes': total_matrizes_ativas, 'taxa_prenhez': round(taxa_prenhez, 1)}
+
     @staticmethod
     def obter_indicadores_performance():
         hoje = timezone.localdate()
@@ -78,49 +85,22 @@ class ZootecnicoService:
         taxa_mortalidade = (mortes_ano / total_vivos * 100) if total_vivos > 0 else 0
 
         # 3. Eficiência Reprodutiva
-        # 1. Pegamos os dados da estação (prenhezes confirmadas)
-        indice_reproducao = ReproducaoService.obter_dados_estacao(ano_atual - 1)
-        prenhezes = indice_reproducao['prenhezes']
-
-        # 2. Buscamos o total de matrizes (fêmeas ativas) que poderiam ter emprenhado
-        # Filtramos por sexo 'F' e status 'Ativo'
-        # Usamos 426 dias como aproximação de 14 meses (14 * 30.4)
-        # Exemplo: Apenas fêmeas ativas com mais de 2 anos (730 dias)
-        data_limite_14_meses = timezone.now().date() - timedelta(days=730)
-        total_matrizes_ativas = Animal.objects.filter(
-            sexo='F', 
-            situacao='VIVO', 
-            data_nascimento__lte=data_limite_14_meses
-        ).count()
-
-        # 3. Cálculo da Taxa de Prenhez sobre o rebanho vivo
-        # A fórmula é: (Prenhezes / Matrizes Ativas) * 100
-        taxa_prenhez = (prenhezes / total_matrizes_ativas * 100) if total_matrizes_ativas > 0 else 0
+        prenhez = ZootecnicoService.obter_prenhez()
 
         
 
         # --- CATEGORIZAÇÃO ETÁRIA ---
-        # Inicializamos os contadores
-        bezerros = 0  # 0-12 meses
-        sobreanos = 0 # 13-24 meses
-        adultos = 0   # > 24 meses
-
-        for animal in animais_ativos:
-            # Assumindo que idade_em_meses é uma property ou campo do model Animal
-            meses = animal.idade_em_meses 
-            if meses <= 12: 
-                bezerros += 1
-            elif meses <= 24: 
-                sobreanos += 1
-            else: 
-                adultos += 1
+        # Bezerros: 0-12 meses, sobreanos: 13-24 meses, adultos: > 24 meses
+        composicao = dict(
+            animais_ativos.com_categoria(hoje).order_by().values('categoria')
+            .annotate(total=Count('pk')).values_list('categoria', 'total')
+        )
 
         # --- CÁLCULO DE LOTAÇÃO ---
         area_total_ha = Pasto.objects.aggregate(total_area=Sum('area_hectares'))['total_area'] or 0
         area_float = float(area_total_ha)
         
-        # IMPORTANTE: ua_atual deve ser uma @property (sem parênteses na chamada)
-        total_ua = sum(a.ua_atual for a in animais_ativos) or 1
+        total_ua = animais_ativos.com_ua(hoje).aggregate(total=Sum('ua'))['total'] or 1
 
         lotacao_cabecas_ha = (total_vivos / area_float) if area_float > 0 else 0
         from decimal import Decimal
@@ -138,14 +118,14 @@ class ZootecnicoService:
             'ano_atual': ano_atual,
             'taxa_natalidade': round(taxa_natalidade, 1),
             'taxa_mortalidade': round(taxa_mortalidade, 1),
-            'taxa_prenhez': round(taxa_prenhez, 1),
+            'taxa_prenhez': prenhez['taxa_prenhez'],
             'nascimentos_ano': nascimentos_ano,
             'mortes_ano': mortes_ano,
-            'comp_bezerros': bezerros,
-            'comp_sobreanos': sobreanos,
-            'comp_adultos': adultos,
+            'comp_bezerros': composicao.get('BEZERRO', 0),
+            'comp_sobreanos': composicao.get('SOBREANO', 0),
+            'comp_adultos': composicao.get('ADULTO', 0),
             'total_vivos': total_vivos,
 
-            'total_matrizes': total_matrizes_ativas,
-            'prenhezes': prenhezes,
+            'total_matrizes': prenhez['total_matrizes'],
+            'prenhezes': prenhez['prenhezes'],
         }
\ No newline at end of file
@@ -0,0 +1,26 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from financeiro.models import Venda
+from manejo.models import Reproducao
+from rebanho.models import Animal, BaixaAnimal
+
+from .dashboard import invalidar_dashboard
+from .sqlite import configurar_conexao
+
+
+@receiver(connection_created)
+def ajustar_conexao_sqlite(sender, connection, **kwargs):
+    # WAL, cache, mmap etc. (apenas quando o banco for SQLite em arquivo)
+    configurar_conexao(connection)
+
+
+@receiver([post_save, post_delete], sender=Animal)
+@receiver([post_save, post_delete], sender=Venda)
+@receiver([post_save, post_delete], sender=BaixaAnimal)
+@receiver([post_save, post_delete], sender=Reproducao)
+def atualizar_dashboard(sender, raw=False, **kwargs):
+    # Cadastros pelas telas aparecem na hora; cargas em lote esperam o TTL dos blocos
+    if not raw:
+        invalidar_dashboard()
@@ -0,0 +1,494 @@
+# core/simulacao.py
+"""
+Fazenda sintética para testes de carga e benchmarks (comando gerar_fazenda).
+
+Gera de forma reprodutível (mesma semente, mesmos dados) um rebanho com
+genealogia, estações de monta, pesagens, movimentações de pasto, tratamentos,
+vendas, mortes, custos alocados por pasto e despesas gerais. Tudo entra por
+bulk_create em blocos, uma geração (estação de monta) por vez, para que
+1 milhão de linhas carregue em minutos sem manter o histórico todo em memória.
+"""
+import math
+import random
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from financeiro.models import CategoriaDespesa, CustoAnimalDetalhe, Despesa, RegistroDeCusto, TipoCusto, Venda
+from infraestrutura.models import MovimentacaoPasto, Pasto
+from manejo.models import Pesagem, Reproducao, TratamentoSaude
+from rebanho.models import Animal, BaixaAnimal, Lote
+
+
+TAMANHO_BLOCO = 5000
+
+PESO_NASCIMENTO = 32
+# Curva de Brody: peso adulto (kg) e taxa de maturação (por dia)
+CURVA_CRESCIMENTO = {'F': (480, 0.0022), 'M': (620, 0.0021)}
+PRECO_KG = Decimal('10.50')
+CUSTO_CABECA_TRIMESTRE = Decimal('45.00')
+MORTALIDADE_ANUAL = 0.02
+TAXA_PRENHEZ = 0.8
+
+COMPRADORES = ['Frigorífico Bacuri', 'Frigorífico Mearim', 'Leilão Regional', 'Fazenda Vizinha', 'Confinamento Boa Vista']
+PRODUTOS_VACINA = ['Febre Aftosa', 'Brucelose', 'Clostridiose']
+DESPESAS_MENSAIS = [
+    # (categoria, tipo, valor por cabeça por mês)
+    ('Mão de Obra', 'FIXA', Decimal('6.00')),
+    ('Energia e Combustível', 'VARIAVEL', Decimal('1.80')),
+    ('Manutenção de Cercas', 'VARIAVEL', Decimal('0.90')),
+]
+
+
+def inserir_com_heranca(objs, tamanho=TAMANHO_BLOCO):
+    """
+    bulk_create não aceita herança multi-tabela (Venda, Despesa, RegistroDeCusto):
+    grava as linhas do pai com bulk_create e as do filho com um INSERT em lote.
+    Depende do banco devolver as chaves do bulk_create (SQLite 3.35+, PostgreSQL,
+    MariaDB 10.5+); gerar_fazenda confere isso antes de começar.
+    """
+    model = type(objs[0])
+    pai = model._meta.get_parent_list()[0]
+    ponteiro = model._meta.parents[pai]
+
+    campos_pai = [f for f in pai._meta.concrete_fields if not f.primary_key]
+    registros = pai.objects.bulk_create(
+        [pai(**{f.attname: getattr(obj, f.attname) for f in campos_pai}) for obj in objs],
+        batch_size=tamanho,
+    )
+    for obj, registro in zip(objs, registros):
+        setattr(obj, ponteiro.attname, registro.pk)
+        setattr(obj, pai._meta.pk.attname, registro.pk)
+
+    campos = model._meta.local_concrete_fields
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(f.column) for f in campos),
+        ', '.join(['%s'] * len(campos)),
+    )
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(objs), tamanho):
+            cursor.executemany(sql, [
+                [f.get_db_prep_save(getattr(obj, f.attname), connection) for f in campos]
+                for obj in objs[inicio:inicio + tamanho]
+            ])
+    return objs
+
+
+class _Gravador:
+    """Acumula objetos por model e grava em blocos."""
+
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self.pendentes = defaultdict(list)
+        self.contagem = Counter()
+
+    def adicionar(self, obj):
+        pendentes = self.pendentes[type(obj)]
+        pendentes.append(obj)
+        if len(pendentes) >= self.tamanho:
+            self.gravar(type(obj))
+
+    def gravar(self, model):
+        objs = self.pendentes.pop(model, [])
+        if not objs:
+            return
+        if model._meta.parents:
+            inserir_com_heranca(objs, self.tamanho)
+        else:
+            model.objects.bulk_create(objs, batch_size=self.tamanho)
+        self.contagem[model._meta.verbose_name_plural] += len(objs)
+
+    def gravar_tudo(self):
+        for model in list(self.pendentes):
+            self.gravar(model)
+
+
+class _Plano:
+    """Vida de um animal calculada antes da gravação (o id só existe depois)."""
+
+    def __init__(self, animal, papel):
+        self.animal = animal
+        self.papel = papel  # MATRIZ, TOURO ou CRIA
+        self.saida = None
+        self.motivo_saida = None  # VENDA ou MORTE
+        self.pesagens = []
+        self.movimentos = []
+        self.tratamentos = []
+
+    @property
+    def nascimento(self):
+        return self.animal.data_nascimento
+
+    def ativo_em(self, data):
+        return self.nascimento <= data and (self.saida is None or self.saida > data)
+
+    def pasto_em(self, data):
+        pasto_id = None
+        for entrada, destino in self.movimentos:
+            if entrada > data:
+                break
+            pasto_id = destino
+        return pasto_id
+
+
+class GeradorFazenda:
+
+    def __init__(self, animais=10000, anos=6, prefixo='S', semente=42, hoje=None,
+                 tamanho_bloco=TAMANHO_BLOCO, log=None):
+        self.total_animais = animais
+        self.anos = anos
+        self.prefixo = prefixo
+        self.random = random.Random(semente)
+        self.hoje = hoje or timezone.localdate()
+        self.inicio = date(self.hoje.year - anos, 1, 1)
+        self.gravador = _Gravador(tamanho_bloco)
+        self.log = log or (lambda mensagem: None)
+
+        self.sequencia = 0
+        self.matrizes = []
+        self.touros = []
+        # (pasto_id, início do trimestre) -> ids dos animais presentes
+        self.custos = defaultdict(list)
+        # Cabeças em 1º de janeiro de cada ano (base das despesas gerais)
+        self.cabecas = Counter()
+
+    # ------------------------------------------------------------------
+    # Entrada
+    # ------------------------------------------------------------------
+    def gerar(self):
+        """Gera a fazenda inteira em uma transação. Retorna {model: linhas}."""
+        with transaction.atomic():
+            self._cadastros()
+            self._fundadores()
+            for ano in range(self.inicio.year - 1, self.hoje.year + 1):
+                if date(ano, 10, 1) > self.hoje:
+                    break
+                self._estacao_monta(ano)
+            self._custos()
+            self._despesas()
+            self.gravador.gravar_tudo()
+        return dict(self.gravador.contagem)
+
+    # ------------------------------------------------------------------
+    # Cadastros básicos
+    # ------------------------------------------------------------------
+    def _cadastros(self):
+        quantidade_pastos = max(4, self.total_animais // 60)
+        pastos = Pasto.objects.bulk_create([
+            Pasto(
+                nome=f"{self.prefixo} Pasto {numero:04d}",
+                area_hectares=Decimal(self.random.randint(20, 90)),
+                tipo_capim=self.random.choice(['Brachiaria brizantha', 'Panicum maximum', 'Andropogon']),
+                capacidade_maxima_ua=Decimal(self.random.randint(40, 120)),
+            )
+            for numero in range(1, quantidade_pastos + 1)
+        ])
+        self.pastos = [pasto.pk for pasto in pastos]
+        self.gravador.contagem[Pasto._meta.verbose_name_plural] += len(pastos)
+
+        finalidades = ['MATRIZES'] * max(1, quantidade_pastos // 8) + ['BEZERROS', 'RECRIA', 'TOUROS']
+        lotes = Lote.objects.bulk_create([
+            Lote(nome=f"{self.prefixo} {finalidade.title()} {numero}", finalidade=finalidade,
+                 pasto_atual_id=self.random.choice(self.pastos))
+            for numero, finalidade in enumerate(finalidades, start=1)
+        ])
+        self.lotes = defaultdict(list)
+        for lote in lotes:
+            self.lotes[lote.finalidade].append(lote.pk)
+
+        self.tipo_custo = TipoCusto.objects.get_or_create(nome='Suplementação Mineral')[0]
+        self.categorias_despesa = {
+            nome: CategoriaDespesa.objects.get_or_create(nome=nome)[0]
+            for nome, _, _ in DESPESAS_MENSAIS
+        }
+
+    # ------------------------------------------------------------------
+    # Animais
+    # ------------------------------------------------------------------
+    def _novo_animal(self, sexo, nascimento, papel, mae=None, pai=None):
+        self.sequencia += 1
+        animal = Animal(
+            identificacao=f"{self.prefixo}{self.sequencia:07d}",
+            data_nascimento=nascimento,
+            sexo=sexo,
+            mae_id=mae,
+            pai_id=pai,
+        )
+        plano = _Plano(animal, papel)
+        self._planejar_saida(plano)
+        self._planejar_historico(plano)
+        return plano
+
+    def _planejar_saida(self, plano):
+        nascimento = plano.nascimento
+        inicio = max(nascimento, self.inicio)
+
+        morte = inicio + timedelta(days=int(self.random.expovariate(MORTALIDADE_ANUAL / 365)) + 1)
+        if plano.papel == 'MATRIZ':
+            idade_venda = self.random.randint(8 * 365, 11 * 365)
+        elif plano.papel == 'TOURO':
+            idade_venda = self.random.randint(7 * 365, 10 * 365)
+        elif plano.animal.sexo == 'M':
+            idade_venda = self.random.randint(540, 900)
+        else:
+            idade_venda = self.random.randint(365, 700)
+        venda = nascimento + timedelta(days=idade_venda)
+        if venda <= inicio:
+            venda = inicio + timedelta(days=self.random.randint(30, 1500))
+
+        saida, motivo = (morte, 'MORTE') if morte < venda else (venda, 'VENDA')
+        if saida <= self.hoje:
+            plano.saida, plano.motivo_saida = saida, motivo
+
+    def _datas(self, inicio, fim, intervalo, variacao):
+        data = inicio
+        while data < fim:
+            yield data
+            data += timedelta(days=intervalo + self.random.randint(-variacao, variacao))
+
+    def _peso(self, plano, data):
+        adulto, taxa = CURVA_CRESCIMENTO[plano.animal.sexo]
+        idade = (data - plano.nascimento).days
+        peso = adulto - (adulto - PESO_NASCIMENTO) * math.exp(-taxa * idade)
+        return Decimal(peso * self.random.uniform(0.97, 1.03)).quantize(Decimal('0.01'))
+
+    def _planejar_historico(self, plano):
+        animal = plano.animal
+        inicio = max(plano.nascimento, self.inicio)
+        fim = plano.saida or self.hoje
+
+        # Movimentações de pasto a cada 4-8 meses
+        for data in self._datas(inicio, fim, 180, 60):
+            plano.movimentos.append((data, self.random.choice(self.pastos)))
+        if not plano.movimentos:
+            plano.movimentos.append((inicio, self.random.choice(self.pastos)))
+
+        # Pesagens trimestrais (nascimento, desmama aos ~7 meses e a de venda)
+        desmama = plano.nascimento + timedelta(days=210)
+        datas = {data: 'Pesagem trimestral' for data in self._datas(inicio, fim, 90, 20)}
+        if plano.nascimento >= self.inicio:
+            datas[plano.nascimento] = 'Nascimento'
+        if inicio <= desmama < fim:
+            datas[desmama] = 'Desmama'
+        if plano.motivo_saida == 'VENDA':
+            datas[plano.saida] = 'Venda'
+        plano.pesagens = [(data, self._peso(plano, data), evento) for data, evento in sorted(datas.items())]
+
+        # Vacinação semestral e vermifugação anual
+        for data in self._datas(inicio + timedelta(days=30), fim, 182, 10):
+            plano.tratamentos.append((data, 'VAC', self.random.choice(PRODUTOS_VACINA), '5 ml'))
+        for data in self._datas(inicio + timedelta(days=60), fim, 365, 15):
+            plano.tratamentos.append((data, 'VERM', 'Ivermectina 1%', '1 ml/50 kg'))
+
+        # Situação atual
+        if plano.motivo_saida == 'VENDA':
+            animal.situacao = 'VENDIDO'
+        elif plano.motivo_saida == 'MORTE':
+            animal.situacao = 'MORTO'
+        else:
+            animal.situacao = 'VIVO'
+            animal.pasto_atual_id = plano.movimentos[-1][1]
+            animal.lote_atual_id = self.random.choice(self.lotes[self._finalidade(plano)])
+        if plano.pesagens:
+            animal.data_ultima_pesagem, animal.peso_atual, _ = plano.pesagens[-1]
+
+    def _finalidade(self, plano):
+        if plano.papel == 'MATRIZ':
+            return 'MATRIZES'
+        if plano.papel == 'TOURO':
+            return 'TOUROS'
+        return 'BEZERROS' if (self.hoje - plano.nascimento).days < 240 else 'RECRIA'
+
+    def _gravar_animais(self, planos):
+        """Grava a geração (a genealogia é atualizada pelo bulk_create) e o histórico de cada animal."""
+        Animal.objects.bulk_create([plano.animal for plano in planos], batch_size=self.gravador.tamanho)
+        self.gravador.contagem[Animal._meta.verbose_name_plural] += len(planos)
+
+        for plano in planos:
+            animal_id = plano.animal.pk
+            fim = plano.saida or self.hoje
+
+            for indice, (entrada, destino) in enumerate(plano.movimentos):
+                proxima = plano.movimentos[indice + 1][0] if indice + 1 < len(plano.movimentos) else plano.saida
+                self.gravador.adicionar(MovimentacaoPasto(
+                    animal_id=animal_id,
+                    pasto_origem_id=plano.movimentos[indice - 1][1] if indice else None,
+                    pasto_destino_id=destino,
+                    data_entrada=entrada,
+                    data_saida=proxima,
+                    motivo='Rodízio de pastagem' if indice else 'Entrada no rebanho',
+                ))
+
+            for data, peso, evento in plano.pesagens:
+                self.gravador.adicionar(Pesagem(animal_id=animal_id, data_pesagem=data, peso_kg=peso, evento=evento))
+
+            tratamentos = [
+                TratamentoSaude(animal_id=animal_id, data_tratamento=data, tipo_tratamento=tipo, produto=produto, dose=dose)
+                for data, tipo, produto, dose in plano.tratamentos
+            ]
+            if plano.saida is None:
+                # Animais vivos ficam com o próximo reforço agendado
+                ultimos = {tratamento.tipo_tratamento: tratamento for tratamento in tratamentos}
+                for tipo, tratamento in ultimos.items():
+                    intervalo = 182 if tipo == 'VAC' else 365
+                    tratamento.data_proximo_tratamento = tratamento.data_tratamento + timedelta(days=intervalo)
+            for tratamento in tratamentos:
+                self.gravador.adicionar(tratamento)
+
+            # Custo de suplementação rateado pelo pasto em que o animal estava no início do trimestre
+            trimestre = date(max(plano.nascimento, self.inicio).year, 1, 1)
+            while trimestre < fim:
+                if plano.ativo_em(trimestre) and trimestre >= self.inicio:
+                    if trimestre.month == 1:
+                        self.cabecas[trimestre.year] += 1
+                    pasto_id = plano.pasto_em(trimestre)
+                    if pasto_id:
+                        self.custos[(pasto_id, trimestre)].append(animal_id)
+                trimestre = date(trimestre.year + (trimestre.month == 10), (trimestre.month + 2) % 12 + 1, 1)
+
+            if plano.motivo_saida == 'VENDA':
+                peso = plano.pesagens[-1][1]
+                self.gravador.adicionar(Venda(
+                    animal_id=animal_id,
+                    data_entrada=plano.saida,
+                    descricao=f"Venda de {plano.animal.identificacao}",
+                    valor_total=(peso * PRECO_KG).quantize(Decimal('0.01')),
+                    peso_venda=peso,
+                    origem_pagador=self.random.choice(COMPRADORES),
+                    tipo_entrada='VENDA_ANIMAL',
+                ))
+            elif plano.motivo_saida == 'MORTE':
+                self.gravador.adicionar(BaixaAnimal(
+                    animal_id=animal_id,
+                    data_baixa=plano.saida,
+                    causa=self.random.choice(['DOENCA', 'ACIDENTE', 'PREDACAO', 'OUTRO']),
+                ))
+
+            if plano.papel == 'MATRIZ':
+                self.matrizes.append(plano)
+            elif plano.papel == 'TOURO':
+                self.touros.append(plano)
+
+    def _fundadores(self):
+        quantidade = max(10, self.total_animais // 4)
+        touros = max(2, quantidade // 25)
+        planos = []
+        for numero in range(quantidade):
+            if numero < touros:
+                idade = self.random.randint(3 * 365, 6 * 365)
+                planos.append(self._novo_animal('M', self.inicio - timedelta(days=idade), 'TOURO'))
+            else:
+                idade = self.random.randint(2 * 365, 8 * 365)
+                planos.append(self._novo_animal('F', self.inicio - timedelta(days=idade), 'MATRIZ'))
+        self._gravar_animais(planos)
+        self.log(f"Fundadores: {len(planos)} animais")
+
+    # ------------------------------------------------------------------
+    # Reprodução
+    # ------------------------------------------------------------------
+    def _estacao_monta(self, ano):
+        """Estação de outubro/ano a março/ano+1: coberturas, DG e os bezerros que já nasceram."""
+        inicio_estacao = date(ano, 10, 1)
+        restantes = self.total_animais - self.sequencia
+        # Os bezerros da estação nascem no ano seguinte
+        estacoes_restantes = max(1, self.hoje.year - ano)
+        cota = math.ceil(restantes / estacoes_restantes) if restantes > 0 else 0
+
+        aptas = [
+            plano for plano in self.matrizes
+            if plano.ativo_em(inicio_estacao) and (inicio_estacao - plano.nascimento).days >= 730
+        ]
+        self.random.shuffle(aptas)
+
+        coberturas = []
+        crias = []
+        for matriz in aptas:
+            data_cio = inicio_estacao + timedelta(days=self.random.randint(0, 150))
+            if data_cio > self.hoje or not matriz.ativo_em(data_cio):
+                continue
+            touros = [touro for touro in self.touros if touro.ativo_em(data_cio)]
+            if not touros:
+                continue
+            touro = self.random.choice(touros)
+            data_dg = data_cio + timedelta(days=self.random.randint(35, 60))
+            prenhe = self.random.random() < TAXA_PRENHEZ
+            data_parto = Reproducao.calcular_data_parto_prevista(data_cio)
+
+            reproducao = Reproducao(
+                matriz_id=matriz.animal.pk,
+                data_cio=data_cio,
+                tipo=self.random.choice(['IA', 'IATF', 'MONTA']),
+                touro_id=touro.animal.pk,
+                escore=Decimal(self.random.choice(['2.5', '3.0', '3.5', '4.0'])),
+            )
+            if data_dg <= self.hoje:
+                reproducao.data_dg = data_dg
+                reproducao.resultado = 'P' if prenhe else 'V'
+            coberturas.append(reproducao)
+
+            if prenhe and data_parto <= self.hoje and matriz.ativo_em(data_parto) and len(crias) < cota:
+                sexo = self.random.choice('MF')
+                if sexo == 'F':
+                    papel = 'MATRIZ' if self.random.random() < 0.6 else 'CRIA'
+                else:
+                    papel = 'TOURO' if self.random.random() < 0.03 else 'CRIA'
+                cria = self._novo_animal(sexo, data_parto, papel, mae=matriz.animal.pk, pai=touro.animal.pk)
+                crias.append((reproducao, cria))
+
+        if crias:
+            self._gravar_animais([cria for _, cria in crias])
+            for reproducao, cria in crias:
+                reproducao.bezerro_id = cria.animal.pk
+
+        for reproducao in coberturas:
+            self.gravador.adicionar(reproducao)
+        self.gravador.gravar(Reproducao)
+        self.log(f"Estação {ano}/{ano + 1}: {len(coberturas)} coberturas, {len(crias)} nascimentos")
+
+    # ------------------------------------------------------------------
+    # Financeiro
+    # ------------------------------------------------------------------
+    def _custos(self):
+        """Um RegistroDeCusto por pasto e trimestre, rateado entre os animais presentes."""
+        chaves = sorted(self.custos)
+        for inicio in range(0, len(chaves), self.gravador.tamanho):
+            bloco = chaves[inicio:inicio + self.gravador.tamanho]
+            registros = inserir_com_heranca([
+                RegistroDeCusto(
+                    descricao=f"Suplementação mineral {trimestre:%m/%Y}",
+                    data_pagamento=trimestre,
+                    valor_total=CUSTO_CABECA_TRIMESTRE * len(self.custos[(pasto_id, trimestre)]),
+                    tipo_saida='REGISTRO_CUSTO',
+                    tipo_custo_id=self.tipo_custo.pk,
+                    pasto_id=pasto_id,
+                    quantidade=len(self.custos[(pasto_id, trimestre)]),
+                )
+                for pasto_id, trimestre in bloco
+            ], self.gravador.tamanho)
+            self.gravador.contagem[RegistroDeCusto._meta.verbose_name_plural] += len(registros)
+
+            for chave, registro in zip(bloco, registros):
+                for animal_id in self.custos.pop(chave):
+                    self.gravador.adicionar(CustoAnimalDetalhe(
+                        registro_de_custo_id=registro.pk, animal_id=animal_id, valor_alocado=CUSTO_CABECA_TRIMESTRE,
+                    ))
+        self.gravador.gravar(CustoAnimalDetalhe)
+
+    def _despesas(self):
+        mes = self.inicio
+        while mes <= self.hoje:
+            cabecas = self.cabecas[mes.year]
+            for nome, tipo, valor in DESPESAS_MENSAIS:
+                self.gravador.adicionar(Despesa(
+                    descricao=f"{nome} {mes:%m/%Y}",
+                    data_pagamento=mes + timedelta(days=self.random.randint(0, 9)),
+                    valor_total=(valor * max(cabecas, 1) * Decimal(self.random.uniform(0.9, 1.1))).quantize(Decimal('0.01')),
+                    tipo_saida='DESPESA_GERAL',
+                    categoria_id=self.categorias_despesa[nome].pk,
+                    tipo=tipo,
+                ))
+            mes = date(mes.year + (mes.month == 12), mes.month % 12 + 1, 1)
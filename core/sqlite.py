@@ -0,0 +1,63 @@
+# core/sqlite.py
+"""
+Ajustes de desempenho para instalações que rodam no SQLite (db.sqlite3).
+
+As PRAGMAs são lidas de settings.SQLITE_PRAGMAS e aplicadas em toda conexão
+nova (ver core/signals.py). A espera pelo lock (busy_timeout) fica só no
+OPTIONS['timeout'] de DATABASES, que o sqlite3 já aplica ao conectar. O PRAGMA optimize roda no máximo uma vez a cada
+settings.SQLITE_OPTIMIZE_INTERVALO segundos por processo.
+"""
+import time
+
+from django.conf import settings
+
+
+# Ordem importa: journal_mode precisa vir antes de synchronous para o WAL
+# assumir o modo NORMAL corretamente.
+ORDEM_PRAGMAS = ['journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store']
+
+_ultimo_optimize = 0.0
+
+
+def banco_em_memoria(connection):
+    """Bancos em memória (ex: testes) não suportam WAL nem mmap."""
+    nome = str(connection.settings_dict.get('NAME') or '')
+    return nome in ('', ':memory:') or 'mode=memory' in nome
+
+
+def aplicar_pragmas(cursor, pragmas):
+    """Executa as PRAGMAs informadas em um cursor DB-API do sqlite3."""
+    for nome in ORDEM_PRAGMAS:
+        valor = pragmas.get(nome)
+        if valor is None or valor == '':
+            continue
+        cursor.execute(f"PRAGMA {nome} = {valor}")
+
+
+def otimizar(cursor, forcar=False):
+    """
+    Roda o PRAGMA optimize respeitando o intervalo configurado.
+    Retorna True se a otimização foi executada.
+    """
+    global _ultimo_optimize
+    intervalo = getattr(settings, 'SQLITE_OPTIMIZE_INTERVALO', 3600)
+    agora = time.monotonic()
+
+    if not forcar and (intervalo is None or intervalo <= 0 or agora - _ultimo_optimize < intervalo):
+        return False
+
+    cursor.execute("PRAGMA optimize")
+    _ultimo_optimize = agora
+    return True
+
+
+def configurar_conexao(connection):
+    """Aplica as PRAGMAs de settings a uma conexão Django do SQLite."""
+    if connection.vendor != 'sqlite' or banco_em_memoria(connection):
+        return
+
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        aplicar_pragmas(cursor, pragmas)
+        # Na primeira conexão do processo o optimize também roda (o relógio começa em zero)
+        otimizar(cursor)
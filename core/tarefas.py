@@ -0,0 +1,44 @@
+# core/tarefas.py
+"""Tarefas de segundo plano do core (ver core/processamento.py)."""
+import tempfile
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .exportacao import ExportacaoMixin, escrever_csv, escrever_xlsx, linhas_exportacao
+from .processamento import tarefa
+
+
+@tarefa('core.exportar_lista', 'Exportação de lista')
+def exportar_lista(execucao):
+    """Refaz o get_queryset() da ListView com os filtros da tela e grava o arquivo."""
+    parametros = execucao.parametros
+    visao = import_string(parametros['visao'])
+    if not issubclass(visao, ExportacaoMixin):
+        raise ValueError(f"{parametros['visao']} não é uma lista exportável.")
+
+    request = HttpRequest()
+    request.method = 'GET'
+    request.GET = QueryDict(parametros.get('filtros', ''))
+    request.user = execucao.usuario or AnonymousUser()
+    view = visao()
+    view.setup(request)
+    queryset = view.get_queryset()
+
+    total = queryset.count()
+    cabecalho, linhas = linhas_exportacao(queryset, view.colunas_exportacao)
+    linhas = execucao.acompanhar(linhas, total, mensagem='Gerando arquivo...')
+
+    formato = parametros.get('formato', 'csv')
+    nome = f"{view.nome_arquivo_exportacao}_{timezone.localdate():%Y-%m-%d}.{formato}"
+    with tempfile.TemporaryFile() as arquivo:
+        if formato == 'xlsx':
+            escrever_xlsx(arquivo, cabecalho, linhas, titulo=str(visao.model._meta.verbose_name_plural))
+        else:
+            escrever_csv(arquivo, cabecalho, linhas)
+        arquivo.seek(0)
+        execucao.salvar_arquivo(nome, arquivo)
+
+    return {'linhas': total}
@@ -1,3 +1,498 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from financeiro.models import CustoAnimalDetalhe, FluxoSaida, RegistroDeCusto, TipoCusto, Venda
+from infraestrutura.models import MovimentacaoPasto, Pasto
+from manejo.models import IndiceReprodutivo, Pesagem, Reproducao, TratamentoSaude
+from manejo.services import EstacaoMontaService
+from rebanho.models import Animal, AvaliacaoGenetica, BaixaAnimal, CurvaCrescimento, Genealogia, Lote
+
+from .dashboard import FRAGMENTOS, _saidas
+from .models import Processamento
+from .perfil import CACHE_EM_MEMORIA, OrcamentoConsultasMixin, impressao_digital
+from .processamento import cancelar, enfileirar, executar, reservar, tarefa
+from .services import ZootecnicoService
+
+
+def nome_indice(model, campos):
+    """Nome do índice declarado em Meta.indexes para os campos informados."""
+    for indice in model._meta.indexes:
+        if list(indice.fields) == list(campos):
+            return indice.name
+    raise LookupError(f"{model.__name__} não tem índice em {campos}")
+
+
+class PlanoConsultasDashboardTests(TestCase):
+    """
+    Regressão de plano de execução: as consultas quentes do dashboard e dos
+    alertas precisam continuar usando os índices das migrations.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        hoje = date.today()
+        pasto = Pasto.objects.create(nome='Piquete 1', area_hectares=10)
+        matriz = Animal.objects.create(identificacao='100', data_nascimento=date(2019, 5, 1), sexo='F')
+        Reproducao.objects.bulk_create([
+            Reproducao(
+                matriz=matriz,
+                data_cio=hoje - timedelta(days=i),
+                data_parto_prevista=hoje - timedelta(days=i) + timedelta(days=285),
+            )
+            for i in range(200)
+        ])
+        MovimentacaoPasto.objects.bulk_create([
+            MovimentacaoPasto(
+                animal=matriz,
+                pasto_destino=pasto,
+                data_entrada=hoje - timedelta(days=30 * (i + 1)),
+                data_saida=hoje - timedelta(days=30 * i) if i else None,
+            )
+            for i in range(20)
+        ])
+
+        # Estatísticas do otimizador (em produção o PRAGMA optimize mantém isso)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Tabelas pequenas sempre dariam Seq Scan; força o planner a mostrar o índice possível
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        elif connection.vendor != 'sqlite':
+            self.skipTest("Plano de execução verificado apenas no SQLite e no PostgreSQL.")
+
+    def assertUsaIndice(self, queryset, *indices):
+        plano = queryset.explain()
+        self.assertTrue(
+            any(indice in plano for indice in indices),
+            f"Esperava um dos índices {indices} no plano:\n{plano}",
+        )
+
+    def test_contagens_rebanho_vivo(self):
+        self.assertUsaIndice(
+            Animal.objects.filter(situacao='VIVO', sexo='F').order_by(),
+            nome_indice(Animal, ['situacao', 'sexo', 'data_nascimento']),
+            'animal_vivo_sexo_nasc_idx',
+        )
+
+    def test_alerta_paricao(self):
+        hoje = date.today()
+        self.assertUsaIndice(
+            Reproducao.objects.filter(
+                bezerro__isnull=True,
+                data_parto_prevista__gte=hoje,
+                data_parto_prevista__lte=hoje + timedelta(days=30),
+            ),
+            'repro_parto_pendente_idx',
+            nome_indice(Reproducao, ['data_parto_prevista', 'bezerro']),
+        )
+
+    def test_estacao_de_monta(self):
+        self.assertUsaIndice(
+            Reproducao.objects.filter(data_cio__range=(date(2024, 10, 1), date(2025, 3, 31))),
+            nome_indice(Reproducao, ['data_cio', 'resultado']),
+        )
+
+    def test_historico_de_pesagens(self):
+        self.assertUsaIndice(
+            Pesagem.objects.filter(animal_id=1).order_by('-data_pesagem'),
+            nome_indice(Pesagem, ['animal', 'data_pesagem']),
+        )
+
+    def test_estadia_aberta_do_animal(self):
+        self.assertUsaIndice(
+            MovimentacaoPasto.objects.filter(animal_id=1, data_saida__isnull=True),
+            'mov_pasto_aberta_animal_idx',
+            nome_indice(MovimentacaoPasto, ['animal', 'data_saida']),
+        )
+
+    def test_ocupacao_do_pasto(self):
+        self.assertUsaIndice(
+            MovimentacaoPasto.objects.filter(pasto_destino_id=1, data_entrada__lte=date.today()),
+            nome_indice(MovimentacaoPasto, ['pasto_destino', 'data_entrada', 'data_saida']),
+            'mov_pasto_aberta_pasto_idx',
+        )
+
+    def test_custo_acumulado_por_animal(self):
+        self.assertUsaIndice(
+            CustoAnimalDetalhe.objects.filter(animal_id=1).values('animal').annotate(total=Sum('valor_alocado')),
+            nome_indice(CustoAnimalDetalhe, ['animal', 'valor_alocado']),
+        )
+
+    def test_despesas_do_ano(self):
+        self.assertUsaIndice(
+            FluxoSaida.objects.filter(data_pagamento__range=(date(2025, 1, 1), date(2025, 12, 31))),
+            nome_indice(FluxoSaida, ['data_pagamento']),
+        )
+
+    def test_proximos_tratamentos(self):
+        hoje = date.today()
+        self.assertUsaIndice(
+            TratamentoSaude.objects.filter(data_proximo_tratamento__range=(hoje, hoje + timedelta(days=30))),
+            nome_indice(TratamentoSaude, ['data_proximo_tratamento']),
+        )
+
+
+class ExportacaoListasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user('gerente', password='senha')
+        cls.vaca = Animal.objects.create(identificacao='V-1', data_nascimento=date(2020, 1, 10), sexo='F')
+        cls.boi = Animal.objects.create(identificacao='B-1', data_nascimento=date(2021, 3, 5), sexo='M')
+        Pesagem.objects.bulk_create([
+            Pesagem(animal=cls.vaca, data_pesagem=date(2024, 6, 1), peso_kg='412.50', evento='Desmama'),
+            Pesagem(animal=cls.boi, data_pesagem=date(2024, 6, 1), peso_kg='380.00', evento='Desmama'),
+        ])
+
+    def setUp(self):
+        self.client.login(username='gerente', password='senha')
+
+    def test_csv_respeita_filtro(self):
+        response = self.client.get(reverse('controle_peso_list'), {'animal': 'V-1', 'exportar': 'csv'})
+        bruto = b''.join(response.streaming_content)
+        self.assertTrue(bruto.startswith('\ufeff'.encode('utf-8')))
+        conteudo = bruto.decode('utf-8-sig').splitlines()
+
+        self.assertEqual(conteudo[0], 'Animal;Data;Peso (kg);Evento')
+        self.assertEqual(conteudo[1:], ['V-1;01/06/2024;412,50;Desmama'])
+
+    def test_csv_usa_rotulo_das_escolhas(self):
+        response = self.client.get(reverse('rebanho:animal_list'), {'identificacao': 'B-1', 'exportar': 'csv'})
+        linhas = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(linhas), 2)
+        self.assertIn(';Macho;', linhas[1])
+
+    def test_xlsx(self):
+        response = self.client.get(reverse('custo_list'), {'exportar': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+
+    def test_botoes_mantem_filtro(self):
+        response = self.client.get(reverse('despesa_list'), {'page': 1, 'descricao': 'sal'})
+        self.assertContains(response, '?descricao=sal&amp;exportar=xlsx')
+        self.assertNotContains(response, 'page=1&amp;exportar')
+
+
+@override_settings(PERFIL_SQL=True)
+class OrcamentoConsultasTests(OrcamentoConsultasMixin, TestCase):
+    """O número de consultas destas telas não pode crescer com o rebanho (N+1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_superuser('admin', password='senha')
+        hoje = date.today()
+        cls.pasto = Pasto.objects.create(nome='Piquete 1', area_hectares=10)
+        lote = Lote.objects.create(nome='Recria')
+        Animal.objects.bulk_create([
+            Animal(
+                identificacao=f'A-{i}', data_nascimento=date(2022, 1, 1), sexo='M',
+                lote_atual=lote, pasto_atual=cls.pasto, data_ultima_pesagem=hoje - timedelta(days=90),
+            )
+            for i in range(15)
+        ])
+        animais = list(Animal.objects.all())
+        MovimentacaoPasto.objects.bulk_create([
+            MovimentacaoPasto(animal=a, pasto_destino=cls.pasto, data_entrada=hoje - timedelta(days=60))
+            for a in animais
+        ])
+        Pesagem.objects.bulk_create([
+            Pesagem(animal=a, data_pesagem=hoje - timedelta(days=dias), peso_kg=peso)
+            for a in animais
+            for dias, peso in ((20, '300.00'), (5, '301.00'))
+        ])
+        RegistroDeCusto.objects.create(
+            descricao='Sal mineral', valor_total=Decimal('1500.00'), data_pagamento=hoje - timedelta(days=10),
+            tipo_custo=TipoCusto.objects.create(nome='Suplemento'), pasto=cls.pasto,
+        )
+        for animal in animais[:5]:
+            Venda.objects.create(animal=animal, valor_total=Decimal('3000.00'), origem_pagador='Frigorífico', data_entrada=hoje)
+
+    def setUp(self):
+        self.client.login(username='admin', password='senha')
+
+    def test_alertas_risco(self):
+        response = self.assertOrcamentoConsultas(6, reverse('alertas_risco'))
+        self.assertEqual(len(response.context['animais_em_risco']), 10)
+
+    def test_desempenho_pasto(self):
+        response = self.assertOrcamentoConsultas(7, reverse('relatorio_desempenho_pasto'), data={'pasto': self.pasto.pk})
+        resumo = response.context['relatorio_resumo']
+        self.assertEqual(resumo['total_animais'], 15)
+        self.assertEqual(resumo['custo_total_lote'], Decimal('1500.00'))
+        # 300 kg e 301 kg com 15 dias entre as pesagens
+        self.assertEqual(resumo['media_gpmd_lote'], Decimal('0.067'))
+
+    def test_lucratividade_animais(self):
+        response = self.assertOrcamentoConsultas(6, reverse('detalhe_lucratividade_animais'))
+        self.assertContains(response, 'Frigorífico')
+
+    def test_admin_lotes(self):
+        response = self.assertOrcamentoConsultas(8, reverse('admin:rebanho_lote_changelist'))
+        self.assertContains(response, '<td class="field-contagem_animais">15</td>', html=True)
+
+    def test_cabecalho_perfil(self):
+        response = self.client.get(reverse('alertas_risco'))
+        self.assertRegex(response['X-SQL-Perfil'], r'^consultas=\d+; ')
+        self.assertIn('sql;dur=', response['Server-Timing'])
+
+        User.objects.create_user('peao', password='senha')
+        self.client.login(username='peao', password='senha')
+        response = self.client.get(reverse('alertas_risco'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('X-SQL-Perfil'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_pagina_perfil(self):
+        self.client.get(reverse('alertas_risco'))
+        response = self.client.get(reverse('perfil_sql'))
+        self.assertContains(response, 'alertas_risco')
+
+    def test_impressao_digital_ignora_parametros(self):
+        self.assertEqual(
+            impressao_digital("SELECT * FROM a WHERE id = 1 AND nome = 'x'"),
+            impressao_digital("SELECT * FROM a WHERE id = 27 AND nome = 'y'"),
+        )
+
+
+class CacheCompartilhadoTests(TestCase):
+
+    def test_padrao_guarda_o_cache_no_banco(self):
+        # Web, processar_fila e comandos leem a mesma tabela: a invalidação feita em um vale para todos
+        self.assertEqual(settings.CACHES['default']['BACKEND'], 'django.core.cache.backends.db.DatabaseCache')
+        EstacaoMontaService.analisar(2020)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(settings.CACHES['default']['LOCATION'])}")
+            self.assertGreater(cursor.fetchone()[0], 0)
+
+        Reproducao.objects.create(
+            matriz=Animal.objects.create(identificacao='C-1', data_nascimento=date(2018, 1, 1), sexo='F'),
+            data_cio=date(2020, 11, 1),
+        )
+        self.assertIsNone(caches.create_connection('default').get(EstacaoMontaService.CHAVE_VERSAO))
+
+
+@override_settings(CACHES=CACHE_EM_MEMORIA)
+class DashboardFragmentosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Animal.objects.bulk_create([
+            Animal(identificacao='D-1', data_nascimento=date(2020, 1, 1), sexo='F'),
+            Animal(identificacao='D-2', data_nascimento=date(2021, 1, 1), sexo='M'),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pagina_so_traz_o_esqueleto(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('dashboard'))
+        for nome in FRAGMENTOS:
+            self.assertContains(response, reverse('dashboard_fragmento', args=[nome]))
+
+    def test_blocos(self):
+        for nome in FRAGMENTOS:
+            response = self.client.get(reverse('dashboard_fragmento', args=[nome]))
+            self.assertEqual(response.status_code, 200, nome)
+            self.assertIn(f'{nome};dur=', response['Server-Timing'])
+        self.assertEqual(self.client.get(reverse('dashboard_fragmento', args=['inexistente'])).status_code, 404)
+
+    def test_cache_etag_e_invalidacao(self):
+        url = reverse('dashboard_fragmento', args=['rebanho'])
+        primeira = self.client.get(url)
+        self.assertIn('desc="calculado"', primeira['Server-Timing'])
+
+        with self.assertNumQueries(0):
+            revalidada = self.client.get(url, HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(revalidada.status_code, 304)
+
+        Animal.objects.create(identificacao='D-3', data_nascimento=date(2022, 1, 1), sexo='F')
+        atualizada = self.client.get(url, HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(atualizada.status_code, 200)
+        self.assertNotEqual(atualizada['ETag'], primeira['ETag'])
+
+    def test_mortalidade_igual_ao_painel_de_indicadores(self):
+        Animal.objects.create(identificacao='D-3', data_nascimento=date(2022, 1, 1), sexo='F')
+        morta = Animal.objects.create(identificacao='D-4', data_nascimento=date(2022, 1, 1), sexo='F', situacao='MORTO')
+        BaixaAnimal.objects.create(animal=morta, data_baixa=date.today(), causa='DOENCA')
+
+        taxa = _saidas()['taxa_mortalidade']
+        self.assertEqual(taxa, ZootecnicoService.obter_indicadores_performance()['taxa_mortalidade'])
+        self.assertEqual(taxa, 33.3)
+
+
+class GeradorFazendaTests(TestCase):
+
+    def test_gera_fazenda_coerente(self):
+        saida = StringIO()
+        call_command('gerar_fazenda', animais=60, anos=3, prefixo='T', stdout=saida)
+
+        animais = Animal.objects.filter(identificacao__startswith='T')
+        self.assertGreater(animais.count(), 40)
+        self.assertTrue(animais.filter(mae__isnull=False, pai__isnull=False).exists())
+        self.assertTrue(Genealogia.objects.filter(descendente__in=animais, distancia=1).exists())
+        self.assertEqual(Venda.objects.count(), animais.filter(situacao='VENDIDO').count())
+        self.assertFalse(animais.filter(situacao='VIVO', pasto_atual__isnull=True).exists())
+        # Rateio fecha com o valor dos registros de custo
+        self.assertEqual(
+            CustoAnimalDetalhe.objects.aggregate(total=Sum('valor_alocado'))['total'],
+            RegistroDeCusto.objects.aggregate(total=Sum('valor_total'))['total'],
+        )
+
+        with self.assertRaises(CommandError):
+            call_command('gerar_fazenda', animais=60, prefixo='T', stdout=saida)
+
+    def test_benchmark_nao_altera_o_banco_nem_o_cache(self):
+        call_command('gerar_fazenda', animais=60, anos=3, prefixo='T', stdout=StringIO())
+        casos = ['servico.curvas_crescimento', 'servico.indices_reprodutivos', 'servico.avaliacao_genetica', 'estoque']
+        with self.assertRaisesMessage(CommandError, 'superusuário'):
+            call_command('benchmark_fazenda', repeticoes=1, apenas=casos, stdout=StringIO())
+        self.assertFalse(User.objects.exists())
+
+        admin = User.objects.create_superuser('admin', password='senha')
+        cache.set('chave:da:fazenda', 1, None)
+        saida = StringIO()
+        # O comando monta o próprio ambiente de teste (Client em 'testserver')
+        teardown_test_environment()
+        try:
+            call_command('benchmark_fazenda', repeticoes=2, apenas=casos, stdout=saida)
+        finally:
+            setup_test_environment()
+        self.assertIn('servico.avaliacao_genetica', saida.getvalue())
+        self.assertNotIn('[500]', saida.getvalue())
+
+        self.assertFalse(CurvaCrescimento.objects.exists())
+        self.assertFalse(IndiceReprodutivo.objects.exists())
+        self.assertFalse(AvaliacaoGenetica.objects.exists())
+        self.assertFalse(Session.objects.exists())
+        admin.refresh_from_db()
+        self.assertIsNone(admin.last_login)
+        self.assertEqual(cache.get('chave:da:fazenda'), 1)
+
+    def test_recusa_banco_sem_retorno_de_chaves_no_bulk_create(self):
+        recurso = mock.PropertyMock(return_value=False)
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', recurso):
+            with self.assertRaisesMessage(CommandError, 'chaves primárias'):
+                call_command('gerar_fazenda', animais=60, prefixo='T', stdout=StringIO())
+        self.assertFalse(Animal.objects.exists())
+
+
+@tarefa('testes.contagem', 'Tarefa de teste')
+def _tarefa_contagem(execucao):
+    total = execucao.parametros.get('total', 3)
+    for _ in execucao.acompanhar(range(total), total):
+        execucao.progresso(50, forcar=True)
+    if execucao.parametros.get('falhar'):
+        raise RuntimeError('falha proposital')
+    return {'itens': total}
+
+
+class ProcessamentoTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media = tempfile.mkdtemp()
+        cls.settings_media = override_settings(MEDIA_ROOT=cls.media)
+        cls.settings_media.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_media.disable()
+        shutil.rmtree(cls.media, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('gerente', password='senha')
+        vaca = Animal.objects.create(identificacao='V-1', data_nascimento=date(2020, 1, 10), sexo='F')
+        boi = Animal.objects.create(identificacao='B-1', data_nascimento=date(2021, 3, 5), sexo='M')
+        Pesagem.objects.bulk_create([
+            Pesagem(animal=vaca, data_pesagem=date(2024, 6, 1), peso_kg='412.50'),
+            Pesagem(animal=boi, data_pesagem=date(2024, 6, 1), peso_kg='380.00'),
+        ])
+
+    def setUp(self):
+        self.client.login(username='gerente', password='senha')
+
+    def test_fila_conclui_e_guarda_resultado(self):
+        processamento = enfileirar('testes.contagem', {'total': 5}, usuario=self.usuario)
+        self.assertEqual(reservar('teste'), processamento.pk)
+        self.assertIsNone(reservar('outro'))  # já reservado
+
+        self.assertEqual(executar(processamento.pk), 'CONCLUIDO')
+        processamento.refresh_from_db()
+        self.assertEqual((processamento.progresso, processamento.resultado), (100, {'itens': 5}))
+
+    def test_cancelamento_e_erro(self):
+        na_fila = enfileirar('testes.contagem')
+        cancelar(na_fila)
+        na_fila.refresh_from_db()
+        self.assertEqual(na_fila.status, 'CANCELADO')
+        self.assertIsNone(reservar('teste'))
+
+        em_execucao = enfileirar('testes.contagem')
+        reservar('teste')
+        cancelar(em_execucao)
+        self.assertEqual(executar(em_execucao.pk), 'CANCELADO')
+
+        com_erro = enfileirar('testes.contagem', {'falhar': True})
+        reservar('teste')
+        self.assertEqual(executar(com_erro.pk), 'ERRO')
+        com_erro.refresh_from_db()
+        self.assertIn('falha proposital', com_erro.erro)
+
+    def test_exportacao_em_segundo_plano(self):
+        response = self.client.get(
+            reverse('controle_peso_list'), {'animal': 'B-1', 'exportar': 'csv', 'segundo_plano': '1'}
+        )
+        processamento = Processamento.objects.get()
+        self.assertRedirects(response, processamento.get_absolute_url())
+
+        call_command('processar_fila', processos=0, uma_vez=True, stdout=StringIO())
+        processamento.refresh_from_db()
+        self.assertEqual(processamento.status, 'CONCLUIDO', processamento.erro)
+
+        response = self.client.get(reverse('processamento_arquivo', args=[processamento.pk]))
+        conteudo = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(conteudo[1:], ['B-1;01/06/2024;380,00;Cadastro de peso regular'])
+
+    def test_outro_usuario_nao_ve(self):
+        processamento = enfileirar('testes.contagem', usuario=self.usuario)
+        User.objects.create_user('vaqueiro', password='senha')
+        self.client.login(username='vaqueiro', password='senha')
+        self.assertEqual(self.client.get(processamento.get_absolute_url()).status_code, 404)
+
+    def test_mudar_pasto_lote(self):
+        origem = Pasto.objects.create(nome='Origem', area_hectares=5)
+        destino = Pasto.objects.create(nome='Destino', area_hectares=5)
+        lote = Lote.objects.create(nome='Recria', pasto_atual=origem)
+        Animal.objects.filter(identificacao__in=['V-1', 'B-1']).update(lote_atual=lote, pasto_atual=origem)
+
+        processamento = enfileirar('rebanho.mudar_pasto_lote', {
+            'lotes': [lote.pk], 'pasto_destino': destino.pk, 'data_entrada': '2024-07-01', 'observacoes': 'seca',
+        })
+        reservar('teste')
+        self.assertEqual(executar(processamento.pk), 'CONCLUIDO')
+
+        self.assertEqual(Animal.objects.filter(pasto_atual=destino).count(), 2)
+        self.assertEqual(MovimentacaoPasto.objects.filter(pasto_destino=destino).count(), 2)
@@ -3,11 +3,20 @@ from django.contrib.auth import views as auth_views
 from django.views.generic.base import RedirectView
 from django.conf import settings
 
-from .views import  DashboardView, ZootecnicoAnalyticsView, logout
+from .views import (
+    DashboardFragmentoView, DashboardView, PerfilSQLView, ProcessamentoArquivoView, ProcessamentoCancelarView, ProcessamentoDetailView,
+    ProcessamentoListView, ZootecnicoAnalyticsView, logout,
+)
 
 urlpatterns = [
     path('', DashboardView.as_view(), name='dashboard'),
+    path('dashboard/bloco/<slug:nome>/', DashboardFragmentoView.as_view(), name='dashboard_fragmento'),
     path('dashboard/zootecnico/', ZootecnicoAnalyticsView.as_view(), name='zootecnico_stats'),
+    path('processamentos/', ProcessamentoListView.as_view(), name='processamento_list'),
+    path('processamentos/<int:pk>/', ProcessamentoDetailView.as_view(), name='processamento_detail'),
+    path('processamentos/<int:pk>/cancelar/', ProcessamentoCancelarView.as_view(), name='processamento_cancelar'),
+    path('processamentos/<int:pk>/arquivo/', ProcessamentoArquivoView.as_view(), name='processamento_arquivo'),
+    path('debug/perf/', PerfilSQLView.as_view(), name='perfil_sql'),
     path('logout/', logout, name='logout'),
     path('login/', auth_views.LoginView.as_view(template_name='core/login.html'), name='login'),
     
@@ -1,23 +1,32 @@
 # ControleRebanho/views.py
 
+import os
+import time
+
+from django.conf import settings
 from django.shortcuts import  redirect
 from django.contrib import messages, auth
-from django.views.generic import  TemplateView
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.views import View
+from django.views.generic import  DetailView, ListView, TemplateView
+from django.views.generic.detail import SingleObjectMixin
 from django.contrib.auth.decorators import login_required # Importe o decorador
-from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 
 
 from datetime import date, timedelta
 
 
 from core.services import ZootecnicoService
-from financeiro.models import Venda
-from financeiro.services import CalculadorIndices
 from infraestrutura.models import Pasto
-from manejo.services import ReproducaoService
-from rebanho.models import Animal, BaixaAnimal
 from manejo.models import Reproducao
 
+from .dashboard import FRAGMENTOS
+from .models import Processamento
+from .perfil import historico
+from .processamento import cancelar
+
 
 class ZootecnicoAnalyticsView(TemplateView):
     template_name = 'core/zootecnico.html'
@@ -33,39 +42,37 @@ class ZootecnicoAnalyticsView(TemplateView):
 
 
 class DashboardView(TemplateView):
+    """Só o esqueleto: os blocos vêm de DashboardFragmentoView, em paralelo."""
     template_name = 'core/dashboard.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        ano_atual = timezone.localdate().year
-
-        # 1. Indicadores Zootécnicos e Alertas
-        context.update(ZootecnicoService.obter_indicadores_performance())
-        context['alerta_desmame'] = ZootecnicoService.obter_alertas_desmame()
-        context['alertas_paricao'] = ZootecnicoService.obter_alertas_paricao()
-
-        # 2. Contagens Rápidas do Rebanho
-        animais_vivos = Animal.objects.filter(situacao='VIVO')
-        context.update({
-            'total_animais': animais_vivos.count(),
-            'total_machos': animais_vivos.filter(sexo='M').count(),
-            'total_femeas': animais_vivos.filter(sexo='F').count(),
-            'alerta_genealogia': animais_vivos.filter(mae__isnull=True).count(),
-        })
-
-        # 3. Dados de Distribuição do Ano
-        context.update({
-            'total_vendido': Venda.objects.filter(animal__situacao='VENDIDO', data_entrada__year=ano_atual).count(),
-            'total_baixa': BaixaAnimal.objects.filter(animal__situacao='MORTO', data_baixa__year=ano_atual).count(),
-        })
-
-        # 4. Indicadores Financeiros e Reprodutivos
-        context.update(ReproducaoService.obter_dados_estacao(ano_atual - 1))
-        context.update(CalculadorIndices.obter_estatisticas_financeiras(ano_atual))
-
+        context['fragmentos'] = list(FRAGMENTOS)
         return context
 
 
+class DashboardFragmentoView(View):
+    """
+    Um bloco do dashboard: HTML em cache pelo TTL do bloco, ETag para o
+    navegador revalidar (304) e Server-Timing com o tempo e a origem.
+    """
+
+    def get(self, request, nome):
+        fragmento = FRAGMENTOS.get(nome)
+        if fragmento is None:
+            raise Http404("Bloco inexistente.")
+
+        inicio = time.perf_counter()
+        conteudo, veio_do_cache = fragmento.obter()
+        duracao = (time.perf_counter() - inicio) * 1000
+
+        response = get_conditional_response(request, etag=conteudo['etag']) or HttpResponse(conteudo['html'])
+        response['ETag'] = conteudo['etag']
+        patch_cache_control(response, private=True, no_cache=True)
+        response['Server-Timing'] = f'{nome};dur={duracao:.1f};desc="{"cache" if veio_do_cache else "calculado"}"'
+        return response
+
+
 @login_required(login_url='login')
 def logout(request):
     try:
@@ -76,4 +83,85 @@ def logout(request):
         pass
     auth.logout(request)
     messages.info(request, "You have been successfully logged out")
-    return redirect('dashboard')
\ No newline at end of file
+    return redirect('dashboard')
+
+class ProcessamentosDoUsuarioMixin(LoginRequiredMixin):
+    """Cada usuário vê os próprios processamentos; a equipe (staff) vê todos."""
+
+    def get_queryset(self):
+        queryset = Processamento.objects.select_related('solicitado_por')
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(solicitado_por=self.request.user)
+        return queryset
+
+
+class ProcessamentoListView(ProcessamentosDoUsuarioMixin, ListView):
+    model = Processamento
+    template_name = 'core/processamento_list.html'
+    context_object_name = 'processamentos'
+    paginate_by = 25
+
+
+class ProcessamentoDetailView(ProcessamentosDoUsuarioMixin, DetailView):
+    model = Processamento
+    template_name = 'core/processamento_detail.html'
+    context_object_name = 'processamento'
+
+    def render_to_response(self, context, **response_kwargs):
+        # A página consulta o andamento via ?formato=json enquanto não termina
+        if self.request.GET.get('formato') == 'json':
+            processamento = self.object
+            return JsonResponse({
+                'status': processamento.status,
+                'status_display': processamento.get_status_display(),
+                'progresso': processamento.progresso,
+                'mensagem': processamento.mensagem,
+                'finalizado': processamento.finalizado,
+            })
+        return super().render_to_response(context, **response_kwargs)
+
+
+class ProcessamentoCancelarView(ProcessamentosDoUsuarioMixin, SingleObjectMixin, View):
+    model = Processamento
+
+    def post(self, request, *args, **kwargs):
+        processamento = self.get_object()
+        if processamento.finalizado:
+            messages.warning(request, "Este processamento já terminou.")
+        else:
+            cancelar(processamento)
+            messages.info(request, "Cancelamento solicitado.")
+        return redirect(processamento)
+
+
+class ProcessamentoArquivoView(ProcessamentosDoUsuarioMixin, SingleObjectMixin, View):
+    model = Processamento
+
+    def get(self, request, *args, **kwargs):
+        processamento = self.get_object()
+        if processamento.status != 'CONCLUIDO' or not processamento.arquivo:
+            raise Http404("Arquivo não disponível.")
+        return FileResponse(
+            processamento.arquivo.open('rb'),
+            as_attachment=True,
+            filename=os.path.basename(processamento.arquivo.name),
+        )
+
+
+class PerfilSQLView(UserPassesTestMixin, TemplateView):
+    """Consultas por view registradas pelo PerfilSQLMiddleware (neste processo)."""
+    template_name = 'core/perfil_sql.html'
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def post(self, request, *args, **kwargs):
+        historico.limpar()
+        return redirect('perfil_sql')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['ativo'] = getattr(settings, 'PERFIL_SQL', settings.DEBUG)
+        context['views'] = historico.views()
+        context['recentes'] = list(historico.recentes)[:50]
+        return context
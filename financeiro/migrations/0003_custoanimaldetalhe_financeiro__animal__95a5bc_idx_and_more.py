@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("financeiro", "0002_alter_tipocusto_options"),
+        ("rebanho", "0002_alter_animal_options_animal_data_ultima_pesagem_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="custoanimaldetalhe",
+            index=models.Index(
+                fields=["animal", "valor_alocado"],
+                name="financeiro__animal__95a5bc_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fluxosaida",
+            index=models.Index(
+                fields=["data_pagamento"], name="financeiro__data_pa_bd8f64_idx"
+            ),
+        ),
+    ]
@@ -129,6 +129,9 @@ class FluxoSaida(models.Model):
         verbose_name = "Fluxo de Saída"
         verbose_name_plural = "Fluxo de Saídas (Despesas)"
         ordering = ['-data_pagamento']
+        indexes = [
+            models.Index(fields=['data_pagamento']),
+        ]
 
     def __str__(self):
         return f"[{self.get_tipo_saida_display()}] {self.descricao} - R$ {self.valor_total}"
@@ -275,6 +278,10 @@ class CustoAnimalDetalhe(models.Model):
         unique_together = ('registro_de_custo', 'animal')
         verbose_name = "Detalhe de Custo Alocado"
         verbose_name_plural = "Detalhes de Custos Alocados"
+        indexes = [
+            # Cobre o Sum('valor_alocado') por animal sem ler a tabela
+            models.Index(fields=['animal', 'valor_alocado']),
+        ]
 
     def __str__(self):
         return f"Animal {self.animal.identificacao}: R$ {self.valor_alocado}"
\ No newline at end of file
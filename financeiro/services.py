@@ -1,66 +1,72 @@
 # core/services.py
-from django.db.models import Max, Min, Sum
+from django.db.models import DecimalField, Max, Min, OuterRef, Q, Subquery, Sum
 from django.utils import timezone
 from django.db.models.functions import Coalesce
 from decimal import Decimal
 
 from .models import CustoAnimalDetalhe, Despesa, RegistroDeCusto, Venda
 from manejo.models import Pesagem
-from rebanho.models import Animal, BaixaAnimal
+from manejo.services import PesagemService
+from rebanho.models import Animal
 from django.db.models.functions import TruncMonth
 from collections import defaultdict
 
 
+def _custo_alocado(**filtros):
+    """Subquery com a soma do custo alocado ao animal (OuterRef('pk'))."""
+    custos = (
+        CustoAnimalDetalhe.objects
+        .filter(animal=OuterRef('pk'), **filtros)
+        .order_by()
+        .values('animal')
+        .annotate(total=Sum('valor_alocado'))
+        .values('total')
+    )
+    return Coalesce(Subquery(custos), Decimal(0), output_field=DecimalField())
+
+
 def obter_detalhe_lucratividade_animais(ano_filtro):
     """
     Retorna a listagem detalhada de lucratividade de cada animal que saiu no ano.
     """
-    animais_saidos_ids = set()
-    
-    # Identifica animais que saíram (vendidos, abatidos ou mortos) no ano
-    vendas_periodo = Venda.objects.filter(data_entrada__year=ano_filtro)
-    for v in vendas_periodo:
-        animais_saidos_ids.add(v.animal_id)
-
-    baixas_periodo = BaixaAnimal.objects.filter(data_baixa__year=ano_filtro)
-    for b in baixas_periodo:
-        animais_saidos_ids.add(b.animal_id)
-        
-    animais_saidos = Animal.objects.filter(id__in=animais_saidos_ids)
-    
+    # Animais que saíram (vendidos, abatidos ou mortos) no ano; venda, baixa e
+    # custo acumulado vêm na mesma consulta
+    animais_saidos = (
+        Animal.objects
+        .filter(Q(venda__data_entrada__year=ano_filtro) | Q(baixaanimal__data_baixa__year=ano_filtro))
+        .select_related('venda', 'baixaanimal')
+        .annotate(custo_acumulado=_custo_alocado())
+        .distinct()
+    )
+
     detalhe_lucratividade = []
 
     for animal in animais_saidos:
-        custo_acumulado = CustoAnimalDetalhe.objects.filter(
-            animal=animal
-        ).aggregate(
-            total=Coalesce(Sum('valor_alocado'), Decimal(0))
-        )['total']
-        
+        custo_acumulado = animal.custo_acumulado
+        venda = getattr(animal, 'venda', None)
+        baixa = getattr(animal, 'baixaanimal', None)
+
         receita_animal = Decimal(0)
         destino = "N/A"
         data_saida = None
-        
+
         if animal.situacao == 'VENDIDO':
-            try:
-                venda = Venda.objects.get(animal=animal)
+            if venda is not None:
                 receita_animal = venda.valor_total
                 destino = f"Vendido a {venda.origem_pagador}"
                 data_saida = venda.data_entrada
-            except Venda.DoesNotExist:
+            else:
                 destino = "VENDIDO (Registro de Venda Ausente)"
 
-        elif animal.situacao == 'MORTO': 
-            try:
-                baixa = BaixaAnimal.objects.get(animal=animal)
-                receita_animal = Decimal(0) 
+        elif animal.situacao == 'MORTO':
+            if baixa is not None:
                 destino = f"Morte ({baixa.get_causa_display()})"
                 data_saida = baixa.data_baixa
-            except BaixaAnimal.DoesNotExist:
+            else:
                 destino = "MORTO (Registro de Baixa Ausente)"
 
         lucro = receita_animal - custo_acumulado
-        
+
         detalhe_lucratividade.append({
             'identificacao': animal.identificacao,
             'link': animal.get_absolute_url(),
@@ -71,11 +77,65 @@ def obter_detalhe_lucratividade_animais(ano_filtro):
             'lucro': lucro,
         })
 
-    # from datetime import date
-    # detalhe_lucratividade.sort(key=lambda x: x['data_saida'] if x['data_saida'] else date.min, reverse=True)
-    
     return detalhe_lucratividade
 
+
+def obter_desempenho_pasto(pasto, data_inicio, data_fim):
+    """
+    GPMD, último peso e custo do período dos animais que passaram pelo pasto.
+    Três consultas, independente do número de animais.
+
+    O GPMD é o ganho entre a primeira e a última pesagem do período
+    (PesagemService.gpmd_por_animal): Pesagem não guarda GPMD por registro, e o
+    animal com uma pesagem só no período fica fora do relatório.
+    """
+    animais_no_pasto = (
+        Animal.objects
+        .filter(
+            movimentacoes_pasto__pasto_destino=pasto,
+            movimentacoes_pasto__data_entrada__lte=data_fim,
+        )
+        .filter(
+            Q(movimentacoes_pasto__data_saida__gte=data_inicio) |
+            Q(movimentacoes_pasto__data_saida__isnull=True)
+        )
+        .annotate(
+            peso_periodo=PesagemService.ultimo_peso(ate=data_fim),
+            custo_periodo=_custo_alocado(registro_de_custo__data_pagamento__range=[data_inicio, data_fim]),
+        )
+        .distinct()
+    )
+    animais = list(animais_no_pasto)
+    gpmd = PesagemService.gpmd_por_animal([a.pk for a in animais], inicio=data_inicio, fim=data_fim)
+
+    animais_desempenho = []
+    for animal in animais:
+        gpmd_medio = gpmd.get(animal.pk)
+        if gpmd_medio is None:
+            continue
+        animais_desempenho.append({
+            'identificacao': animal.identificacao,
+            'link': animal.get_absolute_url(),
+            'gpmd_medio': gpmd_medio,
+            'peso_atual': animal.peso_periodo,
+            'custo_periodo': animal.custo_periodo,
+        })
+
+    relatorio_resumo = {}
+    if animais_desempenho:
+        total_animais = len(animais_desempenho)
+        total_gpmd = sum(a['gpmd_medio'] for a in animais_desempenho)
+        total_custo = sum(a['custo_periodo'] for a in animais_desempenho)
+        relatorio_resumo = {
+            'pasto_nome': pasto.nome,
+            'total_animais': total_animais,
+            'media_gpmd_lote': total_gpmd / total_animais,
+            'custo_total_lote': total_custo,
+            'custo_medio_animal': total_custo / total_animais,
+        }
+    return animais_desempenho, relatorio_resumo
+
+
 def obter_fluxo_de_caixa():
     # 1. Agrega as Entradas (Vendas) por mês
     entradas_query = Venda.objects.annotate(
@@ -108,44 +168,28 @@ def obter_fluxo_de_caixa():
 
 
 def calcular_performance_rebanho(ano_filtro):
-    ganho_total_real = 0
-    peso_estimado_ua = 0
-    
-    # 1. Filtramos apenas animais ativos
-    animais_ativos = Animal.objects.filter(situacao='VIVO') 
+    """
+    (ganho real, peso estimado) do rebanho vivo no ano: maior menos menor pesagem de
+    cada animal pesado no ano; os que não passaram pela balança entram pela UA * 450.
+    """
+    animais_ativos = Animal.objects.filter(situacao='VIVO')
+    pesagens_ano = Pesagem.objects.filter(animal__situacao='VIVO', data_pesagem__year=ano_filtro)
 
+    ganhos = pesagens_ano.order_by().values('animal').annotate(ganho=Max('peso_kg') - Min('peso_kg'))
+    ganho_total_real = sum(ganhos.values_list('ganho', flat=True), Decimal(0)).quantize(Decimal('0.01'))
 
-    for animal in animais_ativos:
-        # Buscamos as pesagens deste animal no ano específico
-        pesagens_do_bicho = Pesagem.objects.filter(
-            animal=animal, 
-            data_pesagem__year=ano_filtro
-        )
-
-        if pesagens_do_bicho.exists():
-            # Se houve pesagem, calculamos o ganho real (Max - Min)
-            dados = pesagens_do_bicho.aggregate(
-                max_p=Max('peso_kg'), 
-                min_p=Min('peso_kg')
-            )
-            ganho = (dados['max_p'] or 0) - (dados['min_p'] or 0)
-            ganho_total_real += ganho
-        else:
-            
-            peso_estimado_ua += (animal.ua_atual * 450)
+    sem_pesagem = animais_ativos.exclude(pk__in=pesagens_ano.values('animal')).com_ua()
+    peso_estimado_ua = (sem_pesagem.aggregate(total=Sum('ua'))['total'] or 0) * 450
 
     return ganho_total_real, peso_estimado_ua
 
 
-
-
 class CalculadorIndices:
     @staticmethod
     def obter_estatisticas_financeiras_zootecnicas(ano_filtro=None):
         # 1. Total de UAs da Fazenda
-        animais_ativos = Animal.objects.filter(situacao='VIVO') 
-        # IMPORTANTE: Garanta que ua_atual no model seja @property
-        total_ua_fazenda = sum(a.ua_atual for a in animais_ativos) or 1
+        animais_ativos = Animal.objects.filter(situacao='VIVO')
+        total_ua_fazenda = animais_ativos.com_ua().aggregate(total=Sum('ua'))['total'] or 1
 
         # 2. Total de Despesas no mês
         ano_atual = ano_filtro if ano_filtro is not None else timezone.now().year
@@ -171,7 +215,7 @@ class CalculadorIndices:
         #     min_p = pesagens_do_bicho.aggregate(Min('peso_kg'))['peso_kg__min'] or 0
         #     ganho_total_kg += (max_p - min_p)
         
-        ganho_total_real, peso_estimado_ua = calcular_performance_rebanho(ano_filtro)
+        ganho_total_real, peso_estimado_ua = calcular_performance_rebanho(ano_atual)
         ganho_total_kg = ganho_total_real + peso_estimado_ua
 
         # Transformando quilos ganhos em Arrobas (@)
@@ -3,6 +3,7 @@ from django.dispatch import receiver
 from django.db.models import Q
 
 from rebanho.models import Animal
+from rebanho.timeline import TimelineAnimalService
 from .models import  RegistroDeCusto, CustoAnimalDetalhe, Venda, Despesa, TipoCusto
 
 
@@ -83,6 +84,8 @@ def alocar_custo_por_pasto(sender, instance, created, **kwargs):
             ]
             
             CustoAnimalDetalhe.objects.bulk_create(detalhes)
+            # bulk_create não dispara signals: a ficha dos animais precisa ser descartada aqui
+            TimelineAnimalService.invalidar([detalhe.animal_id for detalhe in detalhes])
         
         # Se o custo for individualizado (aplicado a um animal), registra o detalhe também
         elif instance.animal and created:
@@ -0,0 +1,34 @@
+# financeiro/tarefas.py
+"""Tarefas de segundo plano do financeiro (ver core/processamento.py)."""
+import tempfile
+
+from core.exportacao import escrever_xlsx
+from core.processamento import tarefa
+
+from .services import obter_detalhe_lucratividade_animais
+
+
+@tarefa('financeiro.lucratividade', 'Relatório de lucratividade por animal')
+def relatorio_lucratividade(execucao):
+    ano = int(execucao.parametros['ano'])
+    execucao.progresso(5, mensagem=f"Calculando a lucratividade de {ano}...", forcar=True)
+
+    dados = obter_detalhe_lucratividade_animais(ano)
+    dados.sort(key=lambda x: x['destino'].lower())
+    execucao.progresso(80, mensagem="Gerando planilha...", forcar=True)
+
+    cabecalho = ['Animal', 'Destino', 'Data de Saída', 'Custo Acumulado (R$)', 'Receita (R$)', 'Lucro (R$)']
+    linhas = (
+        [d['identificacao'], d['destino'], d['data_saida'], d['custo_acumulado'], d['receita_animal'], d['lucro']]
+        for d in dados
+    )
+    with tempfile.TemporaryFile() as arquivo:
+        escrever_xlsx(arquivo, cabecalho, linhas, titulo=f"Lucratividade {ano}")
+        arquivo.seek(0)
+        execucao.salvar_arquivo(f"lucratividade_{ano}.xlsx", arquivo)
+
+    return {
+        'ano': ano,
+        'animais': len(dados),
+        'lucro_total': float(sum(d['lucro'] or 0 for d in dados)),
+    }
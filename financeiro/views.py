@@ -4,23 +4,25 @@ from datetime import timedelta
 from django.urls import reverse_lazy
 from django.views.generic import  CreateView, FormView, ListView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q, Avg, Sum
+from django.db.models import Sum
 from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.contrib import messages
 from decimal import Decimal
 
+from core.exportacao import ExportacaoMixin
+from core.processamento import enfileirar
 from financeiro.services import CalculadorIndices
 from infraestrutura.models import Pasto
-from rebanho.models import Animal, BaixaAnimal
+from rebanho.models import BaixaAnimal
 
 from .filters import DespesaFilter, RegistroCustoFilter
 from .forms import CategoriaDespesaForm, DespesaForm, VendaForm
-from .models import  CategoriaDespesa, Despesa, RegistroDeCusto, CustoAnimalDetalhe,  Venda
-from .services import obter_detalhe_lucratividade_animais 
+from .models import  CategoriaDespesa, Despesa, RegistroDeCusto, Venda
+from .services import obter_desempenho_pasto, obter_detalhe_lucratividade_animais
 
 
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from django.db.models.functions import TruncMonth
 from collections import defaultdict
 import json
@@ -31,6 +33,18 @@ import json
 class DetalheLucratividadeAnimaisView(TemplateView):
     template_name = 'financeiro/detalhe_lucratividade.html'
 
+    def get(self, request, *args, **kwargs):
+        # Anos com muitas saídas: gera a planilha pela fila (financeiro/tarefas.py)
+        ano = request.GET.get('ano', '')
+        if request.GET.get('segundo_plano'):
+            processamento = enfileirar(
+                'financeiro.lucratividade',
+                {'ano': int(ano) if ano.isdigit() else timezone.now().year},
+                usuario=request.user,
+            )
+            return redirect(processamento)
+        return super().get(request, *args, **kwargs)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
@@ -117,11 +131,21 @@ def dashboard_fluxo_caixa(request):
     return render(request, 'financeiro/fluxo_caixa.html', context)
 
 
-class RegistroCustoListView(LoginRequiredMixin, ListView):
+class RegistroCustoListView(LoginRequiredMixin, ExportacaoMixin, ListView):
     model = RegistroDeCusto
     template_name = 'financeiro/custo_list.html'
     context_object_name = 'custos'
     paginate_by = 20
+    nome_arquivo_exportacao = 'custos'
+    colunas_exportacao = [
+        ('data_pagamento', 'Data'),
+        ('descricao', 'Descrição'),
+        ('tipo_custo__nome', 'Tipo de Custo'),
+        ('animal__identificacao', 'Animal'),
+        ('pasto__nome', 'Pasto'),
+        ('quantidade', 'Quantidade'),
+        ('valor_total', 'Valor Total (R$)'),
+    ]
 
     def get_queryset(self):
         # Pega os dados e aplica o filtro
@@ -139,11 +163,19 @@ class RegistroCustoListView(LoginRequiredMixin, ListView):
         return context
 
 
-class DespesaListView(LoginRequiredMixin, ListView):
+class DespesaListView(LoginRequiredMixin, ExportacaoMixin, ListView):
     model = Despesa
     template_name = 'financeiro/despesa_list.html' # Nome do seu arquivo HTML
     context_object_name = 'despesas'
     paginate_by = 20
+    nome_arquivo_exportacao = 'despesas'
+    colunas_exportacao = [
+        ('data_pagamento', 'Data'),
+        ('descricao', 'Descrição'),
+        ('categoria__nome', 'Categoria'),
+        ('tipo', 'Tipo'),
+        ('valor_total', 'Valor Total (R$)'),
+    ]
 
     def get_queryset(self):
         # 1. Pega todas as despesas
@@ -161,8 +193,8 @@ class DespesaListView(LoginRequiredMixin, ListView):
         # Adiciona o formulário de filtro ao contexto para aparecer no HTML
         context['filter'] = self.filter
         
-        # CÁLCULO DO TOTAL: Soma o campo 'valor' apenas dos itens que aparecem após o filtro
-        total = self.filter.qs.aggregate(Sum('valor'))['valor__sum']
+        # CÁLCULO DO TOTAL: Soma o campo 'valor_total' apenas dos itens que aparecem após o filtro
+        total = self.filter.qs.aggregate(Sum('valor_total'))['valor_total__sum']
         context['total_valor'] = total or 0
         
         return context
@@ -285,60 +317,10 @@ class RelatorioDesempenhoPastoView(LoginRequiredMixin, TemplateView):
             try:
                 pasto_selecionado = Pasto.objects.get(pk=pasto_id)
                 
-                # 2. Identificar animais (Melhorado com Prefetch para evitar N+1)
-                animais_no_pasto = Animal.objects.filter(
-                    movimentacoes_pasto__pasto_destino=pasto_selecionado,
-                    movimentacoes_pasto__data_entrada__lte=data_fim
-                ).filter(
-                    Q(movimentacoes_pasto__data_saida__gte=data_inicio) | 
-                    Q(movimentacoes_pasto__data_saida__isnull=True)
-                ).distinct()
-                
-                total_gpmd = 0
-                total_custo = 0
-                total_animais_com_dados = 0
-                
-                for animal in animais_no_pasto:
-                    # GPMD Médio
-                    gpmd_medio = animal.pesagens.filter(
-                        data_pesagem__range=[data_inicio, data_fim],
-                        gpmd__isnull=False
-                    ).aggregate(Avg('gpmd'))['gpmd__avg']
-                    
-                    # Último Peso
-                    ultima_pesagem = animal.pesagens.filter(
-                        data_pesagem__lte=data_fim
-                    ).order_by('-data_pesagem').first()
-                    
-                    # Custo Alocado
-                    custo_periodo = CustoAnimalDetalhe.objects.filter(
-                        animal=animal,
-                        registro_de_custo__data_pagamento__range=[data_inicio, data_fim]
-                    ).aggregate(total=Sum('valor_alocado'))['total'] or 0.0
-                    
-                    if gpmd_medio is not None:
-                        total_gpmd += gpmd_medio
-                        total_custo += custo_periodo
-                        total_animais_com_dados += 1
-                        
-                        animais_desempenho.append({
-                            'identificacao': animal.identificacao,
-                            'link': animal.get_absolute_url(),
-                            'gpmd_medio': gpmd_medio,
-                            'peso_atual': ultima_pesagem.peso if ultima_pesagem else None,
-                            'custo_periodo': custo_periodo,
-                        })
-
-                # 4. Resumo
-                if total_animais_com_dados > 0:
-                    relatorio_resumo = {
-                        'pasto_nome': pasto_selecionado.nome,
-                        'total_animais': total_animais_com_dados,
-                        'media_gpmd_lote': total_gpmd / total_animais_com_dados,
-                        'custo_total_lote': total_custo,
-                        'custo_medio_animal': total_custo / total_animais_com_dados,
-                    }
-                    
+                animais_desempenho, relatorio_resumo = obter_desempenho_pasto(
+                    pasto_selecionado, data_inicio, data_fim
+                )
+
             except Pasto.DoesNotExist:
                 pass
         
@@ -5,6 +5,7 @@ from django import forms
 from django.utils import timezone
 
 from rebanho.models import Animal
+from .lotacao import LotacaoService
 from .models import Pasto
 
 
@@ -34,6 +35,22 @@ class MovimentacaoPastoForm(forms.Form):
         label="Selecione os Animais para Mover"
     )
 
+    ignorar_lotacao = forms.BooleanField(
+        required=False,
+        label="Mover mesmo acima da capacidade do pasto",
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        pasto_destino = cleaned_data.get('pasto_destino')
+        animais = cleaned_data.get('animais')
+        if pasto_destino and animais and not cleaned_data.get('ignorar_lotacao'):
+            excesso = LotacaoService.verificar_capacidade(pasto_destino, animais)
+            if excesso:
+                self.add_error('ignorar_lotacao', LotacaoService.mensagem_excesso(excesso))
+        return cleaned_data
+
 
 class PastoForm(forms.ModelForm):
     class Meta:
@@ -64,3 +81,5 @@ class MudarPastoLoteForm(forms.Form):
         required=False,
         label="Observações da Movimentação"
     )
+    # Conferido na action, que conhece os animais
+    ignorar_lotacao = forms.BooleanField(required=False, label="Mover mesmo acima da capacidade do pasto")
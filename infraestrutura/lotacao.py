@@ -0,0 +1,233 @@
+# infraestrutura/lotacao.py
+"""
+Lotação das pastagens (UA e UA/ha).
+
+UA de um animal: peso / 450 kg; sem peso, pela idade e sexo (mesma regra de
+Animal.ua_atual). A ocupação de hoje sai de uma consulta agrupada sobre
+pasto_atual. A série diária (LotacaoDiaria) é reconstruída das estadias em
+MovimentacaoPasto e das pesagens (o peso do dia é o da última pesagem até
+ele), sem consultas por pasto ou por dia.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from manejo.models import Pesagem
+from rebanho.estoque import EstoqueService
+from rebanho.models import Animal
+
+from .models import LotacaoDiaria, MovimentacaoPasto, Pasto
+
+
+PESO_UA = Decimal('450')
+# Sem peso: (idade em dias abaixo da qual vale, UA)
+UA_POR_IDADE = [(270, Decimal('0.3')), (360, Decimal('0.4')), (720, Decimal('0.7'))]
+UA_FEMEA_ADULTA = Decimal('1.0')
+UA_MACHO_ADULTO = Decimal('1.5')
+
+# Ocupação/capacidade a partir da qual o pasto aparece "no limite"
+LIMITE_ATENCAO = Decimal('0.8')
+
+UM_DIA = timedelta(days=1)
+_DECIMAL_UA = DecimalField(max_digits=9, decimal_places=4)
+
+
+def ua_animal(peso, data_nascimento, sexo, data):
+    if peso:
+        return Decimal(peso) / PESO_UA
+    dias = (data - data_nascimento).days
+    for limite, ua in UA_POR_IDADE:
+        if dias < limite:
+            return ua
+    return UA_FEMEA_ADULTA if sexo == 'F' else UA_MACHO_ADULTO
+
+
+def expressao_ua(data, prefixo=''):
+    """
+    ua_animal em SQL, com o peso_atual do animal e a idade em `data`.
+    `prefixo` aponta para o animal a partir de outro modelo (ex.: 'animais_atuais__').
+    """
+    peso = f'{prefixo}peso_atual'
+    return Case(
+        # Cast: no SQLite um peso redondo fica inteiro e a divisão seria inteira
+        When(**{f'{peso}__gt': 0}, then=ExpressionWrapper(
+            Cast(peso, FloatField()) / Value(float(PESO_UA)), output_field=_DECIMAL_UA
+        )),
+        *[
+            When(**{f'{prefixo}data_nascimento__gt': data - timedelta(days=limite)}, then=Value(ua))
+            for limite, ua in UA_POR_IDADE
+        ],
+        When(**{f'{prefixo}sexo': 'F'}, then=Value(UA_FEMEA_ADULTA)),
+        default=Value(UA_MACHO_ADULTO),
+        output_field=_DECIMAL_UA,
+    )
+
+
+def nivel_lotacao(ua_total, capacidade):
+    if not capacidade:
+        return 'sem_capacidade'
+    ocupacao = Decimal(ua_total) / capacidade
+    if ocupacao > 1:
+        return 'acima'
+    return 'limite' if ocupacao >= LIMITE_ATENCAO else 'normal'
+
+
+class LotacaoService:
+
+    @staticmethod
+    def ocupacao_atual(pasto_ids=None, data=None):
+        """{pasto_id: {'cabecas', 'ua'}} dos animais vivos hoje em cada pasto (uma consulta)."""
+        data = data or timezone.localdate()
+        animais = Animal.objects.filter(situacao='VIVO', pasto_atual__isnull=False)
+        if pasto_ids is not None:
+            animais = animais.filter(pasto_atual__in=pasto_ids)
+        linhas = (
+            animais.order_by().values('pasto_atual')
+            .annotate(cabecas=Count('pk'), ua=Sum(expressao_ua(data)))
+        )
+        return {
+            linha['pasto_atual']: {'cabecas': linha['cabecas'], 'ua': linha['ua'].quantize(Decimal('0.01'))}
+            for linha in linhas
+        }
+
+    @staticmethod
+    def verificar_capacidade(pasto, animais, data=None):
+        """
+        Lotação do pasto se `animais` (queryset ou ids) entrarem nele. Retorna None se couber
+        (ou se o pasto não tem capacidade informada); senão um dict com o excesso.
+        """
+        if not pasto.capacidade_maxima_ua:
+            return None
+        data = data or timezone.localdate()
+        if hasattr(animais, 'values'):
+            entrando = Animal.objects.filter(pk__in=animais.values('pk'))
+        else:
+            entrando = Animal.objects.filter(pk__in=[getattr(animal, 'pk', animal) for animal in animais])
+
+        ua_atual = LotacaoService.ocupacao_atual([pasto.pk], data).get(pasto.pk, {}).get('ua', Decimal(0))
+        ua_entrando = entrando.exclude(pasto_atual=pasto).aggregate(
+            ua=Coalesce(Sum(expressao_ua(data)), Value(Decimal(0)), output_field=_DECIMAL_UA)
+        )['ua'].quantize(Decimal('0.01'))
+        ua_total = ua_atual + ua_entrando
+        if ua_total <= pasto.capacidade_maxima_ua:
+            return None
+        return {
+            'pasto': pasto,
+            'capacidade': pasto.capacidade_maxima_ua,
+            'ua_atual': ua_atual,
+            'ua_entrando': ua_entrando,
+            'ua_total': ua_total,
+            'excedente': ua_total - pasto.capacidade_maxima_ua,
+        }
+
+    @staticmethod
+    def mensagem_excesso(excesso):
+        return (
+            f"O pasto {excesso['pasto'].nome} ficará com {excesso['ua_total']} UA para uma capacidade de "
+            f"{excesso['capacidade']} UA ({excesso['excedente']} UA acima)."
+        )
+
+    @staticmethod
+    def calcular(inicio, fim, pasto_ids=None):
+        """LotacaoDiaria (sem gravar) de cada pasto com animais em cada dia de inicio a fim."""
+        estadias = MovimentacaoPasto.objects.filter(animal__isnull=False, data_entrada__lte=fim).filter(
+            Q(data_saida__isnull=True) | Q(data_saida__gt=inicio)
+        )
+        if pasto_ids is not None:
+            estadias = estadias.filter(pasto_destino__in=pasto_ids)
+        animal_ids = estadias.values('animal_id')
+
+        animais = {
+            pk: (nascimento, sexo, saida)
+            for pk, nascimento, sexo, saida in EstoqueService.com_saida(Animal.objects.filter(pk__in=animal_ids))
+            .values_list('pk', 'data_nascimento', 'sexo', 'data_saida')
+        }
+        pesagens = defaultdict(lambda: ([], []))
+        for animal_id, data, peso in (
+            Pesagem.objects.filter(animal_id__in=animal_ids, data_pesagem__lte=fim)
+            .order_by('animal_id', 'data_pesagem', 'pk').values_list('animal_id', 'data_pesagem', 'peso_kg')
+        ):
+            datas, pesos = pesagens[animal_id]
+            datas.append(data)
+            pesos.append(peso)
+
+        cabecas = defaultdict(int)
+        ua_total = defaultdict(Decimal)
+        for animal_id, pasto_id, entrada, saida in estadias.values_list(
+            'animal_id', 'pasto_destino_id', 'data_entrada', 'data_saida'
+        ):
+            nascimento, sexo, saida_rebanho = animais[animal_id]
+            # O dia da saída já conta no pasto seguinte (ou fora do rebanho)
+            ultimo = min(d for d in (fim, saida and saida - UM_DIA, saida_rebanho and saida_rebanho - UM_DIA) if d)
+            dia = max(entrada, inicio, nascimento)
+            datas, pesos = pesagens.get(animal_id, ([], []))
+            indice = bisect_right(datas, dia) - 1
+            while dia <= ultimo:
+                while indice + 1 < len(datas) and datas[indice + 1] <= dia:
+                    indice += 1
+                cabecas[(pasto_id, dia)] += 1
+                ua_total[(pasto_id, dia)] += ua_animal(pesos[indice] if indice >= 0 else None, nascimento, sexo, dia)
+                dia += UM_DIA
+
+        pastos = Pasto.objects.in_bulk({pasto_id for pasto_id, _ in cabecas})
+        serie = []
+        for (pasto_id, dia), total in cabecas.items():
+            pasto = pastos[pasto_id]
+            ua = ua_total[(pasto_id, dia)].quantize(Decimal('0.01'))
+            serie.append(LotacaoDiaria(
+                pasto_id=pasto_id,
+                data=dia,
+                cabecas=total,
+                ua_total=ua,
+                ua_por_ha=(ua / pasto.area_hectares).quantize(Decimal('0.01')) if pasto.area_hectares else None,
+                capacidade_ua=pasto.capacidade_maxima_ua,
+                acima_capacidade=nivel_lotacao(ua, pasto.capacidade_maxima_ua) == 'acima',
+            ))
+        return serie
+
+    @staticmethod
+    def recalcular(inicio, fim, pasto_ids=None):
+        """Refaz a série no período (e pastos) informado. Retorna as linhas gravadas."""
+        serie = LotacaoService.calcular(inicio, fim, pasto_ids)
+        with transaction.atomic():
+            antigas = LotacaoDiaria.objects.filter(data__range=(inicio, fim))
+            if pasto_ids is not None:
+                antigas = antigas.filter(pasto__in=pasto_ids)
+            antigas.delete()
+            LotacaoDiaria.objects.bulk_create(serie, batch_size=2000)
+        return len(serie)
+
+    @staticmethod
+    def mapa_calor(inicio, fim):
+        """
+        Matriz pasto x dia da série gravada (uma consulta + os pastos):
+        {'dias': [...], 'linhas': [{'pasto', 'celulas', 'ua_por_ha_max', 'dias_acima'}]}.
+        """
+        dias = [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+        por_pasto = defaultdict(dict)
+        for lotacao in LotacaoDiaria.objects.filter(data__range=(inicio, fim)).only(
+            'pasto_id', 'data', 'cabecas', 'ua_total', 'ua_por_ha', 'capacidade_ua'
+        ):
+            por_pasto[lotacao.pasto_id][lotacao.data] = {
+                'cabecas': lotacao.cabecas,
+                'ua_total': lotacao.ua_total,
+                'ua_por_ha': lotacao.ua_por_ha,
+                'nivel': nivel_lotacao(lotacao.ua_total, lotacao.capacidade_ua),
+            }
+
+        linhas = []
+        for pasto in Pasto.objects.order_by('nome'):
+            ocupacao = por_pasto.get(pasto.pk, {})
+            linhas.append({
+                'pasto': pasto,
+                'celulas': [ocupacao.get(dia) for dia in dias],
+                'ua_por_ha_max': max((c['ua_por_ha'] for c in ocupacao.values() if c['ua_por_ha'] is not None), default=None),
+                'dias_acima': sum(1 for c in ocupacao.values() if c['nivel'] == 'acima'),
+            })
+        return {'dias': dias, 'linhas': linhas}
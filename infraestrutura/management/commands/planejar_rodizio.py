@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from infraestrutura.rodizio import DESCANSO_MINIMO, DIAS_OCUPACAO, SEMANAS_PADRAO, RodizioService
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera o plano de rodízio dos lotes como tarefas de manejo (tipo 'RO'), trocando as pendentes. "
+        "Com --replanejar, só confere o plano atual e replaneja os lotes que saíram dele (rode diariamente)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', help="Primeiro dia do plano (AAAA-MM-DD, padrão: hoje).")
+        parser.add_argument('--semanas', type=int, default=SEMANAS_PADRAO, help="Horizonte do plano.")
+        parser.add_argument('--ocupacao', type=int, default=DIAS_OCUPACAO, help="Dias de cada lote em um pasto.")
+        parser.add_argument('--descanso', type=int, default=DESCANSO_MINIMO, help="Descanso mínimo do pasto em dias.")
+        parser.add_argument('--replanejar', action='store_true', help="Replaneja só os lotes fora do plano.")
+
+    def handle(self, *args, **options):
+        inicio = parse_date(options['inicio'] or '')
+        if options['replanejar']:
+            plano = RodizioService.replanejar(inicio, options['ocupacao'], options['descanso'])
+            if plano is None:
+                self.stdout.write("Todos os lotes seguem o plano.")
+                return
+        else:
+            plano = RodizioService.gerar(inicio, options['semanas'], options['ocupacao'], options['descanso'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rodízio de {plano['inicio']} a {plano['fim']}: {len(plano['movimentos'])} mudanças planejadas."
+        ))
+        for falta in plano['sem_pasto']:
+            self.stdout.write(self.style.WARNING(
+                f"{falta['data']}: nenhum pasto descansado comporta o lote {falta['lote'].nome} ({falta['ua']} UA)."
+            ))
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from infraestrutura.lotacao import LotacaoService
+
+
+class Command(BaseCommand):
+    help = (
+        "Refaz a série diária de lotação (LotacaoDiaria) a partir das movimentações de pasto e pesagens. "
+        "Rode diariamente (cron); use --inicio/--fim depois de lançamentos retroativos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', help="Primeiro dia (AAAA-MM-DD).")
+        parser.add_argument('--fim', help="Último dia (AAAA-MM-DD, padrão: hoje).")
+        parser.add_argument('--dias', type=int, default=30, help="Dias até o fim quando --inicio não é informado.")
+
+    def handle(self, *args, **options):
+        fim = parse_date(options['fim'] or '') or timezone.localdate()
+        inicio = parse_date(options['inicio'] or '') or fim - timedelta(days=options['dias'])
+        if inicio > fim:
+            raise CommandError("--inicio deve ser anterior a --fim.")
+        linhas = LotacaoService.recalcular(inicio, fim)
+        self.stdout.write(self.style.SUCCESS(f"Lotação de {inicio} a {fim}: {linhas} linhas (pasto/dia)."))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("infraestrutura", "0002_initial"),
+        ("rebanho", "0002_alter_animal_options_animal_data_ultima_pesagem_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="movimentacaopasto",
+            index=models.Index(
+                fields=["animal", "data_saida"], name="infraestrut_animal__fe90ed_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movimentacaopasto",
+            index=models.Index(
+                fields=["pasto_destino", "data_entrada", "data_saida"],
+                name="infraestrut_pasto_d_4999d4_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movimentacaopasto",
+            index=models.Index(
+                condition=models.Q(("data_saida__isnull", True)),
+                fields=["animal"],
+                name="mov_pasto_aberta_animal_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="movimentacaopasto",
+            index=models.Index(
+                condition=models.Q(("data_saida__isnull", True)),
+                fields=["pasto_destino"],
+                name="mov_pasto_aberta_pasto_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "infraestrutura",
+            "0003_movimentacaopasto_infraestrut_animal__fe90ed_idx_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LotacaoDiaria",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.DateField(verbose_name="Data")),
+                (
+                    "cabecas",
+                    models.PositiveIntegerField(default=0, verbose_name="Cabeças"),
+                ),
+                (
+                    "ua_total",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=9, verbose_name="UA Total"
+                    ),
+                ),
+                (
+                    "ua_por_ha",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=9,
+                        null=True,
+                        verbose_name="UA/ha",
+                    ),
+                ),
+                (
+                    "capacidade_ua",
+                    models.IntegerField(
+                        blank=True, null=True, verbose_name="Capacidade (UA) no Cálculo"
+                    ),
+                ),
+                (
+                    "acima_capacidade",
+                    models.BooleanField(
+                        default=False, verbose_name="Acima da Capacidade"
+                    ),
+                ),
+                (
+                    "pasto",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lotacao_diaria",
+                        to="infraestrutura.pasto",
+                        verbose_name="Pasto",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Lotação Diária",
+                "verbose_name_plural": "Lotação Diária",
+                "ordering": ["data", "pasto"],
+                "indexes": [
+                    models.Index(fields=["data"], name="infraestrut_data_acb5ef_idx"),
+                    models.Index(
+                        condition=models.Q(("acima_capacidade", True)),
+                        fields=["data"],
+                        name="lotacao_acima_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("pasto", "data"), name="lotacao_pasto_data_unica"
+                    )
+                ],
+            },
+        ),
+    ]
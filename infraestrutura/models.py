@@ -1,6 +1,42 @@
+from decimal import Decimal
+
 from django.db import models
-from django.db.models import Sum
+from django.db.models import Case, Count, DecimalField, DurationField, ExpressionWrapper, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+
+class PastoQuerySet(models.QuerySet):
+
+    def com_lotacao(self, data=None):
+        """
+        Anota total_animais, ua_total, ua_por_ha, ocupacao (UA / capacidade) e
+        dias_sem_manejo (timedelta) em uma única consulta agrupada. Só animais vivos.
+        """
+        from .lotacao import expressao_ua
 
+        data = data or timezone.localdate()
+        vivos = Q(animais_atuais__situacao='VIVO')
+        return self.annotate(
+            total_animais=Count('animais_atuais', filter=vivos),
+            ua_total=Coalesce(
+                Sum(expressao_ua(data, prefixo='animais_atuais__'), filter=vivos),
+                Value(Decimal(0)),
+                output_field=DecimalField(max_digits=9, decimal_places=2),
+            ),
+        ).annotate(
+            ua_por_ha=Case(
+                When(area_hectares__gt=0, then=Cast('ua_total', FloatField()) / Cast('area_hectares', FloatField())),
+                output_field=FloatField(),
+            ),
+            ocupacao=Case(
+                When(capacidade_maxima_ua__gt=0, then=Cast('ua_total', FloatField()) / F('capacidade_maxima_ua')),
+                output_field=FloatField(),
+            ),
+            dias_sem_manejo=ExpressionWrapper(
+                Value(data, output_field=models.DateField()) - F('data_ultimo_manejo'), output_field=DurationField()
+            ),
+        )
 
 
 class Pasto(models.Model):
@@ -18,12 +54,21 @@ class Pasto(models.Model):
         default=10,
     )
 
+    objects = PastoQuerySet.as_manager()
+
     @property
     def total_ua(self):
-        # Soma o peso de todos os animais no pasto e divide por 450
-        # Supõe que você tem uma relação entre Animal e Pasto
-        peso_total = self.get_animais_no_pasto().aggregate(total=Sum('ultimo_peso'))['total'] or 0
-        return peso_total / 450
+        """UA dos animais vivos hoje no pasto (mesma regra de Animal.ua_atual)."""
+        if hasattr(self, 'ua_total'):
+            return self.ua_total
+        from .lotacao import LotacaoService
+        return LotacaoService.ocupacao_atual([self.pk]).get(self.pk, {}).get('ua', Decimal(0))
+
+    @property
+    def nivel_lotacao(self):
+        """'normal', 'limite', 'acima' ou 'sem_capacidade' (ver lotacao.nivel_lotacao)."""
+        from .lotacao import nivel_lotacao
+        return nivel_lotacao(self.total_ua, self.capacidade_maxima_ua)
 
     def __str__(self):
         return self.nome
@@ -32,7 +77,10 @@ class Pasto(models.Model):
         return self.animais_atuais.all()
         
     def get_total_animais(self):
-        return self.get_animais_no_pasto().count()
+        # Use Pasto.objects.com_lotacao() nas listagens para não contar pasto a pasto
+        if hasattr(self, 'total_animais'):
+            return self.total_animais
+        return self.get_animais_no_pasto().filter(situacao='VIVO').count()
 
     class Meta:
         verbose_name = "Pasto/Piquete"
@@ -78,8 +126,59 @@ class MovimentacaoPasto(models.Model):
         verbose_name = "Movimentação de Pasto"
         verbose_name_plural = "Movimentações de Pasto"
         ordering = ['-data_entrada']
+        indexes = [
+            # Fechamento da estadia anterior do animal
+            models.Index(fields=['animal', 'data_saida']),
+            # Ocupação de um pasto em um período
+            models.Index(fields=['pasto_destino', 'data_entrada', 'data_saida']),
+            # Estadias em aberto (só a atual de cada animal)
+            models.Index(
+                fields=['animal'],
+                condition=Q(data_saida__isnull=True),
+                name='mov_pasto_aberta_animal_idx',
+            ),
+            models.Index(
+                fields=['pasto_destino'],
+                condition=Q(data_saida__isnull=True),
+                name='mov_pasto_aberta_pasto_idx',
+            ),
+        ]
 
     def __str__(self):
         saida_str = f"até {self.data_saida}" if self.data_saida else " - ATUAL"
         return f"{self.animal.identificacao}: {self.pasto_destino} ({self.data_entrada} {saida_str})"
 
+
+class LotacaoDiaria(models.Model):
+    """
+    Lotação de cada pasto por dia, a partir das estadias (MovimentacaoPasto) e
+    do peso dos animais. Só dias com animais. Mantida por LotacaoService.
+    """
+    pasto = models.ForeignKey(
+        Pasto,
+        on_delete=models.CASCADE,
+        related_name='lotacao_diaria',
+        verbose_name="Pasto"
+    )
+    data = models.DateField(verbose_name="Data")
+    cabecas = models.PositiveIntegerField(default=0, verbose_name="Cabeças")
+    ua_total = models.DecimalField(max_digits=9, decimal_places=2, verbose_name="UA Total")
+    ua_por_ha = models.DecimalField(max_digits=9, decimal_places=2, null=True, blank=True, verbose_name="UA/ha")
+    capacidade_ua = models.IntegerField(null=True, blank=True, verbose_name="Capacidade (UA) no Cálculo")
+    acima_capacidade = models.BooleanField(default=False, verbose_name="Acima da Capacidade")
+
+    class Meta:
+        verbose_name = "Lotação Diária"
+        verbose_name_plural = "Lotação Diária"
+        ordering = ['data', 'pasto']
+        constraints = [
+            models.UniqueConstraint(fields=['pasto', 'data'], name='lotacao_pasto_data_unica'),
+        ]
+        indexes = [
+            models.Index(fields=['data']),
+            models.Index(fields=['data'], condition=Q(acima_capacidade=True), name='lotacao_acima_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.pasto} em {self.data}: {self.ua_total} UA"
+
@@ -0,0 +1,257 @@
+# infraestrutura/rodizio.py
+"""
+Planejamento do rodízio de pastagens.
+
+Cada lote fica `dias_ocupacao` dias em um pasto e o pasto descansa ao menos
+`descanso` dias antes de receber outro lote. O plano é guloso: os lotes são
+atendidos em ordem de data de saída (os de mais UA primeiro no mesmo dia) e
+cada um vai para o pasto descansado de menor folga de capacidade que o
+comporta (empate: o que está parado há mais tempo). Sem pasto livre, o lote
+fica onde está e tenta de novo no período seguinte.
+
+O plano vira TarefaManejo do tipo 'RO' (lote, pasto_origem -> pasto). Quando
+um lote sai do plano (foi para outro pasto ou a mudança atrasou), só ele é
+replanejado; as tarefas pendentes dos demais lotes ficam como reservas.
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+
+from manejo.models import TarefaManejo
+from rebanho.models import Animal, Lote
+
+from .lotacao import expressao_ua
+from .models import MovimentacaoPasto, Pasto
+
+
+DIAS_OCUPACAO = 7
+DESCANSO_MINIMO = 35
+SEMANAS_PADRAO = 8
+# Capacidade estimada (UA/ha) dos pastos sem capacidade_maxima_ua
+UA_HA_PADRAO = Decimal('1.0')
+# Dias de atraso tolerados antes de considerar que o lote saiu do plano
+TOLERANCIA_ATRASO = 2
+
+
+def _cabe(ocupacoes, entrada, saida, descanso):
+    """O pasto pode receber um lote de entrada a saida sem encurtar o descanso de ninguém."""
+    for inicio, fim in ocupacoes:
+        if fim is None:
+            return False
+        if not (saida + descanso <= inicio or fim + descanso <= entrada):
+            return False
+    return True
+
+
+class RodizioService:
+
+    @staticmethod
+    def _lotes(data, lote_ids=None):
+        """Lotes com animais vivos: {id: {'lote', 'ua', 'entrada'}} (entrada = início da estadia atual)."""
+        ua = dict(
+            Animal.objects.filter(situacao='VIVO', lote_atual__isnull=False).order_by()
+            .values('lote_atual').annotate(ua=Sum(expressao_ua(data))).values_list('lote_atual', 'ua')
+        )
+        entradas = dict(
+            MovimentacaoPasto.objects.filter(
+                data_saida__isnull=True, animal__situacao='VIVO',
+                pasto_destino=F('animal__lote_atual__pasto_atual'),
+            ).order_by().values('animal__lote_atual').annotate(entrada=Max('data_entrada'))
+            .values_list('animal__lote_atual', 'entrada')
+        )
+        lotes = Lote.objects.filter(pk__in=ua.keys())
+        if lote_ids is not None:
+            lotes = lotes.filter(pk__in=lote_ids)
+        return {
+            lote.pk: {'lote': lote, 'ua': ua[lote.pk].quantize(Decimal('0.01')), 'entrada': entradas.get(lote.pk)}
+            for lote in lotes.select_related('pasto_atual')
+        }
+
+    @staticmethod
+    def _ocupacoes(data, planejados, dias_ocupacao, reservas):
+        """
+        {pasto_id: [(entrada, saida)]} já comprometidos (saida None = sem data para sair):
+        último uso, pastos com animais fora dos lotes planejados e, com `reservas`, as
+        tarefas pendentes dos outros lotes.
+        """
+        ocupacoes = defaultdict(list)
+        for pasto_id, ultima_saida in (
+            MovimentacaoPasto.objects.filter(data_saida__isnull=False).order_by()
+            .values('pasto_destino').annotate(ultima=Max('data_saida')).values_list('pasto_destino', 'ultima')
+        ):
+            ocupacoes[pasto_id].append((ultima_saida, ultima_saida))
+
+        # Animais que não vão sair pelo plano prendem o pasto
+        outros = Animal.objects.filter(situacao='VIVO', pasto_atual__isnull=False).exclude(
+            lote_atual__in=list(planejados)
+        )
+        for pasto_id in outros.order_by().values_list('pasto_atual', flat=True).distinct():
+            ocupacoes[pasto_id].append((data, None))
+
+        if not reservas:
+            return ocupacoes
+        # Estadias previstas pelas tarefas pendentes dos lotes fora do replanejamento
+        por_lote = defaultdict(list)
+        for tarefa in TarefaManejo.objects.filter(
+            tipo='RO', concluida=False, lote__isnull=False
+        ).exclude(lote__in=list(planejados)).order_by('data_prevista', 'pk'):
+            por_lote[tarefa.lote_id].append(tarefa)
+        for tarefas in por_lote.values():
+            for atual, seguinte in zip(tarefas, tarefas[1:] + [None]):
+                saida = seguinte.data_prevista if seguinte else atual.data_prevista + timedelta(days=dias_ocupacao)
+                ocupacoes[atual.pasto_id].append((atual.data_prevista, saida))
+            if tarefas[0].pasto_origem_id:
+                ocupacoes[tarefas[0].pasto_origem_id].append((data, tarefas[0].data_prevista))
+        return ocupacoes
+
+    @staticmethod
+    def planejar(inicio=None, semanas=SEMANAS_PADRAO, dias_ocupacao=DIAS_OCUPACAO, descanso=DESCANSO_MINIMO,
+                 lote_ids=None, fim=None):
+        """
+        Plano (sem gravar) de `inicio` até `semanas` à frente (ou `fim`). Com `lote_ids`, planeja
+        só esses lotes. Retorna {'inicio', 'fim', 'movimentos', 'sem_pasto'}; cada movimento é
+        {'data', 'lote', 'ua', 'origem', 'destino', 'descanso'}.
+        """
+        inicio = inicio or timezone.localdate()
+        fim = fim or inicio + timedelta(weeks=semanas)
+        ocupacao = timedelta(days=dias_ocupacao)
+        descanso = timedelta(days=descanso)
+
+        lotes = RodizioService._lotes(inicio, lote_ids)
+        ocupacoes = RodizioService._ocupacoes(inicio, lotes, dias_ocupacao, reservas=lote_ids is not None)
+        pastos = {}
+        for pasto in Pasto.objects.all():
+            capacidade = pasto.capacidade_maxima_ua or (pasto.area_hectares or 0) * UA_HA_PADRAO
+            pastos[pasto.pk] = (pasto, Decimal(capacidade))
+
+        # (data da próxima mudança, -UA, lote): lotes recém-chegados cumprem a ocupação antes
+        fila = []
+        for lote_id, info in lotes.items():
+            atual = info['lote'].pasto_atual_id
+            entrada = min(info['entrada'] or inicio, inicio)
+            if atual:
+                ocupacoes[atual].append((entrada, None))
+            saida = max(inicio, entrada + ocupacao) if info['entrada'] else inicio
+            heapq.heappush(fila, (saida, -info['ua'], lote_id, atual, entrada))
+
+        movimentos, sem_pasto = [], []
+        while fila:
+            data, ua_negativa, lote_id, atual, entrada = heapq.heappop(fila)
+            if data > fim:
+                continue
+            ua = -ua_negativa
+            saida = data + ocupacao
+            if atual:
+                # Fecha a estadia atual em `data` para a escolha (o próprio lote não conta contra si)
+                aberta = ocupacoes[atual].index((entrada, None))
+                ocupacoes[atual][aberta] = (entrada, data)
+
+            melhor = None
+            for pasto_id, (pasto, capacidade) in pastos.items():
+                if pasto_id == atual or capacidade < ua or not _cabe(ocupacoes[pasto_id], data, saida, descanso):
+                    continue
+                ultimo_uso = max((f for _, f in ocupacoes[pasto_id] if f <= data), default=None)
+                chave = (capacidade - ua, ultimo_uso or data - timedelta(days=3650))
+                if melhor is None or chave < melhor[0]:
+                    melhor = (chave, pasto_id, ultimo_uso)
+
+            if melhor is None:
+                sem_pasto.append({'data': data, 'lote': lotes[lote_id]['lote'], 'ua': ua})
+                if atual:
+                    ocupacoes[atual][aberta] = (entrada, None)
+                heapq.heappush(fila, (saida, ua_negativa, lote_id, atual, entrada))
+                continue
+
+            _, destino, ultimo_uso = melhor
+            ocupacoes[destino].append((data, None))
+            movimentos.append({
+                'data': data,
+                'lote': lotes[lote_id]['lote'],
+                'ua': ua,
+                'origem': pastos[atual][0] if atual else None,
+                'destino': pastos[destino][0],
+                'descanso': (data - ultimo_uso).days if ultimo_uso else None,
+            })
+            heapq.heappush(fila, (saida, ua_negativa, lote_id, destino, data))
+
+        movimentos.sort(key=lambda m: (m['data'], m['lote'].nome))
+        return {'inicio': inicio, 'fim': fim, 'movimentos': movimentos, 'sem_pasto': sem_pasto}
+
+    @staticmethod
+    def tarefas(plano):
+        """TarefaManejo 'RO' (não gravadas) de cada movimento do plano."""
+        tarefas = []
+        for mov in plano['movimentos']:
+            origem = mov['origem'].nome if mov['origem'] else 'sem pasto'
+            descanso = f"{mov['descanso']} dias de descanso" if mov['descanso'] is not None else "sem uso registrado"
+            tarefas.append(TarefaManejo(
+                titulo=f"Rodízio: {mov['lote'].nome} -> {mov['destino'].nome}"[:200],
+                data_prevista=mov['data'],
+                tipo='RO',
+                descricao=f"Lote {mov['lote'].nome} ({mov['ua']} UA) sai de {origem}. "
+                          f"{mov['destino'].nome}: {descanso}.",
+                lote=mov['lote'],
+                pasto_origem=mov['origem'],
+                pasto=mov['destino'],
+            ))
+        return tarefas
+
+    @staticmethod
+    def gerar(inicio=None, semanas=SEMANAS_PADRAO, dias_ocupacao=DIAS_OCUPACAO, descanso=DESCANSO_MINIMO,
+              lote_ids=None, fim=None):
+        """Troca as tarefas de rodízio pendentes dos lotes planejados pelo plano novo."""
+        plano = RodizioService.planejar(inicio, semanas, dias_ocupacao, descanso, lote_ids, fim)
+        with transaction.atomic():
+            pendentes = TarefaManejo.objects.filter(tipo='RO', concluida=False, lote__isnull=False)
+            if lote_ids is not None:
+                pendentes = pendentes.filter(lote__in=lote_ids)
+            pendentes.delete()
+            TarefaManejo.objects.bulk_create(RodizioService.tarefas(plano), batch_size=1000)
+        return plano
+
+    @staticmethod
+    def conferir(data=None):
+        """
+        Compara o pasto atual de cada lote com a primeira tarefa pendente: marca como
+        concluídas as mudanças feitas e retorna os ids dos lotes fora do plano.
+        """
+        data = data or timezone.localdate()
+        pendentes = defaultdict(list)
+        for tarefa in TarefaManejo.objects.filter(
+            tipo='RO', concluida=False, lote__isnull=False
+        ).select_related('lote').order_by('data_prevista', 'pk'):
+            pendentes[tarefa.lote_id].append(tarefa)
+
+        concluidas, desvios = [], set()
+        for lote_id, tarefas in pendentes.items():
+            atual = tarefas[0].lote.pasto_atual_id
+            for tarefa in tarefas:
+                if tarefa.pasto_id == atual and tarefa.data_prevista <= data + timedelta(days=TOLERANCIA_ATRASO):
+                    concluidas.append(tarefa.pk)
+                    continue
+                no_plano = tarefa.pasto_origem_id == atual
+                if not no_plano or tarefa.data_prevista < data - timedelta(days=TOLERANCIA_ATRASO):
+                    desvios.add(lote_id)
+                break
+        TarefaManejo.objects.filter(pk__in=concluidas).update(concluida=True)
+        return desvios
+
+    @staticmethod
+    def replanejar(data=None, dias_ocupacao=DIAS_OCUPACAO, descanso=DESCANSO_MINIMO):
+        """Replaneja só os lotes fora do plano, até o fim do plano atual. Retorna o plano ou None."""
+        data = data or timezone.localdate()
+        desvios = RodizioService.conferir(data)
+        if not desvios:
+            return None
+        fim = TarefaManejo.objects.filter(tipo='RO', concluida=False, lote__isnull=False).aggregate(
+            fim=Max('data_prevista')
+        )['fim']
+        return RodizioService.gerar(
+            data, dias_ocupacao=dias_ocupacao, descanso=descanso, lote_ids=desvios,
+            fim=max(fim, data) if fim else None,
+        )
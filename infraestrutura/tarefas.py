@@ -0,0 +1,16 @@
+# infraestrutura/tarefas.py
+"""Tarefas de segundo plano da infraestrutura (ver core/processamento.py)."""
+from django.utils.dateparse import parse_date
+
+from core.processamento import tarefa
+
+from .lotacao import LotacaoService
+
+
+@tarefa('infraestrutura.lotacao', 'Série diária de lotação dos pastos')
+def recalcular_lotacao(execucao):
+    inicio = parse_date(execucao.parametros['inicio'])
+    fim = parse_date(execucao.parametros['fim'])
+    execucao.progresso(5, mensagem=f"Recalculando a lotação de {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}...", forcar=True)
+    linhas = LotacaoService.recalcular(inicio, fim)
+    return {'inicio': inicio.isoformat(), 'fim': fim.isoformat(), 'linhas': linhas}
@@ -1,3 +1,234 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.perfil import OrcamentoConsultasMixin
+from financeiro.models import Venda
+from manejo.models import Pesagem, TarefaManejo
+from rebanho.models import Animal, Lote
+
+from .lotacao import LotacaoService, expressao_ua
+from .models import LotacaoDiaria, MovimentacaoPasto, Pasto
+from .rodizio import RodizioService
+
+
+class LotacaoTests(OrcamentoConsultasMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pasto_a = Pasto.objects.create(nome='A', area_hectares=Decimal('2'), capacidade_maxima_ua=2)
+        cls.pasto_b = Pasto.objects.create(nome='B', area_hectares=Decimal('5'), capacidade_maxima_ua=10)
+        User.objects.create_user('gerente', password='senha')
+
+    def setUp(self):
+        self.client.login(username='gerente', password='senha')
+
+    def test_ua_em_sql_igual_a_do_modelo(self):
+        hoje = timezone.localdate()
+        Animal.objects.bulk_create([
+            Animal(identificacao='U-1', data_nascimento=hoje - timedelta(days=100), sexo='M'),
+            Animal(identificacao='U-2', data_nascimento=hoje - timedelta(days=300), sexo='F'),
+            Animal(identificacao='U-3', data_nascimento=hoje - timedelta(days=500), sexo='M'),
+            Animal(identificacao='U-4', data_nascimento=hoje - timedelta(days=2000), sexo='F'),
+            Animal(identificacao='U-5', data_nascimento=hoje - timedelta(days=2000), sexo='M'),
+            Animal(identificacao='U-6', data_nascimento=hoje - timedelta(days=900), sexo='M', peso_atual=Decimal('495')),
+        ])
+        for animal in Animal.objects.annotate(ua=expressao_ua(hoje)):
+            self.assertEqual(animal.ua.quantize(Decimal('0.0001')), animal.ua_atual.quantize(Decimal('0.0001')), animal)
+
+    def test_serie_diaria_segue_estadias_pesagens_e_saidas(self):
+        inicio = date(2024, 1, 1)
+        boi = Animal.objects.create(identificacao='L-1', data_nascimento=date(2020, 1, 1), sexo='M')
+        MovimentacaoPasto.objects.create(animal=boi, pasto_destino=self.pasto_a, data_entrada=inicio)
+        MovimentacaoPasto.objects.create(animal=boi, pasto_origem=self.pasto_a, pasto_destino=self.pasto_b, data_entrada=inicio + timedelta(days=10))
+        Pesagem.objects.create(animal=boi, data_pesagem=inicio + timedelta(days=5), peso_kg=Decimal('450'))
+        Venda.objects.create(animal=boi, valor_total=Decimal('5000'), origem_pagador='Frigorífico', data_entrada=inicio + timedelta(days=20))
+
+        LotacaoService.recalcular(inicio, inicio + timedelta(days=30))
+        serie = {(dia.pasto_id, dia.data): dia for dia in LotacaoDiaria.objects.all()}
+
+        # Sem pesagem: macho adulto (1,5 UA); depois, 450 kg = 1 UA
+        self.assertEqual(serie[(self.pasto_a.pk, inicio)].ua_total, Decimal('1.50'))
+        self.assertTrue(serie[(self.pasto_a.pk, inicio)].acima_capacidade is False)
+        self.assertEqual(serie[(self.pasto_a.pk, inicio + timedelta(days=5))].ua_total, Decimal('1.00'))
+        self.assertEqual(serie[(self.pasto_a.pk, inicio + timedelta(days=5))].ua_por_ha, Decimal('0.50'))
+        # Dia da mudança já conta no pasto B; dia da venda já está fora
+        self.assertNotIn((self.pasto_a.pk, inicio + timedelta(days=10)), serie)
+        self.assertIn((self.pasto_b.pk, inicio + timedelta(days=10)), serie)
+        self.assertIn((self.pasto_b.pk, inicio + timedelta(days=19)), serie)
+        self.assertNotIn((self.pasto_b.pk, inicio + timedelta(days=20)), serie)
+        self.assertEqual(len(serie), 20)
+
+    def test_movimentacao_acima_da_capacidade_pede_confirmacao(self):
+        hoje = timezone.localdate()
+        animais = Animal.objects.bulk_create([
+            Animal(identificacao=f'C-{i}', data_nascimento=date(2018, 1, 1), sexo='M') for i in range(2)
+        ])
+        dados = {
+            'pasto_destino': self.pasto_a.pk,
+            'data_entrada': hoje.isoformat(),
+            'animais': [animal.pk for animal in animais],
+        }
+        response = self.client.post(reverse('rebanho:movimentar_animais'), dados)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('3.00 UA', str(response.context['form'].errors['ignorar_lotacao']))
+        self.assertFalse(MovimentacaoPasto.objects.exists())
+
+        response = self.client.post(reverse('rebanho:movimentar_animais'), {**dados, 'ignorar_lotacao': 'on'})
+        self.assertRedirects(response, reverse('rebanho:movimentar_animais'), fetch_redirect_response=False)
+        self.assertEqual(self.pasto_a.total_ua, Decimal('3.00'))
+
+    def test_mapa_de_calor_sem_consulta_por_pasto(self):
+        Pasto.objects.bulk_create([Pasto(nome=f'P{i}', area_hectares=3) for i in range(20)])
+        boi = Animal.objects.create(identificacao='M-1', data_nascimento=date(2020, 1, 1), sexo='M')
+        MovimentacaoPasto.objects.create(animal=boi, pasto_destino=self.pasto_a, data_entrada=timezone.localdate() - timedelta(days=5))
+        LotacaoService.recalcular(timezone.localdate() - timedelta(days=30), timezone.localdate())
+
+        response = self.assertOrcamentoConsultas(6, reverse('lotacao_mapa'))
+        linha = next(linha for linha in response.context['linhas'] if linha['pasto'] == self.pasto_a)
+        self.assertEqual(sum(1 for celula in linha['celulas'] if celula), 6)
+
+        # Data impossível cai no período padrão em vez de derrubar a tela
+        response = self.client.get(reverse('lotacao_mapa'), {'inicio': '2024-02-30', 'fim': '2024-13-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['fim'], timezone.localdate())
+
+
+class PastoListagemTests(OrcamentoConsultasMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        hoje = timezone.localdate()
+        cls.pasto = Pasto.objects.create(
+            nome='Cocho', area_hectares=Decimal('2'), capacidade_maxima_ua=2, data_ultimo_manejo=hoje - timedelta(days=12)
+        )
+        Pasto.objects.create(nome='Vazio', area_hectares=Decimal('3'), capacidade_maxima_ua=5)
+        Animal.objects.bulk_create([
+            Animal(identificacao='P-1', data_nascimento=date(2018, 1, 1), sexo='M', pasto_atual=cls.pasto),
+            Animal(identificacao='P-2', data_nascimento=date(2018, 1, 1), sexo='F', pasto_atual=cls.pasto, peso_atual=Decimal('540')),
+            Animal(identificacao='P-3', data_nascimento=date(2018, 1, 1), sexo='F', pasto_atual=cls.pasto, situacao='MORTO'),
+        ])
+
+    def test_anotacoes_de_lotacao(self):
+        pastos = {pasto.nome: pasto for pasto in Pasto.objects.com_lotacao()}
+        cocho, vazio = pastos['Cocho'], pastos['Vazio']
+        # 1,5 (macho adulto sem peso) + 540/450; o morto fica de fora
+        self.assertEqual(cocho.total_animais, 2)
+        self.assertEqual(cocho.ua_total, Decimal('2.70'))
+        self.assertAlmostEqual(cocho.ua_por_ha, 1.35)
+        self.assertAlmostEqual(cocho.ocupacao, 1.35)
+        self.assertEqual(cocho.nivel_lotacao, 'acima')
+        self.assertEqual(cocho.dias_sem_manejo.days, 12)
+        self.assertEqual((vazio.total_animais, vazio.ua_total, vazio.nivel_lotacao), (0, Decimal('0'), 'normal'))
+        self.assertIsNone(vazio.dias_sem_manejo)
+
+    def test_listagem_sem_consulta_por_pasto(self):
+        Pasto.objects.bulk_create([Pasto(nome=f'Extra {i}', area_hectares=4) for i in range(30)])
+        response = self.assertOrcamentoConsultas(4, reverse('pasto_list'))
+        self.assertContains(response, 'Acima (135%)')
+
+    def test_detalhe_pagina_os_animais(self):
+        Animal.objects.bulk_create([
+            Animal(identificacao=f'D-{i:02d}', data_nascimento=date(2020, 1, 1), sexo='F', pasto_atual=self.pasto)
+            for i in range(30)
+        ])
+        MovimentacaoPasto.objects.create(animal=Animal.objects.get(identificacao='P-1'), pasto_destino=self.pasto, data_entrada=date(2024, 3, 1))
+        response = self.assertOrcamentoConsultas(8, reverse('pasto_detail', args=[self.pasto.pk]))
+        self.assertEqual(len(response.context['animais_no_pasto']), 25)
+        self.assertEqual(response.context['page_obj'].paginator.count, 32)
+        self.assertEqual(len(response.context['movimentacoes_recentes']), 1)
+
+        response = self.client.get(reverse('pasto_detail', args=[self.pasto.pk]), {'page': 2})
+        self.assertEqual(len(response.context['animais_no_pasto']), 7)
+
+
+class RodizioTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.inicio = date(2025, 1, 6)
+        cls.pastos = Pasto.objects.bulk_create(
+            [Pasto(nome=f'R{i}', area_hectares=5, capacidade_maxima_ua=5) for i in range(6)]
+            + [Pasto(nome='Grande', area_hectares=20, capacidade_maxima_ua=20)]
+        )
+        cls.lotes = []
+        for nome, cabecas, pasto in (('Vacas', 10, cls.pastos[-1]), ('Garrotes', 2, cls.pastos[0]), ('Touros', 1, None)):
+            lote = Lote.objects.create(nome=nome, finalidade='OUTRO', pasto_atual=pasto)
+            Animal.objects.bulk_create([
+                Animal(identificacao=f'{nome}-{i}', data_nascimento=date(2018, 1, 1), sexo='M', lote_atual=lote, pasto_atual=pasto)
+                for i in range(cabecas)
+            ])
+            cls.lotes.append(lote)
+
+    def mover(self, lote, pasto, data):
+        """Como a tarefa rebanho.mudar_pasto_lote, sem passar pela fila."""
+        Lote.objects.filter(pk=lote.pk).update(pasto_atual=pasto)
+        for animal in lote.animais.all():
+            MovimentacaoPasto.objects.create(animal=animal, pasto_origem=animal.pasto_atual, pasto_destino=pasto, data_entrada=data)
+        lote.animais.update(pasto_atual=pasto)
+
+    def verificar_plano(self, dias_ocupacao=7, descanso=14):
+        """Nenhum pasto do plano pendente recebe lote antes do descanso nem acima da capacidade."""
+        estadias = {}
+        for tarefa in TarefaManejo.objects.filter(tipo='RO', concluida=False).order_by('data_prevista'):
+            estadias.setdefault(tarefa.pasto_id, []).append((tarefa.data_prevista, tarefa.lote))
+        ua = {lote.pk: sum(a.ua_atual for a in lote.animais.all()) for lote in self.lotes}
+        for pasto_id, entradas in estadias.items():
+            pasto = Pasto.objects.get(pk=pasto_id)
+            for (anterior, _), (seguinte, lote) in zip(entradas, entradas[1:]):
+                self.assertGreaterEqual((seguinte - anterior).days, dias_ocupacao + descanso, pasto)
+            for _, lote in entradas:
+                self.assertLessEqual(ua[lote.pk], pasto.capacidade_maxima_ua)
+
+    def test_plano_respeita_descanso_e_capacidade(self):
+        plano = RodizioService.gerar(self.inicio, semanas=6, dias_ocupacao=7, descanso=14)
+        self.verificar_plano()
+        self.assertEqual(plano['movimentos'][0]['data'], self.inicio)
+        # 15 UA das vacas só cabem no pasto grande: ficam nele e aparecem como sem pasto
+        self.assertFalse(TarefaManejo.objects.filter(lote=self.lotes[0]).exists())
+        self.assertTrue(all(falta['lote'] == self.lotes[0] for falta in plano['sem_pasto']))
+        # Garrotes e touros mudam toda semana
+        self.assertEqual(TarefaManejo.objects.filter(lote=self.lotes[1]).count(), 7)
+        primeira = TarefaManejo.objects.filter(lote=self.lotes[1]).first()
+        self.assertEqual(primeira.pasto_origem, self.pastos[0])
+
+    def test_desvio_replaneja_so_o_lote(self):
+        RodizioService.gerar(self.inicio, semanas=6, dias_ocupacao=7, descanso=14)
+        garrotes, touros = self.lotes[1], self.lotes[2]
+        tarefas_touros = set(TarefaManejo.objects.filter(lote=touros).values_list('pk', 'pasto', 'data_prevista'))
+
+        # Os dois lotes vão para onde o plano mandou: tarefas concluídas, nada replanejado
+        primeira = TarefaManejo.objects.filter(lote=garrotes).first()
+        self.mover(garrotes, primeira.pasto, self.inicio)
+        self.mover(touros, TarefaManejo.objects.filter(lote=touros).first().pasto, self.inicio)
+        self.assertIsNone(RodizioService.replanejar(self.inicio, descanso=14))
+        primeira.refresh_from_db()
+        self.assertTrue(primeira.concluida)
+
+        # Depois vão para um pasto fora do plano
+        segunda = TarefaManejo.objects.filter(lote=garrotes, concluida=False).first()
+        fora = next(p for p in self.pastos[:-1] if p.pk not in (segunda.pasto_id, segunda.pasto_origem_id))
+        self.mover(garrotes, fora, segunda.data_prevista - timedelta(days=1))
+        plano = RodizioService.replanejar(segunda.data_prevista - timedelta(days=1), descanso=14)
+
+        self.assertEqual({mov['lote'] for mov in plano['movimentos']}, {garrotes})
+        self.assertEqual(set(TarefaManejo.objects.filter(lote=touros).values_list('pk', 'pasto', 'data_prevista')), tarefas_touros)
+        self.assertEqual(TarefaManejo.objects.filter(lote=touros, concluida=True).count(), 1)
+        self.assertEqual(TarefaManejo.objects.filter(lote=garrotes, concluida=False).first().pasto_origem, fora)
+        self.verificar_plano()
 
-# Create your tests here.
+    def test_fazenda_grande_sem_consulta_por_lote(self):
+        pastos = Pasto.objects.bulk_create([Pasto(nome=f'G{i}', area_hectares=10, capacidade_maxima_ua=12) for i in range(200)])
+        for i in range(50):
+            lote = Lote.objects.create(nome=f'L{i}', finalidade='RECRIA', pasto_atual=pastos[i])
+            Animal.objects.create(identificacao=f'L{i}', data_nascimento=date(2018, 1, 1), sexo='F', lote_atual=lote, pasto_atual=pastos[i])
+        with self.assertNumQueries(6):
+            plano = RodizioService.planejar(self.inicio, semanas=12, descanso=14)
+        # 50 lotes novos + garrotes e touros, uma mudança por semana
+        self.assertEqual(len(plano['movimentos']), 52 * 13)
+        # Só as vacas (15 UA) não cabem em nenhum pasto
+        self.assertEqual({falta['lote'].nome for falta in plano['sem_pasto']}, {'Vacas'})
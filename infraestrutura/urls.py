@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import  PastoListView, PastoDetailView, PastoCreateView, PastoUpdateView, relatorio_desempenho_pasto
+from .views import  LotacaoMapaView, PastoListView, PastoDetailView, PastoCreateView, PastoUpdateView
 
 urlpatterns = [
     
@@ -7,6 +7,6 @@ urlpatterns = [
     path('pasto/<int:pk>/', PastoDetailView.as_view(), name='pasto_detail'),
     path('pasto/novo/', PastoCreateView.as_view(), name='pasto_create'),
     path('pasto/<int:pk>/editar/', PastoUpdateView.as_view(), name='pasto_update'),
-    path('relatorios/desempenho-pasto/', relatorio_desempenho_pasto, name='relatorio_desempenho_pasto'),
+    path('pastos/lotacao/', LotacaoMapaView.as_view(), name='lotacao_mapa'),
 
 ]
\ No newline at end of file
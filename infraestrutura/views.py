@@ -1,117 +1,25 @@
-from django.shortcuts import render,  get_object_or_404
+from datetime import timedelta
+
+from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy, reverse
 from django.contrib import messages
-from django.views.generic import ListView, DetailView,  CreateView, UpdateView, FormView
-from django.contrib.auth.decorators import login_required # Importe o decorador
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Avg,  Q, Sum
-from datetime import timedelta
+from django.core.paginator import Paginator
 from django.utils import timezone
+from django.views.generic import ListView, DetailView,  CreateView, UpdateView, FormView, TemplateView
+from django.contrib.auth.mixins import LoginRequiredMixin
 
 
-from .models import  Pasto
+from core.datas import ler_data
+from core.processamento import enfileirar
+from .lotacao import LotacaoService
+from .models import  LotacaoDiaria, Pasto
 from rebanho.models import Animal
-from financeiro.models import CustoAnimalDetalhe
 
 from .forms import PastoForm,  MovimentacaoPastoForm
 
 
 
 
-@login_required
-def relatorio_desempenho_pasto(request):
-
-    # 1. Filtros e Parâmetros Padrão
-    hoje = timezone.localdate()
-    trinta_dias_atras = hoje - timedelta(days=30)
-    
-    # Pega os filtros da URL
-    pasto_id = request.GET.get('pasto')
-    data_inicio = request.GET.get('data_inicio', trinta_dias_atras.strftime('%Y-%m-%d'))
-    data_fim = request.GET.get('data_fim', hoje.strftime('%Y-%m-%d'))
-    
-    pastos = Pasto.objects.all().order_by('nome')
-    animais_desempenho = []
-    
-    # --- CORREÇÃO: Inicialize as variáveis que serão usadas no context! ---
-    pasto_selecionado = None
-    relatorio_resumo = {}
-    
-
-    if pasto_id:
-        try:
-            pasto_selecionado = Pasto.objects.get(pk=pasto_id)
-            
-            # 2. Identificar animais que estiveram no pasto durante o período
-            # Esta lógica é mais precisa para o desempenho do pasto
-            animais_no_pasto = Animal.objects.filter(
-                movimentacoes_pasto__pasto_destino=pasto_selecionado,
-                movimentacoes_pasto__data_entrada__lte=data_fim
-            ).filter(
-                Q(movimentacoes_pasto__data_saida__gte=data_inicio) | Q(movimentacoes_pasto__data_saida__isnull=True)
-            ).distinct()
-            
-            total_gpmd = 0
-            total_custo = 0
-            total_animais = 0
-            
-            for animal in animais_no_pasto:
-                # 3. Calcular GPMD, Peso e Custo para CADA ANIMAL no Período
-                
-                # a) GPMD Médio no período
-                # Filtra as pesagens cuja data_pesagem está entre o período
-                pesagens_periodo = animal.pesagens.filter(
-                    data_pesagem__range=[data_inicio, data_fim],
-                    gpmd__isnull=False
-                )
-                gpmd_medio = pesagens_periodo.aggregate(Avg('gpmd'))['avg']
-                
-                # b) Último Peso (para peso médio)
-                ultima_pesagem = animal.pesagens.filter(data_pesagem__lte=data_fim).order_by('-data_pesagem').first()
-                peso_atual = ultima_pesagem.peso if ultima_pesagem else None
-                
-                # c) Custo Alocado no Período
-                custo_periodo = CustoAnimalDetalhe.objects.filter(
-                    animal=animal,
-                    registro_de_custo__data_custo__range=[data_inicio, data_fim]
-                ).aggregate(total=Sum('valor_alocado'))['total'] or 0.00
-                
-                if gpmd_medio is not None:
-                    total_gpmd += gpmd_medio
-                    total_custo += custo_periodo
-                    total_animais += 1
-                    
-                    animais_desempenho.append({
-                        'identificacao': animal.identificacao,
-                        'link': animal.get_absolute_url(),
-                        'gpmd_medio': gpmd_medio,
-                        'peso_atual': peso_atual,
-                        'custo_periodo': custo_periodo,
-                    })
-
-            # 4. Resumo do Pasto/Lote
-            if total_animais > 0:
-                relatorio_resumo = {
-                    'pasto_nome': pasto_selecionado.nome,
-                    'total_animais': total_animais,
-                    'media_gpmd_lote': total_gpmd / total_animais,
-                    'custo_total_lote': total_custo,
-                    'custo_medio_animal': total_custo / total_animais,
-                }
-                
-        except Pasto.DoesNotExist:
-            pasto_selecionado = None
-            
-    context = {
-        'pastos': pastos,
-        'pasto_selecionado': pasto_selecionado,
-        'data_inicio_filtro': data_inicio,
-        'data_fim_filtro': data_fim,
-        'animais_desempenho': animais_desempenho,
-        'relatorio_resumo': relatorio_resumo,
-    }
-    
-    return render(request, 'infraestrutura/relatorio_desempenho_pasto.html', context)
 
 
 class MovimentacaoPastoCreateView(LoginRequiredMixin,FormView):
@@ -164,8 +72,8 @@ class MovimentacaoPastoCreateView(LoginRequiredMixin,FormView):
     def get_success_url(self):
         animal_id = self.request.GET.get('animal_id')
         if animal_id:
-            return reverse('animal_detail', kwargs={'pk': animal_id})
-        return reverse('movimentar_animais')
+            return reverse('rebanho:animal_detail', kwargs={'pk': animal_id})
+        return reverse('rebanho:movimentar_animais')
 
 
 class PastoCreateView(LoginRequiredMixin, CreateView):
@@ -187,6 +95,8 @@ class PastoListView(ListView):
     model = Pasto
     template_name = 'infraestrutura/pasto_list.html'
     context_object_name = 'pastos'
+    # Animais, UA e ocupação de todos os pastos em uma consulta
+    queryset = Pasto.objects.com_lotacao()
     ordering = ['nome']
 
 
@@ -194,110 +104,57 @@ class PastoDetailView( DetailView):
     model = Pasto
     template_name = 'infraestrutura/pasto_detail.html'
     context_object_name = 'pasto'
+    queryset = Pasto.objects.com_lotacao()
+    animais_por_pagina = 25
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        pasto = context['pasto']
         
-        # 1. Animais Atualmente no Pasto (usando o related_name 'animais_atuais')
-        context['animais_no_pasto'] = context['pasto'].animais_atuais.all().order_by('identificacao')
+        # 1. Animais Atualmente no Pasto (usando o related_name 'animais_atuais'), paginados
+        animais = pasto.animais_atuais.filter(situacao='VIVO').select_related('lote_atual').order_by('chave_ordenacao')
+        pagina = Paginator(animais, self.animais_por_pagina).get_page(self.request.GET.get('page'))
+        context['page_obj'] = pagina
+        context['animais_no_pasto'] = pagina.object_list
         
-        # 2. Histórico de Movimentações Recentes (opcional, para um histórico)
-        context['movimentacoes_recentes'] = context['pasto'].entradas_pasto.all().order_by('-data_entrada')[:10]
+        # 2. Histórico de Movimentações Recentes
+        context['movimentacoes_recentes'] = (
+            pasto.entradas_pasto.select_related('animal', 'pasto_origem').order_by('-data_entrada', '-pk')[:10]
+        )
         
         return context
 
-@login_required
-def relatorio_desempenho_pasto(request):
-
-    # 1. Filtros e Parâmetros Padrão
-    hoje = timezone.localdate()
-    trinta_dias_atras = hoje - timedelta(days=30)
-    
-    # Pega os filtros da URL
-    pasto_id = request.GET.get('pasto')
-    data_inicio = request.GET.get('data_inicio', trinta_dias_atras.strftime('%Y-%m-%d'))
-    data_fim = request.GET.get('data_fim', hoje.strftime('%Y-%m-%d'))
-    
-    pastos = Pasto.objects.all().order_by('nome')
-    animais_desempenho = []
-    
-    # --- CORREÇÃO: Inicialize as variáveis que serão usadas no context! ---
-    pasto_selecionado = None
-    relatorio_resumo = {}
-    
 
-    if pasto_id:
-        try:
-            pasto_selecionado = Pasto.objects.get(pk=pasto_id)
-            
-            # 2. Identificar animais que estiveram no pasto durante o período
-            # Esta lógica é mais precisa para o desempenho do pasto
-            animais_no_pasto = Animal.objects.filter(
-                movimentacoes_pasto__pasto_destino=pasto_selecionado,
-                movimentacoes_pasto__data_entrada__lte=data_fim
-            ).filter(
-                Q(movimentacoes_pasto__data_saida__gte=data_inicio) | Q(movimentacoes_pasto__data_saida__isnull=True)
-            ).distinct()
-            
-            total_gpmd = 0
-            total_custo = 0
-            total_animais = 0
-            
-            for animal in animais_no_pasto:
-                # 3. Calcular GPMD, Peso e Custo para CADA ANIMAL no Período
-                
-                # a) GPMD Médio no período
-                # Filtra as pesagens cuja data_pesagem está entre o período
-                pesagens_periodo = animal.pesagens.filter(
-                    data_pesagem__range=[data_inicio, data_fim],
-                    gpmd__isnull=False
-                )
-                gpmd_medio = pesagens_periodo.aggregate(Avg('gpmd'))['avg']
-                
-                # b) Último Peso (para peso médio)
-                ultima_pesagem = animal.pesagens.filter(data_pesagem__lte=data_fim).order_by('-data_pesagem').first()
-                peso_atual = ultima_pesagem.peso if ultima_pesagem else None
-                
-                # c) Custo Alocado no Período
-                custo_periodo = CustoAnimalDetalhe.objects.filter(
-                    animal=animal,
-                    registro_de_custo__data_custo__range=[data_inicio, data_fim]
-                ).aggregate(total=Sum('valor_alocado'))['total'] or 0.00
-                
-                if gpmd_medio is not None:
-                    total_gpmd += gpmd_medio
-                    total_custo += custo_periodo
-                    total_animais += 1
-                    
-                    animais_desempenho.append({
-                        'identificacao': animal.identificacao,
-                        'link': animal.get_absolute_url(),
-                        'gpmd_medio': gpmd_medio,
-                        'peso_atual': peso_atual,
-                        'custo_periodo': custo_periodo,
-                    })
+class LotacaoMapaView(LoginRequiredMixin, TemplateView):
+    """Mapa de calor da lotação (pasto x dia) a partir da série LotacaoDiaria."""
+    template_name = 'infraestrutura/lotacao_mapa.html'
+    DIAS_PADRAO = 60
+    DIAS_MAXIMO = 366
+
+    def periodo(self, dados):
+        fim = ler_data(dados.get('fim'), timezone.localdate())
+        inicio = ler_data(dados.get('inicio'), fim - timedelta(days=self.DIAS_PADRAO - 1))
+        inicio = max(min(inicio, fim), fim - timedelta(days=self.DIAS_MAXIMO - 1))
+        return inicio, fim
+
+    def post(self, request, *args, **kwargs):
+        inicio, fim = self.periodo(request.POST)
+        processamento = enfileirar(
+            'infraestrutura.lotacao',
+            {'inicio': inicio.isoformat(), 'fim': fim.isoformat()},
+            usuario=request.user,
+            descricao=f"Lotação dos pastos de {inicio:%d/%m/%Y} a {fim:%d/%m/%Y}",
+        )
+        return redirect(processamento)
 
-            # 4. Resumo do Pasto/Lote
-            if total_animais > 0:
-                relatorio_resumo = {
-                    'pasto_nome': pasto_selecionado.nome,
-                    'total_animais': total_animais,
-                    'media_gpmd_lote': total_gpmd / total_animais,
-                    'custo_total_lote': total_custo,
-                    'custo_medio_animal': total_custo / total_animais,
-                }
-                
-        except Pasto.DoesNotExist:
-            pasto_selecionado = None
-            
-    context = {
-        'pastos': pastos,
-        'pasto_selecionado': pasto_selecionado,
-        'data_inicio_filtro': data_inicio,
-        'data_fim_filtro': data_fim,
-        'animais_desempenho': animais_desempenho,
-        'relatorio_resumo': relatorio_resumo,
-    }
-    
-    return render(request, 'pecuaria/relatorio_desempenho_pasto.html', context)
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        inicio, fim = self.periodo(self.request.GET)
+        context.update(LotacaoService.mapa_calor(inicio, fim))
+        context.update({
+            'inicio': inicio,
+            'fim': fim,
+            'atualizado_ate': LotacaoDiaria.objects.order_by('-data').values_list('data', flat=True).first(),
+        })
+        return context
 
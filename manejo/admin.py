@@ -3,8 +3,9 @@ from import_export import resources, fields
 from import_export.admin import ImportExportModelAdmin
 from import_export.widgets import ForeignKeyWidget
 
+from core.exportacao import acao_exportar_csv
 from rebanho.models import Animal
-from .models import TratamentoSaude, Reproducao, Pesagem,  TarefaManejo
+from .models import IndiceReprodutivo, TratamentoSaude, Reproducao, Pesagem, PesagemQuarentena, TarefaManejo
 
 
 class ReproducaoResource(resources.ModelResource):
@@ -34,11 +35,12 @@ class ReproducaoResource(resources.ModelResource):
 
 @admin.register(TarefaManejo)
 class TarefaManejoAdmin(admin.ModelAdmin):
-    list_display = ('titulo', 'data_prevista', 'tipo', 'animal', 'pasto', 'concluida')
+    list_display = ('titulo', 'data_prevista', 'tipo', 'animal', 'lote', 'pasto', 'concluida')
     list_filter = ('tipo', 'concluida', 'data_prevista')
-    search_fields = ('titulo', 'descricao', 'animal__identificacao', 'pasto__nome')
+    search_fields = ('titulo', 'descricao', 'animal__identificacao', 'lote__nome', 'pasto__nome')
     date_hierarchy = 'data_prevista'
-    raw_id_fields = ('animal', 'pasto')
+    list_select_related = ('animal', 'lote', 'pasto')
+    raw_id_fields = ('animal', 'lote', 'pasto', 'pasto_origem')
 
 
 @admin.register(TratamentoSaude)
@@ -46,6 +48,11 @@ class TratamentoSaudeAdmin(admin.ModelAdmin):
     list_display = ('animal', 'data_tratamento', 'tipo_tratamento', 'produto', 'data_proximo_tratamento')
     list_filter = ('tipo_tratamento',)
     search_fields = ('animal__identificacao', 'produto')
+    actions = [acao_exportar_csv(
+        [('animal__identificacao', 'Animal'), ('data_tratamento', 'Data'), ('tipo_tratamento', 'Tipo'),
+         ('produto', 'Produto'), ('dose', 'Dose/Via'), ('data_proximo_tratamento', 'Próxima Data')],
+        'tratamentos',
+    )]
 
 
 @admin.register(Pesagem)
@@ -53,8 +60,33 @@ class PesagemAdmin(admin.ModelAdmin):
     list_display = ('animal', 'data_pesagem', 'peso_kg', 'evento')
     list_filter = ('evento',)
     search_fields = ('animal__identificacao',)
+    actions = [acao_exportar_csv(
+        [('animal__identificacao', 'Animal'), ('data_pesagem', 'Data'), ('peso_kg', 'Peso (kg)'), ('evento', 'Evento')],
+        'pesagens',
+    )]
     
 
+@admin.register(PesagemQuarentena)
+class PesagemQuarentenaAdmin(admin.ModelAdmin):
+    list_display = ('animal', 'data_pesagem', 'peso_kg', 'motivo', 'peso_sugerido', 'pontuacao', 'situacao')
+    list_filter = ('situacao', 'motivo')
+    search_fields = ('animal__identificacao',)
+    list_select_related = ('animal',)
+    raw_id_fields = ('animal',)
+
+
+@admin.register(IndiceReprodutivo)
+class IndiceReprodutivoAdmin(admin.ModelAdmin):
+    list_display = (
+        'matriz', 'partos', 'idade_primeiro_parto_meses', 'iep_medio_dias', 'iep_ultimo_dias',
+        'dias_em_aberto', 'servicos_por_concepcao', 'prenhe', 'calculado_em',
+    )
+    list_filter = ('prenhe', 'partos')
+    search_fields = ('matriz__identificacao',)
+    list_select_related = ('matriz',)
+    raw_id_fields = ('matriz',)
+
+
 @admin.register(Reproducao)
 class ReproducaoAdmin(ImportExportModelAdmin):
     resource_class = ReproducaoResource   
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class manejoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'manejo'
+
+    def ready(self):
+        import manejo.signals
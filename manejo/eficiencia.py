@@ -0,0 +1,199 @@
+# manejo/eficiencia.py
+"""
+Eficiência reprodutiva das matrizes.
+
+Os partos saem dos nascimentos (Animal.mae + data_nascimento) com funções de
+janela por mãe: DENSE_RANK dá a ordem do parto (gêmeos contam como um parto)
+e LAG o parto anterior, então o intervalo entre partos (IEP) vem pronto do
+banco. Serviços, concepções e a última concepção vêm de uma consulta
+agrupada em Reproducao. O resultado de todas as matrizes fica em
+IndiceReprodutivo, recalculado de uma vez (comando calcular_indices_reprodutivos
+ou a tarefa manejo.indices_reprodutivos), e alimenta o ranking e a lista de
+descarte.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Q, Window
+from django.db.models.functions import DenseRank, Lag
+from django.utils import timezone
+
+from rebanho.models import Animal, DiasEntre
+
+from .models import IndiceReprodutivo, Reproducao
+
+
+DIAS_MES = Decimal('30.4')
+
+# Lista de descarte (matrizes vivas e não prenhes)
+IEP_LIMITE = 450
+DIAS_EM_ABERTO_LIMITE = 180
+SERVICOS_LIMITE = Decimal('3')
+IDADE_NOVILHA_LIMITE = 36  # meses sem parir
+
+
+
+class EficienciaReprodutivaService:
+
+    @staticmethod
+    def partos():
+        """
+        Nascimentos com a ordem do parto da mãe e os dias desde o parto anterior
+        (None no primeiro parto e no segundo gêmeo): (mae_id, data, parto, intervalo).
+        """
+        por_mae = {'partition_by': [F('mae_id')]}
+        return (
+            Animal.objects.filter(mae__isnull=False).order_by()
+            .annotate(
+                parto=Window(DenseRank(), order_by=F('data_nascimento').asc(), **por_mae),
+                intervalo=DiasEntre(
+                    F('data_nascimento'),
+                    Window(Lag('data_nascimento'), order_by=[F('data_nascimento').asc(), F('pk').asc()], **por_mae),
+                ),
+            )
+            .values_list('mae_id', 'data_nascimento', 'parto', 'intervalo')
+        )
+
+    @staticmethod
+    def calcular(data=None):
+        """IndiceReprodutivo (sem gravar) de todas as matrizes com parto ou serviço registrado."""
+        data = data or timezone.localdate()
+
+        partos = defaultdict(lambda: {'partos': 0, 'primeiro': None, 'ultimo': None, 'intervalos': []})
+        for mae_id, nascimento, ordem, intervalo in EficienciaReprodutivaService.partos().iterator(chunk_size=5000):
+            mae = partos[mae_id]
+            mae['partos'] = max(mae['partos'], ordem)
+            if ordem == 1:
+                mae['primeiro'] = nascimento
+            if mae['ultimo'] is None or nascimento > mae['ultimo']:
+                mae['ultimo'] = nascimento
+            if intervalo:
+                mae['intervalos'].append((nascimento, intervalo))
+
+        concepcao = Q(resultado='P') | Q(bezerro__isnull=False)
+        servicos = {
+            linha['matriz']: linha
+            for linha in Reproducao.objects.order_by().values('matriz').annotate(
+                servicos=Count('pk'),
+                concepcoes=Count('pk', filter=concepcao),
+                ultima_concepcao=Max('data_cio', filter=concepcao),
+                ultima_gestacao=Max('data_cio', filter=Q(resultado='P', bezerro__isnull=True)),
+            )
+        }
+
+        matriz_ids = set(partos) | set(servicos)
+        nascimentos = dict(
+            Animal.objects.filter(sexo='F').order_by().values_list('pk', 'data_nascimento')
+        )
+        indices = []
+        for matriz_id in matriz_ids:
+            if matriz_id not in nascimentos:
+                continue  # mãe cadastrada com sexo errado
+            mae = partos.get(matriz_id, {'partos': 0, 'primeiro': None, 'ultimo': None, 'intervalos': []})
+            reproducao = servicos.get(matriz_id, {'servicos': 0, 'concepcoes': 0})
+            ultimo_parto = mae['ultimo']
+            intervalos = [dias for _, dias in sorted(mae['intervalos'])]
+
+            ultima_concepcao = reproducao.get('ultima_concepcao')
+            if ultimo_parto is None:
+                dias_em_aberto = None
+            elif ultima_concepcao and ultima_concepcao > ultimo_parto:
+                dias_em_aberto = (ultima_concepcao - ultimo_parto).days
+            else:
+                dias_em_aberto = (data - ultimo_parto).days
+            gestacao = reproducao.get('ultima_gestacao')
+
+            indices.append(IndiceReprodutivo(
+                matriz_id=matriz_id,
+                partos=mae['partos'],
+                data_primeiro_parto=mae['primeiro'],
+                data_ultimo_parto=ultimo_parto,
+                idade_primeiro_parto_meses=(
+                    (Decimal((mae['primeiro'] - nascimentos[matriz_id]).days) / DIAS_MES).quantize(Decimal('0.1'))
+                    if mae['primeiro'] else None
+                ),
+                iep_medio_dias=round(sum(intervalos) / len(intervalos)) if intervalos else None,
+                iep_ultimo_dias=intervalos[-1] if intervalos else None,
+                dias_em_aberto=dias_em_aberto,
+                servicos=reproducao['servicos'],
+                concepcoes=reproducao['concepcoes'],
+                servicos_por_concepcao=(
+                    (Decimal(reproducao['servicos']) / reproducao['concepcoes']).quantize(Decimal('0.01'))
+                    if reproducao['concepcoes'] else None
+                ),
+                prenhe=bool(gestacao and (ultimo_parto is None or gestacao > ultimo_parto)),
+            ))
+        return indices
+
+    @staticmethod
+    def recalcular(data=None):
+        """Refaz os índices de todas as matrizes. Retorna quantas foram gravadas."""
+        indices = EficienciaReprodutivaService.calcular(data)
+        with transaction.atomic():
+            IndiceReprodutivo.objects.all().delete()
+            IndiceReprodutivo.objects.bulk_create(indices, batch_size=2000)
+        return len(indices)
+
+    @staticmethod
+    def ranking():
+        """Matrizes vivas com ao menos dois partos, do menor para o maior IEP médio."""
+        return (
+            IndiceReprodutivo.objects.filter(matriz__situacao='VIVO', iep_medio_dias__isnull=False)
+            .select_related('matriz')
+            .order_by('iep_medio_dias', '-partos', 'matriz__chave_ordenacao')
+        )
+
+    @staticmethod
+    def motivos_descarte(indice, data=None):
+        data = data or timezone.localdate()
+        motivos = []
+        if indice.iep_medio_dias and indice.iep_medio_dias > IEP_LIMITE:
+            motivos.append(f"IEP médio de {indice.iep_medio_dias} dias")
+        if indice.dias_em_aberto and indice.dias_em_aberto > DIAS_EM_ABERTO_LIMITE:
+            motivos.append(f"{indice.dias_em_aberto} dias em aberto")
+        if indice.servicos_por_concepcao and indice.servicos_por_concepcao >= SERVICOS_LIMITE:
+            motivos.append(f"{indice.servicos_por_concepcao} serviços por concepção")
+        if not indice.partos and (data - indice.matriz.data_nascimento).days / float(DIAS_MES) > IDADE_NOVILHA_LIMITE:
+            motivos.append(f"sem parto aos {IDADE_NOVILHA_LIMITE} meses")
+        if indice.servicos and not indice.concepcoes and indice.servicos >= SERVICOS_LIMITE:
+            motivos.append(f"{indice.servicos} serviços sem concepção")
+        return motivos
+
+    @staticmethod
+    def descarte(data=None):
+        """[(indice, motivos)] das matrizes vivas e vazias que passam de algum limite."""
+        data = data or timezone.localdate()
+        nascida_antes = data - timedelta(days=int(IDADE_NOVILHA_LIMITE * DIAS_MES))
+        candidatas = (
+            IndiceReprodutivo.objects.filter(matriz__situacao='VIVO', prenhe=False)
+            .filter(
+                Q(iep_medio_dias__gt=IEP_LIMITE)
+                | Q(dias_em_aberto__gt=DIAS_EM_ABERTO_LIMITE)
+                | Q(servicos_por_concepcao__gte=SERVICOS_LIMITE)
+                | Q(partos=0, matriz__data_nascimento__lt=nascida_antes)
+                | Q(concepcoes=0, servicos__gte=SERVICOS_LIMITE)
+            )
+            .select_related('matriz')
+            .order_by('-dias_em_aberto', 'matriz__chave_ordenacao')
+        )
+        lista = []
+        for indice in candidatas:
+            motivos = EficienciaReprodutivaService.motivos_descarte(indice, data)
+            if motivos:
+                lista.append((indice, motivos))
+        return lista
+
+    @staticmethod
+    def resumo():
+        """Médias do rebanho vivo (uma consulta)."""
+        return IndiceReprodutivo.objects.filter(matriz__situacao='VIVO').aggregate(
+            matrizes=Count('pk'),
+            prenhes=Count('pk', filter=Q(prenhe=True)),
+            iep_medio=Avg('iep_medio_dias'),
+            idade_primeiro_parto=Avg('idade_primeiro_parto_meses'),
+            dias_em_aberto=Avg('dias_em_aberto', filter=Q(prenhe=False, partos__gt=0)),
+            servicos_por_concepcao=Avg('servicos_por_concepcao'),
+            calculado_em=Max('calculado_em'),
+        )
@@ -1,10 +1,10 @@
 import django_filters
+from rebanho.busca import filtro_busca
 from .models import Pesagem, Reproducao
 
 class ReproducaoFilter(django_filters.FilterSet):
     matriz = django_filters.CharFilter(
-        field_name='matriz__identificacao', 
-        lookup_expr='icontains', # Busca por identificação que *contém* o texto (case-insensitive)
+        method='filtrar_matriz', # Busca indexada (rebanho/busca.py)
         label='Buscar por matriz'
     )
     
@@ -15,15 +15,20 @@ class ReproducaoFilter(django_filters.FilterSet):
         model = Reproducao
         fields = ['matriz',] # Lista de campos que serão filtrados
 
+    def filtrar_matriz(self, queryset, name, value):
+        return queryset.filter(filtro_busca(value, prefixo='matriz__'))
+
 
 class PesagemFilter(django_filters.FilterSet):
     animal = django_filters.CharFilter(
-        field_name='animal__identificacao', 
-        lookup_expr='icontains', 
+        method='filtrar_animal',
         label='Buscar por animal'
     )
     
 
     class Meta:
         model = Pesagem
-        fields = ['animal']
\ No newline at end of file
+        fields = ['animal']
+
+    def filtrar_animal(self, queryset, name, value):
+        return queryset.filter(filtro_busca(value, prefixo='animal__'))
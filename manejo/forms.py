@@ -1,4 +1,6 @@
 
+import re
+
 from django.contrib import admin
 from django import forms
 
@@ -63,6 +65,55 @@ class PesagemForm(forms.Form):
     )
 
 
+# Mesmo formato de PesagemQuarentena.peso_kg: recusa NaN, infinito e o que não cabe na coluna
+PESO_LEITURA = forms.DecimalField(max_digits=7, decimal_places=2)
+
+
+class PesagemSessaoForm(forms.Form):
+    """Sessão de tronco: uma linha "brinco peso" por animal (separados por espaço, tab ou ;)."""
+    data_pesagem = forms.DateField(
+        label="Data da Pesagem",
+        widget=forms.DateInput(format='%Y-%m-%d', attrs={'class': 'form-control', 'type': 'date'})
+    )
+    evento = forms.CharField(
+        label="Evento",
+        max_length=50,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control'})
+    )
+    linhas = forms.CharField(
+        label="Pesagens (brinco e peso por linha)",
+        widget=forms.Textarea(attrs={'class': 'form-control font-monospace', 'rows': 15, 'placeholder': 'BR-1020;412,5'})
+    )
+
+    def clean_linhas(self):
+        """Lista de (Animal, peso) na ordem digitada, com os animais buscados em uma consulta."""
+        leituras, erros = [], []
+        for numero, linha in enumerate(self.cleaned_data['linhas'].splitlines(), start=1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            partes = re.split(r'[;\t]|\s+', linha)
+            partes = [parte for parte in partes if parte]
+            if len(partes) != 2:
+                erros.append(f"Linha {numero}: use \"brinco peso\".")
+                continue
+            try:
+                peso = PESO_LEITURA.clean(partes[1].replace(',', '.'))
+            except forms.ValidationError:
+                erros.append(f"Linha {numero}: peso inválido ({partes[1]}).")
+                continue
+            leituras.append((partes[0], peso))
+
+        animais = Animal.objects.filter(situacao='VIVO').in_bulk([brinco for brinco, _ in leituras], field_name='identificacao')
+        desconhecidos = sorted({brinco for brinco, _ in leituras if brinco not in animais})
+        if desconhecidos:
+            erros.append(f"Animais não encontrados no rebanho vivo: {', '.join(desconhecidos)}.")
+        if erros:
+            raise forms.ValidationError(erros)
+        return [(animais[brinco], peso) for brinco, peso in leituras]
+
+
 class PesagemModelForm(forms.ModelForm):
     class Meta:
         model = Pesagem
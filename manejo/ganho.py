@@ -0,0 +1,134 @@
+# manejo/ganho.py
+"""
+Ganho de peso por intervalo entre pesagens.
+
+Cada pesagem é pareada com a anterior do mesmo animal por LAG (janela por
+animal em ordem de data) no próprio banco, então uma consulta devolve ganho,
+dias e GPMD de todos os intervalos de qualquer conjunto de animais e
+período. Os intervalos contam quando as duas pesagens estão no período (a
+mesma regra de PesagemService.gpmd_por_animal); pesagens repetidas no mesmo
+dia não formam intervalo.
+
+O relatório por período agrupa os intervalos pelo mês/trimestre/ano da
+pesagem final e por lote, pasto, sexo ou safra (ano de nascimento), lendo a
+consulta em blocos: o GPMD do grupo é o ganho total sobre os dias somados.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import F, FloatField, Window
+from django.db.models.functions import Cast, Lag
+
+from infraestrutura.models import Pasto
+from rebanho.models import Animal, DiasEntre, Lote
+
+from .models import Pesagem
+
+
+JANELA_ANIMAL = {'partition_by': [F('animal_id')], 'order_by': [F('data_pesagem').asc(), F('pk').asc()]}
+
+# Agrupamento -> (rótulo, campo da pesagem); lote e pasto são os atuais do animal
+AGRUPAMENTOS = {
+    'lote': ('Lote', 'animal__lote_atual'),
+    'pasto': ('Pasto', 'animal__pasto_atual'),
+    'sexo': ('Sexo', 'animal__sexo'),
+    'safra': ('Safra', 'animal__data_nascimento'),
+}
+# Início do período de uma data (em Python: no SQLite o Trunc* é uma função Python por linha)
+PERIODOS = {
+    'mes': lambda d: d.replace(day=1),
+    'trimestre': lambda d: date(d.year, (d.month - 1) // 3 * 3 + 1, 1),
+    'ano': lambda d: date(d.year, 1, 1),
+}
+TAMANHO_BLOCO = 5000
+
+
+def _gpmd(ganho, dias):
+    return (Decimal(ganho) / dias).quantize(Decimal('0.001')) if dias else None
+
+
+class GanhoPesoService:
+
+    @staticmethod
+    def intervalos(animais=None, inicio=None, fim=None):
+        """
+        Pesagens anotadas com o intervalo até a anterior do animal: peso_anterior,
+        data_anterior, ganho_kg, dias e gpmd (kg/dia). Uma consulta; só linhas com
+        intervalo (a primeira pesagem de cada animal no período fica de fora).
+        """
+        pesagens = Pesagem.objects.order_by()
+        if animais is not None:
+            pesagens = pesagens.filter(animal__in=animais)
+        if inicio:
+            pesagens = pesagens.filter(data_pesagem__gte=inicio)
+        if fim:
+            pesagens = pesagens.filter(data_pesagem__lte=fim)
+
+        peso = Cast('peso_kg', FloatField())
+        return pesagens.annotate(
+            peso_anterior=Window(Lag('peso_kg'), **JANELA_ANIMAL),
+            data_anterior=Window(Lag('data_pesagem'), **JANELA_ANIMAL),
+            ganho_kg=peso - Window(Lag(peso), **JANELA_ANIMAL),
+            dias=DiasEntre(F('data_pesagem'), Window(Lag('data_pesagem'), **JANELA_ANIMAL)),
+        ).annotate(
+            gpmd=F('ganho_kg') / Cast('dias', FloatField()),
+        ).filter(dias__gt=0)
+
+    @staticmethod
+    def nomes_grupos(agrupar, chaves):
+        """{chave: nome legível} dos grupos do relatório."""
+        if agrupar == 'lote':
+            return {pk: lote.nome for pk, lote in Lote.objects.in_bulk([c for c in chaves if c]).items()}
+        if agrupar == 'pasto':
+            return {pk: pasto.nome for pk, pasto in Pasto.objects.in_bulk([c for c in chaves if c]).items()}
+        if agrupar == 'sexo':
+            return dict(Animal.SEXO_CHOICES)
+        return {chave: str(chave) for chave in chaves if chave}
+
+    @staticmethod
+    def relatorio(agrupar='lote', periodo='mes', inicio=None, fim=None, animais=None):
+        """
+        Ganho por grupo e período: {'agrupamento', 'periodos': [...], 'linhas': [{'chave', 'nome',
+        'celulas', 'total'}]}. Cada célula (ou None) e o total têm 'animais', 'intervalos',
+        'ganho_kg', 'dias' e 'gpmd'.
+        """
+        rotulo, campo = AGRUPAMENTOS[agrupar]
+        inicio_periodo = PERIODOS[periodo]
+        linhas = GanhoPesoService.intervalos(animais, inicio, fim).values_list(
+            campo, 'data_pesagem', 'animal_id', 'ganho_kg', 'dias'
+        )
+
+        soma = defaultdict(lambda: [0, 0.0, 0, set()])  # intervalos, ganho, dias, animais
+        for chave, data, animal_id, ganho, dias in linhas.iterator(chunk_size=TAMANHO_BLOCO):
+            if agrupar == 'safra':
+                chave = chave.year
+            for celula in (soma[(chave, inicio_periodo(data))], soma[(chave, None)]):
+                celula[0] += 1
+                celula[1] += ganho
+                celula[2] += dias
+                celula[3].add(animal_id)
+
+        def resumo(celula):
+            if celula is None:
+                return None
+            intervalos, ganho, dias, animais_grupo = celula
+            return {
+                'animais': len(animais_grupo), 'intervalos': intervalos,
+                'ganho_kg': round(ganho, 1), 'dias': dias, 'gpmd': _gpmd(ganho, dias),
+            }
+
+        periodos = sorted({data for _, data in soma if data is not None})
+        chaves = {chave for chave, _ in soma}
+        nomes = GanhoPesoService.nomes_grupos(agrupar, chaves)
+        resultado = [
+            {
+                'chave': chave,
+                'nome': nomes.get(chave, 'Sem ' + rotulo.lower()),
+                'celulas': [resumo(soma.get((chave, data))) for data in periodos],
+                'total': resumo(soma[(chave, None)]),
+            }
+            for chave in chaves
+        ]
+        resultado.sort(key=lambda linha: linha['nome'])
+        return {'agrupamento': rotulo, 'periodos': periodos, 'linhas': resultado}
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from manejo.eficiencia import EficienciaReprodutivaService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os índices reprodutivos de todas as matrizes (partos, IEP, idade ao primeiro parto, "
+        "dias em aberto, serviços por concepção). Rode diariamente (cron) ou depois de importar partos."
+    )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        matrizes = EficienciaReprodutivaService.recalcular()
+        self.stdout.write(self.style.SUCCESS(
+            f"Índices de {matrizes} matrizes calculados em {time.perf_counter() - inicio:.1f}s."
+        ))
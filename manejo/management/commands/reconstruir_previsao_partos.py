@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from manejo.services import PrevisaoPartoService
+
+
+class Command(BaseCommand):
+    help = "Refaz a série diária de partos previstos (PrevisaoParto) a partir das gestações pendentes."
+
+    def handle(self, *args, **options):
+        linhas = PrevisaoPartoService.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"Previsão de partos reconstruída: {linhas} linhas (dia/pasto/lote)."))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("manejo", "0001_initial"),
+        ("rebanho", "0003_animal_rebanho_ani_situaca_5b43c6_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pesagem",
+            index=models.Index(
+                fields=["animal", "data_pesagem"], name="manejo_pesa_animal__b271a2_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reproducao",
+            index=models.Index(
+                fields=["data_parto_prevista", "bezerro"],
+                name="manejo_repr_data_pa_04e7b8_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reproducao",
+            index=models.Index(
+                condition=models.Q(("bezerro__isnull", True)),
+                fields=["data_parto_prevista"],
+                name="repro_parto_pendente_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reproducao",
+            index=models.Index(
+                fields=["data_cio", "resultado"], name="manejo_repr_data_ci_9b7168_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tratamentosaude",
+            index=models.Index(
+                fields=["data_proximo_tratamento"],
+                name="manejo_trat_data_pr_c7168a_idx",
+            ),
+        ),
+    ]
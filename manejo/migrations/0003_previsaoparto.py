@@ -0,0 +1,100 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def preencher_previsao(apps, schema_editor):
+    Reproducao = apps.get_model("manejo", "Reproducao")
+    PrevisaoParto = apps.get_model("manejo", "PrevisaoParto")
+
+    linhas = (
+        Reproducao.objects.filter(
+            resultado="P",
+            bezerro__isnull=True,
+            matriz__situacao="VIVO",
+            data_parto_prevista__isnull=False,
+        )
+        .order_by()
+        .values("data_parto_prevista", "matriz__pasto_atual", "matriz__lote_atual")
+        .annotate(total=models.Count("pk"))
+    )
+    PrevisaoParto.objects.bulk_create(
+        [
+            PrevisaoParto(
+                data=linha["data_parto_prevista"],
+                pasto_id=linha["matriz__pasto_atual"],
+                lote_id=linha["matriz__lote_atual"],
+                quantidade=linha["total"],
+            )
+            for linha in linhas
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "infraestrutura",
+            "0003_movimentacaopasto_infraestrut_animal__fe90ed_idx_and_more",
+        ),
+        ("manejo", "0002_pesagem_manejo_pesa_animal__b271a2_idx_and_more"),
+        ("rebanho", "0006_genealogia"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PrevisaoParto",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.DateField(verbose_name="Data Prevista")),
+                (
+                    "quantidade",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Partos Previstos"
+                    ),
+                ),
+                (
+                    "lote",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="previsoes_parto",
+                        to="rebanho.lote",
+                        verbose_name="Lote",
+                    ),
+                ),
+                (
+                    "pasto",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="previsoes_parto",
+                        to="infraestrutura.pasto",
+                        verbose_name="Pasto",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Previsão de Parto",
+                "verbose_name_plural": "Previsões de Parto",
+                "ordering": ["data"],
+                "indexes": [
+                    models.Index(fields=["data"], name="manejo_prev_data_afa8ea_idx")
+                ],
+            },
+        ),
+        migrations.RunPython(preencher_previsao, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("infraestrutura", "0004_lotacao_diaria"),
+        ("manejo", "0003_previsaoparto"),
+        ("rebanho", "0006_genealogia"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tarefamanejo",
+            name="lote",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tarefas_manejo",
+                to="rebanho.lote",
+                verbose_name="Lote (opcional)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="tarefamanejo",
+            name="pasto_origem",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="infraestrutura.pasto",
+                verbose_name="Pasto de Origem",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tarefamanejo",
+            index=models.Index(
+                fields=["lote", "concluida", "data_prevista"],
+                name="manejo_tare_lote_id_b91a81_idx",
+            ),
+        ),
+    ]
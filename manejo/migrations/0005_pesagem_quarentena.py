@@ -0,0 +1,112 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("manejo", "0004_tarefa_rodizio"),
+        ("rebanho", "0007_curva_crescimento"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PesagemQuarentena",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data_pesagem", models.DateField(verbose_name="Data da Pesagem")),
+                (
+                    "peso_kg",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=7,
+                        verbose_name="Peso Informado (Kg)",
+                    ),
+                ),
+                (
+                    "evento",
+                    models.CharField(blank=True, max_length=50, verbose_name="Evento"),
+                ),
+                (
+                    "motivo",
+                    models.CharField(
+                        choices=[
+                            ("DUPLICADA", "Pesagem duplicada no dia"),
+                            ("INVALIDA", "Peso fora dos limites"),
+                            ("ARROBA", "Peso digitado em arroba"),
+                            ("TROCA", "Brincos trocados"),
+                            ("CURVA", "Fora da curva do animal"),
+                        ],
+                        max_length=10,
+                        verbose_name="Motivo",
+                    ),
+                ),
+                (
+                    "detalhe",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="Detalhe"
+                    ),
+                ),
+                (
+                    "peso_sugerido",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=7,
+                        null=True,
+                        verbose_name="Peso Sugerido (Kg)",
+                    ),
+                ),
+                (
+                    "pontuacao",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="Desvio (z robusto)"
+                    ),
+                ),
+                (
+                    "situacao",
+                    models.CharField(
+                        choices=[
+                            ("PENDENTE", "Pendente"),
+                            ("APROVADA", "Aprovada"),
+                            ("DESCARTADA", "Descartada"),
+                        ],
+                        default="PENDENTE",
+                        max_length=10,
+                        verbose_name="Situação",
+                    ),
+                ),
+                ("criada_em", models.DateTimeField(auto_now_add=True)),
+                (
+                    "animal",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pesagens_quarentena",
+                        to="rebanho.animal",
+                        verbose_name="Animal",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Pesagem em Quarentena",
+                "verbose_name_plural": "Pesagens em Quarentena",
+                "ordering": ["-data_pesagem", "animal"],
+                "indexes": [
+                    models.Index(
+                        fields=["situacao", "data_pesagem"],
+                        name="manejo_pesa_situaca_356c11_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("manejo", "0005_pesagem_quarentena"),
+        ("rebanho", "0007_curva_crescimento"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndiceReprodutivo",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "partos",
+                    models.PositiveSmallIntegerField(default=0, verbose_name="Partos"),
+                ),
+                (
+                    "data_primeiro_parto",
+                    models.DateField(
+                        blank=True, null=True, verbose_name="Primeiro Parto"
+                    ),
+                ),
+                (
+                    "data_ultimo_parto",
+                    models.DateField(
+                        blank=True, null=True, verbose_name="Último Parto"
+                    ),
+                ),
+                (
+                    "idade_primeiro_parto_meses",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=1,
+                        max_digits=5,
+                        null=True,
+                        verbose_name="Idade ao Primeiro Parto (meses)",
+                    ),
+                ),
+                (
+                    "iep_medio_dias",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="IEP Médio (dias)"
+                    ),
+                ),
+                (
+                    "iep_ultimo_dias",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Último IEP (dias)"
+                    ),
+                ),
+                (
+                    "dias_em_aberto",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Dias em Aberto"
+                    ),
+                ),
+                (
+                    "servicos",
+                    models.PositiveIntegerField(default=0, verbose_name="Serviços"),
+                ),
+                (
+                    "concepcoes",
+                    models.PositiveIntegerField(default=0, verbose_name="Concepções"),
+                ),
+                (
+                    "servicos_por_concepcao",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=4,
+                        null=True,
+                        verbose_name="Serviços por Concepção",
+                    ),
+                ),
+                ("prenhe", models.BooleanField(default=False, verbose_name="Prenhe")),
+                (
+                    "calculado_em",
+                    models.DateTimeField(auto_now=True, verbose_name="Calculado em"),
+                ),
+                (
+                    "matriz",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="indice_reprodutivo",
+                        to="rebanho.animal",
+                        verbose_name="Matriz",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Índice Reprodutivo",
+                "verbose_name_plural": "Índices Reprodutivos",
+                "indexes": [
+                    models.Index(
+                        fields=["iep_medio_dias"], name="manejo_indi_iep_med_a8df12_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -26,6 +26,21 @@ class TarefaManejo(models.Model):
         null=True, 
         blank=True, 
         verbose_name="Pasto (opcional)")
+    # Rodízio (tipo 'RO'): o lote sai de pasto_origem e entra em pasto (ver infraestrutura/rodizio.py)
+    lote = models.ForeignKey(
+        'rebanho.Lote',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='tarefas_manejo',
+        verbose_name="Lote (opcional)")
+    pasto_origem = models.ForeignKey(
+        'infraestrutura.Pasto',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Pasto de Origem")
     concluida = models.BooleanField(default=False, verbose_name="Concluída")
 
     def __str__(self):
@@ -35,9 +50,89 @@ class TarefaManejo(models.Model):
         verbose_name = "Tarefa de Manejo"
         verbose_name_plural = "Tarefas de Manejo"
         ordering = ['data_prevista', 'titulo']
+        indexes = [
+            # Plano de rodízio pendente de cada lote
+            models.Index(fields=['lote', 'concluida', 'data_prevista']),
+        ]
+
+
+# Campos da Reproducao que mudam a análise de safras (agrupamento por sêmen)
+CAMPOS_SAFRA_REPRODUCAO = {'codigo_semen', 'bezerro', 'bezerro_id'}
+
+
+class ReproducaoQuerySet(models.QuerySet):
+    """
+    Calcula data_parto_prevista e invalida os indicadores da estação também nos
+    caminhos em lote (que não chamam save() nem disparam signals).
+    """
+
+    def gestacoes_pendentes(self):
+        """Prenhas (DG positivo) cujo bezerro ainda não foi registrado."""
+        return self.filter(resultado='P', bezerro__isnull=True)
+
+    def _apos_gravacao_em_lote(self, datas, bezerros=()):
+        from rebanho.safra import SafraService
+        from .services import EstacaoMontaService, PrevisaoPartoService
+        EstacaoMontaService.invalidar_cache()
+        PrevisaoPartoService.recalcular(datas)
+        # O código do sêmen agrupa os bezerros na análise de safras
+        SafraService.invalidar_animais({bezerro for bezerro in bezerros if bezerro})
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.data_parto_prevista = Reproducao.calcular_data_parto_prevista(obj.data_cio)
+        criados = super().bulk_create(objs, *args, **kwargs)
+        self._apos_gravacao_em_lote(
+            {obj.data_parto_prevista for obj in objs if obj.resultado == 'P'}, [obj.bezerro_id for obj in objs]
+        )
+        return criados
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+        if 'data_cio' in fields:
+            for obj in objs:
+                obj.data_parto_prevista = Reproducao.calcular_data_parto_prevista(obj.data_cio)
+            if 'data_parto_prevista' not in fields:
+                fields.append('data_parto_prevista')
+
+        # Datas gravadas antes da alteração (e as novas, se o cio mudou)
+        datas = set(
+            Reproducao.objects.filter(pk__in=[obj.pk for obj in objs])
+            .order_by().values_list('data_parto_prevista', flat=True).distinct()
+        )
+        if 'data_cio' in fields:
+            datas.update(obj.data_parto_prevista for obj in objs)
+        # Bezerros ligados antes e depois, se o sêmen ou o bezerro mudou
+        bezerros = set()
+        if CAMPOS_SAFRA_REPRODUCAO.intersection(fields):
+            bezerros.update(Reproducao.objects.filter(pk__in=[obj.pk for obj in objs]).values_list('bezerro_id', flat=True))
+            bezerros.update(obj.bezerro_id for obj in objs)
+        linhas = super().bulk_update(objs, fields, *args, **kwargs)
+        self._apos_gravacao_em_lote(datas, bezerros)
+        return linhas
+
+    def update(self, **kwargs):
+        if 'data_cio' in kwargs and not hasattr(kwargs['data_cio'], 'resolve_expression'):
+            kwargs['data_parto_prevista'] = Reproducao.calcular_data_parto_prevista(kwargs['data_cio'])
+
+        datas = set(self.order_by().values_list('data_parto_prevista', flat=True).distinct())
+        if kwargs.get('data_parto_prevista'):
+            datas.add(kwargs['data_parto_prevista'])
+        bezerros = set()
+        if CAMPOS_SAFRA_REPRODUCAO.intersection(kwargs):
+            bezerros.update(self.order_by().values_list('bezerro_id', flat=True).distinct())
+            novo = kwargs.get('bezerro_id', kwargs.get('bezerro'))
+            bezerros.add(getattr(novo, 'pk', novo))
+        linhas = super().update(**kwargs)
+        self._apos_gravacao_em_lote(datas, bezerros)
+        return linhas
 
 
 class Reproducao(models.Model):
+    # Gestação média da Nelore, contada a partir do cio/inseminação
+    DIAS_GESTACAO = 285
 
     # Relacionamento com a Matriz (Fêmea)
     matriz = models.ForeignKey(
@@ -114,18 +209,22 @@ class Reproducao(models.Model):
         verbose_name="Data Prevista do Parto"
     )
 
+    objects = ReproducaoQuerySet.as_manager()
+
     def __str__(self):
         return f"Reprodução de {self.matriz.identificacao} em {self.data_cio}"
 
     
     
+    @classmethod
+    def calcular_data_parto_prevista(cls, data_cio):
+        """DIAS_GESTACAO dias a partir do cio/inseminação."""
+        if not data_cio:
+            return None
+        return data_cio + timedelta(days=cls.DIAS_GESTACAO)
+
     def save(self, *args, **kwargs):
-       # 285 dias a partir do cio/inseminação
-        if self.data_cio:
-            self.data_parto_prevista = self.data_cio + timedelta(days=285)
-        else:
-            self.data_parto_prevista = None
-            
+        self.data_parto_prevista = self.calcular_data_parto_prevista(self.data_cio)
         super().save(*args, **kwargs)         
 
     def dias_para_parir(self):
@@ -139,6 +238,53 @@ class Reproducao(models.Model):
     class Meta:
         verbose_name = "Manejo Reprodutivo"
         verbose_name_plural = "Manejos Reprodutivos"
+        indexes = [
+            # Alertas de parição (gestações sem bezerro registrado)
+            models.Index(fields=['data_parto_prevista', 'bezerro']),
+            models.Index(
+                fields=['data_parto_prevista'],
+                condition=models.Q(bezerro__isnull=True),
+                name='repro_parto_pendente_idx',
+            ),
+            # Estação de monta (obter_dados_estacao)
+            models.Index(fields=['data_cio', 'resultado']),
+        ]
+
+
+class PrevisaoParto(models.Model):
+    """
+    Série diária de partos esperados (gestações com DG positivo e sem bezerro),
+    por pasto e lote atuais da matriz. Mantida por PrevisaoPartoService.
+    """
+    data = models.DateField(verbose_name="Data Prevista")
+    pasto = models.ForeignKey(
+        'infraestrutura.Pasto',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='previsoes_parto',
+        verbose_name="Pasto"
+    )
+    lote = models.ForeignKey(
+        'rebanho.Lote',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='previsoes_parto',
+        verbose_name="Lote"
+    )
+    quantidade = models.PositiveIntegerField(default=0, verbose_name="Partos Previstos")
+
+    class Meta:
+        verbose_name = "Previsão de Parto"
+        verbose_name_plural = "Previsões de Parto"
+        ordering = ['data']
+        indexes = [
+            models.Index(fields=['data']),
+        ]
+
+    def __str__(self):
+        return f"{self.data}: {self.quantidade}"
 
 
 class TratamentoSaude(models.Model):
@@ -172,6 +318,9 @@ class TratamentoSaude(models.Model):
     class Meta:
         verbose_name = "Tratamento de Saúde"
         verbose_name_plural = "Tratamentos de Saúde"
+        indexes = [
+            models.Index(fields=['data_proximo_tratamento']),
+        ]
 
 
 class Pesagem(models.Model):
@@ -199,10 +348,106 @@ class Pesagem(models.Model):
         ordering = ['data_pesagem']
         verbose_name = "Pesagem"
         verbose_name_plural = "Controle de Peso"
+        indexes = [
+            # Histórico por animal em ordem cronológica (GPMD, última pesagem)
+            models.Index(fields=['animal', 'data_pesagem']),
+        ]
 
     def __str__(self):
         return f"Pesagem de {self.animal.identificacao} em {self.data_pesagem} ({self.peso_kg} Kg)"
     
-    def save(self, force_insert = ..., force_update = ..., using = ..., update_fields = ...):
-        self.animal.atualizar_peso_atual(self.peso_kg, self.data_pesagem)
-        return super().save(force_insert, force_update, using, update_fields)
\ No newline at end of file
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Só a pesagem mais recente atualiza o peso em cache do animal
+        animal = self.animal
+        if animal.data_ultima_pesagem is None or self.data_pesagem >= animal.data_ultima_pesagem:
+            animal.atualizar_peso_cache(self.peso_kg, self.data_pesagem)
+
+
+class PesagemQuarentena(models.Model):
+    """
+    Pesagem suspeita retida na entrada (ver manejo/validacao.py): só vira
+    Pesagem depois de aprovada na fila de revisão.
+    """
+    MOTIVO_CHOICES = [
+        ('DUPLICADA', 'Pesagem duplicada no dia'),
+        ('INVALIDA', 'Peso fora dos limites'),
+        ('ARROBA', 'Peso digitado em arroba'),
+        ('TROCA', 'Brincos trocados'),
+        ('CURVA', 'Fora da curva do animal'),
+    ]
+    SITUACAO_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('APROVADA', 'Aprovada'),
+        ('DESCARTADA', 'Descartada'),
+    ]
+
+    animal = models.ForeignKey(
+        'rebanho.Animal',
+        on_delete=models.CASCADE,
+        related_name='pesagens_quarentena',
+        verbose_name="Animal"
+    )
+    data_pesagem = models.DateField(verbose_name="Data da Pesagem")
+    peso_kg = models.DecimalField(max_digits=7, decimal_places=2, verbose_name="Peso Informado (Kg)")
+    evento = models.CharField(max_length=50, blank=True, verbose_name="Evento")
+    motivo = models.CharField(max_length=10, choices=MOTIVO_CHOICES, verbose_name="Motivo")
+    detalhe = models.CharField(max_length=255, blank=True, verbose_name="Detalhe")
+    peso_sugerido = models.DecimalField(
+        max_digits=7, decimal_places=2, null=True, blank=True, verbose_name="Peso Sugerido (Kg)"
+    )
+    pontuacao = models.FloatField(null=True, blank=True, verbose_name="Desvio (z robusto)")
+    situacao = models.CharField(max_length=10, choices=SITUACAO_CHOICES, default='PENDENTE', verbose_name="Situação")
+    criada_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Pesagem em Quarentena"
+        verbose_name_plural = "Pesagens em Quarentena"
+        ordering = ['-data_pesagem', 'animal']
+        indexes = [
+            models.Index(fields=['situacao', 'data_pesagem']),
+        ]
+
+    def __str__(self):
+        return f"{self.animal_id} em {self.data_pesagem}: {self.peso_kg} Kg ({self.get_motivo_display()})"
+
+
+class IndiceReprodutivo(models.Model):
+    """
+    Indicadores reprodutivos de cada matriz (paridade, idade ao primeiro parto,
+    intervalo entre partos, dias em aberto, serviços por concepção), calculados
+    em conjunto por manejo.eficiencia para ranking e lista de descarte.
+    """
+    matriz = models.OneToOneField(
+        'rebanho.Animal',
+        on_delete=models.CASCADE,
+        related_name='indice_reprodutivo',
+        verbose_name="Matriz"
+    )
+    partos = models.PositiveSmallIntegerField(default=0, verbose_name="Partos")
+    data_primeiro_parto = models.DateField(null=True, blank=True, verbose_name="Primeiro Parto")
+    data_ultimo_parto = models.DateField(null=True, blank=True, verbose_name="Último Parto")
+    idade_primeiro_parto_meses = models.DecimalField(
+        max_digits=5, decimal_places=1, null=True, blank=True, verbose_name="Idade ao Primeiro Parto (meses)"
+    )
+    iep_medio_dias = models.PositiveIntegerField(null=True, blank=True, verbose_name="IEP Médio (dias)")
+    iep_ultimo_dias = models.PositiveIntegerField(null=True, blank=True, verbose_name="Último IEP (dias)")
+    dias_em_aberto = models.PositiveIntegerField(null=True, blank=True, verbose_name="Dias em Aberto")
+    servicos = models.PositiveIntegerField(default=0, verbose_name="Serviços")
+    concepcoes = models.PositiveIntegerField(default=0, verbose_name="Concepções")
+    servicos_por_concepcao = models.DecimalField(
+        max_digits=4, decimal_places=2, null=True, blank=True, verbose_name="Serviços por Concepção"
+    )
+    prenhe = models.BooleanField(default=False, verbose_name="Prenhe")
+    calculado_em = models.DateTimeField(auto_now=True, verbose_name="Calculado em")
+
+    class Meta:
+        verbose_name = "Índice Reprodutivo"
+        verbose_name_plural = "Índices Reprodutivos"
+        indexes = [
+            # Ranking das matrizes
+            models.Index(fields=['iep_medio_dias']),
+        ]
+
+    def __str__(self):
+        return f"Índices de {self.matriz_id}: {self.partos} partos, IEP {self.iep_medio_dias or '-'}"
@@ -1,9 +1,264 @@
-from django.db.models import Q
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.db import transaction
 from django.utils import timezone
 
-from .models import Reproducao
+from .models import Pesagem, PrevisaoParto, Reproducao, TratamentoSaude
 from rebanho.models import Animal
+from rebanho.timeline import TimelineAnimalService
+
+
+def _em_blocos(valores, tamanho=500):
+    valores = list(valores)
+    for inicio in range(0, len(valores), tamanho):
+        yield valores[inicio:inicio + tamanho]
+
+
+class PrevisaoPartoService:
+    """
+    Calendário de parições: mantém a série diária PrevisaoParto (por pasto e lote
+    da matriz) e concentra as consultas de partos previstos.
+    """
+
+    @staticmethod
+    def _gestacoes():
+        # Só matrizes vivas entram na previsão
+        return Reproducao.objects.gestacoes_pendentes().filter(
+            matriz__situacao='VIVO', data_parto_prevista__isnull=False
+        )
+
+    @staticmethod
+    def _montar_serie(gestacoes):
+        linhas = (
+            gestacoes.order_by()
+            .values('data_parto_prevista', 'matriz__pasto_atual', 'matriz__lote_atual')
+            .annotate(total=Count('pk'))
+        )
+        return [
+            PrevisaoParto(
+                data=linha['data_parto_prevista'],
+                pasto_id=linha['matriz__pasto_atual'],
+                lote_id=linha['matriz__lote_atual'],
+                quantidade=linha['total'],
+            )
+            for linha in linhas
+        ]
+
+    @staticmethod
+    def recalcular(datas):
+        """Refaz a série apenas nas datas informadas (atualização incremental)."""
+        datas = {data for data in datas if data}
+        if not datas:
+            return
+        with transaction.atomic():
+            for bloco in _em_blocos(datas):
+                PrevisaoParto.objects.filter(data__in=bloco).delete()
+                PrevisaoParto.objects.bulk_create(
+                    PrevisaoPartoService._montar_serie(
+                        PrevisaoPartoService._gestacoes().filter(data_parto_prevista__in=bloco)
+                    )
+                )
+
+    @staticmethod
+    def recalcular_matrizes(matriz_ids):
+        """Matrizes mudaram de pasto/lote/situação: refaz as datas das gestações delas."""
+        datas = set()
+        for bloco in _em_blocos(matriz_ids):
+            datas.update(
+                Reproducao.objects.gestacoes_pendentes().filter(matriz_id__in=bloco)
+                .order_by().values_list('data_parto_prevista', flat=True).distinct()
+            )
+        PrevisaoPartoService.recalcular(datas)
+
+    @staticmethod
+    def reconstruir():
+        with transaction.atomic():
+            PrevisaoParto.objects.all().delete()
+            serie = PrevisaoParto.objects.bulk_create(
+                PrevisaoPartoService._montar_serie(PrevisaoPartoService._gestacoes()),
+                batch_size=2000,
+            )
+        return len(serie)
+
+    @staticmethod
+    def pendentes(dias=30, inicio=None):
+        """Gestações com parto previsto na janela (leitura única pelo índice parcial de partos pendentes)."""
+        inicio = inicio or timezone.localdate()
+        return (
+            PrevisaoPartoService._gestacoes()
+            .filter(data_parto_prevista__range=(inicio, inicio + timedelta(days=dias)))
+            .select_related('matriz')
+            .order_by('data_parto_prevista', 'matriz__chave_ordenacao')
+        )
+
+    @staticmethod
+    def serie_diaria(inicio, fim):
+        """[{data, quantidade, por_local: [(pasto, lote, quantidade)]}] só com os dias que têm parto."""
+        dias = {}
+        linhas = (
+            PrevisaoParto.objects.filter(data__range=(inicio, fim))
+            .values('data', 'pasto__nome', 'lote__nome', 'quantidade')
+            .order_by('data')
+        )
+        for linha in linhas:
+            dia = dias.setdefault(linha['data'], {'data': linha['data'], 'quantidade': 0, 'por_local': []})
+            dia['quantidade'] += linha['quantidade']
+            dia['por_local'].append((linha['pasto__nome'], linha['lote__nome'], linha['quantidade']))
+        return list(dias.values())
+
+    @staticmethod
+    def projecao_mensal(meses=12, inicio=None):
+        """Carga de trabalho de parições por mês e pasto para os próximos N meses."""
+        inicio = (inicio or timezone.localdate()).replace(day=1)
+        ano, mes = divmod(inicio.month - 1 + meses, 12)
+        fim = date(inicio.year + ano, mes + 1, 1) - timedelta(days=1)
+
+        projecao = {}
+        cursor = inicio
+        while cursor <= fim:
+            projecao[cursor] = {'mes': cursor, 'total': 0, 'por_pasto': defaultdict(int)}
+            cursor = (cursor + timedelta(days=32)).replace(day=1)
+
+        linhas = (
+            PrevisaoParto.objects.filter(data__range=(inicio, fim))
+            .values('data', 'pasto__nome')
+            .annotate(total=Sum('quantidade'))
+            .order_by()
+        )
+        for linha in linhas:
+            mes = projecao[linha['data'].replace(day=1)]
+            mes['total'] += linha['total']
+            mes['por_pasto'][linha['pasto__nome'] or 'Sem pasto'] += linha['total']
+
+        for mes in projecao.values():
+            mes['por_pasto'] = sorted(mes['por_pasto'].items(), key=lambda item: -item[1])
+        return list(projecao.values())
+
+
+class EstacaoMontaService:
+    """
+    Indicadores da Estação de Monta (Outubro/Ano a Março/Ano+1) em uma única
+    consulta agrupada por tipo de manejo, reprodutor, paridade da matriz e resultado.
+    Estações encerradas ficam em cache até o próximo manejo reprodutivo gravado.
+    """
+
+    CHAVE_VERSAO = 'manejo:estacao:versao'
+
+    # Partos anteriores: 0 = novilha, 1 = primípara, 2 = secundípara, 3+ = multípara
+    PARIDADES = ['Novilha', 'Primípara', 'Secundípara', 'Multípara']
+
+    @staticmethod
+    def periodo(ano_inicio):
+        ano_inicio = int(ano_inicio)
+        return date(ano_inicio, 10, 1), date(ano_inicio + 1, 3, 31)
+
+    @staticmethod
+    def encerrada(ano_inicio):
+        return timezone.localdate() > EstacaoMontaService.periodo(ano_inicio)[1]
+
+    @staticmethod
+    def invalidar_cache():
+        """Chamado pelos signals/querysets de Reproducao: descarta todas as estações em cache."""
+        cache.delete(EstacaoMontaService.CHAVE_VERSAO)
+
+    @staticmethod
+    def analisar(ano_inicio):
+        ano_inicio = int(ano_inicio)
+        if not EstacaoMontaService.encerrada(ano_inicio):
+            return EstacaoMontaService._calcular(ano_inicio)
+
+        versao = cache.get_or_set(EstacaoMontaService.CHAVE_VERSAO, lambda: uuid4().hex, None)
+        chave = f'manejo:estacao:{ano_inicio}:v{versao}'
+        dados = cache.get(chave)
+        if dados is None:
+            dados = EstacaoMontaService._calcular(ano_inicio)
+            cache.set(chave, dados, None)
+        return dados
+
+    @staticmethod
+    def comparar(anos):
+        """Estações lado a lado, em ordem cronológica."""
+        return [EstacaoMontaService.analisar(ano) for ano in sorted({int(ano) for ano in anos})]
+
+    @staticmethod
+    def _indicadores(contagem):
+        total = sum(contagem.values())
+        prenhezes = contagem.get('P', 0)
+        vazias = contagem.get('V', 0)
+        diagnosticadas = prenhezes + vazias
+        return {
+            'total_servicos': total,
+            'prenhezes': prenhezes,
+            'vazias': vazias,
+            'nao_verificadas': contagem.get('N', 0),
+            # Prenhez sobre todos os serviços; concepção só sobre os já diagnosticados
+            'taxa_prenhez': round(prenhezes / total * 100, 1) if total else 0,
+            'taxa_concepcao': round(prenhezes / diagnosticadas * 100, 1) if diagnosticadas else 0,
+        }
+
+    @staticmethod
+    def _calcular(ano_inicio):
+        inicio, fim = EstacaoMontaService.periodo(ano_inicio)
+
+        partos_anteriores = (
+            Reproducao.objects.filter(
+                matriz=OuterRef('matriz'),
+                bezerro__isnull=False,
+                data_cio__lt=OuterRef('data_cio'),
+            )
+            .order_by()
+            .values('matriz')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+
+        # Intervalo contínuo de datas (usa o índice de data_cio, ao contrário de __year/__month)
+        linhas = (
+            Reproducao.objects.filter(data_cio__range=(inicio, fim))
+            .annotate(paridade=Coalesce(Subquery(partos_anteriores), 0))
+            .order_by()
+            .values('tipo', 'touro__identificacao', 'codigo_semen', 'paridade', 'resultado')
+            .annotate(total=Count('pk'))
+        )
+
+        tipos = dict(Reproducao._meta.get_field('tipo').choices)
+        geral = defaultdict(int)
+        por_tipo = defaultdict(lambda: defaultdict(int))
+        por_reprodutor = defaultdict(lambda: defaultdict(int))
+        por_paridade = defaultdict(lambda: defaultdict(int))
+
+        for linha in linhas:
+            resultado, total = linha['resultado'], linha['total']
+            reprodutor = linha['touro__identificacao'] or linha['codigo_semen'] or 'Não informado'
+            paridade = EstacaoMontaService.PARIDADES[min(linha['paridade'], len(EstacaoMontaService.PARIDADES) - 1)]
+
+            geral[resultado] += total
+            por_tipo[tipos.get(linha['tipo'], linha['tipo'])][resultado] += total
+            por_reprodutor[reprodutor][resultado] += total
+            por_paridade[paridade][resultado] += total
+
+        def tabela(grupos, ordem=None):
+            chaves = ordem if ordem is not None else sorted(grupos)
+            return [
+                {'grupo': chave, **EstacaoMontaService._indicadores(grupos[chave])}
+                for chave in chaves if chave in grupos
+            ]
+
+        return {
+            'ano_inicio': ano_inicio,
+            'nome_estacao': f"{ano_inicio}/{ano_inicio + 1}",
+            'encerrada': EstacaoMontaService.encerrada(ano_inicio),
+            **EstacaoMontaService._indicadores(geral),
+            'por_tipo': tabela(por_tipo),
+            'por_reprodutor': sorted(tabela(por_reprodutor), key=lambda g: -g['total_servicos']),
+            'por_paridade': tabela(por_paridade, EstacaoMontaService.PARIDADES),
+        }
 
 
 class ReproducaoService:
@@ -11,34 +266,141 @@ class ReproducaoService:
     @staticmethod
     def obter_dados_estacao(ano_inicio):
         """
-        Filtra reproduções da Estação de Monta (Outubro/Ano a Março/Ano+1)
+        Resumo da Estação de Monta (Outubro/Ano a Março/Ano+1) para o dashboard.
         """
-        ano_fim = int(ano_inicio) + 1
-        
-        # Filtro complexo: 
-        # (Ano início E meses >= 10) OU (Ano fim E meses <= 3)
-        filtro_estacao = Q(data_cio__year=ano_inicio, data_cio__month__gte=10) | \
-                         Q(data_cio__year=ano_fim, data_cio__month__lte=3)
-        
-        reproducoes = Reproducao.objects.filter(filtro_estacao)
-        
-        total_servicos = reproducoes.count()
-
-        prenhezes = reproducoes.filter(resultado='P').count() or 0
-        
-        vazias = reproducoes.filter(resultado='V').count() or 0
-
-        nao_verificadas = reproducoes.filter(resultado='N').count() or 0
-
-        # Taxa de Prenhez da Estação
-        taxa_prenhez = (prenhezes / total_servicos * 100) if total_servicos > 0 else 0
-        
-        return {
-            'reproducoes': reproducoes,
-            'total_servicos': total_servicos,
-            'prenhezes': prenhezes,
-            'vazias': vazias,
-            'nao_verificadas': nao_verificadas,
-            'taxa_prenhez': round(taxa_prenhez, 1),
-            'nome_estacao': f"{ano_inicio}/{ano_fim}"
-        }
\ No newline at end of file
+        return EstacaoMontaService.analisar(ano_inicio)
+
+
+class ProtocoloService:
+    """
+    Registro em lote de protocolos (IATF, vacinação...): monta as linhas em memória
+    e grava com um único bulk_create/bulk_update, sem tocar em Animal.
+    """
+
+    TAMANHO_LOTE = 500
+
+    @staticmethod
+    def _ids(animais):
+        return [animal if isinstance(animal, int) else animal.pk for animal in animais]
+
+    @staticmethod
+    def _invalidar_timeline(animal_ids):
+        # bulk_create/bulk_update não disparam os signals que descartam a ficha do animal
+        TimelineAnimalService.invalidar(animal_ids)
+
+    @staticmethod
+    def registrar_reproducoes(matrizes, data_cio, tipo='IATF', touro=None, codigo_semen='',
+                              escore=None, data_dg=None, resultado='N'):
+        """Cria uma Reproducao por matriz. data_parto_prevista é calculada no bulk_create."""
+        reproducoes = [
+            Reproducao(
+                matriz_id=matriz_id,
+                data_cio=data_cio,
+                tipo=tipo,
+                touro=touro,
+                codigo_semen=codigo_semen or '',
+                escore=escore,
+                data_dg=data_dg,
+                resultado=resultado or 'N',
+            )
+            for matriz_id in ProtocoloService._ids(matrizes)
+        ]
+        with transaction.atomic():
+            criadas = Reproducao.objects.bulk_create(reproducoes, batch_size=ProtocoloService.TAMANHO_LOTE)
+        ProtocoloService._invalidar_timeline([reproducao.matriz_id for reproducao in criadas])
+        return criadas
+
+    @staticmethod
+    def registrar_tratamentos(animais, data_tratamento, tipo_tratamento, produto, dose='',
+                              descricao='', data_proximo_tratamento=None):
+        """Cria um TratamentoSaude por animal."""
+        tratamentos = [
+            TratamentoSaude(
+                animal_id=animal_id,
+                data_tratamento=data_tratamento,
+                tipo_tratamento=tipo_tratamento,
+                produto=produto,
+                dose=dose or '',
+                descricao=descricao or '',
+                data_proximo_tratamento=data_proximo_tratamento,
+            )
+            for animal_id in ProtocoloService._ids(animais)
+        ]
+        with transaction.atomic():
+            criados = TratamentoSaude.objects.bulk_create(tratamentos, batch_size=ProtocoloService.TAMANHO_LOTE)
+        ProtocoloService._invalidar_timeline([tratamento.animal_id for tratamento in criados])
+        return criados
+
+    @staticmethod
+    def registrar_diagnosticos(resultados, data_dg=None):
+        """
+        Lança o DG de várias matrizes de uma vez.
+        `resultados` = {reproducao_id: 'P' | 'V' | 'N'}. Retorna quantas mudaram.
+        """
+        data_dg = data_dg or timezone.localdate()
+        validos = {codigo for codigo, _ in Reproducao._meta.get_field('resultado').choices}
+
+        alteradas = []
+        for reproducao in Reproducao.objects.filter(pk__in=list(resultados)).only('id', 'matriz_id', 'resultado', 'data_dg'):
+            resultado = resultados[reproducao.pk]
+            if resultado not in validos:
+                continue
+            nova_data_dg = None if resultado == 'N' else data_dg
+            if (reproducao.resultado, reproducao.data_dg) == (resultado, nova_data_dg):
+                continue
+            reproducao.resultado = resultado
+            reproducao.data_dg = nova_data_dg
+            alteradas.append(reproducao)
+
+        with transaction.atomic():
+            Reproducao.objects.bulk_update(alteradas, ['resultado', 'data_dg'], batch_size=ProtocoloService.TAMANHO_LOTE)
+        ProtocoloService._invalidar_timeline([reproducao.matriz_id for reproducao in alteradas])
+        return len(alteradas)
+
+
+class PesagemService:
+
+    @staticmethod
+    def gpmd_por_animal(animais=None, inicio=None, fim=None):
+        """
+        GPMD (kg/dia) de cada animal entre a primeira e a última pesagem do
+        período, em uma consulta só. Animais com menos de duas pesagens (em
+        datas diferentes) ficam de fora. `animais`: ids ou queryset de Animal.
+        """
+        pesagens = Pesagem.objects.order_by('animal_id', 'data_pesagem')
+        if animais is not None:
+            pesagens = pesagens.filter(animal__in=animais)
+        if inicio:
+            pesagens = pesagens.filter(data_pesagem__gte=inicio)
+        if fim:
+            pesagens = pesagens.filter(data_pesagem__lte=fim)
+
+        extremos = {}
+        for animal_id, data, peso in pesagens.values_list('animal_id', 'data_pesagem', 'peso_kg').iterator(chunk_size=2000):
+            if animal_id in extremos:
+                extremos[animal_id][1] = (data, peso)
+            else:
+                extremos[animal_id] = [(data, peso), (data, peso)]
+
+        resultado = {}
+        for animal_id, ((data_inicial, peso_inicial), (data_final, peso_final)) in extremos.items():
+            dias = (data_final - data_inicial).days
+            if dias > 0:
+                resultado[animal_id] = ((peso_final - peso_inicial) / dias).quantize(Decimal('0.001'))
+        return resultado
+
+    @staticmethod
+    def ultimo_peso(ate=None):
+        """Subquery para Animal.annotate(): peso da última pesagem até a data."""
+        pesagens = Pesagem.objects.filter(animal=OuterRef('pk'))
+        if ate:
+            pesagens = pesagens.filter(data_pesagem__lte=ate)
+        return Subquery(pesagens.order_by('-data_pesagem').values('peso_kg')[:1])
+
+    @staticmethod
+    def ultima_data(ate=None):
+        """Subquery para Animal.annotate(): data da última pesagem."""
+        pesagens = Pesagem.objects.filter(animal=OuterRef('pk'))
+        if ate:
+            pesagens = pesagens.filter(data_pesagem__lte=ate)
+        return Subquery(pesagens.order_by('-data_pesagem').values('data_pesagem')[:1])
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from rebanho.models import Animal, CAMPOS_PREVISAO_PARTO
+
+from .models import Reproducao
+from .services import EstacaoMontaService, PrevisaoPartoService
+
+
+@receiver(pre_save, sender=Reproducao)
+def guardar_data_parto_anterior(sender, instance, raw=False, **kwargs):
+    # Se o cio mudar, a data antiga também precisa ser recalculada na previsão
+    instance._data_parto_anterior = None
+    if instance.pk and not raw:
+        instance._data_parto_anterior = (
+            Reproducao.objects.filter(pk=instance.pk).values_list('data_parto_prevista', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Reproducao)
+def atualizar_apos_reproducao(sender, instance, raw=False, **kwargs):
+    # Qualquer manejo reprodutivo muda os indicadores (e a paridade das estações seguintes)
+    EstacaoMontaService.invalidar_cache()
+    if not raw:
+        PrevisaoPartoService.recalcular({instance.data_parto_prevista, getattr(instance, '_data_parto_anterior', None)})
+
+
+@receiver(post_delete, sender=Reproducao)
+def atualizar_apos_exclusao_reproducao(sender, instance, **kwargs):
+    EstacaoMontaService.invalidar_cache()
+    PrevisaoPartoService.recalcular({instance.data_parto_prevista})
+
+
+@receiver(post_save, sender=Animal)
+def atualizar_previsao_da_matriz(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Matriz mudou de pasto, lote ou situação: a previsão por pasto/lote acompanha."""
+    if created or raw or instance.sexo != 'F':
+        return
+    if update_fields is not None and not CAMPOS_PREVISAO_PARTO.intersection(update_fields):
+        return
+    PrevisaoPartoService.recalcular_matrizes([instance.pk])
@@ -0,0 +1,11 @@
+# manejo/tarefas.py
+"""Tarefas de segundo plano do manejo (ver core/processamento.py)."""
+from core.processamento import tarefa
+
+from .eficiencia import EficienciaReprodutivaService
+
+
+@tarefa('manejo.indices_reprodutivos', 'Índices reprodutivos das matrizes')
+def calcular_indices_reprodutivos(execucao):
+    execucao.progresso(5, mensagem="Calculando os índices reprodutivos...", forcar=True)
+    return {'matrizes': EficienciaReprodutivaService.recalcular()}
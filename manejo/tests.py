@@ -1,3 +1,415 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.perfil import CACHE_EM_MEMORIA
+from core.services import ZootecnicoService
+from infraestrutura.models import Pasto
+from rebanho.models import Animal
+
+from .models import IndiceReprodutivo, Pesagem, PesagemQuarentena, PrevisaoParto, Reproducao, TratamentoSaude
+from .services import EstacaoMontaService, PrevisaoPartoService, ProtocoloService
+from .eficiencia import EficienciaReprodutivaService
+from .ganho import GanhoPesoService
+from .validacao import ValidacaoPesagemService
+
+
+@override_settings(CACHES=CACHE_EM_MEMORIA)
+class ProtocoloServiceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Animal.objects.bulk_create([
+            Animal(identificacao=f'M-{i}', data_nascimento=date(2019, 1, 1), sexo='F')
+            for i in range(50)
+        ])
+        cls.matrizes = list(Animal.objects.values_list('pk', flat=True))
+
+    def test_protocolo_iatf_em_lote(self):
+        data_cio = date(2025, 11, 3)
+        with self.assertNumQueries(3):  # savepoint + INSERT + release
+            ProtocoloService.registrar_reproducoes(self.matrizes, data_cio=data_cio, codigo_semen='NEL-123')
+
+        self.assertEqual(Reproducao.objects.count(), 50)
+        self.assertFalse(
+            Reproducao.objects.exclude(data_parto_prevista=data_cio + timedelta(days=Reproducao.DIAS_GESTACAO)).exists()
+        )
+
+    def test_tratamento_em_lote(self):
+        with self.assertNumQueries(3):
+            ProtocoloService.registrar_tratamentos(
+                self.matrizes, data_tratamento=date(2025, 5, 1), tipo_tratamento='VAC', produto='Aftosa'
+            )
+        self.assertEqual(TratamentoSaude.objects.count(), 50)
+
+    def test_dg_em_lote(self):
+        reproducoes = ProtocoloService.registrar_reproducoes(self.matrizes[:4], data_cio=date(2025, 11, 3))
+        resultados = {
+            reproducoes[0].pk: 'P',
+            reproducoes[1].pk: 'V',
+            reproducoes[2].pk: 'N',
+            reproducoes[3].pk: 'X',
+        }
+
+        alteradas = ProtocoloService.registrar_diagnosticos(resultados, data_dg=date(2026, 1, 5))
+
+        self.assertEqual(alteradas, 2)
+        self.assertEqual(
+            dict(Reproducao.objects.values_list('pk', 'resultado')),
+            {reproducoes[0].pk: 'P', reproducoes[1].pk: 'V', reproducoes[2].pk: 'N', reproducoes[3].pk: 'N'},
+        )
+
+    def test_tela_dg_ignora_datas_invalidas(self):
+        reproducao, = ProtocoloService.registrar_reproducoes(self.matrizes[:1], data_cio=date(2025, 11, 3))
+        User.objects.create_user('gerente', password='senha')
+        self.client.login(username='gerente', password='senha')
+        for data_cio in ('abc', '2023-02-30'):
+            response = self.client.get(reverse('diagnostico_lote'), {'data_cio': data_cio})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['reproducoes']), 1)
+
+        response = self.client.post(reverse('diagnostico_lote'), {'data_dg': '2023-02-30', f'resultado_{reproducao.pk}': 'P'})
+        self.assertEqual(response.status_code, 302)
+        reproducao.refresh_from_db()
+        self.assertEqual((reproducao.resultado, reproducao.data_dg), ('P', timezone.localdate()))
+
+
+@override_settings(CACHES=CACHE_EM_MEMORIA)
+class EstacaoMontaServiceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.touro = Animal.objects.create(identificacao='T-1', data_nascimento=date(2018, 1, 1), sexo='M')
+        cls.novilha = Animal.objects.create(identificacao='N-1', data_nascimento=date(2022, 1, 1), sexo='F')
+        cls.vaca = Animal.objects.create(identificacao='V-1', data_nascimento=date(2018, 1, 1), sexo='F')
+        bezerro = Animal.objects.create(identificacao='B-1', data_nascimento=date(2024, 7, 1), sexo='M', mae=cls.vaca)
+
+        Reproducao.objects.create(matriz=cls.vaca, data_cio=date(2023, 10, 10), resultado='P', bezerro=bezerro)
+        Reproducao.objects.create(matriz=cls.vaca, data_cio=date(2024, 11, 1), tipo='MONTA', touro=cls.touro, resultado='P')
+        Reproducao.objects.create(matriz=cls.novilha, data_cio=date(2024, 11, 1), codigo_semen='NEL-9', resultado='V')
+        Reproducao.objects.create(matriz=cls.novilha, data_cio=date(2025, 1, 15), codigo_semen='NEL-9', resultado='N')
+        # Fora da estação (abril)
+        Reproducao.objects.create(matriz=cls.novilha, data_cio=date(2025, 4, 10), resultado='P')
+
+    def test_indicadores_agrupados_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            dados = EstacaoMontaService._calcular(2024)
+
+        self.assertEqual((dados['total_servicos'], dados['prenhezes'], dados['vazias'], dados['nao_verificadas']), (3, 1, 1, 1))
+        self.assertEqual(dados['taxa_concepcao'], 50.0)
+        self.assertEqual(
+            {g['grupo']: g['total_servicos'] for g in dados['por_reprodutor']},
+            {'T-1': 1, 'NEL-9': 2},
+        )
+        self.assertEqual(
+            {g['grupo']: g['prenhezes'] for g in dados['por_paridade']},
+            {'Novilha': 0, 'Primípara': 1},
+        )
+
+    def test_estacao_encerrada_em_cache_ate_novo_manejo(self):
+        EstacaoMontaService.analisar(2024)
+        with self.assertNumQueries(0):
+            EstacaoMontaService.analisar(2024)
+
+        Reproducao.objects.filter(matriz=self.novilha, resultado='N').update(resultado='P')
+        comparativo = EstacaoMontaService.comparar([2024, 2023])
+        self.assertEqual([e['nome_estacao'] for e in comparativo], ['2023/2024', '2024/2025'])
+        self.assertEqual(comparativo[1]['prenhezes'], 2)
+
+
+class PrevisaoPartoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pasto_a = Pasto.objects.create(nome='Pasto A', area_hectares=10)
+        cls.pasto_b = Pasto.objects.create(nome='Pasto B', area_hectares=10)
+        cls.matrizes = [
+            Animal.objects.create(identificacao=f'V-{i}', data_nascimento=date(2019, 1, 1), sexo='F', pasto_atual=cls.pasto_a)
+            for i in range(3)
+        ]
+
+    def serie(self):
+        return sorted(
+            (p.data, p.pasto_id, p.quantidade) for p in PrevisaoParto.objects.all()
+        )
+
+    def test_serie_acompanha_dg_e_parto(self):
+        data_cio = timezone.localdate() - timedelta(days=200)
+        dpp = data_cio + timedelta(days=Reproducao.DIAS_GESTACAO)
+        reproducoes = ProtocoloService.registrar_reproducoes(self.matrizes, data_cio=data_cio)
+        self.assertEqual(self.serie(), [])
+
+        ProtocoloService.registrar_diagnosticos({r.pk: 'P' for r in reproducoes})
+        self.assertEqual(self.serie(), [(dpp, self.pasto_a.pk, 3)])
+
+        bezerro = Animal.objects.create(identificacao='B-1', data_nascimento=dpp, sexo='M')
+        reproducoes[0].bezerro = bezerro
+        reproducoes[0].save()
+        self.assertEqual(self.serie(), [(dpp, self.pasto_a.pk, 2)])
+
+        # Leitura da lista em uma consulta
+        with self.assertNumQueries(1):
+            self.assertEqual(len(ZootecnicoService.obter_alertas_paricao(120)), 2)
+
+    def test_tela_mostra_taxa_de_prenhez_sobre_matrizes_ativas(self):
+        ano = timezone.localdate().year
+        ProtocoloService.registrar_reproducoes(self.matrizes[:1], data_cio=date(ano - 1, 11, 1), resultado='P')
+        User.objects.create_user('gerente', password='senha')
+        self.client.login(username='gerente', password='senha')
+        response = self.client.get(reverse('paricoes_list'))
+        # 1 prenhez da última estação sobre 3 matrizes ativas (mesmo indicador do painel)
+        self.assertEqual(response.context['taxa_prenhez'], 33.3)
+        self.assertEqual(ZootecnicoService.obter_indicadores_performance()['taxa_prenhez'], 33.3)
+
+    def test_serie_acompanha_pasto_e_situacao_da_matriz(self):
+        data_cio = timezone.localdate() - timedelta(days=100)
+        dpp = data_cio + timedelta(days=Reproducao.DIAS_GESTACAO)
+        ProtocoloService.registrar_reproducoes(self.matrizes, data_cio=data_cio, resultado='P')
+
+        Animal.objects.filter(pk=self.matrizes[0].pk).update(pasto_atual=self.pasto_b)
+        self.assertEqual(self.serie(), [(dpp, self.pasto_a.pk, 2), (dpp, self.pasto_b.pk, 1)])
+
+        self.matrizes[1].situacao = 'MORTO'
+        self.matrizes[1].save(update_fields=['situacao'])
+        self.assertEqual(self.serie(), [(dpp, self.pasto_a.pk, 1), (dpp, self.pasto_b.pk, 1)])
+
+        projecao = PrevisaoPartoService.projecao_mensal(12)
+        self.assertEqual(len(projecao), 12)
+        self.assertEqual(sum(mes['total'] for mes in projecao), 2)
+
+        resposta = self.client.get(reverse('paricoes_ical'))
+        self.assertEqual(resposta.status_code, 403)
+
+
+class ValidacaoPesagemTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ultima = date(2024, 6, 1)
+        cls.sessao = cls.ultima + timedelta(days=60)
+        cls.animais = Animal.objects.bulk_create([
+            Animal(identificacao=f'T-{i:02d}', data_nascimento=date(2022, 1, 1), sexo='F') for i in range(20)
+        ])
+        # Cada animal com peso de base diferente e ganho de 0,6 kg/dia
+        Pesagem.objects.bulk_create([
+            Pesagem(animal=animal, data_pesagem=cls.ultima - timedelta(days=dias), peso_kg=Decimal(250 + 15 * i - dias * 0.6).quantize(Decimal('0.1')))
+            for i, animal in enumerate(cls.animais) for dias in (0, 90, 180)
+        ])
+        User.objects.create_user('peao', password='senha')
+
+    def esperado(self, indice):
+        return Decimal(250 + 15 * indice + 36)
+
+    def sessao_com_erros(self):
+        pesos = {i: self.esperado(i) + (i % 3 - 1) * 2 for i in range(20)}
+        pesos[3] = (self.esperado(3) / 15).quantize(Decimal('0.1'))    # digitado em @
+        pesos[0], pesos[19] = pesos[19], pesos[0]                      # brincos trocados
+        pesos[7] = Decimal('2500')                                      # fora dos limites
+        pesos[11] = self.esperado(11) - 90                              # perda impossível em 60 dias
+        linhas = [Pesagem(animal=self.animais[i], data_pesagem=self.sessao, peso_kg=peso) for i, peso in pesos.items()]
+        linhas.append(Pesagem(animal=self.animais[5], data_pesagem=self.sessao, peso_kg=pesos[5]))  # repetida
+        return linhas
+
+    def test_lote_avaliado_em_uma_passada(self):
+        with self.assertNumQueries(3):
+            aceitas, suspeitas = ValidacaoPesagemService.avaliar(self.sessao_com_erros())
+
+        motivos = {s.animal_id: s.motivo for s in suspeitas}
+        ids = [animal.pk for animal in self.animais]
+        self.assertEqual(motivos, {
+            ids[3]: 'ARROBA', ids[0]: 'TROCA', ids[19]: 'TROCA', ids[7]: 'INVALIDA', ids[11]: 'CURVA', ids[5]: 'DUPLICADA',
+        })
+        self.assertEqual(len(aceitas), 15)
+        arroba = next(s for s in suspeitas if s.motivo == 'ARROBA')
+        self.assertAlmostEqual(float(arroba.peso_sugerido), float(self.esperado(3)), delta=2)
+        self.assertIn('T-19', next(s for s in suspeitas if s.animal_id == ids[0]).detalhe)
+
+    def test_registrar_grava_aceitas_e_revisao_aprova_correcao(self):
+        criadas, suspeitas = ValidacaoPesagemService.registrar(self.sessao_com_erros())
+        self.assertEqual(len(criadas), 15)
+        self.assertEqual(PesagemQuarentena.objects.filter(situacao='PENDENTE').count(), 6)
+        self.animais[1].refresh_from_db()
+        self.assertEqual((self.animais[1].data_ultima_pesagem, self.animais[1].peso_atual), (self.sessao, self.esperado(1)))
+        # Em quarentena o peso atual não muda
+        self.animais[3].refresh_from_db()
+        self.assertIsNone(self.animais[3].data_ultima_pesagem)
+
+        # A mesma leitura de novo é duplicada (já está no banco)
+        _, repetidas = ValidacaoPesagemService.avaliar([Pesagem(animal=self.animais[1], data_pesagem=self.sessao, peso_kg=self.esperado(1))])
+        self.assertEqual(repetidas[0].motivo, 'DUPLICADA')
+
+        arroba = PesagemQuarentena.objects.get(motivo='ARROBA')
+        invalida = PesagemQuarentena.objects.get(motivo='INVALIDA')
+        self.assertEqual(ValidacaoPesagemService.revisar({
+            arroba.pk: ('APROVADA', arroba.peso_sugerido), invalida.pk: ('DESCARTADA', None),
+        }), (1, 1))
+        self.animais[3].refresh_from_db()
+        self.assertEqual(self.animais[3].peso_atual, arroba.peso_sugerido)
+        self.assertEqual(PesagemQuarentena.objects.filter(situacao='PENDENTE').count(), 4)
+
+    def test_revisao_recusa_peso_fora_dos_limites(self):
+        ValidacaoPesagemService.registrar(self.sessao_com_erros())
+        arroba = PesagemQuarentena.objects.get(motivo='ARROBA')
+        invalida = PesagemQuarentena.objects.get(motivo='INVALIDA')
+        self.client.login(username='peao', password='senha')
+        for peso in ('NaN', '1e9', '5'):
+            self.client.post(reverse('pesagem_quarentena'), {f'decisao_{arroba.pk}': 'APROVADA', f'peso_{arroba.pk}': peso})
+            arroba.refresh_from_db()
+            self.assertEqual(arroba.situacao, 'PENDENTE')
+        # Aprovar sem correção um peso original fora dos limites também não grava
+        self.assertEqual(ValidacaoPesagemService.revisar({invalida.pk: ('APROVADA', None)}), (0, 0))
+        self.assertFalse(Pesagem.objects.filter(animal_id=invalida.animal_id, data_pesagem=self.sessao).exists())
+
+    def test_sessao_de_tronco(self):
+        self.client.login(username='peao', password='senha')
+        url = reverse('pesagem_sessao')
+        response = self.client.post(url, {'data_pesagem': self.sessao.isoformat(), 'linhas': 'T-01;287\nXX-9 300'})
+        self.assertContains(response, 'XX-9')
+        self.assertFalse(Pesagem.objects.filter(data_pesagem=self.sessao).exists())
+
+        linhas = '\n'.join(f'T-{i:02d}\t{str(self.esperado(i)).replace(".", ",")}' for i in range(1, 8)) + '\nT-09 28'
+        response = self.client.post(url, {'data_pesagem': self.sessao.isoformat(), 'linhas': linhas})
+        self.assertRedirects(response, reverse('controle_peso_list'), fetch_redirect_response=False)
+        self.assertEqual(Pesagem.objects.filter(data_pesagem=self.sessao).count(), 7)
+        self.assertEqual(PesagemQuarentena.objects.get().motivo, 'ARROBA')
+        self.assertEqual(self.client.get(reverse('pesagem_quarentena')).status_code, 200)
+
+    def test_sessao_recusa_peso_que_nao_cabe_na_quarentena(self):
+        self.client.login(username='peao', password='senha')
+        url = reverse('pesagem_sessao')
+        response = self.client.post(url, {'data_pesagem': self.sessao.isoformat(), 'linhas': 'T-01;123456\nT-02 NaN\nT-03 inf'})
+        self.assertEqual(response.status_code, 200)
+        for numero, peso in ((1, '123456'), (2, 'NaN'), (3, 'inf')):
+            self.assertContains(response, f'Linha {numero}: peso inválido ({peso}).')
+        self.assertFalse(PesagemQuarentena.objects.exists())
+
+        # Fora dos limites mas armazenável: vai para a quarentena e a fila continua abrindo
+        response = self.client.post(url, {'data_pesagem': self.sessao.isoformat(), 'linhas': 'T-01 99999'})
+        self.assertRedirects(response, reverse('controle_peso_list'), fetch_redirect_response=False)
+        self.assertEqual(PesagemQuarentena.objects.get().motivo, 'INVALIDA')
+        self.assertContains(self.client.get(reverse('pesagem_quarentena')), '99.999,00')
+
+
+class GanhoPesoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from rebanho.models import Lote
+
+        cls.lote = Lote.objects.create(nome='Recria 1', finalidade='RECRIA')
+        cls.macho = Animal.objects.create(identificacao='G-1', data_nascimento=date(2023, 1, 10), sexo='M', lote_atual=cls.lote)
+        cls.femea = Animal.objects.create(identificacao='G-2', data_nascimento=date(2022, 6, 1), sexo='F')
+        Pesagem.objects.bulk_create([
+            Pesagem(animal=cls.macho, data_pesagem=date(2024, 1, 1), peso_kg=Decimal('300')),
+            Pesagem(animal=cls.macho, data_pesagem=date(2024, 1, 31), peso_kg=Decimal('330')),
+            Pesagem(animal=cls.macho, data_pesagem=date(2024, 1, 31), peso_kg=Decimal('331')),  # repetida no dia
+            Pesagem(animal=cls.macho, data_pesagem=date(2024, 3, 1), peso_kg=Decimal('346')),
+            Pesagem(animal=cls.femea, data_pesagem=date(2024, 1, 15), peso_kg=Decimal('280')),
+            Pesagem(animal=cls.femea, data_pesagem=date(2024, 2, 14), peso_kg=Decimal('292')),
+        ])
+
+    def test_intervalos_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            intervalos = list(
+                GanhoPesoService.intervalos().order_by('animal_id', 'data_pesagem')
+                .values_list('animal_id', 'data_anterior', 'data_pesagem', 'ganho_kg', 'dias', 'gpmd')
+            )
+        self.assertEqual(intervalos, [
+            (self.macho.pk, date(2024, 1, 1), date(2024, 1, 31), 30.0, 30, 1.0),
+            (self.macho.pk, date(2024, 1, 31), date(2024, 3, 1), 15.0, 30, 0.5),
+            (self.femea.pk, date(2024, 1, 15), date(2024, 2, 14), 12.0, 30, 0.4),
+        ])
+        # As duas pontas precisam estar no período
+        self.assertEqual(GanhoPesoService.intervalos(inicio=date(2024, 1, 20)).count(), 1)
+        self.assertEqual(GanhoPesoService.intervalos([self.femea.pk]).get().ganho_kg, 12.0)
+
+    def test_relatorio_por_grupo_e_periodo(self):
+        relatorio = GanhoPesoService.relatorio('sexo', 'mes')
+        self.assertEqual(relatorio['periodos'], [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)])
+        linhas = {linha['nome']: linha for linha in relatorio['linhas']}
+        self.assertEqual([c and c['gpmd'] for c in linhas['Macho']['celulas']], [Decimal('1.000'), None, Decimal('0.500')])
+        self.assertEqual(linhas['Macho']['total'], {
+            'animais': 1, 'intervalos': 2, 'ganho_kg': 45.0, 'dias': 60, 'gpmd': Decimal('0.750'),
+        })
+
+        por_lote = GanhoPesoService.relatorio('lote', 'ano')
+        self.assertEqual([(linha['nome'], linha['total']['gpmd']) for linha in por_lote['linhas']], [
+            ('Recria 1', Decimal('0.750')), ('Sem lote', Decimal('0.400')),
+        ])
+        self.assertEqual({linha['nome'] for linha in GanhoPesoService.relatorio('safra', 'ano')['linhas']}, {'2022', '2023'})
+
+    def test_telas(self):
+        User.objects.create_user('gerente', password='senha')
+        self.client.login(username='gerente', password='senha')
+        response = self.client.get(reverse('ganho_peso'), {'agrupar': 'pasto', 'inicio': '2024-01-01', 'fim': '2024-03-31'})
+        self.assertContains(response, 'Sem pasto')
+        # Data impossível cai no padrão em vez de derrubar a tela
+        response = self.client.get(reverse('ganho_peso'), {'inicio': '2024-02-30', 'fim': '2024-04-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['fim'], timezone.localdate())
+        response = self.client.get(reverse('rebanho:analise_lotes'))
+        self.assertEqual(response.status_code, 200)
+
+
+class EficienciaReprodutivaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = date(2021, 6, 1)
+        cls.vaca = Animal.objects.create(identificacao='V-1', data_nascimento=date(2015, 1, 1), sexo='F')
+        cls.tardia = Animal.objects.create(identificacao='V-2', data_nascimento=date(2016, 1, 1), sexo='F')
+        cls.novilha = Animal.objects.create(identificacao='V-3', data_nascimento=date(2016, 1, 1), sexo='F')
+        partos = [
+            (cls.vaca, date(2017, 10, 1)), (cls.vaca, date(2018, 11, 1)),
+            (cls.vaca, date(2019, 12, 1)), (cls.vaca, date(2019, 12, 1)),  # gêmeos: um parto
+            (cls.tardia, date(2018, 6, 1)), (cls.tardia, date(2020, 1, 1)),
+        ]
+        for i, (mae, nascimento) in enumerate(partos):
+            Animal.objects.create(identificacao=f'B-{i}', data_nascimento=nascimento, sexo='M', mae=mae)
+
+        Reproducao.objects.bulk_create([
+            Reproducao(matriz=cls.vaca, data_cio=date(2020, 2, 1), resultado='V'),
+            Reproducao(matriz=cls.vaca, data_cio=date(2020, 3, 1), resultado='P'),
+            *[Reproducao(matriz=cls.novilha, data_cio=date(2018 + i, 1, 10), resultado='V') for i in range(3)],
+        ])
+
+    def test_indices_em_poucas_consultas(self):
+        with self.assertNumQueries(3):
+            indices = {indice.matriz_id: indice for indice in EficienciaReprodutivaService.calcular(self.data)}
+        vaca = indices[self.vaca.pk]
+        self.assertEqual((vaca.partos, vaca.iep_ultimo_dias, vaca.iep_medio_dias), (3, 395, 396))
+        self.assertEqual(vaca.idade_primeiro_parto_meses, Decimal('33.0'))
+        self.assertEqual((vaca.dias_em_aberto, vaca.prenhe), (91, True))
+        self.assertEqual(vaca.servicos_por_concepcao, Decimal('2.00'))
+
+        tardia = indices[self.tardia.pk]
+        self.assertEqual((tardia.partos, tardia.iep_medio_dias, tardia.dias_em_aberto), (2, 579, 517))
+        self.assertIsNone(tardia.servicos_por_concepcao)
+        novilha = indices[self.novilha.pk]
+        self.assertEqual((novilha.partos, novilha.servicos, novilha.concepcoes, novilha.dias_em_aberto), (0, 3, 0, None))
+
+    def test_ranking_e_descarte(self):
+        self.assertEqual(EficienciaReprodutivaService.recalcular(self.data), 3)
+        self.assertEqual([i.matriz_id for i in EficienciaReprodutivaService.ranking()], [self.vaca.pk, self.tardia.pk])
+
+        descarte = {indice.matriz_id: motivos for indice, motivos in EficienciaReprodutivaService.descarte(self.data)}
+        self.assertEqual(set(descarte), {self.tardia.pk, self.novilha.pk})
+        self.assertEqual(descarte[self.tardia.pk], ['IEP médio de 579 dias', '517 dias em aberto'])
+        self.assertEqual(len(descarte[self.novilha.pk]), 2)
+
+        # Recalcular substitui as linhas
+        self.assertEqual(EficienciaReprodutivaService.recalcular(self.data), 3)
+        self.assertEqual(IndiceReprodutivo.objects.count(), 3)
+        self.assertEqual(EficienciaReprodutivaService.resumo()['iep_medio'], (396 + 579) / 2)
+
+    def test_tela(self):
+        EficienciaReprodutivaService.recalcular(self.data)
+        User.objects.create_user('gerente', password='senha')
+        self.client.login(username='gerente', password='senha')
+        url = reverse('eficiencia_reprodutiva')
+        self.assertContains(self.client.get(url), 'sem parto aos 36 meses')
+        self.assertEqual(self.client.post(url).status_code, 302)
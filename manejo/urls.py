@@ -1,6 +1,6 @@
 from django.urls import path, include
 from . import views
-from .views import AlertaRiscoListView, ExportarParicoesCSVView, ParicoesListView,  PesagemCreateView,   PesagemListView, RegistrarNascimentoView, ReproducaoListView, ReproducaoUpdateView, TratamentoSaudeListView, TratamentoCreateView, ReproducaoCreateView,  PesagemUpdateView
+from .views import AlertaRiscoListView, CalendarioParicoesView, DiagnosticoLoteView, EficienciaReprodutivaView, EstacoesMontaView, ExportarParicoesCSVView, GanhoPesoView, ParicoesListView,  PesagemCreateView,   PesagemListView, PesagemQuarentenaView, PesagemSessaoView, RegistrarNascimentoView, ReproducaoListView, ReproducaoUpdateView, TratamentoSaudeListView, TratamentoCreateView, ReproducaoCreateView,  PesagemUpdateView
 
 
 urlpatterns = [
@@ -12,12 +12,19 @@ urlpatterns = [
     path('tratamentos/novo-tratamento/', TratamentoCreateView.as_view(),name='tratamento_create'),
     path('reproducao', ReproducaoListView.as_view(), name='manejo_reprodutivo_list'),
     path('reproducao/nova-reproducao/', ReproducaoCreateView.as_view(),name='reproducao_create'),
+    path('reproducao/estacoes/', EstacoesMontaView.as_view(), name='estacoes_monta'),
+    path('reproducao/diagnostico-lote/', DiagnosticoLoteView.as_view(), name='diagnostico_lote'),
+    path('reproducao/eficiencia/', EficienciaReprodutivaView.as_view(), name='eficiencia_reprodutiva'),
     path('reproducao/editar/<int:pk>/', ReproducaoUpdateView.as_view(),name='reproducao_update'),
     path('controle_peso/', PesagemListView.as_view(), name='controle_peso_list'),
     path('controle_peso/nova-pesagem/', PesagemCreateView.as_view(), name='pesagem_create'),
     path('controle_peso/<int:pk>/editar/', PesagemUpdateView.as_view(), name='pesagem_update'),
+    path('controle_peso/sessao/', PesagemSessaoView.as_view(), name='pesagem_sessao'),
+    path('controle_peso/quarentena/', PesagemQuarentenaView.as_view(), name='pesagem_quarentena'),
+    path('controle_peso/ganho/', GanhoPesoView.as_view(), name='ganho_peso'),
 
     path('paricoes/', ParicoesListView.as_view(), name='paricoes_list'),
     path('reproducao/novo-nascimento/', RegistrarNascimentoView.as_view(), name='registrar_nascimento'),
+    path('paricoes/calendario.ics', CalendarioParicoesView.as_view(), name='paricoes_ical'),
     path('paricoes/exportar/csv/', ExportarParicoesCSVView.as_view(), name='exportar_paricoes_csv'),
 ]
\ No newline at end of file
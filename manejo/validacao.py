@@ -0,0 +1,278 @@
+# manejo/validacao.py
+"""
+Validação das pesagens na entrada (tronco, lançamento em lote).
+
+O lote inteiro é avaliado em uma passada NumPy com três consultas (animais,
+histórico de pesagens e curvas de crescimento). O peso esperado de cada
+linha é a pesagem anterior do animal somada ao ganho da sua curva no
+intervalo; sem curva, ao ganho mediano do próprio lote; sem histórico, à
+curva média do sexo. O resíduo vira um z robusto (mediana/MAD do lote, com
+um piso por linha que cresce com o tempo desde a referência).
+
+Linhas suspeitas vão para PesagemQuarentena em vez de virar Pesagem:
+duplicadas no dia, fora dos limites, kg digitado em @, brincos trocados
+(dois animais cujos pesos batem com o esperado do outro) e fora da curva.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from rebanho.crescimento import PRIOR_PADRAO, brody
+from rebanho.models import Animal, CurvaCrescimento
+from rebanho.safra import SafraService
+from rebanho.timeline import TimelineAnimalService
+
+from .models import Pesagem, PesagemQuarentena
+
+
+PESO_MINIMO = 10
+PESO_MAXIMO = 1500
+KG_POR_ARROBA = 15
+Z_LIMITE = 4.0
+# Ganho (kg/dia) usado quando nem a curva nem o lote dizem nada
+GANHO_PADRAO = 0.5
+# Piso da escala do z (kg): base + por dia desde a pesagem anterior; sem histórico, fração do esperado
+ESCALA_BASE = 12.0
+ESCALA_POR_DIA = 0.1
+ESCALA_SEM_HISTORICO = {'curva': 0.12, 'prior': 0.25}
+# Com menos linhas que isso o lote não dá mediana/MAD confiáveis
+MINIMO_LOTE = 5
+
+
+def _ordinais(datas):
+    return np.fromiter((d.toordinal() for d in datas), dtype=np.int64, count=len(datas))
+
+
+class ValidacaoPesagemService:
+
+    @staticmethod
+    def _esperados(linhas):
+        """
+        Arrays (pesos, esperado, escala, duplicada) de cada linha e a identificação
+        dos animais, com as três consultas do lote. `linhas` são Pesagem ainda não gravadas.
+        """
+        total = len(linhas)
+        animal_ids = np.array([p.animal_id for p in linhas])
+        datas = _ordinais([p.data_pesagem for p in linhas])
+        pesos = np.array([float(p.peso_kg) for p in linhas])
+        unicos = sorted(set(animal_ids.tolist()))
+        posicao = np.searchsorted(unicos, animal_ids)
+
+        animais = {
+            pk: (sexo, nascimento, identificacao)
+            for pk, sexo, nascimento, identificacao in Animal.objects.filter(pk__in=unicos)
+            .values_list('pk', 'sexo', 'data_nascimento', 'identificacao')
+        }
+        nascimentos = _ordinais([animais[pk][1] for pk in animal_ids.tolist()])
+        sexos = [animais[pk][0] for pk in animal_ids.tolist()]
+        curvas = {
+            pk: (a, b, k)
+            for pk, a, b, k in CurvaCrescimento.objects.filter(animal__in=unicos)
+            .values_list('animal_id', 'peso_adulto', 'fator_b', 'taxa_k')
+        }
+
+        # Histórico ordenado por (animal, data): a pesagem anterior de cada linha sai de um searchsorted
+        historico = list(
+            Pesagem.objects.filter(animal__in=unicos).order_by('animal_id', 'data_pesagem', 'pk')
+            .values_list('animal_id', 'data_pesagem', 'peso_kg')
+        )
+        chaves = posicao * 10**6 + datas
+        if historico:
+            h_animais, h_datas, h_pesos = zip(*historico)
+            h_chaves = np.searchsorted(unicos, h_animais) * 10**6 + _ordinais(h_datas)
+            h_pesos = np.array(h_pesos, dtype=float)
+        else:
+            # Sentinela para os índices abaixo: nunca é do mesmo animal
+            h_chaves, h_pesos = np.array([-1]), np.array([0.0])
+        anterior = np.searchsorted(h_chaves, chaves, side='left') - 1
+        tem_anterior = (anterior >= 0) & (h_chaves[np.maximum(anterior, 0)] // 10**6 == posicao)
+        anterior = np.maximum(anterior, 0)
+
+        # Duplicada: já existe no banco no mesmo dia ou repete uma linha anterior do próprio lote
+        no_banco = np.isin(chaves, h_chaves)
+        _, primeira = np.unique(chaves, return_index=True)
+        repetida = np.ones(total, bool)
+        repetida[primeira] = False
+        duplicada = no_banco | repetida
+
+        idades = (datas - nascimentos).astype(float)
+        params = np.array([
+            curvas.get(pk) or (PRIOR_PADRAO[sexo][0], 1 - PRIOR_PADRAO[sexo][1] / PRIOR_PADRAO[sexo][0], PRIOR_PADRAO[sexo][2])
+            for pk, sexo in zip(animal_ids.tolist(), sexos)
+        ])
+        tem_curva = np.array([pk in curvas for pk in animal_ids.tolist()])
+        peso_curva = brody(params[:, 0], params[:, 1], params[:, 2], idades)
+
+        peso_anterior = np.where(tem_anterior, h_pesos[anterior], np.nan)
+        data_anterior = np.where(tem_anterior, h_chaves[anterior] % 10**6, datas)
+        dias = (datas - data_anterior).astype(float)
+        idade_anterior = (data_anterior - nascimentos).astype(float)
+        ganho_curva = peso_curva - brody(params[:, 0], params[:, 1], params[:, 2], idade_anterior)
+
+        # Ganho diário mediano do lote para quem tem pesagem anterior mas não tem curva
+        com_ganho = tem_anterior & (dias > 0) & ~duplicada
+        ganho_lote = GANHO_PADRAO
+        if com_ganho.sum() >= MINIMO_LOTE:
+            ganho_lote = np.median((pesos[com_ganho] - peso_anterior[com_ganho]) / dias[com_ganho])
+        ganho = np.where(tem_curva, ganho_curva, np.maximum(ganho_lote, 0) * dias)
+
+        esperado = np.where(tem_anterior, peso_anterior + ganho, peso_curva)
+        escala = np.where(
+            tem_anterior,
+            ESCALA_BASE + ESCALA_POR_DIA * dias,
+            peso_curva * np.where(tem_curva, ESCALA_SEM_HISTORICO['curva'], ESCALA_SEM_HISTORICO['prior']),
+        )
+        identificacoes = {pk: dados[2] for pk, dados in animais.items()}
+        return pesos, esperado, np.maximum(escala, ESCALA_BASE), duplicada, identificacoes
+
+    @staticmethod
+    def avaliar(pesagens):
+        """
+        Separa o lote em (aceitas, suspeitas): aceitas são as Pesagem recebidas,
+        suspeitas são PesagemQuarentena (nada é gravado).
+        """
+        linhas = list(pesagens)
+        if not linhas:
+            return [], []
+        pesos, esperado, escala, duplicada, identificacoes = ValidacaoPesagemService._esperados(linhas)
+
+        residuo = pesos - esperado
+        validos = ~duplicada & (pesos >= PESO_MINIMO) & (pesos <= PESO_MAXIMO)
+        if validos.sum() >= MINIMO_LOTE:
+            centro = np.median(residuo[validos])
+            escala = np.maximum(escala, 1.4826 * np.median(np.abs(residuo[validos] - centro)))
+        else:
+            centro = 0.0
+        z = (residuo - centro) / escala
+
+        motivos = np.full(len(linhas), '', dtype=object)
+        sugerido = np.full(len(linhas), np.nan)
+        detalhes = [''] * len(linhas)
+        motivos[np.abs(z) > Z_LIMITE] = 'CURVA'
+        sugerido[motivos == 'CURVA'] = esperado[motivos == 'CURVA']
+
+        # kg digitado em @: o peso x 15 cai dentro do esperado
+        em_arroba = (motivos == 'CURVA') & (np.abs((pesos * KG_POR_ARROBA - esperado - centro) / escala) <= Z_LIMITE / 2)
+        motivos[em_arroba] = 'ARROBA'
+        sugerido[em_arroba] = pesos[em_arroba] * KG_POR_ARROBA
+
+        # Brincos trocados: entre as linhas fora da curva, pares em que cada peso cabe no esperado do outro
+        fora = np.flatnonzero(motivos == 'CURVA')
+        if len(fora) > 1:
+            cruzado = np.abs(pesos[fora][:, None] - esperado[fora][None, :] - centro) / escala[fora][None, :] <= Z_LIMITE / 2
+            par = cruzado & cruzado.T
+            np.fill_diagonal(par, False)
+            for i, j in zip(*np.nonzero(np.triu(par))):
+                a, b = fora[i], fora[j]
+                if motivos[a] == 'CURVA' and motivos[b] == 'CURVA':
+                    motivos[[a, b]] = 'TROCA'
+                    sugerido[a], sugerido[b] = pesos[b], pesos[a]
+                    detalhes[a] = f"Peso confere com o animal {identificacoes[linhas[b].animal_id]}."
+                    detalhes[b] = f"Peso confere com o animal {identificacoes[linhas[a].animal_id]}."
+
+        motivos[(pesos < PESO_MINIMO) | (pesos > PESO_MAXIMO)] = 'INVALIDA'
+        motivos[duplicada] = 'DUPLICADA'
+
+        aceitas, suspeitas = [], []
+        for indice, pesagem in enumerate(linhas):
+            motivo = motivos[indice]
+            if not motivo:
+                aceitas.append(pesagem)
+                continue
+            if not detalhes[indice] and motivo in ('CURVA', 'ARROBA'):
+                detalhes[indice] = f"Esperado ~{esperado[indice]:.0f} kg (z = {z[indice]:+.1f})."
+            suspeitas.append(PesagemQuarentena(
+                animal_id=pesagem.animal_id,
+                data_pesagem=pesagem.data_pesagem,
+                peso_kg=pesagem.peso_kg,
+                evento=pesagem.evento or '',
+                motivo=motivo,
+                detalhe=detalhes[indice],
+                peso_sugerido=None if np.isnan(sugerido[indice]) else Decimal(f"{sugerido[indice]:.2f}"),
+                pontuacao=None if motivo in ('DUPLICADA', 'INVALIDA') else round(float(z[indice]), 2),
+            ))
+        return aceitas, suspeitas
+
+    @staticmethod
+    def gravar(pesagens):
+        """
+        Grava as pesagens com um bulk_create e atualiza o peso em cache dos animais
+        (o que Pesagem.save faria uma a uma). Retorna as pesagens criadas.
+        """
+        pesagens = list(pesagens)
+        if not pesagens:
+            return []
+        with transaction.atomic():
+            criadas = Pesagem.objects.bulk_create(pesagens, batch_size=1000)
+            ultimas = {}
+            for pesagem in criadas:
+                atual = ultimas.get(pesagem.animal_id)
+                if atual is None or pesagem.data_pesagem >= atual.data_pesagem:
+                    ultimas[pesagem.animal_id] = pesagem
+            animais = []
+            for animal in Animal.objects.filter(pk__in=ultimas).only('pk', 'peso_atual', 'data_ultima_pesagem'):
+                pesagem = ultimas[animal.pk]
+                if animal.data_ultima_pesagem is None or pesagem.data_pesagem >= animal.data_ultima_pesagem:
+                    animal.peso_atual = pesagem.peso_kg
+                    animal.data_ultima_pesagem = pesagem.data_pesagem
+                    animais.append(animal)
+            Animal.objects.bulk_update(animais, ['peso_atual', 'data_ultima_pesagem'], batch_size=1000)
+        # bulk_create não dispara os signals que descartam a ficha do animal e as safras em cache
+        TimelineAnimalService.invalidar(list(ultimas))
+        SafraService.invalidar_animais(
+            [pesagem.animal_id for pesagem in criadas], [pesagem.data_pesagem for pesagem in criadas]
+        )
+        return criadas
+
+    @staticmethod
+    def registrar(pesagens):
+        """Valida o lote, grava as aceitas e põe as suspeitas em quarentena. Retorna (criadas, suspeitas)."""
+        aceitas, suspeitas = ValidacaoPesagemService.avaliar(pesagens)
+        with transaction.atomic():
+            criadas = ValidacaoPesagemService.gravar(aceitas)
+            PesagemQuarentena.objects.bulk_create(suspeitas, batch_size=1000)
+        return criadas, suspeitas
+
+    @staticmethod
+    def peso_valido(peso):
+        """Mesmos limites das pesagens novas (NaN e infinito ficam de fora)."""
+        return peso is not None and peso.is_finite() and PESO_MINIMO <= peso <= PESO_MAXIMO
+
+    @staticmethod
+    def revisar(decisoes):
+        """
+        Aplica a revisão da fila: {quarentena_id: ('APROVADA' | 'DESCARTADA', peso ou None)}.
+        Aprovadas viram Pesagem com o peso informado na revisão (ou o original); aprovações
+        com peso fora de PESO_MINIMO..PESO_MAXIMO ficam pendentes. Retorna (aprovadas, descartadas).
+        """
+        pendentes = PesagemQuarentena.objects.filter(pk__in=decisoes, situacao='PENDENTE')
+        aprovadas, descartadas, novas = [], [], []
+        for item in pendentes:
+            situacao, peso = decisoes[item.pk]
+            if situacao == 'APROVADA':
+                if not ValidacaoPesagemService.peso_valido(item.peso_kg if peso is None else peso):
+                    continue
+                if peso is not None:
+                    item.peso_kg = peso
+                novas.append(Pesagem(
+                    animal_id=item.animal_id, data_pesagem=item.data_pesagem, peso_kg=item.peso_kg,
+                    evento=item.evento or "Cadastro de peso regular",
+                ))
+                aprovadas.append(item)
+            elif situacao == 'DESCARTADA':
+                descartadas.append(item)
+            else:
+                continue
+            item.situacao = situacao
+        with transaction.atomic():
+            ValidacaoPesagemService.gravar(novas)
+            PesagemQuarentena.objects.bulk_update(aprovadas + descartadas, ['situacao', 'peso_kg'])
+        return len(aprovadas), len(descartadas)
+
+    @staticmethod
+    def pendentes():
+        return PesagemQuarentena.objects.filter(situacao='PENDENTE').select_related('animal').order_by(
+            '-data_pesagem', 'animal__chave_ordenacao'
+        )
+
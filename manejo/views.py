@@ -1,27 +1,37 @@
 # ControleRebanho/views.py
 
-import csv
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy, reverse
+from django.utils.html import format_html
 from django.contrib import messages
 from django.views.generic import ListView, UpdateView, FormView, TemplateView, View
 from django.contrib.auth.decorators import login_required # Importe o decorador
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Avg, Sum
-from django.db.models.functions import Length
+from django.core.paginator import Paginator
+from django.db.models import Avg, DecimalField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from datetime import  timedelta
 from django.utils import timezone
 from decimal import Decimal
 
+from core.exportacao import ExportacaoMixin, resposta_csv
+from core.datas import ler_data
+from core.processamento import enfileirar
 from core.services import ZootecnicoService
 from financeiro.models import CustoAnimalDetalhe
+from rebanho.genealogia import GenealogiaService, LIMITE_PARENTESCO
 from rebanho.models import Animal
 
 
 from .models import  TratamentoSaude, Reproducao, Pesagem,  TarefaManejo
-from .forms import  ReproducaoSelectMultipleMatrizForm, TratamentoForm, ReproducaoForm,  PesagemForm, PesagemForm,  PesagemModelForm
+from .forms import  ReproducaoSelectMultipleMatrizForm, TratamentoForm, ReproducaoForm,  PesagemForm,  PesagemModelForm, PesagemSessaoForm
+from .eficiencia import EficienciaReprodutivaService
 from .filters import PesagemFilter, ReproducaoFilter
+from .ganho import AGRUPAMENTOS, PERIODOS, GanhoPesoService
+from .services import EstacaoMontaService, PesagemService, PrevisaoPartoService, ProtocoloService
+from .validacao import PESO_MAXIMO, PESO_MINIMO, ValidacaoPesagemService
 
 from django.db import transaction
 
@@ -65,30 +75,90 @@ class PesagemCreateView(LoginRequiredMixin,FormView):
         evento = form.cleaned_data.get('evento', '')
         animais = form.cleaned_data['animais']
 
-        quantidade = 0
-        for animal in animais:
-            Pesagem.objects.create(
-                animal=animal,
-                data_pesagem=data_pesagem,
-                peso_kg=peso_kg,
-                evento=evento
-            )
-            quantidade += 1 
-        
-        messages.success(
-            self.request, 
-            f"Sucesso! {quantidade} animal(is) pesado(s) com {peso_kg}kg."
+        criadas, suspeitas = ValidacaoPesagemService.registrar(
+            Pesagem(animal=animal, data_pesagem=data_pesagem, peso_kg=peso_kg, evento=evento)
+            for animal in animais
         )
+        if criadas:
+            messages.success(
+                self.request, 
+                f"Sucesso! {len(criadas)} animal(is) pesado(s) com {peso_kg}kg."
+            )
+        _avisar_quarentena(self.request, suspeitas)
 
         return redirect(self.get_success_url())
     
     def get_success_url(self):
         animal_id = self.request.GET.get('animal_id')
         if animal_id:
-            return reverse('animal_detail', kwargs={'pk': animal_id})
+            return reverse('rebanho:animal_detail', kwargs={'pk': animal_id})
         return reverse('controle_peso_list')
 
 
+def _avisar_quarentena(request, suspeitas):
+    if suspeitas:
+        messages.warning(
+            request,
+            format_html(
+                '{} pesagem(ns) suspeita(s) ficaram em quarentena. <a href="{}">Revisar</a>',
+                len(suspeitas), reverse('pesagem_quarentena'),
+            ),
+        )
+
+
+class PesagemSessaoView(LoginRequiredMixin, FormView):
+    """Sessão de tronco: valida o lote inteiro de uma vez e retém as leituras suspeitas"""
+    form_class = PesagemSessaoForm
+    template_name = 'manejo/pesagem_sessao.html'
+
+    def get_initial(self):
+        return {'data_pesagem': timezone.localdate()}
+
+    def form_valid(self, form):
+        data_pesagem = form.cleaned_data['data_pesagem']
+        evento = form.cleaned_data['evento'] or "Cadastro de peso regular"
+        criadas, suspeitas = ValidacaoPesagemService.registrar(
+            Pesagem(animal=animal, data_pesagem=data_pesagem, peso_kg=peso, evento=evento)
+            for animal, peso in form.cleaned_data['linhas']
+        )
+        messages.success(self.request, f"{len(criadas)} pesagem(ns) registrada(s).")
+        _avisar_quarentena(self.request, suspeitas)
+        return redirect('controle_peso_list')
+
+
+class PesagemQuarentenaView(LoginRequiredMixin, TemplateView):
+    """Fila de revisão das pesagens retidas na validação (aprovar, corrigir ou descartar)"""
+    template_name = 'manejo/pesagem_quarentena.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['pendentes'] = ValidacaoPesagemService.pendentes()
+        return context
+
+    def post(self, request, *args, **kwargs):
+        decisoes, recusadas = {}, 0
+        for chave, valor in request.POST.items():
+            if chave.startswith('decisao_') and chave[8:].isdigit() and valor in ('APROVADA', 'DESCARTADA'):
+                peso = request.POST.get(f'peso_{chave[8:]}', '').replace(',', '.')
+                try:
+                    peso = Decimal(peso) if peso else None
+                except ArithmeticError:
+                    peso = None
+                if valor == 'APROVADA' and peso is not None and not ValidacaoPesagemService.peso_valido(peso):
+                    recusadas += 1
+                    continue
+                decisoes[int(chave[8:])] = (valor, peso)
+
+        aprovadas, descartadas = ValidacaoPesagemService.revisar(decisoes)
+        messages.success(request, f"{aprovadas} pesagem(ns) aprovada(s) e {descartadas} descartada(s).")
+        if recusadas:
+            messages.error(
+                request,
+                f"{recusadas} correção(ões) fora dos limites ({PESO_MINIMO} a {PESO_MAXIMO} kg) continua(m) pendente(s).",
+            )
+        return redirect('pesagem_quarentena')
+
+
 class ReproducaoCreateView(LoginRequiredMixin,FormView):
     model = Reproducao
     form_class = ReproducaoSelectMultipleMatrizForm
@@ -111,40 +181,48 @@ class ReproducaoCreateView(LoginRequiredMixin,FormView):
         return initial
 
     def form_valid(self, form):
-        """Executa a movimentação no banco de dados"""
-        data_cio = form.cleaned_data['data_cio']
-        tipo = form.cleaned_data['tipo']
+        """Registra o protocolo para todas as matrizes selecionadas em um único bulk_create"""
         touro = form.cleaned_data['touro']
         codigo_semen = form.cleaned_data['codigo_semen']
-        data_dg = form.cleaned_data['data_dg']
         resultado = form.cleaned_data['resultado']
-        matrizes = form.cleaned_data['matriz']
-
-        # O método update() é eficiente para 1 ou 100 animais
-        quantidade = 0
-        for animal in matrizes:
-            # Cria o registro de movimentação
-            animal.reproducoes_matriz.create(
-                data_cio=data_cio,
-                tipo=tipo,
-                touro=touro,
-                codigo_semen=codigo_semen,
-                data_dg=data_dg,
-                resultado=resultado
-            )
-            animal.save()
-            quantidade += 1 
+        matrizes = list(form.cleaned_data['matriz'].only('id', 'identificacao'))
+
+        quantidade = len(ProtocoloService.registrar_reproducoes(
+            matrizes,
+            data_cio=form.cleaned_data['data_cio'],
+            tipo=form.cleaned_data['tipo'],
+            touro=touro,
+            codigo_semen=codigo_semen,
+            escore=form.cleaned_data['escore'],
+            data_dg=form.cleaned_data['data_dg'],
+            resultado=resultado,
+        ))
         
         messages.success(
             self.request, 
             f"Sucesso! {quantidade} matriz(es) {touro} {codigo_semen} {resultado}."
         )
+
+        if touro:
+            # F esperado da cria = coancestria touro x matriz (duas consultas para o lote todo)
+            parentesco = GenealogiaService.parentesco_com(touro, matrizes)
+            parentes = [
+                f"{matriz.identificacao} ({parentesco[matriz.pk]:.1%})"
+                for matriz in matrizes
+                if parentesco[matriz.pk] >= LIMITE_PARENTESCO
+            ]
+            if parentes:
+                messages.warning(
+                    self.request,
+                    f"Atenção: parentesco próximo com o touro {touro.identificacao}. "
+                    f"Endogamia esperada da cria: {', '.join(parentes)}."
+                )
         return super().form_valid(form)
     
     def get_success_url(self):
         animal_id = self.request.GET.get('animal_id')
         if animal_id:
-            return reverse('animal_detail', kwargs={'pk': animal_id})
+            return reverse('rebanho:animal_detail', kwargs={'pk': animal_id})
         return reverse('manejo_reprodutivo_list')
     
 
@@ -170,29 +248,19 @@ class TratamentoCreateView(LoginRequiredMixin,FormView):
         return initial
 
     def form_valid(self, form):
-        """Executa a movimentação no banco de dados"""
-        data_tratamento = form.cleaned_data['data_tratamento']
+        """Registra o tratamento para todos os animais selecionados em um único bulk_create"""
         tipo_tratamento = form.cleaned_data['tipo_tratamento']
         produto = form.cleaned_data['produto']
-        dose = form.cleaned_data['dose']
-        descricao = form.cleaned_data['descricao']
-        data_proximo_tratamento = form.cleaned_data['data_proximo_tratamento']   
-        animais = form.cleaned_data['animais']
-        
-        # O método update() é eficiente para 1 ou 100 animais
-        quantidade = 0
-        for animal in animais:
-            # Cria o registro de movimentação
-            animal.tratamentos.create(
-                data_tratamento=data_tratamento,
-                tipo_tratamento=tipo_tratamento,
-                produto=produto,
-                dose=dose,
-                descricao=descricao,
-                data_proximo_tratamento=data_proximo_tratamento
-            )
-            animal.save()
-            quantidade += 1 
+
+        quantidade = len(ProtocoloService.registrar_tratamentos(
+            form.cleaned_data['animais'].values_list('pk', flat=True),
+            data_tratamento=form.cleaned_data['data_tratamento'],
+            tipo_tratamento=tipo_tratamento,
+            produto=produto,
+            dose=form.cleaned_data['dose'],
+            descricao=form.cleaned_data['descricao'],
+            data_proximo_tratamento=form.cleaned_data['data_proximo_tratamento'],
+        ))
         
         messages.success(
             self.request, 
@@ -203,10 +271,114 @@ class TratamentoCreateView(LoginRequiredMixin,FormView):
     def get_success_url(self):
         animal_id = self.request.GET.get('animal_id')
         if animal_id:
-            return reverse('animal_detail', kwargs={'pk': animal_id})
+            return reverse('rebanho:animal_detail', kwargs={'pk': animal_id})
         return reverse('tratamentos_saude_list')
 
 
+class DiagnosticoLoteView(LoginRequiredMixin, TemplateView):
+    """Lançamento do DG (Prenha/Vazia) de um protocolo inteiro com um único bulk_update"""
+    template_name = 'manejo/diagnostico_lote.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        pendentes = Reproducao.objects.filter(resultado='N').select_related('matriz', 'touro').order_by(
+            '-data_cio', 'matriz__chave_ordenacao'
+        )
+        data_cio = ler_data(self.request.GET.get('data_cio'))
+        if data_cio:
+            pendentes = pendentes.filter(data_cio=data_cio)
+
+        context['reproducoes'] = pendentes
+        context['data_cio'] = data_cio.isoformat() if data_cio else ''
+        context['datas_protocolo'] = (
+            Reproducao.objects.filter(resultado='N').order_by('-data_cio')
+            .values_list('data_cio', flat=True).distinct()
+        )
+        context['data_dg'] = timezone.localdate()
+        return context
+
+    def post(self, request, *args, **kwargs):
+        resultados = {}
+        for chave, valor in request.POST.items():
+            if chave.startswith('resultado_') and chave[10:].isdigit():
+                resultados[int(chave[10:])] = valor
+
+        data_dg = ler_data(request.POST.get('data_dg'), timezone.localdate())
+        quantidade = ProtocoloService.registrar_diagnosticos(resultados, data_dg=data_dg)
+
+        messages.success(request, f"DG lançado para {quantidade} matriz(es).")
+        return redirect('manejo_reprodutivo_list')
+
+
+class EstacoesMontaView(LoginRequiredMixin, TemplateView):
+    """Comparativo de estações de monta lado a lado (?anos=2023&anos=2024)"""
+    template_name = 'manejo/estacoes_monta.html'
+    QUANTIDADE_PADRAO = 4
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        hoje = timezone.localdate()
+        estacao_atual = hoje.year if hoje.month >= 10 else hoje.year - 1
+
+        anos = [int(ano) for ano in self.request.GET.getlist('anos') if ano.isdigit()]
+        if not anos:
+            anos = range(estacao_atual - self.QUANTIDADE_PADRAO + 1, estacao_atual + 1)
+
+        context['estacoes'] = EstacaoMontaService.comparar(anos)
+        context['anos_disponiveis'] = range(estacao_atual - 9, estacao_atual + 1)
+        context['anos_selecionados'] = [estacao['ano_inicio'] for estacao in context['estacoes']]
+        return context
+
+
+class EficienciaReprodutivaView(LoginRequiredMixin, TemplateView):
+    """Ranking das matrizes por IEP e lista de descarte (índices gravados em IndiceReprodutivo)."""
+    template_name = 'manejo/eficiencia_reprodutiva.html'
+    RANKING_POR_PAGINA = 50
+
+    def post(self, request, *args, **kwargs):
+        processamento = enfileirar('manejo.indices_reprodutivos', usuario=request.user)
+        return redirect(processamento)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['resumo'] = EficienciaReprodutivaService.resumo()
+        context['page_obj'] = Paginator(EficienciaReprodutivaService.ranking(), self.RANKING_POR_PAGINA).get_page(
+            self.request.GET.get('page')
+        )
+        context['descarte'] = EficienciaReprodutivaService.descarte()
+        return context
+
+
+class GanhoPesoView(LoginRequiredMixin, TemplateView):
+    """Ganho de peso por período (?agrupar=lote|pasto|sexo|safra&periodo=mes|trimestre|ano&inicio=&fim=)"""
+    template_name = 'manejo/ganho_peso.html'
+    MESES_PADRAO = 12
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        fim = ler_data(self.request.GET.get('fim'), timezone.localdate())
+        inicio = ler_data(self.request.GET.get('inicio'), (
+            fim.replace(day=1) - timedelta(days=30 * (self.MESES_PADRAO - 1))
+        ).replace(day=1))
+        if inicio > fim:
+            inicio, fim = fim, inicio
+        agrupar = self.request.GET.get('agrupar')
+        agrupar = agrupar if agrupar in AGRUPAMENTOS else 'lote'
+        periodo = self.request.GET.get('periodo')
+        periodo = periodo if periodo in PERIODOS else 'mes'
+
+        context.update({
+            'relatorio': GanhoPesoService.relatorio(agrupar, periodo, inicio, fim),
+            'inicio': inicio,
+            'fim': fim,
+            'agrupar': agrupar,
+            'periodo': periodo,
+            'agrupamentos': [(chave, rotulo) for chave, (rotulo, _) in AGRUPAMENTOS.items()],
+            'periodos': [('mes', 'Mês'), ('trimestre', 'Trimestre'), ('ano', 'Ano')],
+        })
+        return context
+
+
 # --------------------------------
 # Updated Views do projeto de Pecuária
 # --------------------------------
@@ -233,14 +405,23 @@ class ReproducaoUpdateView(LoginRequiredMixin, UpdateView):
 # ListViews do projeto de Pecuária
 # --------------------------------
 
-class ReproducaoListView(ListView):
+class ReproducaoListView(ExportacaoMixin, ListView):
     model = Reproducao
     template_name = 'manejo/reproducao_list.html'
     context_object_name = 'manejos'
-    queryset = Reproducao.objects.select_related('matriz').annotate(
-            tamanho_id=Length('matriz__identificacao')
-        ).order_by('resultado', 'tamanho_id' ,'matriz__identificacao') 
+    queryset = Reproducao.objects.select_related('matriz').order_by('resultado', 'matriz__chave_ordenacao')
     paginate_by = 25 # Opção para paginar os resultados
+    nome_arquivo_exportacao = 'reproducoes'
+    colunas_exportacao = [
+        ('matriz__identificacao', 'Matriz'),
+        ('data_cio', 'Data Cio/Protocolo'),
+        ('tipo', 'Tipo'),
+        ('touro__identificacao', 'Touro'),
+        ('codigo_semen', 'Sêmen'),
+        ('data_dg', 'Data DG'),
+        ('resultado', 'Resultado'),
+        ('data_parto_prevista', 'Parto Previsto'),
+    ]
     
     def get_queryset(self):
         # 1. Obtém o queryset base (todos os animais)
@@ -267,63 +448,70 @@ class AlertaRiscoListView(ListView):
     model = Animal
     template_name = 'manejo/alertas_risco.html'
     context_object_name = 'animais_em_risco'
-    
-    # Exclui animais que já saíram do rebanho
-    queryset = Animal.objects.filter(situacao='VIVO')
+
+    # --- Configurações de Limite ---
+    DIAS_PESAGEM_LIMITE = 60  # Máximo de dias sem pesagem
+    GPMD_MINIMO = Decimal('0.20')  # GPMD mínimo aceitável (kg/dia)
+
+    def get_queryset(self):
+        # Exclui animais que já saíram do rebanho; custo do ano em subquery (sem N+1)
+        ano = timezone.localdate().year
+        custo_ano = (
+            CustoAnimalDetalhe.objects
+            .filter(animal=OuterRef('pk'), registro_de_custo__data_pagamento__year=ano)
+            .order_by()
+            .values('animal')
+            .annotate(total=Sum('valor_alocado'))
+            .values('total')
+        )
+        return (
+            Animal.objects.filter(situacao='VIVO')
+            .select_related('lote_atual', 'pasto_atual')
+            .annotate(custo_acumulado=Coalesce(Subquery(custo_ano), Decimal(0), output_field=DecimalField()))
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        animais = context[self.context_object_name]
+
+        animais = list(context[self.context_object_name])
         animais_em_risco_list = []
-        
-        # --- Configurações de Limite ---
+
         HOJE = timezone.localdate()
-        DIAS_PESAGEM_LIMITE = 60 # Máximo de dias sem pesagem
-        GPMD_MINIMO = Decimal('0.20') # GPMD mínimo aceitável (kg/dia)
-        
+
         # 1. Calcular a média de custo do rebanho para o Alerta de Custo
         avg_custo_anual = CustoAnimalDetalhe.objects.filter(
-            registro_de_custo__data_custo__year=HOJE.year
+            registro_de_custo__data_pagamento__year=HOJE.year
         ).aggregate(
             media=Avg('valor_alocado')
         )['media'] or Decimal(0)
-        
-        CUSTO_LIMITE = avg_custo_anual * Decimal('1.20') # 20% acima da média
 
-        
+        CUSTO_LIMITE = avg_custo_anual * Decimal('1.20')  # 20% acima da média
+
+        # GPMD dos últimos 30 dias de todos os animais em uma consulta
+        gpmd_30d_por_animal = PesagemService.gpmd_por_animal(
+            [animal.pk for animal in animais], inicio=HOJE - timedelta(days=30)
+        )
+
         for animal in animais:
             riscos = []
-            
-            # ----------------------------------------------------
+
             # Risco 1: GPMD Baixo/Negativo
-            # ----------------------------------------------------
-            gpmd_30d = animal.calcular_gpmd_animal(dias_filtro=30)
-            
-            if gpmd_30d is not None and gpmd_30d < GPMD_MINIMO:
-                riscos.append(f"GPMD de 30 dias ({gpmd_30d:.2f} kg) está abaixo do mínimo ({GPMD_MINIMO:.2f}).")
-            
-            # ----------------------------------------------------
+            gpmd_30d = gpmd_30d_por_animal.get(animal.pk)
+            if gpmd_30d is not None and gpmd_30d < self.GPMD_MINIMO:
+                riscos.append(f"GPMD de 30 dias ({gpmd_30d:.2f} kg) está abaixo do mínimo ({self.GPMD_MINIMO:.2f}).")
+
             # Risco 2: Perda de Pesagem Recente
-            # ----------------------------------------------------
-            ultima_pesagem = animal.ultima_pesagem
-            if ultima_pesagem is None or (HOJE - ultima_pesagem).days > DIAS_PESAGEM_LIMITE:
-                 riscos.append(f"Última pesagem é de {(HOJE - (ultima_pesagem or HOJE)).days} dias atrás. Limite: {DIAS_PESAGEM_LIMITE} dias.")
+            ultima_pesagem = animal.data_ultima_pesagem
+            if ultima_pesagem is None:
+                riscos.append("Animal sem pesagem registrada.")
+            elif (HOJE - ultima_pesagem).days > self.DIAS_PESAGEM_LIMITE:
+                riscos.append(f"Última pesagem é de {(HOJE - ultima_pesagem).days} dias atrás. Limite: {self.DIAS_PESAGEM_LIMITE} dias.")
 
-            # ----------------------------------------------------
             # Risco 3: Alto Custo Acumulado
-            # ----------------------------------------------------
-            custo_acumulado = CustoAnimalDetalhe.objects.filter(
-                animal=animal,
-                registro_de_custo__data_custo__year=HOJE.year
-            ).aggregate(
-                total=Sum('valor_alocado')
-            )['total'] or Decimal(0)
-            
+            custo_acumulado = animal.custo_acumulado
             if custo_acumulado > CUSTO_LIMITE:
-                 riscos.append(f"Custo Acumulado ({custo_acumulado:.2f}) está acima da média do rebanho ({CUSTO_LIMITE:.2f}).")
-            
-            
+                riscos.append(f"Custo Acumulado ({custo_acumulado:.2f}) está acima da média do rebanho ({CUSTO_LIMITE:.2f}).")
+
             if riscos:
                 animais_em_risco_list.append({
                     'animal': animal,
@@ -334,24 +522,41 @@ class AlertaRiscoListView(ListView):
 
         context['animais_em_risco'] = animais_em_risco_list
         context['media_custo_rebanho'] = avg_custo_anual
-        
+
         return context
 
 
-class TratamentoSaudeListView(LoginRequiredMixin, ListView):
+class TratamentoSaudeListView(LoginRequiredMixin, ExportacaoMixin, ListView):
     model = TratamentoSaude
     template_name = 'manejo/tratamentos_saude_list.html'
     context_object_name = 'tratamentos'
     # Ordena os registros pela data do tratamento mais recente
     ordering = ['-data_tratamento']
-
-
-class PesagemListView(ListView):
+    nome_arquivo_exportacao = 'tratamentos'
+    colunas_exportacao = [
+        ('animal__identificacao', 'Animal'),
+        ('data_tratamento', 'Data'),
+        ('tipo_tratamento', 'Tipo'),
+        ('produto', 'Produto'),
+        ('dose', 'Dose/Via'),
+        ('data_proximo_tratamento', 'Próxima Data'),
+        ('descricao', 'Observações'),
+    ]
+
+
+class PesagemListView(ExportacaoMixin, ListView):
     model = Pesagem
     template_name = 'manejo/pesagem_list.html'
     context_object_name = 'pesagens'
     ordering = ['-data_pesagem']
     paginate_by = 25 # Opção para paginar os resultados
+    nome_arquivo_exportacao = 'pesagens'
+    colunas_exportacao = [
+        ('animal__identificacao', 'Animal'),
+        ('data_pesagem', 'Data'),
+        ('peso_kg', 'Peso (kg)'),
+        ('evento', 'Evento'),
+    ]
     
     def get_queryset(self):
         # 1. Obtém o queryset base (todos os animais)
@@ -376,14 +581,8 @@ def alertas_de_manejo(request):
     
     alertas = []
 
-    # 1. Alertas de Partos Esperados (Partos Previstos)
-    # Filtra registros de reprodução onde o resultado ainda não é conhecido (pendente)
-    partos_previstos = Reproducao.objects.filter(
-        data_parto_prevista__range=[hoje, futuro_proximo],
-        # Supondo que 'PENDENTE' seja a situação inicial do resultado
-        # Ajuste o filtro 'resultado' conforme o seu modelo de Reproducao:
-        # Q(resultado__isnull=True) | Q(resultado='PE') 
-    ).order_by('data_parto_prevista')
+    # 1. Alertas de Partos Esperados (gestações confirmadas ainda sem bezerro)
+    partos_previstos = PrevisaoPartoService.pendentes(dias=(futuro_proximo - hoje).days, inicio=hoje)
     
     for repro in partos_previstos:
         dias_restantes = (repro.data_parto_prevista - hoje).days
@@ -444,43 +643,82 @@ class ParicoesListView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['page_title'] = 'Controle de Parições Previstas'
-        context.update(ZootecnicoService.obter_indicadores_performance())
+        # Uma leitura indexada das gestações pendentes + série pré-calculada (sem KPIs do rebanho)
         context['alertas_paricao'] = ZootecnicoService.obter_alertas_paricao()
+        context['alertas_paricao_iminente'] = sum(
+            1 for alerta in context['alertas_paricao'] if alerta['dias_restantes'] <= 7
+        )
+        context['taxa_prenhez'] = ZootecnicoService.obter_prenhez()['taxa_prenhez']
+        context['projecao_mensal'] = PrevisaoPartoService.projecao_mensal(12)
         return context
 
 
-class ExportarParicoesCSVView(LoginRequiredMixin, View):
+class CalendarioParicoesView(View):
+    """
+    Feed iCal (.ics) com um evento por dia de parto previsto, para assinar no
+    celular da equipe. Aceita usuário logado ou ?token=CALENDARIO_PARICOES_TOKEN.
+    """
+    DIAS_FUTURO = 365
+
+    @staticmethod
+    def _escapar(texto):
+        return str(texto).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
     def get(self, request, *args, **kwargs):
-        # 1. Configura os headers HTTP para o download do arquivo CSV
-        data_hoje = timezone.localdate().strftime('%Y-%m-%d')
-        filename = f"alertas_paricao_{data_hoje}.csv"
-        
-        response = HttpResponse(content_type='text/csv; charset=utf-8-sig')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        token = settings.CALENDARIO_PARICOES_TOKEN
+        if not request.user.is_authenticated and not (token and request.GET.get('token') == token):
+            return HttpResponseForbidden("Token inválido.")
+
+        hoje = timezone.localdate()
+        agora = timezone.now().strftime('%Y%m%dT%H%M%SZ')
+        linhas = [
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            'PRODID:-//PecBacuri//Paricoes//PT-BR',
+            'CALSCALE:GREGORIAN',
+            'X-WR-CALNAME:Parições previstas',
+        ]
+        for dia in PrevisaoPartoService.serie_diaria(hoje, hoje + timedelta(days=self.DIAS_FUTURO)):
+            locais = '\n'.join(
+                f"{pasto or 'Sem pasto'} / {lote or 'Sem lote'}: {quantidade}"
+                for pasto, lote, quantidade in dia['por_local']
+            )
+            linhas += [
+                'BEGIN:VEVENT',
+                f"UID:parto-{dia['data']:%Y%m%d}@pecbacuri",
+                f'DTSTAMP:{agora}',
+                f"DTSTART;VALUE=DATE:{dia['data']:%Y%m%d}",
+                f"DTEND;VALUE=DATE:{dia['data'] + timedelta(days=1):%Y%m%d}",
+                f"SUMMARY:{dia['quantidade']} parto(s) previsto(s)",
+                f'DESCRIPTION:{self._escapar(locais)}',
+                'END:VEVENT',
+            ]
+        linhas.append('END:VCALENDAR')
+
+        response = HttpResponse('\r\n'.join(linhas) + '\r\n', content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="paricoes.ics"'
+        return response
 
-        # 2. Inicializa o gravador CSV
-        writer = csv.writer(response, delimiter=';')
-        
-        # Cabeçalho do arquivo CSV
-        writer.writerow(['Matriz', 'Data Prevista (DPP)', 'Dias Restantes', 'Status'])
 
-        # 3. Busca os dados usando o seu ZootecnicoService
+class ExportarParicoesCSVView(LoginRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        data_hoje = timezone.localdate().strftime('%Y-%m-%d')
         alertas = ZootecnicoService.obter_alertas_paricao()
 
-        # 4. Escreve as linhas
-        for alerta in alertas:
-            dias = alerta.get('dias_restantes', 0)
-            status = 'IMINENTE' if dias <= 7 else 'Normal'
-            dpp = alerta['dpp'].strftime('%d/%m/%Y') if alerta.get('dpp') else ''
-
-            writer.writerow([
+        linhas = (
+            [
                 alerta.get('matriz', ''),
-                dpp,
-                dias,
-                status
-            ])
-
-        return response
+                alerta.get('dpp'),
+                alerta.get('dias_restantes', 0),
+                'IMINENTE' if alerta.get('dias_restantes', 0) <= 7 else 'Normal',
+            ]
+            for alerta in alertas
+        )
+        return resposta_csv(
+            f"alertas_paricao_{data_hoje}",
+            ['Matriz', 'Data Prevista (DPP)', 'Dias Restantes', 'Status'],
+            linhas,
+        )
 
 
 class RegistrarNascimentoView(LoginRequiredMixin, FormView):
@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.perfil.PerfilSQLMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,6 +61,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Perfil de SQL por requisição (cabeçalhos X-SQL-Perfil/Server-Timing e /debug/perf/, só para staff)
+PERFIL_SQL = config('PERFIL_SQL', default=DEBUG, cast=bool)
+PERFIL_SQL_HISTORICO = config('PERFIL_SQL_HISTORICO', default=200, cast=int)
+
 # ==========================
 # DATABASE (Render)
 # ==========================
@@ -73,6 +78,47 @@ DATABASES = {
     'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Espera o lock em vez de falhar com "database is locked" (é o busy_timeout
+                # da conexão, por isso SQLITE_PRAGMAS não repete essa PRAGMA)
+                'timeout': config('SQLITE_TIMEOUT', default=20, cast=int),
+                # Transações pegam o lock de escrita no BEGIN (evita deadlock de upgrade no WAL)
+                'transaction_mode': 'IMMEDIATE',
+            },
+    }
+}
+
+# ==========================
+# SQLITE (instalações de uma só fazenda)
+# ==========================
+# Aplicadas em toda conexão nova por core.signals (ignoradas em outros bancos)
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+    # Valor negativo = tamanho em KiB (64 MiB)
+    'cache_size': -config('SQLITE_CACHE_KB', default=65536, cast=int),
+    'mmap_size': config('SQLITE_MMAP_BYTES', default=268435456, cast=int),
+    'temp_store': 'MEMORY' if config('SQLITE_TEMP_STORE_MEMORY', default=False, cast=bool) else '',
+}
+# Intervalo (segundos) entre execuções do PRAGMA optimize por processo; 0 desliga
+SQLITE_OPTIMIZE_INTERVALO = config('SQLITE_OPTIMIZE_INTERVALO', default=3600, cast=int)
+
+# ==========================
+# CACHE
+# ==========================
+# Indicadores consolidados (estações de monta e safras encerradas, fichas dos
+# animais, blocos do dashboard). A invalidação apaga a chave de versão no cache,
+# então web, processar_fila e comandos precisam ver o mesmo cache: o padrão é a
+# tabela do próprio banco (criada pela migração core 0002). Um backend por
+# processo (LocMemCache) deixaria os outros processos com dados velhos.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('CACHE_LOCATION', default='pecbacuri_cache'),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int),
+        },
     }
 }
 
@@ -103,6 +149,10 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles_root'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Arquivos gerados pelos processamentos em segundo plano (baixados pela view, não servidos direto)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
 # ==========================
 # Outras Configurações
 # ==========================
@@ -131,6 +181,9 @@ LOGOUT_REDIRECT_URL = 'login'
 
 IMPORT_EXPORT_ENCODING = 'utf-8-sig'
 
+# Token para assinar o calendário de parições (.ics) sem login; vazio = só usuário logado
+CALENDARIO_PARICOES_TOKEN = config('CALENDARIO_PARICOES_TOKEN', default='')
+
 # ==========================
 # Segurança em Produção
 # ==========================
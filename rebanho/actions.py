@@ -1,11 +1,15 @@
 from django.contrib import admin, messages
 from django.db import transaction
 from django.shortcuts import render, redirect
+from django.utils.html import format_html
+
+from core.processamento import enfileirar
 
 from .models import Animal
 from infraestrutura.models import MovimentacaoPasto
 from .forms import MudarLoteAnimalForm
 from infraestrutura.forms import MudarPastoLoteForm
+from infraestrutura.lotacao import LotacaoService
 
 ##############################
 #
@@ -14,6 +18,17 @@ from infraestrutura.forms import MudarPastoLoteForm
 ##############################
 
 
+def _lotacao_excedida(form, animais):
+    """Segura a movimentação acima da capacidade do pasto até o usuário confirmar."""
+    if form.cleaned_data.get('ignorar_lotacao'):
+        return False
+    excesso = LotacaoService.verificar_capacidade(form.cleaned_data['pasto_destino'], animais)
+    if excesso:
+        form.add_error('ignorar_lotacao', LotacaoService.mensagem_excesso(excesso))
+        return True
+    return False
+
+
 
 @admin.action(description='Mudar animais para outro Pasto')
 def mudar_pasto_lote(modeladmin, request, queryset): # O queryset agora é de Lotes
@@ -21,61 +36,26 @@ def mudar_pasto_lote(modeladmin, request, queryset): # O queryset agora é de Lo
     if 'apply' in request.POST:
         form = MudarPastoLoteForm(request.POST)
         
-        if form.is_valid():
-            pasto_destino = form.cleaned_data['pasto_destino']
-            data_entrada = form.cleaned_data['data_entrada'] 
-            observacoes = form.cleaned_data['observacoes']
-            
-           
-            try:
-                with transaction.atomic():
-                    total_animais_movimentados = 0
-                    
-                    # 1. Itera sobre os Lotes selecionados
-                    for lote in queryset:
-
-                        # --- A. ATUALIZAÇÃO DO PRÓPRIO LOTE ---
-                        # Assumimos que o campo no Lote é 'pasto_atual'
-                        lote.pasto_atual = pasto_destino
-                        lote.save(update_fields=['pasto_atual'])
-
-                        # 2. Encontra TODOS os animais NESTES lotes (usando lote_atual)
-                        animais_do_lote = Animal.objects.filter(lote_atual=lote)
-
-                        # Se não houver animais, pule para o próximo lote
-                        if not animais_do_lote.exists():
-                            continue
-
-                        # 3. Executa a movimentação para cada animal
-                        for animal in animais_do_lote:
-                            pasto_origem = animal.pasto_atual
-
-                            # Cria o registro de MovimentacaoPasto
-                            MovimentacaoPasto.objects.create(
-                                animal=animal,
-                                pasto_origem=pasto_origem,      
-                                pasto_destino=pasto_destino,  
-                                data_entrada=data_entrada,   
-                                motivo=f"Movimentação de Pasto: {observacoes}"
-                            )
-                            
-                            # Atualiza o campo pasto_atual do Animal
-                            animal.pasto_atual = pasto_destino
-                            animal.save(update_fields=['pasto_atual'])
-                            
-                            total_animais_movimentados += 1
-                
-                # Mensagem de sucesso
-                messages.success(
-                    request,
-                    f"{total_animais_movimentados} animal(is) de {queryset.count()} lote(s) movimentado(s) para o pasto '{pasto_destino.nome}'.",
-                )
-                
-            except Exception as e:
-                messages.error(
-                    request,
-                    f"Erro ao movimentar os lotes: {e}",
-                )
+        if form.is_valid() and not _lotacao_excedida(form, Animal.objects.filter(lote_atual__in=queryset, situacao='VIVO')):
+            # Lotes grandes estouram o timeout do gunicorn: vai para a fila (rebanho/tarefas.py)
+            processamento = enfileirar(
+                'rebanho.mudar_pasto_lote',
+                {
+                    'lotes': list(queryset.values_list('pk', flat=True)),
+                    'pasto_destino': form.cleaned_data['pasto_destino'].pk,
+                    'data_entrada': form.cleaned_data['data_entrada'].isoformat(),
+                    'observacoes': form.cleaned_data['observacoes'],
+                },
+                usuario=request.user,
+                descricao=f"Mudar {queryset.count()} lote(s) para o pasto '{form.cleaned_data['pasto_destino'].nome}'",
+            )
+            messages.info(
+                request,
+                format_html(
+                    'Movimentação enviada para processamento. <a href="{}">Acompanhar</a>',
+                    processamento.get_absolute_url(),
+                ),
+            )
 
             # Redireciona de volta para a changelist de Lotes
             return redirect('admin:%s_%s_changelist' % (modeladmin.model._meta.app_label, modeladmin.model._meta.model_name))
@@ -107,7 +87,7 @@ def mover_pasto_animais(modeladmin, request, queryset):
     
     if 'apply' in request.POST:
         form = MudarPastoLoteForm(request.POST)
-        if form.is_valid():
+        if form.is_valid() and not _lotacao_excedida(form, queryset):
             pasto_destino = form.cleaned_data['pasto_destino']
             data_entrada = form.cleaned_data['data_entrada']
             observacoes = form.cleaned_data['observacoes']
@@ -183,6 +163,9 @@ def mudar_lote_animais(modeladmin, request, queryset):
 
             # Obtém o pasto do lote de destino (pode ser None)
             pasto_destino = lote_destino.pasto_atual
+            excesso = LotacaoService.verificar_capacidade(pasto_destino, queryset) if pasto_destino else None
+            if excesso:
+                modeladmin.message_user(request, LotacaoService.mensagem_excesso(excesso), messages.WARNING)
             
             try:
                 with transaction.atomic():
@@ -1,8 +1,10 @@
 from django.contrib import admin
+from django.db.models import Count
 from import_export.admin import ImportExportModelAdmin # 1. Importar o mixin
 from import_export import resources, fields
 from import_export.widgets import ForeignKeyWidget
-from .models import Animal,  Lote, BaixaAnimal
+from .busca import filtro_busca
+from .models import Animal,  Lote, BaixaAnimal, AvaliacaoGenetica
 from .actions import mover_pasto_animais, mudar_lote_animais, mudar_pasto_lote
 
 
@@ -56,6 +58,12 @@ class AnimalAdmin(ImportExportModelAdmin):
     list_filter = ('situacao', 'sexo', 'lote_atual')
     search_fields = ('identificacao', 'nome',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Usa o índice de busca (rebanho/busca.py) no lugar do LIKE '%termo%' do admin
+        if not search_term:
+            return queryset, False
+        return queryset.filter(filtro_busca(search_term)), False
+
     # NOVO: Define a ordem e quais campos aparecem no formulário de ADD/EDIT
     fieldsets = (
         ('Identificação', {
@@ -95,8 +103,19 @@ class LoteAdmin(ImportExportModelAdmin):
 
     actions = [mudar_pasto_lote]
 
-    # Calcula a contagem de animais no lote (campo dinâmico para a lista)
+    def get_queryset(self, request):
+        # Contagem no mesmo SELECT da lista (evita uma consulta por lote)
+        return super().get_queryset(request).select_related('pasto_atual').annotate(total_animais=Count('animais'))
+
     def contagem_animais(self, obj):
-        return obj.animais_no_lote.count()
+        return obj.total_animais
     contagem_animais.short_description = 'Animais'
+    contagem_animais.admin_order_field = 'total_animais'
+
 
+@admin.register(AvaliacaoGenetica)
+class AvaliacaoGeneticaAdmin(admin.ModelAdmin):
+    list_display = ('animal', 'dep', 'valor_genetico', 'p205', 'filhos_com_registro', 'avaliada_em')
+    search_fields = ('animal__identificacao',)
+    list_select_related = ('animal',)
+    raw_id_fields = ('animal',)
@@ -0,0 +1,93 @@
+# rebanho/busca.py
+"""
+Busca indexada de animais por brinco, nome e observações.
+
+- SQLite: tabela virtual FTS5 (tokenizer trigram) rebanho_animal_busca,
+  mantida pelos triggers criados na migration 0005 (inclusive em bulk_create/update).
+- PostgreSQL: índices GIN pg_trgm sobre UPPER(coluna), que é exatamente a
+  expressão que o Django gera para __icontains.
+- Outros bancos: __icontains sem índice.
+"""
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Animal
+
+
+TABELA_FTS = 'rebanho_animal_busca'
+
+# O tokenizer trigram só indexa sequências de 3 caracteres ou mais
+TAMANHO_MINIMO_FTS = 3
+
+_fts_disponivel = {}
+
+
+def fts_disponivel():
+    """Verifica (uma vez por processo/banco) se a tabela FTS5 existe."""
+    alias = connection.alias
+    if alias not in _fts_disponivel:
+        _fts_disponivel[alias] = (
+            connection.vendor == 'sqlite'
+            and TABELA_FTS in connection.introspection.table_names()
+        )
+    return _fts_disponivel[alias]
+
+
+def _expressao_fts(termo):
+    # Frase entre aspas: o trigram casa a substring, como um LIKE '%termo%'
+    return '"' + termo.replace('"', '""') + '"'
+
+
+def filtro_busca(termo, prefixo=''):
+    """
+    Retorna um Q que filtra animais pelo termo.
+    Use `prefixo` para filtrar modelos relacionados, ex: prefixo='matriz__'.
+    """
+    termo = (termo or '').strip()
+    if not termo:
+        return Q()
+
+    if fts_disponivel():
+        if len(termo) < TAMANHO_MINIMO_FTS:
+            # Termos curtos: substring do brinco sem o índice (barato com 1 ou 2 caracteres)
+            return Q(**{f'{prefixo}identificacao__icontains': termo})
+
+        ids = RawSQL(
+            f"SELECT rowid FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH %s",
+            [_expressao_fts(termo)],
+        )
+        return Q(**{f'{prefixo}pk__in': ids})
+
+    return (
+        Q(**{f'{prefixo}identificacao__icontains': termo})
+        | Q(**{f'{prefixo}nome__icontains': termo})
+        | Q(**{f'{prefixo}observacoes__icontains': termo})
+    )
+
+
+def buscar_animais(termo, limite=10, somente_vivos=False):
+    """
+    Top N animais para o typeahead. Brincos que começam com o termo vêm
+    primeiro, depois a ordem natural dos brincos.
+    """
+    termo = (termo or '').strip()
+    if not termo:
+        return []
+
+    animais = Animal.objects.filter(filtro_busca(termo))
+    if somente_vivos:
+        animais = animais.filter(situacao='VIVO')
+
+    animais = animais.annotate(
+        relevancia=Case(
+            When(identificacao__iexact=termo, then=Value(0)),
+            When(identificacao__istartswith=termo, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+    ).order_by('relevancia', 'chave_ordenacao')
+
+    return list(
+        animais.values('id', 'identificacao', 'nome', 'sexo', 'situacao')[:limite]
+    )
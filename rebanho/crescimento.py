@@ -0,0 +1,204 @@
+# rebanho/crescimento.py
+"""
+Curvas de crescimento (Brody) de todo o rebanho em uma passada NumPy.
+
+peso(t) = A * (1 - b * e^(-k*t)), com t em dias de idade. A taxa k sai de um
+ajuste do rebanho por sexo (busca em grade). Com k fixo o modelo é linear em
+A e C = A*b, e cada animal resolve um sistema 2x2 de mínimos quadrados com
+penalidade puxando para a curva do seu sexo: animais com uma ou nenhuma
+pesagem ficam perto da curva média e os com histórico longo seguem os
+próprios dados. Pesagens de bezerro dizem pouco sobre o peso adulto, então o
+peso do prior de A depende da faixa de idade da última pesagem.
+
+As curvas ficam em CurvaCrescimento; pesos_projetados() devolve o peso de
+qualquer conjunto de animais em qualquer data com uma consulta.
+"""
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from manejo.models import Pesagem
+
+from .models import Animal, CurvaCrescimento
+
+
+# Curva de cada sexo quando o rebanho não tem pesagens suficientes: (A, peso ao nascer, k por dia)
+PRIOR_PADRAO = {'F': (450.0, 30.0, 0.0022), 'M': (600.0, 32.0, 0.0020)}
+# Mínimo de pesagens do sexo para ajustar a curva do rebanho
+MINIMO_REBANHO = 30
+GRADE_K = np.geomspace(0.0004, 0.012, 80)
+# Pontos sorteados para o ajuste do rebanho (a curva média não precisa de todos)
+AMOSTRA_REBANHO = 100_000
+
+# Força do prior em "pesagens equivalentes": de A pela idade (dias) da última pesagem, e de C
+FORCA_PRIOR_A = [(365, 4.0), (730, 2.0), (None, 1.0)]
+FORCA_PRIOR_C = 1.0
+PESO_ADULTO_LIMITES = (100.0, 1500.0)
+PESO_NASCER_MINIMO = 10.0
+
+
+def _ordinais(datas):
+    return np.fromiter((d.toordinal() for d in datas), dtype=np.int64, count=len(datas))
+
+
+def _forca_prior_a(idade_ultima):
+    forca = np.full(idade_ultima.shape, FORCA_PRIOR_A[-1][1])
+    for limite, valor in reversed(FORCA_PRIOR_A[:-1]):
+        forca[idade_ultima < limite] = valor
+    return forca
+
+
+def brody(peso_adulto, fator_b, taxa_k, idade_dias):
+    """Peso pela curva (aceita escalares ou arrays NumPy)."""
+    return peso_adulto * (1 - fator_b * np.exp(-taxa_k * idade_dias))
+
+
+class CrescimentoService:
+
+    @staticmethod
+    def ajustar_rebanho(idades, pesos):
+        """
+        Curva média (A, C, k) de um grupo de pesagens: para cada k da grade, A e C
+        por mínimos quadrados; fica o k de menor erro. None se não houver dados.
+        """
+        if len(pesos) < MINIMO_REBANHO or np.ptp(idades) < 180:
+            return None
+        if len(pesos) > AMOSTRA_REBANHO:
+            sorteio = np.random.default_rng(0).choice(len(pesos), AMOSTRA_REBANHO, replace=False)
+            idades, pesos = idades[sorteio], pesos[sorteio]
+
+        x = -np.exp(-np.outer(GRADE_K, idades))  # grade x pontos
+        n, sw, sww = len(pesos), pesos.sum(), (pesos ** 2).sum()
+        sx, sxx, sxw = x.sum(axis=1), (x ** 2).sum(axis=1), x @ pesos
+        det = n * sxx - sx ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = (sw * sxx - sx * sxw) / det
+            c = (n * sxw - sx * sw) / det
+        erro = sww - 2 * a * sw - 2 * c * sxw + n * a ** 2 + 2 * a * c * sx + c ** 2 * sxx
+        validos = np.isfinite(erro) & (a > PESO_ADULTO_LIMITES[0]) & (c > 0) & (c < a)
+        if not validos.any():
+            return None
+        melhor = np.flatnonzero(validos)[np.argmin(erro[validos])]
+        return float(a[melhor]), float(c[melhor]), float(GRADE_K[melhor])
+
+    @staticmethod
+    def priors():
+        """{sexo: (A, C, k)} do rebanho todo, com PRIOR_PADRAO para os sexos sem dados."""
+        linhas = list(Pesagem.objects.order_by().values_list('animal__sexo', 'animal__data_nascimento', 'data_pesagem', 'peso_kg'))
+        resultado = {}
+        if linhas:
+            sexos, nascimentos, datas, pesos = zip(*linhas)
+            sexos = np.array(sexos)
+            idades = (_ordinais(datas) - _ordinais(nascimentos)).astype(float)
+            pesos = np.array(pesos, dtype=float)
+            for sexo in PRIOR_PADRAO:
+                filtro = (sexos == sexo) & (idades >= 0)
+                curva = CrescimentoService.ajustar_rebanho(idades[filtro], pesos[filtro])
+                if curva:
+                    resultado[sexo] = curva
+        for sexo, (peso_adulto, peso_nascer, taxa_k) in PRIOR_PADRAO.items():
+            resultado.setdefault(sexo, (peso_adulto, peso_adulto - peso_nascer, taxa_k))
+        return resultado
+
+    @staticmethod
+    def ajustar_animais(sexos, idades_pesagem, pesagem_animal, pesos, priors):
+        """
+        Ajuste vetorizado de todos os animais. `sexos` tem um item por animal;
+        `idades_pesagem`, `pesagem_animal` (índice do animal) e `pesos`, um por pesagem.
+        Retorna arrays (A, b, k, pesagens, erro) por animal.
+        """
+        total = len(sexos)
+        a0, c0, k = (np.array([priors[s][i] for s in sexos], dtype=float) for i in range(3))
+
+        x = -np.exp(-k[pesagem_animal] * idades_pesagem)
+
+        def soma(valores):
+            return np.bincount(pesagem_animal, weights=valores, minlength=total)
+
+        n = np.bincount(pesagem_animal, minlength=total).astype(float)
+        sx, sxx, sw, sxw = soma(x), soma(x ** 2), soma(pesos), soma(x * pesos)
+
+        idade_ultima = np.zeros(total)
+        np.maximum.at(idade_ultima, pesagem_animal, idades_pesagem)
+        forca_a = _forca_prior_a(idade_ultima)
+
+        # [n + λA, Σx; Σx, Σx² + λC] [A; C] = [Σw + λA·A0; Σxw + λC·C0]
+        a11, a12, a22 = n + forca_a, sx, sxx + FORCA_PRIOR_C
+        b1, b2 = sw + forca_a * a0, sxw + FORCA_PRIOR_C * c0
+        det = a11 * a22 - a12 ** 2
+        peso_adulto = np.clip((b1 * a22 - a12 * b2) / det, *PESO_ADULTO_LIMITES)
+        c = (a11 * b2 - a12 * b1) / det
+        fator_b = np.clip(c / peso_adulto, 0.0, 1 - PESO_NASCER_MINIMO / peso_adulto)
+
+        residuos = pesos - brody(
+            peso_adulto[pesagem_animal], fator_b[pesagem_animal], k[pesagem_animal], idades_pesagem
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            erro = np.sqrt(soma(residuos ** 2) / n)
+        return peso_adulto, fator_b, k, n.astype(int), np.where(n > 0, erro, np.nan)
+
+    @staticmethod
+    def ajustar(queryset=None):
+        """Ajusta e grava a curva dos animais (padrão: todos). Retorna quantas curvas gravou."""
+        animais = Animal.objects.all() if queryset is None else queryset
+        linhas = list(animais.order_by('pk').values_list('pk', 'sexo', 'data_nascimento'))
+        if not linhas:
+            return 0
+        ids, sexos, nascimentos = zip(*linhas)
+        ids = np.array(ids)
+        nascimentos = _ordinais(nascimentos)
+
+        pesagens = list(
+            Pesagem.objects.filter(animal__in=animais).order_by().values_list('animal_id', 'data_pesagem', 'peso_kg')
+        )
+        if pesagens:
+            animal_ids, datas, pesos = zip(*pesagens)
+            indice = np.searchsorted(ids, np.array(animal_ids))
+            idades = np.maximum(_ordinais(datas) - nascimentos[indice], 0).astype(float)
+            pesos = np.array(pesos, dtype=float)
+        else:
+            indice, idades, pesos = np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+
+        peso_adulto, fator_b, taxa_k, contagem, erro = CrescimentoService.ajustar_animais(
+            sexos, idades, indice, pesos, CrescimentoService.priors()
+        )
+        curvas = [
+            CurvaCrescimento(
+                animal_id=animal_id, peso_adulto=a, fator_b=b, taxa_k=k, pesagens=total,
+                erro_kg=None if np.isnan(e) else round(e, 2),
+            )
+            for animal_id, a, b, k, total, e in zip(
+                ids.tolist(), peso_adulto.tolist(), fator_b.tolist(), taxa_k.tolist(), contagem.tolist(), erro.tolist()
+            )
+        ]
+        with transaction.atomic():
+            CurvaCrescimento.objects.bulk_create(
+                curvas, batch_size=2000, update_conflicts=True, unique_fields=['animal'],
+                update_fields=['peso_adulto', 'fator_b', 'taxa_k', 'pesagens', 'erro_kg', 'ajustada_em'],
+            )
+        return len(curvas)
+
+    @staticmethod
+    def pesos_projetados(data=None, queryset=None):
+        """{animal_id: peso em kg} em `data` pela curva de cada animal (uma consulta)."""
+        data = data or timezone.localdate()
+        curvas = CurvaCrescimento.objects.order_by()
+        if queryset is not None:
+            curvas = curvas.filter(animal__in=queryset)
+        linhas = list(curvas.values_list('animal_id', 'animal__data_nascimento', 'peso_adulto', 'fator_b', 'taxa_k'))
+        if not linhas:
+            return {}
+        ids, nascimentos, peso_adulto, fator_b, taxa_k = zip(*linhas)
+        idades = np.maximum(data.toordinal() - _ordinais(nascimentos), 0)
+        pesos = brody(np.array(peso_adulto), np.array(fator_b), np.array(taxa_k), idades)
+        return dict(zip(ids, np.round(pesos, 1).tolist()))
+
+    @staticmethod
+    def uas_projetadas(data=None, queryset=None):
+        """{animal_id: UA} em `data` pelo peso projetado (lotação e planejamento de venda)."""
+        from infraestrutura.lotacao import PESO_UA
+
+        return {
+            animal_id: round(peso / float(PESO_UA), 3)
+            for animal_id, peso in CrescimentoService.pesos_projetados(data, queryset).items()
+        }
@@ -0,0 +1,172 @@
+# rebanho/estoque.py
+"""
+Estoque do rebanho em qualquer data (fechamento de ano, declaração do IR,
+conferência de GTA).
+
+Um animal está no estoque na data D se nasceu até D e não saiu até D. A
+saída é a data da Venda (data_entrada) ou da BaixaAnimal (data_baixa), e o
+pasto em D vem da MovimentacaoPasto aberta naquele dia. Tudo sai em
+consultas agrupadas, sem percorrer animal por animal.
+
+Limitações do modelo atual:
+- não há cadastro de compra, então animais comprados entram pela data de
+  nascimento informada e "compras" é sempre 0;
+- o lote não tem histórico, então o agrupamento por lote usa o lote atual.
+"""
+import calendar
+from collections import Counter
+from datetime import date, timedelta
+
+from django.db.models import Case, CharField, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, TruncMonth
+
+from infraestrutura.models import MovimentacaoPasto, Pasto
+
+from .models import Animal
+
+
+# (limite superior em meses, rótulo): faixas da declaração de rebanho
+FAIXAS_ETARIAS = [
+    (12, '0 a 12 meses'),
+    (24, '13 a 24 meses'),
+    (36, '25 a 36 meses'),
+    (None, 'Acima de 36 meses'),
+]
+
+
+def meses_antes(data, meses):
+    """Mesma data `meses` antes (dia ajustado ao fim do mês quando preciso)."""
+    ano, mes = divmod(data.year * 12 + data.month - 1 - meses, 12)
+    return date(ano, mes + 1, min(data.day, calendar.monthrange(ano, mes + 1)[1]))
+
+
+def fim_do_mes(data):
+    return data.replace(day=calendar.monthrange(data.year, data.month)[1])
+
+
+class EstoqueService:
+
+    @staticmethod
+    def com_saida(queryset=None):
+        """Anota data_saida e tipo_saida ('VENDA' ou 'MORTE')."""
+        queryset = Animal.objects.all() if queryset is None else queryset
+        return queryset.annotate(
+            data_saida=Coalesce('venda__data_entrada', 'baixaanimal__data_baixa'),
+            tipo_saida=Case(
+                When(venda__isnull=False, then=Value('VENDA')),
+                When(baixaanimal__isnull=False, then=Value('MORTE')),
+                default=None,
+                output_field=CharField(),
+            ),
+        )
+
+    @staticmethod
+    def presentes(data, queryset=None):
+        """Animais no estoque em `data`."""
+        return EstoqueService.com_saida(queryset).filter(data_nascimento__lte=data).filter(
+            Q(data_saida__isnull=True) | Q(data_saida__gt=data)
+        )
+
+    @staticmethod
+    def _faixa_etaria(data):
+        casos = [
+            When(data_nascimento__gt=meses_antes(data, limite), then=Value(rotulo))
+            for limite, rotulo in FAIXAS_ETARIAS if limite is not None
+        ]
+        return Case(*casos, default=Value(FAIXAS_ETARIAS[-1][1]), output_field=CharField())
+
+    @staticmethod
+    def _pasto_em(data):
+        return Subquery(
+            MovimentacaoPasto.objects.filter(animal=OuterRef('pk'), data_entrada__lte=data)
+            .filter(Q(data_saida__isnull=True) | Q(data_saida__gt=data))
+            .order_by('-data_entrada', '-pk')
+            .values('pasto_destino')[:1]
+        )
+
+    @staticmethod
+    def inventario(data, queryset=None):
+        """
+        Cabeças em `data` por sexo, faixa etária, pasto e lote.
+        Retorna {'data', 'total', 'por_sexo', 'por_faixa', 'por_pasto', 'por_lote', 'linhas'},
+        onde 'linhas' é o cruzamento completo (uma consulta agrupada + nomes dos pastos).
+        """
+        linhas = list(
+            EstoqueService.presentes(data, queryset)
+            .annotate(faixa=EstoqueService._faixa_etaria(data), pasto_id=EstoqueService._pasto_em(data))
+            .values('sexo', 'faixa', 'pasto_id', 'lote_atual__nome')
+            .annotate(total=Count('pk'))
+            .order_by()
+        )
+        pastos = Pasto.objects.in_bulk({linha['pasto_id'] for linha in linhas if linha['pasto_id']})
+
+        por_sexo, por_faixa, por_pasto, por_lote = Counter(), Counter(), Counter(), Counter()
+        for linha in linhas:
+            pasto = pastos.get(linha.pop('pasto_id'))
+            linha['pasto'] = pasto.nome if pasto else 'Sem pasto'
+            linha['lote'] = linha.pop('lote_atual__nome') or 'Sem lote'
+            por_sexo[linha['sexo']] += linha['total']
+            por_faixa[linha['faixa']] += linha['total']
+            por_pasto[linha['pasto']] += linha['total']
+            por_lote[linha['lote']] += linha['total']
+
+        return {
+            'data': data,
+            'total': sum(por_sexo.values()),
+            'por_sexo': dict(por_sexo),
+            # Na ordem das faixas, inclusive as vazias
+            'por_faixa': {rotulo: por_faixa[rotulo] for _, rotulo in FAIXAS_ETARIAS},
+            'por_pasto': dict(sorted(por_pasto.items())),
+            'por_lote': dict(sorted(por_lote.items())),
+            'linhas': sorted(linhas, key=lambda linha: (linha['pasto'], linha['lote'], linha['sexo'], linha['faixa'])),
+        }
+
+    @staticmethod
+    def serie_mensal(inicio, fim, queryset=None):
+        """
+        Movimento mês a mês de `inicio` a `fim`: saldo inicial, nascimentos, compras,
+        vendas, mortes e saldo final (inicial do mês seguinte). No último mês o saldo
+        calculado é conferido com a contagem direta do estoque ('conferido').
+        """
+        primeiro = inicio.replace(day=1)
+        ultimo = fim_do_mes(fim)
+
+        # Registros com saída até o nascimento nunca estiveram no estoque: ficam fora dos dois lados
+        validos = EstoqueService.com_saida(queryset).filter(
+            Q(data_saida__isnull=True) | Q(data_saida__gt=F('data_nascimento'))
+        )
+        nascimentos = dict(
+            validos.filter(data_nascimento__range=(primeiro, ultimo))
+            .annotate(mes=TruncMonth('data_nascimento')).values('mes')
+            .annotate(total=Count('pk')).order_by().values_list('mes', 'total')
+        )
+        saidas = Counter()
+        for mes, tipo, total in (
+            validos.filter(data_saida__range=(primeiro, ultimo))
+            .annotate(mes=TruncMonth('data_saida')).values('mes', 'tipo_saida')
+            .annotate(total=Count('pk')).order_by().values_list('mes', 'tipo_saida', 'total')
+        ):
+            saidas[(mes, tipo)] += total
+
+        saldo = EstoqueService.presentes(primeiro - timedelta(days=1), queryset).count()
+        serie = []
+        mes = primeiro
+        while mes <= ultimo:
+            movimento = {
+                'mes': mes,
+                'saldo_inicial': saldo,
+                'nascimentos': nascimentos.get(mes, 0),
+                'compras': 0,
+                'vendas': saidas[(mes, 'VENDA')],
+                'mortes': saidas[(mes, 'MORTE')],
+            }
+            saldo += movimento['nascimentos'] + movimento['compras'] - movimento['vendas'] - movimento['mortes']
+            movimento['saldo_final'] = saldo
+            serie.append(movimento)
+            mes = fim_do_mes(mes) + timedelta(days=1)
+
+        if serie:
+            contado = EstoqueService.presentes(ultimo, queryset).count()
+            serie[-1]['saldo_contado'] = contado
+            serie[-1]['conferido'] = contado == saldo
+        return serie
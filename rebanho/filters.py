@@ -1,10 +1,10 @@
 import django_filters
+from .busca import filtro_busca
 from .models import Animal
 
 class AnimalFilter(django_filters.FilterSet):
     identificacao = django_filters.CharFilter(
-        field_name='identificacao', 
-        lookup_expr='icontains', # Busca por identificação que *contém* o texto (case-insensitive)
+        method='filtrar_busca', # Busca indexada em brinco, nome e observações (rebanho/busca.py)
         label='Buscar por Identificação'
     )
     
@@ -13,4 +13,7 @@ class AnimalFilter(django_filters.FilterSet):
 
     class Meta:
         model = Animal
-        fields = ['identificacao',] # Lista de campos que serão filtrados
\ No newline at end of file
+        fields = ['identificacao',] # Lista de campos que serão filtrados
+
+    def filtrar_busca(self, queryset, name, value):
+        return queryset.filter(filtro_busca(value))
@@ -0,0 +1,273 @@
+# rebanho/genealogia.py
+"""
+Pedigree do rebanho sobre a tabela de fechamento Genealogia.
+
+Cada linha (descendente, ancestral, distancia) liga um animal a um ancestral,
+com a menor distância em gerações (1 = pai/mãe, 2 = avós...). Assim ancestrais,
+descendentes e ancestrais comuns saem em uma única consulta, sem percorrer
+geração por geração.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Animal, Genealogia
+
+
+# Parentesco a partir do qual a cobertura gera alerta: filhos com F >= 6,25%
+# (equivalente a acasalar primos de primeiro grau)
+LIMITE_PARENTESCO = 0.0625
+
+TAMANHO_BLOCO = 500
+
+
+def _em_blocos(ids, tamanho=TAMANHO_BLOCO):
+    ids = list(ids)
+    for inicio in range(0, len(ids), tamanho):
+        yield ids[inicio:inicio + tamanho]
+
+
+def calcular_ancestrais(pais, ancestrais_conhecidos=None):
+    """
+    Ancestrais de cada animal de `pais` ({id: (pai_id, mae_id)}), com a menor distância.
+    `ancestrais_conhecidos` traz os ancestrais já calculados de animais fora de `pais`.
+    Retorna {id: {ancestral_id: distancia}}.
+    """
+    ancestrais_conhecidos = ancestrais_conhecidos or {}
+    memo = {}
+    visitando = set()
+
+    def ancestrais(animal_id):
+        if animal_id in memo:
+            return memo[animal_id]
+        if animal_id not in pais:
+            return ancestrais_conhecidos.get(animal_id, {})
+        if animal_id in visitando:
+            # Ciclo no cadastro (animal ancestral de si mesmo): interrompe o caminho
+            return {}
+
+        visitando.add(animal_id)
+        resultado = {}
+        for progenitor in pais[animal_id]:
+            if progenitor is None:
+                continue
+            resultado[progenitor] = 1
+            for ancestral, distancia in ancestrais(progenitor).items():
+                if distancia + 1 < resultado.get(ancestral, distancia + 2):
+                    resultado[ancestral] = distancia + 1
+        visitando.discard(animal_id)
+
+        resultado.pop(animal_id, None)
+        memo[animal_id] = resultado
+        return resultado
+
+    return {animal_id: ancestrais(animal_id) for animal_id in pais}
+
+
+class Pedigree:
+    """
+    Coeficientes de parentesco (coancestria) e endogamia de Wright pelo método
+    tabular, com memoização. `pais` = {id: (pai_id, mae_id)}; progenitores fora
+    do dicionário são tratados como fundadores.
+    """
+
+    def __init__(self, pais):
+        self.pais = pais
+        self._profundidade = {}
+        self._coancestria = {}
+
+    def profundidade(self, animal_id):
+        """Maior número de gerações conhecidas acima do animal (fundador = 0)."""
+        if animal_id in self._profundidade:
+            return self._profundidade[animal_id]
+        self._profundidade[animal_id] = 0  # protege contra ciclos no cadastro
+        valor = 0
+        for progenitor in self.pais.get(animal_id, (None, None)):
+            if progenitor is not None:
+                valor = max(valor, self.profundidade(progenitor) + 1)
+        self._profundidade[animal_id] = valor
+        return valor
+
+    def endogamia(self, animal_id):
+        """F de Wright: a coancestria entre pai e mãe."""
+        pai, mae = self.pais.get(animal_id, (None, None))
+        return self.coancestria(pai, mae)
+
+    def coancestria(self, a, b):
+        """Probabilidade de dois alelos tomados ao acaso em a e b serem idênticos por descendência."""
+        if a is None or b is None:
+            return 0.0
+        if a == b:
+            return 0.5 * (1 + self.endogamia(a))
+
+        chave = (a, b) if a < b else (b, a)
+        if chave in self._coancestria:
+            return self._coancestria[chave]
+
+        # Expande o mais "novo" na genealogia: ele não pode ser ancestral do outro
+        if self.profundidade(a) < self.profundidade(b):
+            a, b = b, a
+        pai, mae = self.pais.get(a, (None, None))
+        self._coancestria[chave] = 0.0  # protege contra ciclos no cadastro
+        valor = 0.5 * (self.coancestria(pai, b) + self.coancestria(mae, b))
+        self._coancestria[chave] = valor
+        return valor
+
+
+class GenealogiaService:
+
+    @staticmethod
+    def ancestrais(animal, max_geracoes=None):
+        """Todos os ancestrais do animal, anotados com a geração (1 = pais)."""
+        qs = Animal.objects.filter(genealogia_descendentes__descendente=animal).annotate(
+            geracao=F('genealogia_descendentes__distancia')
+        )
+        if max_geracoes:
+            qs = qs.filter(geracao__lte=max_geracoes)
+        return qs.order_by('geracao', 'chave_ordenacao')
+
+    @staticmethod
+    def descendentes(animal, max_geracoes=None):
+        """Todos os descendentes do animal (ex: filhos e netos de um touro)."""
+        qs = Animal.objects.filter(genealogia_ancestrais__ancestral=animal).annotate(
+            geracao=F('genealogia_ancestrais__distancia')
+        )
+        if max_geracoes:
+            qs = qs.filter(geracao__lte=max_geracoes)
+        return qs.order_by('geracao', 'chave_ordenacao')
+
+    @staticmethod
+    def ancestrais_comuns(animal_a, animal_b):
+        """Ancestrais compartilhados pelos dois animais."""
+        return GenealogiaService.ancestrais(animal_a).filter(
+            pk__in=Genealogia.objects.filter(descendente=animal_b).values('ancestral')
+        )
+
+    @staticmethod
+    def e_descendente(animal_id, ancestral_id):
+        return Genealogia.objects.filter(descendente_id=animal_id, ancestral_id=ancestral_id).exists()
+
+    @staticmethod
+    def pais_alterados(animal):
+        """Compara mae/pai do objeto com as linhas de distância 1 gravadas."""
+        gravados = set(
+            Genealogia.objects.filter(descendente_id=animal.pk, distancia=1).values_list('ancestral_id', flat=True)
+        )
+        return gravados != {animal.pai_id, animal.mae_id} - {None}
+
+    @staticmethod
+    def atualizar(animal_ids):
+        """Recalcula as linhas dos animais informados e de todos os seus descendentes."""
+        animal_ids = set(animal_ids)
+        if not animal_ids:
+            return
+
+        afetados = set(animal_ids)
+        for bloco in _em_blocos(animal_ids):
+            afetados.update(
+                Genealogia.objects.filter(ancestral_id__in=bloco).values_list('descendente_id', flat=True)
+            )
+
+        pais = {}
+        for bloco in _em_blocos(afetados):
+            for animal_id, pai_id, mae_id in Animal.objects.filter(pk__in=bloco).values_list('id', 'pai_id', 'mae_id'):
+                pais[animal_id] = (pai_id, mae_id)
+
+        # Ancestrais dos progenitores de fora do subconjunto não mudam: reaproveita
+        externos = {p for par in pais.values() for p in par if p is not None and p not in pais}
+        conhecidos = defaultdict(dict)
+        for bloco in _em_blocos(externos):
+            linhas = Genealogia.objects.filter(descendente_id__in=bloco).values_list('descendente_id', 'ancestral_id', 'distancia')
+            for descendente_id, ancestral_id, distancia in linhas:
+                conhecidos[descendente_id][ancestral_id] = distancia
+
+        calculado = calcular_ancestrais(pais, conhecidos)
+
+        with transaction.atomic():
+            for bloco in _em_blocos(afetados):
+                Genealogia.objects.filter(descendente_id__in=bloco).delete()
+            Genealogia.objects.bulk_create(
+                [
+                    Genealogia(descendente_id=animal_id, ancestral_id=ancestral_id, distancia=distancia)
+                    for animal_id, ancestrais in calculado.items()
+                    for ancestral_id, distancia in ancestrais.items()
+                ],
+                batch_size=2000,
+            )
+            GenealogiaService._atualizar_endogamia(pais, calculado)
+
+    @staticmethod
+    def _atualizar_endogamia(pais, calculado):
+        """F dos animais recalculados, usando só os ancestrais deles."""
+        ancestrais = {a for linhas in calculado.values() for a in linhas if a not in pais}
+        pedigree_pais = dict(pais)
+        for bloco in _em_blocos(ancestrais):
+            for animal_id, pai_id, mae_id in Animal.objects.filter(pk__in=bloco).values_list('id', 'pai_id', 'mae_id'):
+                pedigree_pais[animal_id] = (pai_id, mae_id)
+
+        pedigree = Pedigree(pedigree_pais)
+        Animal.objects.bulk_update(
+            [Animal(pk=animal_id, coeficiente_endogamia=round(pedigree.endogamia(animal_id), 6)) for animal_id in pais],
+            ['coeficiente_endogamia'],
+            batch_size=2000,
+        )
+
+    @staticmethod
+    def reconstruir():
+        """Refaz a tabela de fechamento inteira. Retorna o número de linhas."""
+        pais = {
+            animal_id: (pai_id, mae_id)
+            for animal_id, pai_id, mae_id in Animal.objects.order_by().values_list('id', 'pai_id', 'mae_id')
+        }
+        linhas = [
+            Genealogia(descendente_id=animal_id, ancestral_id=ancestral_id, distancia=distancia)
+            for animal_id, ancestrais in calcular_ancestrais(pais).items()
+            for ancestral_id, distancia in ancestrais.items()
+        ]
+        with transaction.atomic():
+            Genealogia.objects.all().delete()
+            Genealogia.objects.bulk_create(linhas, batch_size=2000)
+        return len(linhas)
+
+    @staticmethod
+    def calcular_endogamia():
+        """
+        Calcula o F de Wright de todo o rebanho em uma passada (memoizada) e grava
+        em Animal.coeficiente_endogamia. Retorna quantos animais mudaram.
+        """
+        registros = list(Animal.objects.order_by().values_list('id', 'pai_id', 'mae_id', 'coeficiente_endogamia'))
+        pedigree = Pedigree({animal_id: (pai_id, mae_id) for animal_id, pai_id, mae_id, _ in registros})
+
+        alterados = []
+        for animal_id, _, _, atual in registros:
+            valor = round(pedigree.endogamia(animal_id), 6)
+            if atual is None or abs(atual - valor) > 1e-9:
+                alterados.append(Animal(pk=animal_id, coeficiente_endogamia=valor))
+
+        Animal.objects.bulk_update(alterados, ['coeficiente_endogamia'], batch_size=2000)
+        return len(alterados)
+
+    @staticmethod
+    def parentesco_com(animal, candidatos):
+        """
+        Coancestria entre `animal` e cada candidato (= F esperado da cria do acasalamento),
+        sem percorrer a genealogia: duas consultas para qualquer número de candidatos.
+        Retorna {candidato_id: coancestria}.
+        """
+        candidato_ids = {c.pk if hasattr(c, 'pk') else c for c in candidatos}
+        envolvidos = candidato_ids | {animal.pk}
+
+        relevantes = set(envolvidos)
+        for bloco in _em_blocos(envolvidos):
+            relevantes.update(
+                Genealogia.objects.filter(descendente_id__in=bloco).values_list('ancestral_id', flat=True)
+            )
+
+        pais = {}
+        for bloco in _em_blocos(relevantes):
+            for animal_id, pai_id, mae_id in Animal.objects.filter(pk__in=bloco).values_list('id', 'pai_id', 'mae_id'):
+                pais[animal_id] = (pai_id, mae_id)
+
+        pedigree = Pedigree(pais)
+        return {candidato_id: pedigree.coancestria(animal.pk, candidato_id) for candidato_id in candidato_ids}
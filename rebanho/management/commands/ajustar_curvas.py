@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rebanho.crescimento import CrescimentoService
+from rebanho.models import Animal
+
+
+class Command(BaseCommand):
+    help = (
+        "Ajusta a curva de crescimento (Brody) de todo o rebanho a partir das pesagens, em uma passada. "
+        "Rode depois de importar pesagens ou diariamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vivos', action='store_true', help="Ajusta só os animais vivos.")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        queryset = Animal.objects.filter(situacao='VIVO') if options['vivos'] else None
+        curvas = CrescimentoService.ajustar(queryset)
+        self.stdout.write(self.style.SUCCESS(f"{curvas} curvas ajustadas em {time.perf_counter() - inicio:.1f}s."))
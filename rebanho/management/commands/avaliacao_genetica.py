@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rebanho.genetica import HERDABILIDADE_P205, AvaliacaoGeneticaService
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula o valor genético e a DEP de P205 de todo o rebanho (BLUP, modelo animal, com grupos de "
+        "contemporâneos por estação de nascimento, lote e sexo). Rode depois das pesagens de desmama ou mensalmente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--herdabilidade', type=float, default=HERDABILIDADE_P205,
+            help=f"Herdabilidade do P205 (padrão {HERDABILIDADE_P205}).",
+        )
+
+    def handle(self, *args, **options):
+        if not 0 < options['herdabilidade'] < 1:
+            raise CommandError("A herdabilidade deve estar entre 0 e 1.")
+        inicio = time.perf_counter()
+        animais, registros, iteracoes = AvaliacaoGeneticaService.avaliar(options['herdabilidade'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{animais} animais avaliados com {registros} registros de P205 "
+            f"({iteracoes} iterações) em {time.perf_counter() - inicio:.1f}s."
+        ))
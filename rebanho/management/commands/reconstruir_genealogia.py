@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rebanho.genealogia import GenealogiaService
+
+
+class Command(BaseCommand):
+    help = (
+        "Refaz a tabela de fechamento da genealogia (ancestrais/descendentes) e recalcula "
+        "o coeficiente de endogamia (F de Wright) de todo o rebanho em uma passada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--somente-endogamia',
+            action='store_true',
+            help="Não refaz a tabela de fechamento, apenas recalcula o F.",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+
+        if not options['somente_endogamia']:
+            linhas = GenealogiaService.reconstruir()
+            self.stdout.write(f"Genealogia: {linhas} ligações ancestral/descendente gravadas.")
+
+        alterados = GenealogiaService.calcular_endogamia()
+        self.stdout.write(f"Endogamia: {alterados} animais atualizados.")
+
+        self.stdout.write(self.style.SUCCESS(f"Concluído em {time.perf_counter() - inicio:.1f}s."))
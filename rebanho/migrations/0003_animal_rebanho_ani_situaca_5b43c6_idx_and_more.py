@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "infraestrutura",
+            "0003_movimentacaopasto_infraestrut_animal__fe90ed_idx_and_more",
+        ),
+        ("rebanho", "0002_alter_animal_options_animal_data_ultima_pesagem_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="animal",
+            index=models.Index(
+                fields=["situacao", "sexo", "data_nascimento"],
+                name="rebanho_ani_situaca_5b43c6_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="animal",
+            index=models.Index(
+                condition=models.Q(("situacao", "VIVO")),
+                fields=["sexo", "data_nascimento"],
+                name="animal_vivo_sexo_nasc_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+import re
+
+from django.db import migrations, models
+
+
+def gerar_chave_ordenacao(identificacao):
+    # Cópia de rebanho.models.gerar_chave_ordenacao no momento desta migração:
+    # migrações não devem importar código vivo do app
+    partes = re.split(r'(\d+)', (identificacao or '').strip().lower())
+    chave = ''.join(parte.zfill(20) if parte.isdigit() else parte for parte in partes)
+    return chave[:255]
+
+
+def preencher_chave_ordenacao(apps, schema_editor):
+    Animal = apps.get_model('rebanho', 'Animal')
+    lote = []
+    for animal in Animal.objects.only('id', 'identificacao').iterator(chunk_size=2000):
+        animal.chave_ordenacao = gerar_chave_ordenacao(animal.identificacao)
+        lote.append(animal)
+        if len(lote) >= 2000:
+            Animal.objects.bulk_update(lote, ['chave_ordenacao'])
+            lote = []
+    if lote:
+        Animal.objects.bulk_update(lote, ['chave_ordenacao'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rebanho', '0003_animal_rebanho_ani_situaca_5b43c6_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='animal',
+            options={'ordering': ['chave_ordenacao'], 'verbose_name': 'Animal', 'verbose_name_plural': 'Animais'},
+        ),
+        # Cria a coluna sem índice, preenche e só então indexa (mais rápido em bases grandes)
+        migrations.AddField(
+            model_name='animal',
+            name='chave_ordenacao',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Chave de Ordenação'),
+        ),
+        migrations.RunPython(preencher_chave_ordenacao, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='animal',
+            name='chave_ordenacao',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255, verbose_name='Chave de Ordenação'),
+        ),
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(condition=models.Q(('situacao', 'VIVO')), fields=['chave_ordenacao'], name='animal_vivo_ordem_idx'),
+        ),
+    ]
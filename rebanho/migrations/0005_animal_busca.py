@@ -0,0 +1,88 @@
+from django.db import migrations
+
+
+TABELA = 'rebanho_animal_busca'
+
+SQLITE_CRIAR = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA} USING fts5(
+        identificacao, nome, observacoes,
+        content='rebanho_animal', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA}_ai AFTER INSERT ON rebanho_animal BEGIN
+        INSERT INTO {TABELA}(rowid, identificacao, nome, observacoes)
+        VALUES (new.id, new.identificacao, new.nome, new.observacoes);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA}_ad AFTER DELETE ON rebanho_animal BEGIN
+        INSERT INTO {TABELA}({TABELA}, rowid, identificacao, nome, observacoes)
+        VALUES ('delete', old.id, old.identificacao, old.nome, old.observacoes);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABELA}_au AFTER UPDATE OF identificacao, nome, observacoes ON rebanho_animal BEGIN
+        INSERT INTO {TABELA}({TABELA}, rowid, identificacao, nome, observacoes)
+        VALUES ('delete', old.id, old.identificacao, old.nome, old.observacoes);
+        INSERT INTO {TABELA}(rowid, identificacao, nome, observacoes)
+        VALUES (new.id, new.identificacao, new.nome, new.observacoes);
+    END
+    """,
+    # Indexa os animais já cadastrados
+    f"INSERT INTO {TABELA}({TABELA}) VALUES ('rebuild')",
+]
+
+SQLITE_REMOVER = [
+    f"DROP TRIGGER IF EXISTS {TABELA}_ai",
+    f"DROP TRIGGER IF EXISTS {TABELA}_ad",
+    f"DROP TRIGGER IF EXISTS {TABELA}_au",
+    f"DROP TABLE IF EXISTS {TABELA}",
+]
+
+# Mesma expressão que o Django gera para __icontains no PostgreSQL
+POSTGRES_CRIAR = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS animal_identificacao_trgm ON rebanho_animal USING gin (UPPER(identificacao::text) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS animal_nome_trgm ON rebanho_animal USING gin (UPPER(nome::text) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS animal_observacoes_trgm ON rebanho_animal USING gin (UPPER(observacoes::text) gin_trgm_ops)",
+]
+
+POSTGRES_REMOVER = [
+    "DROP INDEX IF EXISTS animal_identificacao_trgm",
+    "DROP INDEX IF EXISTS animal_nome_trgm",
+    "DROP INDEX IF EXISTS animal_observacoes_trgm",
+]
+
+
+def _executar(schema_editor, comandos):
+    for sql in comandos:
+        schema_editor.execute(sql)
+
+
+def criar_indice_busca(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _executar(schema_editor, SQLITE_CRIAR)
+    elif vendor == 'postgresql':
+        _executar(schema_editor, POSTGRES_CRIAR)
+
+
+def remover_indice_busca(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _executar(schema_editor, SQLITE_REMOVER)
+    elif vendor == 'postgresql':
+        _executar(schema_editor, POSTGRES_REMOVER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rebanho', '0004_animal_chave_ordenacao'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice_busca, remover_indice_busca),
+    ]
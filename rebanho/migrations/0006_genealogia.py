@@ -0,0 +1,174 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Cópias de rebanho.genealogia (calcular_ancestrais e Pedigree) no momento desta
+# migração: migrações não devem importar código vivo do app
+
+def calcular_ancestrais(pais):
+    """{id: (pai_id, mae_id)} -> {id: {ancestral_id: menor distância}}."""
+    memo = {}
+    visitando = set()
+
+    def ancestrais(animal_id):
+        if animal_id in memo:
+            return memo[animal_id]
+        if animal_id not in pais or animal_id in visitando:
+            return {}
+
+        visitando.add(animal_id)
+        resultado = {}
+        for progenitor in pais[animal_id]:
+            if progenitor is None:
+                continue
+            resultado[progenitor] = 1
+            for ancestral, distancia in ancestrais(progenitor).items():
+                if distancia + 1 < resultado.get(ancestral, distancia + 2):
+                    resultado[ancestral] = distancia + 1
+        visitando.discard(animal_id)
+
+        resultado.pop(animal_id, None)
+        memo[animal_id] = resultado
+        return resultado
+
+    return {animal_id: ancestrais(animal_id) for animal_id in pais}
+
+
+def calcular_endogamia(pais):
+    """F de Wright de cada animal de `pais` pelo método tabular."""
+    profundidades = {}
+    coancestrias = {}
+
+    def profundidade(animal_id):
+        if animal_id in profundidades:
+            return profundidades[animal_id]
+        profundidades[animal_id] = 0
+        valor = 0
+        for progenitor in pais.get(animal_id, (None, None)):
+            if progenitor is not None:
+                valor = max(valor, profundidade(progenitor) + 1)
+        profundidades[animal_id] = valor
+        return valor
+
+    def endogamia(animal_id):
+        pai, mae = pais.get(animal_id, (None, None))
+        return coancestria(pai, mae)
+
+    def coancestria(a, b):
+        if a is None or b is None:
+            return 0.0
+        if a == b:
+            return 0.5 * (1 + endogamia(a))
+        chave = (a, b) if a < b else (b, a)
+        if chave in coancestrias:
+            return coancestrias[chave]
+        if profundidade(a) < profundidade(b):
+            a, b = b, a
+        pai, mae = pais.get(a, (None, None))
+        coancestrias[chave] = 0.0
+        valor = 0.5 * (coancestria(pai, b) + coancestria(mae, b))
+        coancestrias[chave] = valor
+        return valor
+
+    return {animal_id: endogamia(animal_id) for animal_id in pais}
+
+
+def preencher_genealogia(apps, schema_editor):
+    Animal = apps.get_model("rebanho", "Animal")
+    Genealogia = apps.get_model("rebanho", "Genealogia")
+
+    pais = {
+        animal_id: (pai_id, mae_id)
+        for animal_id, pai_id, mae_id in Animal.objects.values_list("id", "pai_id", "mae_id")
+    }
+    Genealogia.objects.bulk_create(
+        [
+            Genealogia(descendente_id=animal_id, ancestral_id=ancestral_id, distancia=distancia)
+            for animal_id, ancestrais in calcular_ancestrais(pais).items()
+            for ancestral_id, distancia in ancestrais.items()
+        ],
+        batch_size=2000,
+    )
+
+    Animal.objects.bulk_update(
+        [
+            Animal(pk=animal_id, coeficiente_endogamia=round(endogamia, 6))
+            for animal_id, endogamia in calcular_endogamia(pais).items()
+        ],
+        ["coeficiente_endogamia"],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rebanho", "0005_animal_busca"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="animal",
+            name="coeficiente_endogamia",
+            field=models.FloatField(
+                blank=True,
+                editable=False,
+                null=True,
+                verbose_name="Coeficiente de Endogamia (F)",
+            ),
+        ),
+        migrations.CreateModel(
+            name="Genealogia",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "distancia",
+                    models.PositiveSmallIntegerField(verbose_name="Gerações"),
+                ),
+                (
+                    "ancestral",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="genealogia_descendentes",
+                        to="rebanho.animal",
+                        verbose_name="Ancestral",
+                    ),
+                ),
+                (
+                    "descendente",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="genealogia_ancestrais",
+                        to="rebanho.animal",
+                        verbose_name="Descendente",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Genealogia",
+                "verbose_name_plural": "Genealogia",
+                "indexes": [
+                    models.Index(
+                        fields=["ancestral", "distancia"],
+                        name="rebanho_gen_ancestr_5e67b7_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("descendente", "ancestral"), name="genealogia_par_unico"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(preencher_genealogia, migrations.RunPython.noop),
+    ]
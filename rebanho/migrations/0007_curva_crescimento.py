@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rebanho", "0006_genealogia"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CurvaCrescimento",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("peso_adulto", models.FloatField(verbose_name="Peso Adulto (A, kg)")),
+                ("fator_b", models.FloatField(verbose_name="Fator de Integração (b)")),
+                (
+                    "taxa_k",
+                    models.FloatField(verbose_name="Taxa de Maturidade (k, por dia)"),
+                ),
+                (
+                    "pesagens",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Pesagens Usadas"
+                    ),
+                ),
+                (
+                    "erro_kg",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="Erro Médio (kg)"
+                    ),
+                ),
+                (
+                    "ajustada_em",
+                    models.DateTimeField(auto_now=True, verbose_name="Ajustada em"),
+                ),
+                (
+                    "animal",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="curva_crescimento",
+                        to="rebanho.animal",
+                        verbose_name="Animal",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Curva de Crescimento",
+                "verbose_name_plural": "Curvas de Crescimento",
+            },
+        ),
+    ]
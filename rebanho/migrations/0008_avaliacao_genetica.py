@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rebanho", "0007_curva_crescimento"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvaliacaoGenetica",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "valor_genetico",
+                    models.FloatField(verbose_name="Valor Genético P205 (kg)"),
+                ),
+                ("dep", models.FloatField(verbose_name="DEP P205 (kg)")),
+                (
+                    "p205",
+                    models.FloatField(
+                        blank=True, null=True, verbose_name="P205 Próprio (kg)"
+                    ),
+                ),
+                (
+                    "filhos_com_registro",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Filhos com P205"
+                    ),
+                ),
+                (
+                    "avaliada_em",
+                    models.DateTimeField(auto_now=True, verbose_name="Avaliada em"),
+                ),
+                (
+                    "animal",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="avaliacao_genetica",
+                        to="rebanho.animal",
+                        verbose_name="Animal",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Avaliação Genética",
+                "verbose_name_plural": "Avaliações Genéticas",
+            },
+        ),
+    ]
@@ -1,7 +1,9 @@
+import math
+import re
+
 from django.db import models
 from django.urls import reverse
-from datetime import date, timedelta 
-from django.db.models.functions import Length
+from datetime import timedelta
 from django.utils import timezone 
 from decimal import Decimal
 
@@ -43,18 +45,148 @@ class Lote(models.Model):
         verbose_name_plural = "Lotes de Manejo"
 
 
-class AnimalManager(models.Manager):
-    def get_queryset(self):
-        # Toda busca agora terá essa anotação e ordenação por padrão
-        return super().get_queryset().annotate(
-            tamanho_id=Length('identificacao')
-        ).order_by('tamanho_id', 'identificacao')
-    
+def gerar_chave_ordenacao(identificacao):
+    """
+    Chave de ordenação natural do brinco: blocos numéricos com zeros à esquerda
+    ('B-7' -> 'b-00000000000000000007'), assim '2' vem antes de '10'.
+    """
+    partes = re.split(r'(\d+)', (identificacao or '').strip().lower())
+    chave = ''.join(parte.zfill(20) if parte.isdigit() else parte for parte in partes)
+    return chave[:255]
 
-from django.db import models
-from django.utils import timezone
-from decimal import Decimal
-from datetime import date, timedelta
+
+CAMPOS_GENEALOGIA = {'mae', 'pai', 'mae_id', 'pai_id'}
+# Mudanças que movem os partos previstos da matriz (manejo.PrevisaoParto)
+CAMPOS_PREVISAO_PARTO = {'pasto_atual', 'pasto_atual_id', 'lote_atual', 'lote_atual_id', 'situacao'}
+
+# Categoria por idade em meses (mesma divisão da composição do rebanho no dashboard)
+CATEGORIAS_IDADE = [(12, 'BEZERRO'), (24, 'SOBREANO')]
+CATEGORIA_ADULTO = 'ADULTO'
+DIAS_MES = 30
+
+
+class DiasEntre(models.Func):
+    """Dias inteiros entre duas datas (fim - inicio) em SQL."""
+    function = 'DATEDIFF'
+    output_field = models.IntegerField()
+
+    def __init__(self, fim, inicio, **extra):
+        super().__init__(fim, inicio, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra):
+        return self.as_sql(
+            compiler, connection, template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(', **extra
+        )
+
+    def as_postgresql(self, compiler, connection, **extra):
+        return self.as_sql(compiler, connection, template='(%(expressions)s)', arg_joiner=' - ', **extra)
+
+
+def _data_referencia(data):
+    return models.Value(data or timezone.localdate(), output_field=models.DateField())
+
+
+class AnimalQuerySet(models.QuerySet):
+    """
+    Mantém a chave_ordenacao, a tabela Genealogia e a previsão de partos também
+    nos caminhos em lote (que não chamam save() nem disparam signals).
+    com_idade_meses(), com_ua() e com_categoria() calculam no banco o mesmo que
+    as propriedades do modelo, para filtrar e agregar sem carregar os animais.
+    """
+
+    def com_idade_meses(self, data=None):
+        """Anota `idade_meses` em `data` (padrão: hoje), como Animal.idade_em_meses."""
+        dias = DiasEntre(_data_referencia(data), 'data_nascimento')
+        return self.annotate(idade_meses=models.ExpressionWrapper(
+            dias / models.Value(DIAS_MES), output_field=models.IntegerField()
+        ))
+
+    def com_ua(self, data=None):
+        """Anota `ua` em `data` (padrão: hoje), como Animal.ua_atual."""
+        from infraestrutura.lotacao import expressao_ua
+        return self.annotate(ua=expressao_ua(data or timezone.localdate()))
+
+    def com_categoria(self, data=None):
+        """Anota `categoria` (BEZERRO, SOBREANO ou ADULTO) pela idade em `data`."""
+        data = data or timezone.localdate()
+        # meses <= limite  <=>  dias < (limite + 1) * 30: compara direto a data de nascimento (indexada)
+        return self.annotate(categoria=models.Case(
+            *[
+                models.When(data_nascimento__gt=data - timedelta(days=(limite + 1) * DIAS_MES), then=models.Value(nome))
+                for limite, nome in CATEGORIAS_IDADE
+            ],
+            default=models.Value(CATEGORIA_ADULTO),
+            output_field=models.CharField(),
+        ))
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.chave_ordenacao = gerar_chave_ordenacao(obj.identificacao)
+        criados = super().bulk_create(objs, *args, **kwargs)
+
+        com_pais = [obj for obj in criados if obj.mae_id or obj.pai_id]
+        if com_pais:
+            from .genealogia import GenealogiaService
+            ids = [obj.pk for obj in com_pais if obj.pk]
+            if len(ids) < len(com_pais):
+                # Bancos que não devolvem a PK no bulk_create
+                ids = self.filter(identificacao__in=[obj.identificacao for obj in com_pais]).values_list('pk', flat=True)
+            GenealogiaService.atualizar(ids)
+        return criados
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+        if 'identificacao' in fields:
+            for obj in objs:
+                obj.chave_ordenacao = gerar_chave_ordenacao(obj.identificacao)
+            if 'chave_ordenacao' not in fields:
+                fields.append('chave_ordenacao')
+        linhas = super().bulk_update(objs, fields, *args, **kwargs)
+        self._apos_alteracao([obj.pk for obj in objs], fields)
+        return linhas
+
+    def update(self, **kwargs):
+        # Valor fixo: a chave sai na mesma UPDATE. Expressão (F, Concat...): só dá
+        # para calcular depois, lendo os brincos gravados.
+        chave_depois = 'identificacao' in kwargs and not isinstance(kwargs['identificacao'], str)
+        if 'identificacao' in kwargs and not chave_depois:
+            kwargs['chave_ordenacao'] = gerar_chave_ordenacao(kwargs['identificacao'])
+
+        if not chave_depois and not (CAMPOS_GENEALOGIA | CAMPOS_PREVISAO_PARTO).intersection(kwargs):
+            return super().update(**kwargs)
+
+        ids = list(self.values_list('pk', flat=True))
+        linhas = super().update(**kwargs)
+        if chave_depois:
+            self._atualizar_chave_ordenacao(ids)
+        self._apos_alteracao(ids, kwargs)
+        return linhas
+
+    def _atualizar_chave_ordenacao(self, ids, tamanho=2000):
+        for inicio in range(0, len(ids), tamanho):
+            registros = self.model._base_manager.filter(pk__in=ids[inicio:inicio + tamanho]).values_list('pk', 'identificacao')
+            self.model._base_manager.bulk_update(
+                [self.model(pk=pk, chave_ordenacao=gerar_chave_ordenacao(identificacao)) for pk, identificacao in registros],
+                ['chave_ordenacao'],
+            )
+
+    def _apos_alteracao(self, ids, campos):
+        if CAMPOS_GENEALOGIA.intersection(campos):
+            from .genealogia import GenealogiaService
+            GenealogiaService.atualizar(ids)
+        if CAMPOS_PREVISAO_PARTO.intersection(campos):
+            from manejo.services import PrevisaoPartoService
+            PrevisaoPartoService.recalcular_matrizes(ids)
+
+
+class AnimalManager(models.Manager.from_queryset(AnimalQuerySet)):
+    # A ordenação natural vem de Meta.ordering (chave_ordenacao indexada), que o
+    # Django já descarta em count(), exists(), get() e agregações.
+    pass
+    
 
 class Animal(models.Model):
     SITUACAO_CHOICES = [
@@ -124,6 +256,13 @@ class Animal(models.Model):
     observacoes = models.TextField(blank=True, verbose_name="Observações")
 
     # === Campos calculados / cache ===
+    chave_ordenacao = models.CharField(
+        max_length=255,
+        db_index=True,
+        editable=False,
+        default='',
+        verbose_name="Chave de Ordenação"
+    )
     peso_atual = models.DecimalField(
         max_digits=6, 
         decimal_places=2, 
@@ -132,22 +271,60 @@ class Animal(models.Model):
         verbose_name="Peso Atual (kg)"
     )
     data_ultima_pesagem = models.DateField(null=True, blank=True)
+    coeficiente_endogamia = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Coeficiente de Endogamia (F)"
+    )
 
     objects = AnimalManager()
 
     class Meta:
         verbose_name = "Animal"
         verbose_name_plural = "Animais"
-        ordering = ['identificacao']
+        ordering = ['chave_ordenacao']
         indexes = [
             models.Index(fields=['identificacao']),
             models.Index(fields=['data_nascimento']),
             models.Index(fields=['situacao']),
+            models.Index(fields=['situacao', 'sexo', 'data_nascimento']),
+            # Quase todas as telas olham só o rebanho vivo
+            models.Index(
+                fields=['sexo', 'data_nascimento'],
+                condition=models.Q(situacao='VIVO'),
+                name='animal_vivo_sexo_nasc_idx',
+            ),
+            # Listagem do rebanho vivo já na ordem natural dos brincos
+            models.Index(
+                fields=['chave_ordenacao'],
+                condition=models.Q(situacao='VIVO'),
+                name='animal_vivo_ordem_idx',
+            ),
         ]
 
     def __str__(self):
         return f"{self.identificacao} {self.nome}"
 
+    def save(self, *args, **kwargs):
+        self.chave_ordenacao = gerar_chave_ordenacao(self.identificacao)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'identificacao' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'chave_ordenacao'}
+        super().save(*args, **kwargs)
+
+    def clean(self):
+        super().clean()
+        from django.core.exceptions import ValidationError
+        from .genealogia import GenealogiaService
+
+        for campo in ('mae', 'pai'):
+            progenitor_id = getattr(self, f'{campo}_id')
+            if not progenitor_id or not self.pk:
+                continue
+            if progenitor_id == self.pk or GenealogiaService.e_descendente(progenitor_id, self.pk):
+                raise ValidationError({campo: "O animal não pode ser ancestral de si mesmo."})
+
     def get_absolute_url(self):
         """Retorna a URL para a página de detalhes/ficha do animal."""
         # Altere 'rebanho:animal_detail' para o name exato da sua URL
@@ -158,9 +335,8 @@ class Animal(models.Model):
     def idade_em_meses(self):
         if not self.data_nascimento:
             return 0
-        hoje = date.today()
-        delta = hoje - self.data_nascimento
-        return (delta.days // 30)  # aproximação boa o suficiente
+        delta = timezone.localdate() - self.data_nascimento
+        return delta.days // DIAS_MES  # aproximação boa o suficiente
 
     @property
     def idade_formatada(self):
@@ -201,6 +377,103 @@ class Animal(models.Model):
         
         return Decimal(str(peso)) / Decimal('450')
 
+    def peso_projetado(self, data=None):
+        """Peso em `data` pela curva de crescimento (None se a curva ainda não foi ajustada)."""
+        try:
+            curva = self.curva_crescimento
+        except CurvaCrescimento.DoesNotExist:
+            return None
+        data = data or timezone.localdate()
+        return round(curva.peso_em((data - self.data_nascimento).days), 1)
+
+
+
+class Genealogia(models.Model):
+    """
+    Tabela de fechamento do pedigree: uma linha por par (descendente, ancestral)
+    com a menor distância em gerações. Mantida por rebanho.genealogia.
+    """
+    descendente = models.ForeignKey(
+        'Animal',
+        on_delete=models.CASCADE,
+        related_name='genealogia_ancestrais',
+        verbose_name="Descendente"
+    )
+    ancestral = models.ForeignKey(
+        'Animal',
+        on_delete=models.CASCADE,
+        related_name='genealogia_descendentes',
+        verbose_name="Ancestral"
+    )
+    distancia = models.PositiveSmallIntegerField(verbose_name="Gerações")
+
+    class Meta:
+        verbose_name = "Genealogia"
+        verbose_name_plural = "Genealogia"
+        constraints = [
+            models.UniqueConstraint(fields=['descendente', 'ancestral'], name='genealogia_par_unico'),
+        ]
+        indexes = [
+            # Descendentes de um touro/matriz (o lado descendente já é coberto pela constraint)
+            models.Index(fields=['ancestral', 'distancia']),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestral_id} -> {self.descendente_id} ({self.distancia})"
+
+
+class CurvaCrescimento(models.Model):
+    """
+    Curva de Brody ajustada às pesagens do animal: peso(t) = A * (1 - b * e^(-k*t)),
+    com t em dias de idade. Mantida por rebanho.crescimento.
+    """
+    animal = models.OneToOneField(
+        'Animal',
+        on_delete=models.CASCADE,
+        related_name='curva_crescimento',
+        verbose_name="Animal"
+    )
+    peso_adulto = models.FloatField(verbose_name="Peso Adulto (A, kg)")
+    fator_b = models.FloatField(verbose_name="Fator de Integração (b)")
+    taxa_k = models.FloatField(verbose_name="Taxa de Maturidade (k, por dia)")
+    pesagens = models.PositiveIntegerField(default=0, verbose_name="Pesagens Usadas")
+    erro_kg = models.FloatField(null=True, blank=True, verbose_name="Erro Médio (kg)")
+    ajustada_em = models.DateTimeField(auto_now=True, verbose_name="Ajustada em")
+
+    class Meta:
+        verbose_name = "Curva de Crescimento"
+        verbose_name_plural = "Curvas de Crescimento"
+
+    def __str__(self):
+        return f"{self.animal_id}: A={self.peso_adulto:.0f} b={self.fator_b:.3f} k={self.taxa_k:.5f}"
+
+    def peso_em(self, idade_dias):
+        return self.peso_adulto * (1 - self.fator_b * math.exp(-self.taxa_k * idade_dias))
+
+
+class AvaliacaoGenetica(models.Model):
+    """
+    Valor genético do animal para peso ajustado aos 205 dias (BLUP, modelo animal).
+    A DEP é metade do valor genético. Mantida por rebanho.genetica.
+    """
+    animal = models.OneToOneField(
+        'Animal',
+        on_delete=models.CASCADE,
+        related_name='avaliacao_genetica',
+        verbose_name="Animal"
+    )
+    valor_genetico = models.FloatField(verbose_name="Valor Genético P205 (kg)")
+    dep = models.FloatField(verbose_name="DEP P205 (kg)")
+    p205 = models.FloatField(null=True, blank=True, verbose_name="P205 Próprio (kg)")
+    filhos_com_registro = models.PositiveIntegerField(default=0, verbose_name="Filhos com P205")
+    avaliada_em = models.DateTimeField(auto_now=True, verbose_name="Avaliada em")
+
+    class Meta:
+        verbose_name = "Avaliação Genética"
+        verbose_name_plural = "Avaliações Genéticas"
+
+    def __str__(self):
+        return f"{self.animal_id}: DEP P205 {self.dep:+.1f} kg"
 
 
 class BaixaAnimal(models.Model):
@@ -0,0 +1,310 @@
+# rebanho/safra.py
+"""
+Análise de safras (coortes de nascimento).
+
+Cada safra é avaliada por sobrevivência até a desmama, peso e idade à
+desmama, peso ajustado aos 205 dias (P205), GMD do nascimento à desmama e
+peso de venda, agrupada por ano ou estação de nascimento, pai (ou código do
+sêmen da inseminação) ou idade da mãe ao parto.
+
+Três consultas agrupadas trazem os dados de todos os animais das safras
+pedidas: o cadastro (com mãe, pai, baixa e venda), a pesagem de desmama (a
+mais próxima dos 205 dias dentro da janela, escolhida por ROW_NUMBER por
+animal) e o peso ao nascer. P205, GMD e as somas por grupo saem de uma
+passada NumPy (bincount).
+
+    P205 = (peso à desmama - peso ao nascer) / idade à desmama * 205 + peso ao nascer
+
+Sem pesagem na primeira semana, o peso ao nascer é o padrão do sexo
+(PRIOR_PADRAO das curvas de crescimento). As somas de cada ano ficam em
+cache quando a safra está encerrada; os signals de Animal, Pesagem,
+BaixaAnimal, Venda e Reproducao (e os caminhos em lote de pesagens e
+reproduções, que não disparam signals) descartam o cache quando mexem em
+uma safra encerrada.
+"""
+from datetime import date
+from functools import reduce
+from operator import or_
+from uuid import uuid4
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import F, Min, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Abs, RowNumber
+from django.utils import timezone
+
+from manejo.models import Pesagem, Reproducao
+
+from .crescimento import PRIOR_PADRAO, _ordinais
+from .models import Animal, DiasEntre
+
+
+AGRUPAMENTOS = {
+    'safra': 'Safra',
+    'estacao': 'Estação de nascimento',
+    'pai': 'Pai / sêmen',
+    'idade_mae': 'Idade da mãe ao parto',
+}
+IDADE_DESMAMA = 205
+JANELA_DESMAMA = (150, 270)  # idade (dias) aceita para a pesagem de desmama
+IDADE_PESO_NASCER = 7
+# A safra é encerrada (e vai para o cache) depois deste número de anos completos
+ANOS_ABERTA = 3
+# (limite superior em anos, rótulo)
+FAIXAS_IDADE_MAE = [
+    (3, 'Até 2 anos'),
+    (4, '3 anos'),
+    (5, '4 anos'),
+    (11, '5 a 10 anos'),
+    (None, '11 anos ou mais'),
+]
+SEM_MAE = 'Mãe não informada'
+SEM_PAI = 'Pai não informado'
+
+# Somas por grupo (o cache guarda estas, as médias saem em _indicadores)
+SOMAS = (
+    'nascidos', 'mortos', 'mortos_desmama', 'desmamados', 'peso_desmama', 'idade_desmama',
+    'p205', 'gmd', 'vendidos', 'com_peso_venda', 'peso_venda', 'idade_venda',
+)
+
+
+def estacao_nascimento(data):
+    return 'Águas' if data.month >= 10 or data.month <= 3 else 'Seca'
+
+
+def _media(soma, total, casas=1):
+    return round(soma / total, casas) if total else None
+
+
+class SafraService:
+
+    CHAVE_VERSAO = 'rebanho:safra:versao'
+
+    @staticmethod
+    def encerrada(ano):
+        return timezone.localdate().year > int(ano) + ANOS_ABERTA
+
+    @staticmethod
+    def _afeta_cache(nascimento, data_pesagem=None):
+        # nascimento None = animal desconhecido (apagado): descarta sempre
+        if nascimento is None:
+            return True
+        if not SafraService.encerrada(nascimento.year):
+            return False
+        # Pesagens só contam até o fim da janela de desmama
+        return data_pesagem is None or (data_pesagem - nascimento).days <= JANELA_DESMAMA[1]
+
+    @staticmethod
+    def invalidar_cache(nascimento=None, data_pesagem=None):
+        """Chamado pelos signals: descarta as safras em cache quando o registro é de um animal de safra encerrada."""
+        if not SafraService._afeta_cache(nascimento, data_pesagem):
+            return
+        cache.delete(SafraService.CHAVE_VERSAO)
+
+    @staticmethod
+    def invalidar_animais(animal_ids, datas_pesagem=None):
+        """
+        Caminhos em lote (bulk_create/bulk_update não disparam signals): uma consulta
+        para as datas de nascimento e descarta o cache se algum animal (ou pesagem,
+        com `datas_pesagem` na mesma ordem de `animal_ids`) mexe em safra encerrada.
+        """
+        animal_ids = list(animal_ids)
+        if not animal_ids:
+            return
+        nascimentos = dict(Animal.objects.filter(pk__in=set(animal_ids)).values_list('pk', 'data_nascimento'))
+        datas = datas_pesagem or [None] * len(animal_ids)
+        for animal_id, data_pesagem in zip(animal_ids, datas):
+            if SafraService._afeta_cache(nascimentos.get(animal_id), data_pesagem):
+                SafraService.invalidar_cache()
+                return
+
+    @staticmethod
+    def analisar(anos, agrupar='safra'):
+        """
+        Indicadores por grupo das safras (anos de nascimento) pedidas, somando os anos
+        quando o grupo se repete (pai, idade da mãe). Lista de dicts com 'grupo' e os
+        campos de _indicadores.
+        """
+        anos = sorted({int(ano) for ano in anos})
+        if agrupar not in AGRUPAMENTOS:
+            raise ValueError(f"Agrupamento inválido: {agrupar}")
+
+        versao = cache.get_or_set(SafraService.CHAVE_VERSAO, lambda: uuid4().hex, None)
+        chaves = {ano: f'rebanho:safra:{agrupar}:{ano}:v{versao}' for ano in anos if SafraService.encerrada(ano)}
+        em_cache = cache.get_many(chaves.values())
+        por_ano = {ano: em_cache[chave] for ano, chave in chaves.items() if chave in em_cache}
+
+        faltam = [ano for ano in anos if ano not in por_ano]
+        if faltam:
+            calculado = SafraService._calcular(faltam, agrupar)
+            por_ano.update(calculado)
+            cache.set_many({chaves[ano]: calculado[ano] for ano in faltam if ano in chaves}, None)
+
+        grupos = {}
+        for ano in anos:
+            for grupo, somas in por_ano[ano].items():
+                atual = grupos.setdefault(grupo, dict.fromkeys(SOMAS, 0))
+                for campo in SOMAS:
+                    atual[campo] += somas[campo]
+
+        linhas = [{'grupo': grupo, **SafraService._indicadores(somas)} for grupo, somas in grupos.items()]
+        if agrupar == 'pai':
+            linhas.sort(key=lambda linha: (linha['p205'] is None, -(linha['p205'] or 0), linha['grupo']))
+        elif agrupar == 'idade_mae':
+            ordem = [rotulo for _, rotulo in FAIXAS_IDADE_MAE] + [SEM_MAE]
+            linhas.sort(key=lambda linha: ordem.index(linha['grupo']))
+        else:
+            linhas.sort(key=lambda linha: str(linha['grupo']))
+        return linhas
+
+    @staticmethod
+    def _indicadores(somas):
+        nascidos, desmamados, vendidos = somas['nascidos'], somas['desmamados'], somas['vendidos']
+        return {
+            'nascidos': nascidos,
+            'mortos': somas['mortos'],
+            'mortos_desmama': somas['mortos_desmama'],
+            'sobrevivencia_desmama': (
+                round((nascidos - somas['mortos_desmama']) / nascidos * 100, 1) if nascidos else None
+            ),
+            'desmamados': desmamados,
+            'peso_desmama': _media(somas['peso_desmama'], desmamados),
+            'idade_desmama': _media(somas['idade_desmama'], desmamados, 0),
+            'p205': _media(somas['p205'], desmamados),
+            'gmd': _media(somas['gmd'], desmamados, 3),
+            'vendidos': vendidos,
+            'peso_venda': _media(somas['peso_venda'], somas['com_peso_venda']),
+            'idade_venda_meses': _media(somas['idade_venda'] / 30.4, vendidos),
+        }
+
+    @staticmethod
+    def desmama(animais, ids, sexos):
+        """
+        Pesagem de desmama dos `animais` (ids em ordem crescente, sexos na mesma ordem):
+        arrays (desmamado, idade, peso à desmama, peso ao nascer, gmd, P205), zerados
+        nos animais sem desmama. Duas consultas.
+        """
+        total = len(ids)
+        idade = DiasEntre(F('data_pesagem'), F('animal__data_nascimento'))
+        pesagens = Pesagem.objects.filter(animal__in=animais.values('pk')).order_by().annotate(idade=idade)
+        desmama = list(
+            pesagens.filter(idade__range=JANELA_DESMAMA)
+            .annotate(ordem=Window(
+                RowNumber(), partition_by=[F('animal_id')],
+                order_by=[Abs(F('idade') - IDADE_DESMAMA).asc(), F('pk').asc()],
+            ))
+            .filter(ordem=1)
+            .values_list('animal_id', 'idade', 'peso_kg')
+        )
+        nascer = list(
+            pesagens.filter(idade__range=(0, IDADE_PESO_NASCER)).values('animal_id')
+            .annotate(peso=Min('peso_kg')).values_list('animal_id', 'peso')
+        )
+
+        # Peso ao nascer: pesado na primeira semana ou o padrão do sexo
+        peso_nascer = np.array([PRIOR_PADRAO[sexo][1] for sexo in sexos])
+        if nascer:
+            animal_ids, pesos = zip(*nascer)
+            peso_nascer[np.searchsorted(ids, animal_ids)] = np.array(pesos, dtype=float)
+
+        desmamado = np.zeros(total, dtype=bool)
+        idade_desmama = np.zeros(total)
+        peso_desmama = np.zeros(total)
+        if desmama:
+            animal_ids, idades, pesos = zip(*desmama)
+            indice = np.searchsorted(ids, animal_ids)
+            desmamado[indice] = True
+            idade_desmama[indice] = idades
+            peso_desmama[indice] = np.array(pesos, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gmd = np.where(desmamado, (peso_desmama - peso_nascer) / idade_desmama, 0.0)
+        p205 = np.where(desmamado, gmd * IDADE_DESMAMA + peso_nascer, 0.0)
+        return desmamado, idade_desmama, peso_desmama, peso_nascer, gmd, p205
+
+    @staticmethod
+    def _calcular(anos, agrupar):
+        """{ano: {grupo: {soma: valor}}} dos anos pedidos."""
+        resultado = {ano: {} for ano in anos}
+        animais = Animal.objects.filter(
+            reduce(or_, (Q(data_nascimento__range=(date(ano, 1, 1), date(ano, 12, 31))) for ano in anos))
+        ).order_by('pk')
+
+        campos = ['pk', 'data_nascimento', 'sexo', 'baixaanimal__data_baixa', 'venda__data_entrada', 'venda__peso_venda']
+        if agrupar == 'pai':
+            animais_lista = animais.annotate(
+                semen=Subquery(
+                    Reproducao.objects.filter(bezerro=OuterRef('pk')).exclude(codigo_semen='')
+                    .order_by('-data_cio').values('codigo_semen')[:1]
+                ),
+            ).values_list(*campos, 'pai__identificacao', 'semen')
+        elif agrupar == 'idade_mae':
+            animais_lista = animais.values_list(*campos, 'mae__data_nascimento')
+        else:
+            animais_lista = animais.values_list(*campos)
+        linhas = list(animais_lista)
+        if not linhas:
+            return resultado
+
+        colunas = list(zip(*linhas))
+        ids = np.array(colunas[0])
+        nascimentos, sexos = colunas[1], colunas[2]
+        nascimento = _ordinais(nascimentos)
+        total = len(ids)
+
+        desmamado, idade_desmama, peso_desmama, _, gmd, p205 = SafraService.desmama(animais, ids, sexos)
+
+        baixas = colunas[3]
+        morto = np.array([data is not None for data in baixas])
+        idade_morte = np.array([data.toordinal() if data else 0 for data in baixas]) - nascimento
+        morto_desmama = morto & ~desmamado & (idade_morte <= JANELA_DESMAMA[1])
+
+        vendas = colunas[4]
+        vendido = np.array([data is not None for data in vendas])
+        idade_venda = np.where(vendido, np.array([data.toordinal() if data else 0 for data in vendas]) - nascimento, 0)
+        com_peso_venda = np.array([peso is not None for peso in colunas[5]])
+        peso_venda = np.array([float(peso) if peso is not None else 0.0 for peso in colunas[5]])
+
+        # Grupo de cada animal: (ano, grupo)
+        if agrupar == 'safra':
+            grupos = [(d.year, d.year) for d in nascimentos]
+        elif agrupar == 'estacao':
+            grupos = [(d.year, f'{d.year} {estacao_nascimento(d)}') for d in nascimentos]
+        elif agrupar == 'pai':
+            grupos = [(d.year, pai or semen or SEM_PAI) for d, pai, semen in zip(nascimentos, colunas[6], colunas[7])]
+        else:
+            limites = np.array([limite for limite, _ in FAIXAS_IDADE_MAE[:-1]])
+            maes = colunas[6]
+            idade_mae = (nascimento - np.array([m.toordinal() if m else 0 for m in maes])) / 365.25
+            faixa = np.searchsorted(limites, idade_mae, side='right')
+            grupos = [
+                (d.year, FAIXAS_IDADE_MAE[f][1] if m else SEM_MAE)
+                for d, m, f in zip(nascimentos, maes, faixa.tolist())
+            ]
+
+        indice_grupo = {}
+        grupo = np.fromiter((indice_grupo.setdefault(chave, len(indice_grupo)) for chave in grupos), dtype=np.int64, count=total)
+
+        def soma(valores):
+            return np.bincount(grupo, weights=valores, minlength=len(indice_grupo))
+
+        somas = {
+            'nascidos': soma(None),
+            'mortos': soma(morto.astype(float)),
+            'mortos_desmama': soma(morto_desmama.astype(float)),
+            'desmamados': soma(desmamado.astype(float)),
+            'peso_desmama': soma(peso_desmama),
+            'idade_desmama': soma(idade_desmama),
+            'p205': soma(p205),
+            'gmd': soma(gmd),
+            'vendidos': soma(vendido.astype(float)),
+            'com_peso_venda': soma(com_peso_venda.astype(float)),
+            'peso_venda': soma(peso_venda),
+            'idade_venda': soma(idade_venda.astype(float)),
+        }
+        contagens = {'nascidos', 'mortos', 'mortos_desmama', 'desmamados', 'vendidos', 'com_peso_venda'}
+        for (ano, chave), posicao in indice_grupo.items():
+            resultado[ano][chave] = {
+                campo: int(valores[posicao]) if campo in contagens else float(valores[posicao])
+                for campo, valores in somas.items()
+            }
+        return resultado
@@ -1,7 +1,15 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.db.models import Q
-from .models import  BaixaAnimal
+
+from financeiro.models import CustoAnimalDetalhe, RegistroDeCusto, Venda
+from infraestrutura.models import MovimentacaoPasto
+from manejo.models import Pesagem, Reproducao, TratamentoSaude
+
+from .genealogia import GenealogiaService
+from .models import  Animal, BaixaAnimal, CAMPOS_GENEALOGIA, Genealogia
+from .safra import SafraService
+from .timeline import TimelineAnimalService
 
 
 @receiver(post_save, sender=BaixaAnimal)
@@ -10,3 +18,88 @@ def update_animal_situacao_on_baixa(sender, instance, created, **kwargs):
         animal = instance.animal
         animal.situacao = 'MORTO'
         animal.save(update_fields=['situacao']) # Altera o status para MORTO
+
+
+@receiver(post_save, sender=Animal)
+def atualizar_genealogia(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Mantém a tabela Genealogia quando mae/pai mudam (inclui os descendentes)."""
+    if raw:
+        return
+    if update_fields is not None and not CAMPOS_GENEALOGIA.intersection(update_fields):
+        return
+    if created and not (instance.mae_id or instance.pai_id):
+        return
+    if not created and not GenealogiaService.pais_alterados(instance):
+        return
+    GenealogiaService.atualizar([instance.pk])
+
+
+@receiver(pre_delete, sender=Animal)
+def guardar_descendentes(sender, instance, **kwargs):
+    # As linhas do animal somem em cascata; guarda quem precisa ser recalculado
+    instance._descendentes_genealogia = list(
+        Genealogia.objects.filter(ancestral=instance).values_list('descendente_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Animal)
+def recalcular_descendentes(sender, instance, **kwargs):
+    descendentes = getattr(instance, '_descendentes_genealogia', None)
+    if descendentes:
+        GenealogiaService.atualizar(Animal.objects.filter(pk__in=descendentes).values_list('pk', flat=True))
+
+
+# Históricos exibidos na ficha do animal: campo que aponta para o animal afetado
+CAMPO_ANIMAL_TIMELINE = {
+    Animal: 'pk',
+    Pesagem: 'animal_id',
+    MovimentacaoPasto: 'animal_id',
+    CustoAnimalDetalhe: 'animal_id',
+    TratamentoSaude: 'animal_id',
+    Reproducao: 'matriz_id',
+}
+
+
+def invalidar_timeline(sender, instance, raw=False, **kwargs):
+    if not raw:
+        TimelineAnimalService.invalidar(getattr(instance, CAMPO_ANIMAL_TIMELINE[sender]))
+
+
+for modelo in CAMPO_ANIMAL_TIMELINE:
+    post_save.connect(invalidar_timeline, sender=modelo, dispatch_uid=f'timeline_save_{modelo.__name__}')
+    post_delete.connect(invalidar_timeline, sender=modelo, dispatch_uid=f'timeline_delete_{modelo.__name__}')
+
+
+@receiver(post_save, sender=RegistroDeCusto)
+def invalidar_timeline_custo(sender, instance, created, raw=False, **kwargs):
+    # Data/descrição/tipo do custo aparecem na ficha; a alocação nova é tratada em alocar_custo_por_pasto
+    if not created and not raw:
+        TimelineAnimalService.invalidar(list(instance.detalhes_alocacao.values_list('animal_id', flat=True)))
+
+
+# Campos do animal que mudam a análise de safras
+CAMPOS_SAFRA = CAMPOS_GENEALOGIA | {'data_nascimento', 'sexo'}
+
+
+def invalidar_safras(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if sender is Animal:
+        if update_fields is not None and not CAMPOS_SAFRA.intersection(update_fields):
+            return
+        SafraService.invalidar_cache(instance.data_nascimento)
+        return
+    if sender is Reproducao:
+        # O código do sêmen agrupa o bezerro; serviços sem bezerro não entram nas safras
+        SafraService.invalidar_animais([instance.bezerro_id] if instance.bezerro_id else [])
+        return
+    try:
+        nascimento = instance.animal.data_nascimento
+    except Animal.DoesNotExist:  # apagado junto com o animal
+        nascimento = None
+    SafraService.invalidar_cache(nascimento, getattr(instance, 'data_pesagem', None))
+
+
+for modelo in (Animal, Pesagem, BaixaAnimal, Venda, Reproducao):
+    post_save.connect(invalidar_safras, sender=modelo, dispatch_uid=f'safra_save_{modelo.__name__}')
+    post_delete.connect(invalidar_safras, sender=modelo, dispatch_uid=f'safra_delete_{modelo.__name__}')
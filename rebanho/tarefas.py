@@ -0,0 +1,56 @@
+# rebanho/tarefas.py
+"""Tarefas de segundo plano do rebanho (ver core/processamento.py)."""
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from core.processamento import tarefa
+from infraestrutura.models import MovimentacaoPasto, Pasto
+from infraestrutura.rodizio import RodizioService
+
+from .crescimento import CrescimentoService
+from .genetica import AvaliacaoGeneticaService
+from .models import Animal, Lote
+
+
+@tarefa('rebanho.mudar_pasto_lote', 'Mudança de pasto de lotes')
+def mudar_pasto_lote(execucao):
+    """Move os lotes e todos os seus animais para o pasto de destino (tudo ou nada)."""
+    parametros = execucao.parametros
+    pasto_destino = Pasto.objects.get(pk=parametros['pasto_destino'])
+    data_entrada = parse_date(parametros['data_entrada'])
+    motivo = f"Movimentação de Pasto: {parametros.get('observacoes', '')}"
+
+    lotes = Lote.objects.filter(pk__in=parametros['lotes'])
+    animais = Animal.objects.filter(lote_atual__in=lotes).select_related('pasto_atual')
+    total = animais.count()
+
+    with transaction.atomic():
+        lotes.update(pasto_atual=pasto_destino)
+        for animal in execucao.acompanhar(animais.iterator(chunk_size=500), total, mensagem="Movimentando animais..."):
+            # Um a um: o signal de MovimentacaoPasto fecha a estadia anterior
+            MovimentacaoPasto.objects.create(
+                animal=animal,
+                pasto_origem=animal.pasto_atual,
+                pasto_destino=pasto_destino,
+                data_entrada=data_entrada,
+                motivo=motivo,
+            )
+            animal.pasto_atual = pasto_destino
+            animal.save(update_fields=['pasto_atual'])
+
+    # Marca a tarefa de rodízio cumprida ou, se o lote foi para outro pasto, replaneja só ele
+    RodizioService.replanejar()
+    return {'lotes': len(parametros['lotes']), 'animais': total, 'pasto': pasto_destino.nome}
+
+
+@tarefa('rebanho.curvas_crescimento', 'Curvas de crescimento do rebanho')
+def ajustar_curvas(execucao):
+    execucao.progresso(5, mensagem="Ajustando as curvas de crescimento...", forcar=True)
+    return {'curvas': CrescimentoService.ajustar()}
+
+
+@tarefa('rebanho.avaliacao_genetica', 'Avaliação genética (DEP de P205)')
+def avaliar_geneticamente(execucao):
+    execucao.progresso(5, mensagem="Resolvendo as equações de modelos mistos...", forcar=True)
+    animais, registros, iteracoes = AvaliacaoGeneticaService.avaliar()
+    return {'animais': animais, 'registros': registros, 'iteracoes': iteracoes}
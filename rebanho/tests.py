@@ -1,3 +1,520 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Concat
+from django.urls import reverse
+from django.utils import timezone
+
+from core.perfil import CACHE_EM_MEMORIA, OrcamentoConsultasMixin
+from financeiro.models import RegistroDeCusto, TipoCusto, Venda
+from infraestrutura.models import MovimentacaoPasto, Pasto
+from manejo.models import Pesagem, Reproducao, TratamentoSaude
+from manejo.services import ProtocoloService
+from manejo.validacao import ValidacaoPesagemService
+
+from .busca import buscar_animais, filtro_busca
+from .crescimento import PRIOR_PADRAO, CrescimentoService, brody
+from .estoque import EstoqueService, meses_antes
+from .genetica import AvaliacaoGeneticaService
+from .genealogia import GenealogiaService
+from .models import Animal, AvaliacaoGenetica, BaixaAnimal, Genealogia, Lote, gerar_chave_ordenacao
+from .safra import SEM_PAI, SafraService
+from .timeline import TimelineAnimalService
+
+
+class BuscaAnimalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.estrela = Animal.objects.create(identificacao='BR-1020', nome='Estrela', data_nascimento=date(2020, 1, 1), sexo='F')
+        Animal.objects.bulk_create([
+            Animal(identificacao=f'BR-{i}', data_nascimento=date(2021, 1, 1), sexo='M')
+            for i in range(1, 30)
+        ])
+
+    def ids(self, termo):
+        return set(Animal.objects.filter(filtro_busca(termo)).values_list('identificacao', flat=True))
+
+    def test_busca_por_substring_nome_e_observacoes(self):
+        self.assertEqual(self.ids('1020'), {'BR-1020'})
+        self.assertEqual(self.ids('strel'), {'BR-1020'})
+
+        self.estrela.observacoes = 'mancha branca na testa'
+        self.estrela.save()
+        self.assertEqual(self.ids('BRANCA'), {'BR-1020'})
+
+    def test_indice_acompanha_escritas(self):
+        Animal.objects.filter(identificacao='BR-7').update(identificacao='XT-700')
+        self.assertEqual(self.ids('XT-7'), {'XT-700'})
+        self.assertEqual(self.ids('BR-7'), set())
+
+        Animal.objects.filter(identificacao='XT-700').delete()
+        self.assertEqual(self.ids('XT-7'), set())
+
+    def test_termo_curto_busca_no_brinco(self):
+        self.assertEqual(len(self.ids('br')), 30)
+        # Não só no começo: "12" acha "BR-12"
+        self.assertEqual(self.ids('12'), {'BR-12'})
+        self.assertEqual(self.ids('02'), {'BR-1020'})
+
+    def test_typeahead_prioriza_prefixo_e_ordem_natural(self):
+        resultados = buscar_animais('BR-2', limite=3)
+        self.assertEqual([r['identificacao'] for r in resultados], ['BR-2', 'BR-20', 'BR-21'])
+
+        resposta = self.client.get(reverse('rebanho:animal_busca'), {'q': 'estrela'})
+        self.assertEqual(resposta.json()['resultados'][0]['id'], self.estrela.pk)
+
+
+class GenealogiaTests(TestCase):
+    """Meio-irmãos paternos: o acasalamento gera F = 1/8."""
+
+    def setUp(self):
+        nasc = date(2018, 1, 1)
+        self.touro = Animal.objects.create(identificacao='T1', data_nascimento=nasc, sexo='M')
+        self.vaca_a = Animal.objects.create(identificacao='V1', data_nascimento=nasc, sexo='F')
+        self.vaca_b = Animal.objects.create(identificacao='V2', data_nascimento=nasc, sexo='F')
+        self.filho = Animal.objects.create(identificacao='F1', data_nascimento=date(2020, 1, 1), sexo='M', pai=self.touro, mae=self.vaca_a)
+        self.filha = Animal.objects.create(identificacao='F2', data_nascimento=date(2020, 1, 1), sexo='F', pai=self.touro, mae=self.vaca_b)
+
+    def test_ancestrais_descendentes_e_comuns(self):
+        neto = Animal.objects.create(identificacao='N1', data_nascimento=date(2022, 1, 1), sexo='M', pai=self.filho, mae=self.filha)
+
+        self.assertEqual(
+            [(a.identificacao, a.geracao) for a in GenealogiaService.ancestrais(neto)],
+            [('F1', 1), ('F2', 1), ('T1', 2), ('V1', 2), ('V2', 2)],
+        )
+        self.assertEqual(
+            [a.identificacao for a in GenealogiaService.descendentes(self.touro)],
+            ['F1', 'F2', 'N1'],
+        )
+        self.assertEqual(
+            [a.identificacao for a in GenealogiaService.ancestrais_comuns(self.filho, self.filha)],
+            ['T1'],
+        )
+        neto.refresh_from_db()
+        self.assertAlmostEqual(neto.coeficiente_endogamia, 0.125)
+
+    def test_troca_de_pai_atualiza_descendentes(self):
+        neto = Animal.objects.create(identificacao='N1', data_nascimento=date(2022, 1, 1), sexo='M', mae=self.filha)
+        outro_touro = Animal.objects.create(identificacao='T2', data_nascimento=date(2018, 1, 1), sexo='M')
+
+        self.filha.pai = outro_touro
+        self.filha.save()
+        self.assertEqual(
+            {a.identificacao for a in GenealogiaService.ancestrais(neto)},
+            {'F2', 'T2', 'V2'},
+        )
+
+        Animal.objects.filter(pk=self.filha.pk).update(mae=None)
+        self.assertEqual(
+            {a.identificacao for a in GenealogiaService.ancestrais(neto)},
+            {'F2', 'T2'},
+        )
+
+    def test_parentesco_e_reconstrucao_em_lote(self):
+        parentesco = GenealogiaService.parentesco_com(self.filho, [self.filha, self.vaca_b])
+        self.assertAlmostEqual(parentesco[self.filha.pk], 0.125)
+        self.assertAlmostEqual(parentesco[self.vaca_b.pk], 0.0)
+
+        antes = set(Genealogia.objects.values_list('descendente', 'ancestral', 'distancia'))
+        GenealogiaService.reconstruir()
+        self.assertEqual(set(Genealogia.objects.values_list('descendente', 'ancestral', 'distancia')), antes)
+
+
+@override_settings(CACHES=CACHE_EM_MEMORIA)
+class TimelineAnimalTests(OrcamentoConsultasMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.animal = Animal.objects.create(identificacao='T-1', data_nascimento=date(2023, 1, 1), sexo='F')
+        self.url = reverse('rebanho:animal_detail', args=[self.animal.pk])
+
+    def popular(self, quantidade):
+        inicio = date(2024, 1, 1)
+        tipo = TipoCusto.objects.get_or_create(nome='Vermífugo')[0]
+        pasto = Pasto.objects.get_or_create(nome='Piquete T', defaults={'area_hectares': 5})[0]
+        for i in range(quantidade):
+            Pesagem.objects.create(animal=self.animal, data_pesagem=inicio + timedelta(days=30 * i), peso_kg=200 + 15 * i)
+            TratamentoSaude.objects.create(
+                animal=self.animal, data_tratamento=inicio + timedelta(days=i), tipo_tratamento='VAC', produto='Aftosa',
+            )
+            MovimentacaoPasto.objects.create(animal=self.animal, pasto_destino=pasto, data_entrada=inicio + timedelta(days=i))
+            RegistroDeCusto.objects.create(
+                descricao='Dose', valor_total=Decimal('10.00'), data_pagamento=inicio + timedelta(days=i),
+                tipo_custo=tipo, pasto=pasto,
+            )
+
+    def test_consultas_nao_crescem_com_o_historico(self):
+        self.popular(2)
+        cache.clear()
+        self.assertOrcamentoConsultas(10, self.url)
+
+        self.popular(6)
+        cache.clear()
+        response = self.assertOrcamentoConsultas(10, self.url)
+        self.assertEqual(len(response.context['pesagens']), 8)
+        self.assertEqual(response.context['custo_acumulado'], Decimal('80.00'))
+        # 1ª pesagem 200 kg, última 305 kg, 210 dias depois
+        self.assertEqual(response.context['gpmd_medio'], Decimal('0.5'))
+        self.assertEqual(response.context['gpmd_recente'], 500)
+
+    def test_cache_descartado_nas_gravacoes(self):
+        self.popular(2)
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as em_cache:
+            self.client.get(self.url)
+        self.assertLessEqual(len(em_cache), 2)
+
+        Pesagem.objects.create(animal=self.animal, data_pesagem=date(2024, 6, 1), peso_kg=320)
+        self.animal.refresh_from_db()
+        self.assertEqual(self.animal.peso_atual, 320)
+        self.assertEqual(self.client.get(self.url).context['ultima_pesagem'].peso_kg, 320)
+
+        # Caminho em lote (sem signals) também descarta
+        ProtocoloService.registrar_tratamentos([self.animal], date(2024, 6, 2), 'VAC', 'Brucelose')
+        timeline = TimelineAnimalService.obter(self.animal)
+        self.assertEqual(timeline['tratamentos'][0].produto, 'Brucelose')
+        self.assertEqual(timeline['eventos'][0]['tipo'], 'saude')
+
+
+class EstoqueTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        pasto = Pasto.objects.create(nome='Piquete E', area_hectares=10)
+        lote = Lote.objects.create(nome='Cria')
+
+        def criar(ident, nasc, sexo):
+            return Animal.objects.create(identificacao=ident, data_nascimento=nasc, sexo=sexo, lote_atual=lote)
+
+        cls.vaca = criar('E-1', date(2019, 5, 10), 'F')
+        cls.boi = criar('E-2', date(2021, 12, 1), 'M')
+        cls.bezerro = criar('E-3', date(2023, 2, 15), 'M')
+        cls.bezerra = criar('E-4', date(2023, 4, 1), 'F')
+        MovimentacaoPasto.objects.create(animal=cls.vaca, pasto_destino=pasto, data_entrada=date(2022, 1, 1))
+        Venda.objects.create(animal=cls.boi, valor_total=Decimal('5000'), origem_pagador='Frigorífico', data_entrada=date(2023, 3, 20))
+        BaixaAnimal.objects.create(animal=cls.bezerra, data_baixa=date(2023, 6, 5), causa='DOENCA')
+
+    def test_meses_antes(self):
+        self.assertEqual(meses_antes(date(2024, 3, 31), 1), date(2024, 2, 29))
+        self.assertEqual(meses_antes(date(2024, 1, 15), 12), date(2023, 1, 15))
+
+    def test_inventario_em_data_passada(self):
+        estoque = EstoqueService.inventario(date(2023, 3, 1))
+        self.assertEqual(estoque['total'], 3)
+        self.assertEqual(estoque['por_sexo'], {'F': 1, 'M': 2})
+        self.assertEqual(estoque['por_faixa'], {
+            '0 a 12 meses': 1, '13 a 24 meses': 1, '25 a 36 meses': 0, 'Acima de 36 meses': 1,
+        })
+        self.assertEqual(estoque['por_pasto'], {'Piquete E': 1, 'Sem pasto': 2})
+        self.assertEqual(estoque['por_lote'], {'Cria': 3})
+
+        self.assertEqual(EstoqueService.inventario(date(2023, 12, 31))['total'], 2)
+        self.assertEqual(EstoqueService.inventario(date(2019, 1, 1))['total'], 0)
+
+    def test_serie_mensal_concilia_saldos(self):
+        serie = EstoqueService.serie_mensal(date(2023, 1, 1), date(2023, 6, 30))
+        self.assertEqual(len(serie), 6)
+        self.assertEqual(serie[0]['saldo_inicial'], 2)
+        fevereiro, marco, abril, junho = serie[1], serie[2], serie[3], serie[5]
+        self.assertEqual(fevereiro['nascimentos'], 1)
+        self.assertEqual(marco['vendas'], 1)
+        self.assertEqual(abril['nascimentos'], 1)
+        self.assertEqual(junho['mortes'], 1)
+        for anterior, seguinte in zip(serie, serie[1:]):
+            self.assertEqual(anterior['saldo_final'], seguinte['saldo_inicial'])
+        self.assertEqual(junho['saldo_final'], 2)
+        self.assertTrue(junho['conferido'])
+
+    def test_tela_estoque(self):
+        User.objects.create_user('gerente', password='senha')
+        self.client.login(username='gerente', password='senha')
+        response = self.client.get(reverse('rebanho:estoque'), {'data': '2023-03-01', 'inicio': '2023-01-01', 'fim': '2023-06-30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['estoque']['total'], 3)
+
+        # Data impossível cai no padrão em vez de derrubar a tela
+        response = self.client.get(reverse('rebanho:estoque'), {'data': '2023-02-30', 'fim': '2023-13-01'})
+        self.assertEqual(response.status_code, 200)
+        padrao = date(timezone.localdate().year - 1, 12, 31)
+        self.assertEqual(response.context['estoque']['data'], padrao)
+        self.assertEqual(response.context['fim'], padrao)
+
+
+@override_settings(CACHES=CACHE_EM_MEMORIA)
+class SafraTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        touro = Animal.objects.create(identificacao='T-1', data_nascimento=date(2015, 3, 1), sexo='M')
+        vaca = Animal.objects.create(identificacao='V-1', data_nascimento=date(2016, 1, 1), sexo='F')
+        self.bezerro = Animal.objects.create(
+            identificacao='B-1', data_nascimento=date(2019, 2, 1), sexo='M', mae=vaca, pai=touro,
+        )
+        self.vaca = vaca
+        self.bezerra = bezerra = Animal.objects.create(identificacao='B-2', data_nascimento=date(2019, 5, 1), sexo='F', mae=vaca)
+        nascimento = self.bezerro.data_nascimento
+        for dias, peso in [(1, 35), (200, 210), (230, 225)]:
+            Pesagem.objects.create(animal=self.bezerro, data_pesagem=nascimento + timedelta(days=dias), peso_kg=peso)
+        Venda.objects.create(
+            animal=self.bezerro, valor_total=Decimal('9000'), origem_pagador='Frigorífico',
+            data_entrada=date(2020, 10, 1), peso_venda=Decimal('450'),
+        )
+        BaixaAnimal.objects.create(animal=bezerra, data_baixa=date(2019, 8, 9), causa='DOENCA')
+
+    def test_indicadores_da_safra(self):
+        with self.assertNumQueries(3):
+            safra, = SafraService.analisar([2019])
+        self.assertEqual(safra['grupo'], 2019)
+        self.assertEqual((safra['nascidos'], safra['mortos_desmama'], safra['desmamados']), (2, 1, 1))
+        self.assertEqual(safra['sobrevivencia_desmama'], 50.0)
+        # Desmama aos 200 dias (mais perto dos 205): (210 - 35) / 200 * 205 + 35
+        self.assertEqual(safra['idade_desmama'], 200)
+        self.assertEqual(safra['p205'], 214.4)
+        self.assertEqual(safra['gmd'], 0.875)
+        self.assertEqual((safra['vendidos'], safra['peso_venda']), (1, 450.0))
+
+    def test_agrupamentos(self):
+        por_pai = {linha['grupo']: linha for linha in SafraService.analisar([2019], 'pai')}
+        self.assertEqual(por_pai['T-1']['p205'], 214.4)
+        self.assertEqual(por_pai[SEM_PAI]['desmamados'], 0)
+        idade_mae, = SafraService.analisar([2019], 'idade_mae')
+        self.assertEqual((idade_mae['grupo'], idade_mae['nascidos']), ('3 anos', 2))
+        estacoes = [linha['grupo'] for linha in SafraService.analisar([2019], 'estacao')]
+        self.assertEqual(estacoes, ['2019 Seca', '2019 Águas'])
+
+    def test_safra_encerrada_fica_em_cache_ate_mudar(self):
+        SafraService.analisar([2019])
+        with self.assertNumQueries(0):
+            SafraService.analisar([2019])
+        Pesagem.objects.create(animal=self.bezerro, data_pesagem=self.bezerro.data_nascimento + timedelta(days=205), peso_kg=230)
+        self.assertEqual(SafraService.analisar([2019])[0]['p205'], 230.0)
+
+    def test_caminhos_em_lote_descartam_o_cache(self):
+        self.assertEqual(SafraService.analisar([2019])[0]['desmamados'], 1)
+        # Pesagem de desmama gravada pela sessão de pesagem / quarentena (bulk_create, sem signals)
+        ValidacaoPesagemService.gravar([Pesagem(
+            animal=self.bezerro, data_pesagem=self.bezerro.data_nascimento + timedelta(days=205), peso_kg=230,
+        )])
+        self.assertEqual(SafraService.analisar([2019])[0]['p205'], 230.0)
+
+        # Sêmen informado em lote na reprodução que gerou a bezerra
+        Reproducao.objects.bulk_create([Reproducao(matriz=self.vaca, data_cio=date(2018, 7, 25), bezerro=self.bezerra)])
+        self.assertIn(SEM_PAI, [linha['grupo'] for linha in SafraService.analisar([2019], 'pai')])
+        Reproducao.objects.filter(bezerro=self.bezerra).update(codigo_semen='NEL-1')
+        self.assertIn('NEL-1', [linha['grupo'] for linha in SafraService.analisar([2019], 'pai')])
+
+    def test_tela_safras(self):
+        User.objects.create_user('gerente', password='senha')
+        self.client.login(username='gerente', password='senha')
+        response = self.client.get(reverse('rebanho:safras'), {'agrupar': 'pai', 'inicio': '2019', 'fim': '2019'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['linhas']), 2)
+
+
+class AvaliacaoGeneticaTests(TestCase):
+
+    def test_inversa_parentesco_pelas_regras_de_henderson(self):
+        # 0 e 1 fundadores, 2 filho de 0 x 1, 3 filho de 0 com mãe desconhecida
+        a_inversa = AvaliacaoGeneticaService.inversa_parentesco([-1, -1, 0, 0], [-1, -1, 1, -1])
+        parentesco = np.array([
+            [1, 0, .5, .5],
+            [0, 1, .5, 0],
+            [.5, .5, 1, .25],
+            [.5, 0, .25, 1],
+        ])
+        np.testing.assert_allclose(a_inversa.toarray(), np.linalg.inv(parentesco), atol=1e-12)
+
+    def test_resolver_sem_parentesco(self):
+        # Sem pedigree o valor genético é h² x desvio da média do grupo
+        a_inversa = AvaliacaoGeneticaService.inversa_parentesco([-1, -1, -1], [-1, -1, -1])
+        grupos, valores, _ = AvaliacaoGeneticaService.resolver(
+            a_inversa, np.arange(3), np.zeros(3, dtype=int), np.array([200.0, 220.0, 240.0]), herdabilidade=0.25,
+        )
+        np.testing.assert_allclose(grupos, [220.0])
+        np.testing.assert_allclose(valores, [-5.0, 0.0, 5.0], atol=1e-6)
+
+    def test_avaliar_grava_e_ordena_touros_e_novilhas(self):
+        lote = Lote.objects.create(nome='Desmama')
+
+        def criar(ident, nasc, sexo, **pais):
+            return Animal.objects.create(identificacao=ident, data_nascimento=nasc, sexo=sexo, lote_atual=lote, **pais)
+
+        touro_bom, touro_ruim = criar('T-1', date(2015, 1, 1), 'M'), criar('T-2', date(2015, 1, 1), 'M')
+        vacas = [criar('V-1', date(2016, 1, 1), 'F'), criar('V-2', date(2016, 1, 1), 'F')]
+        novilha = criar('N-1', date(2019, 1, 1), 'F')
+        nascimento = date(2020, 2, 1)
+        for numero, (touro, vaca, peso) in enumerate([
+            (touro_bom, vacas[0], 240), (touro_bom, vacas[1], 236), (touro_ruim, vacas[0], 200), (touro_ruim, vacas[1], 204),
+        ]):
+            bezerro = criar(f'B-{numero}', nascimento, 'M', pai=touro, mae=vaca)
+            Pesagem.objects.create(animal=bezerro, data_pesagem=nascimento + timedelta(days=205), peso_kg=peso)
+
+        animais, registros, _ = AvaliacaoGeneticaService.avaliar()
+        self.assertEqual((animais, registros), (9, 4))
+        bom, ruim = touro_bom.avaliacao_genetica, touro_ruim.avaliacao_genetica
+        self.assertGreater(bom.dep, 0)
+        self.assertLess(ruim.dep, 0)
+        self.assertAlmostEqual(bom.dep, bom.valor_genetico / 2, places=2)
+        self.assertEqual((bom.filhos_com_registro, bom.p205), (2, None))
+
+        touros = [avaliacao.animal_id for avaliacao in AvaliacaoGeneticaService.ranking_touros()]
+        self.assertLess(touros.index(touro_bom.pk), touros.index(touro_ruim.pk))
+        self.assertEqual([a.animal_id for a in AvaliacaoGeneticaService.ranking_novilhas()], [novilha.pk])
+
+        # Reavaliar atualiza no lugar
+        AvaliacaoGeneticaService.avaliar()
+        self.assertEqual(AvaliacaoGenetica.objects.count(), 9)
+
+    def test_tela_avaliacao_genetica(self):
+        User.objects.create_user('gerente', password='senha')
+        self.client.login(username='gerente', password='senha')
+        response = self.client.get(reverse('rebanho:avaliacao_genetica'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([titulo for titulo, _ in response.context['rankings']], ['Touros', 'Novilhas'])
+
+
+class CrescimentoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.nascimento = date(2020, 1, 1)
+        # Rebanho de fêmeas sobre uma curva conhecida, com ruído pequeno e alternado
+        cls.femeas = Animal.objects.bulk_create([
+            Animal(identificacao=f'CF-{i}', data_nascimento=cls.nascimento, sexo='F') for i in range(8)
+        ])
+        Pesagem.objects.bulk_create([
+            Pesagem(
+                animal=animal, data_pesagem=cls.nascimento + timedelta(days=dias),
+                peso_kg=Decimal(str(round(brody(500, 0.94, 0.0025, dias) + (3 if (i + dias) % 2 else -3), 2))),
+            )
+            for i, animal in enumerate(cls.femeas) for dias in range(30, 1500, 90)
+        ])
+        cls.sem_pesagem = Animal.objects.create(identificacao='CM-0', data_nascimento=cls.nascimento, sexo='M')
+
+    def test_curva_ajustada_e_projecao(self):
+        self.assertEqual(CrescimentoService.ajustar(), 9)
+        curva = self.femeas[0].curva_crescimento
+        self.assertAlmostEqual(curva.peso_adulto, 500, delta=15)
+        self.assertAlmostEqual(curva.taxa_k, 0.0025, delta=0.0004)
+        self.assertEqual(curva.pesagens, 17)
+        self.assertLess(curva.erro_kg, 6)
+
+        data = self.nascimento + timedelta(days=2000)
+        with self.assertNumQueries(1):
+            pesos = CrescimentoService.pesos_projetados(data)
+        self.assertAlmostEqual(pesos[self.femeas[0].pk], brody(500, 0.94, 0.0025, 2000), delta=15)
+        self.assertEqual(self.femeas[0].peso_projetado(data), pesos[self.femeas[0].pk])
+
+    def test_animal_sem_pesagem_fica_com_a_curva_do_sexo(self):
+        CrescimentoService.ajustar()
+        curva = self.sem_pesagem.curva_crescimento
+        peso_adulto, peso_nascer, taxa_k = PRIOR_PADRAO['M']
+        self.assertEqual((curva.pesagens, curva.erro_kg, curva.taxa_k), (0, None, taxa_k))
+        self.assertAlmostEqual(curva.peso_em(0), peso_nascer)
+        self.assertAlmostEqual(curva.peso_adulto, peso_adulto)
+
+        # Uma pesagem puxa a curva sem descartar o prior; reajustar atualiza a mesma linha
+        Pesagem.objects.create(animal=self.sem_pesagem, data_pesagem=date(2021, 1, 1), peso_kg=Decimal('380'))
+        CrescimentoService.ajustar(Animal.objects.filter(pk=self.sem_pesagem.pk))
+        curva.refresh_from_db()
+        self.assertEqual(curva.pesagens, 1)
+        self.assertGreater(curva.peso_em(366), brody(peso_adulto, 1 - peso_nascer / peso_adulto, taxa_k, 366))
+        self.assertLess(curva.peso_em(366), 380)
+
+
+class ChaveOrdenacaoTests(TestCase):
+
+    def chaves(self):
+        return {
+            identificacao: chave
+            for identificacao, chave in Animal.objects.values_list('identificacao', 'chave_ordenacao')
+        }
+
+    def assertChavesEmDia(self):
+        for identificacao, chave in self.chaves().items():
+            self.assertEqual(chave, gerar_chave_ordenacao(identificacao), identificacao)
+
+    def test_chave(self):
+        self.assertLess(gerar_chave_ordenacao('B-7'), gerar_chave_ordenacao('B-10'))
+        self.assertLess(gerar_chave_ordenacao('B-10'), gerar_chave_ordenacao('C-1'))
+        self.assertEqual(gerar_chave_ordenacao(' b-7 '), gerar_chave_ordenacao('B-7'))
+        self.assertEqual(gerar_chave_ordenacao(None), '')
+        self.assertEqual(len(gerar_chave_ordenacao('A1' * 200)), 255)
+
+    def test_caminhos_de_gravacao(self):
+        animal = Animal.objects.create(identificacao='B-7', data_nascimento=date(2022, 1, 1), sexo='F')
+        Animal.objects.bulk_create([
+            Animal(identificacao=f'B-{i}', data_nascimento=date(2022, 1, 1), sexo='M') for i in (8, 9)
+        ])
+        self.assertChavesEmDia()
+
+        animal.identificacao = 'B-70'
+        animal.save(update_fields=['identificacao'])
+        self.assertEqual(self.chaves()['B-70'], gerar_chave_ordenacao('B-70'))
+
+        outros = list(Animal.objects.filter(identificacao__in=['B-8', 'B-9']))
+        for outro in outros:
+            outro.identificacao = outro.identificacao.replace('B-', 'C-')
+        Animal.objects.bulk_update(outros, ['identificacao'])
+        self.assertChavesEmDia()
+
+        Animal.objects.filter(identificacao='C-8').update(identificacao='D-8')
+        self.assertChavesEmDia()
+
+        # Expressão: a chave é recalculada depois, a partir do brinco gravado
+        Animal.objects.filter(identificacao__startswith='C-').update(identificacao=Concat(Value('X'), F('identificacao')))
+        self.assertEqual(set(self.chaves()), {'B-70', 'D-8', 'XC-9'})
+        self.assertChavesEmDia()
+
+    def test_listagem_em_ordem_natural(self):
+        Animal.objects.bulk_create([
+            Animal(identificacao=identificacao, data_nascimento=date(2022, 1, 1), sexo='F')
+            for identificacao in ('B-10', 'b-2', 'A-100', 'B-1')
+        ])
+        User.objects.create_user('gerente', password='senha')
+        self.client.login(username='gerente', password='senha')
+        response = self.client.get(reverse('rebanho:animal_list'))
+        self.assertEqual(
+            [animal.identificacao for animal in response.context['animais']], ['A-100', 'B-1', 'b-2', 'B-10'],
+        )
+
+
+class AnimalAnotacoesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        hoje = timezone.localdate()
+        # Idades nas bordas de cada faixa (30 dias por mês)
+        cls.animais = Animal.objects.bulk_create([
+            Animal(identificacao=f'Q-{dias}-{sexo}', data_nascimento=hoje - timedelta(days=dias), sexo=sexo)
+            for dias in (0, 29, 30, 269, 270, 389, 390, 749, 750, 3000) for sexo in 'MF'
+        ] + [Animal(identificacao='Q-peso', data_nascimento=hoje - timedelta(days=600), sexo='M', peso_atual=Decimal('360'))])
+
+    def test_anotacoes_iguais_as_propriedades(self):
+        for animal in Animal.objects.com_idade_meses().com_ua():
+            self.assertEqual(animal.idade_meses, animal.idade_em_meses, animal)
+            self.assertEqual(animal.ua.quantize(Decimal('0.0001')), animal.ua_atual.quantize(Decimal('0.0001')), animal)
+
+    def test_categoria_filtra_e_agrega_no_banco(self):
+        animais = Animal.objects.com_categoria().com_ua()
+        with self.assertNumQueries(1):
+            bezerros = animais.filter(categoria='BEZERRO').aggregate(cabecas=Count('pk'), total_ua=Sum('ua'))
+        self.assertEqual(bezerros['cabecas'], 12)
+        self.assertEqual(bezerros['total_ua'], sum(a.ua_atual for a in Animal.objects.all() if a.idade_em_meses <= 12))
+        self.assertEqual(
+            sorted(animais.filter(categoria='SOBREANO').values_list('identificacao', flat=True)),
+            ['Q-390-F', 'Q-390-M', 'Q-749-F', 'Q-749-M', 'Q-peso'],
+        )
+
+        # Em outra data de referência as categorias andam junto
+        daqui_a_um_ano = timezone.localdate() + timedelta(days=365)
+        self.assertEqual(Animal.objects.com_categoria(daqui_a_um_ano).filter(categoria='BEZERRO').count(), 2)
+        self.assertEqual(Animal.objects.com_idade_meses(daqui_a_um_ano).get(identificacao='Q-0-M').idade_meses, 12)
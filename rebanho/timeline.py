@@ -0,0 +1,151 @@
+# rebanho/timeline.py
+"""
+Ficha do animal: todos os históricos (pesagens, pastos, custos, reprodução e
+saúde) em um número fixo de consultas via Prefetch, com o GPMD calculado da
+série em memória.
+
+O resultado fica em cache por animal. A chave inclui uma versão que é
+descartada a cada gravação relacionada (signals e caminhos em lote chamam
+invalidar), então a ficha nunca mostra histórico velho.
+"""
+from datetime import date
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+
+from financeiro.models import CustoAnimalDetalhe
+from infraestrutura.models import MovimentacaoPasto
+from manejo.models import Pesagem, Reproducao, TratamentoSaude
+
+
+# Rede de segurança para gravações que não passam pelos signals
+TTL_TIMELINE = 60 * 60
+
+
+def _chave_versao(animal_id):
+    return f"rebanho:timeline:versao:{animal_id}"
+
+
+def calcular_gpmd(pesagens):
+    """
+    GPMD a partir da série já carregada (ordem cronológica): médio (kg/dia,
+    primeira -> última pesagem) e recente (g/dia, duas últimas pesagens).
+    """
+    detalhe = {'gpmd_dias': 0, 'gpmd': None, 'gpmd_peso_recente': None, 'gpmd_medio': None}
+    if not pesagens:
+        return detalhe
+
+    primeira, recente = pesagens[0], pesagens[-1]
+    detalhe['gpmd_peso_recente'] = recente.peso_kg
+    if len(pesagens) < 2:
+        return detalhe
+
+    anterior = pesagens[-2]
+    dias = (recente.data_pesagem - anterior.data_pesagem).days
+    detalhe.update({
+        'gpmd_dias': dias,
+        'gpmd_peso_anterior': anterior.peso_kg,
+        'gpmd_data_anterior': anterior.data_pesagem,
+        'gpmd': round((recente.peso_kg - anterior.peso_kg) / dias * 1000) if dias > 0 else None,
+    })
+    dias_total = (recente.data_pesagem - primeira.data_pesagem).days
+    if dias_total > 0:
+        detalhe['gpmd_medio'] = (recente.peso_kg - primeira.peso_kg) / dias_total
+    return detalhe
+
+
+class TimelineAnimalService:
+
+    PREFETCH = (
+        Prefetch('historico_pesagens', queryset=Pesagem.objects.order_by('data_pesagem', 'pk'), to_attr='_pesagens'),
+        Prefetch(
+            'movimentacoes_pasto',
+            queryset=MovimentacaoPasto.objects.select_related('pasto_origem', 'pasto_destino').order_by('-data_entrada', '-pk'),
+            to_attr='_movimentacoes',
+        ),
+        Prefetch(
+            'custos_alocados',
+            queryset=CustoAnimalDetalhe.objects.select_related('registro_de_custo__tipo_custo')
+            .order_by('-registro_de_custo__data_pagamento', '-pk'),
+            to_attr='_custos',
+        ),
+        Prefetch(
+            'reproducoes_matriz',
+            queryset=Reproducao.objects.select_related('touro', 'bezerro').order_by('-data_cio', '-pk'),
+            to_attr='_reproducoes',
+        ),
+        Prefetch('tratamentos', queryset=TratamentoSaude.objects.order_by('-data_tratamento', '-pk'), to_attr='_tratamentos'),
+    )
+
+    @staticmethod
+    def chave(animal_id):
+        versao = cache.get_or_set(_chave_versao(animal_id), lambda: uuid4().hex, None)
+        return f"rebanho:timeline:{animal_id}:{versao}"
+
+    @staticmethod
+    def invalidar(animal_ids):
+        """Descarta a ficha em cache dos animais (aceita ids ou um único id)."""
+        if isinstance(animal_ids, int):
+            animal_ids = [animal_ids]
+        cache.delete_many([_chave_versao(animal_id) for animal_id in animal_ids if animal_id])
+
+    @staticmethod
+    def obter(animal):
+        chave = TimelineAnimalService.chave(animal.pk)
+        timeline = cache.get(chave)
+        if timeline is None:
+            timeline = TimelineAnimalService.montar(animal)
+            cache.set(chave, timeline, TTL_TIMELINE)
+        return timeline
+
+    @staticmethod
+    def montar(animal):
+        """Carrega os históricos (5 consultas) e monta a ficha."""
+        prefetch_related_objects([animal], *TimelineAnimalService.PREFETCH)
+        pesagens = animal._pesagens
+        custos = animal._custos
+        gpmd = calcular_gpmd(pesagens)
+
+        timeline = {
+            'pesagens': pesagens[::-1],
+            'ultima_pesagem': pesagens[-1] if pesagens else None,
+            'gpmd_medio': gpmd.pop('gpmd_medio'),
+            'gpmd_recente': gpmd['gpmd'] or 0,
+            'detalhe_gpmd': gpmd,
+            'movimentacoes_pasto': animal._movimentacoes,
+            'custo_acumulado': sum((c.valor_alocado for c in custos), 0),
+            'custos_detalhados': custos,
+            'reproducoes': animal._reproducoes,
+            'tratamentos': animal._tratamentos,
+        }
+        timeline['eventos'] = TimelineAnimalService._eventos(animal, timeline)
+        return timeline
+
+    @staticmethod
+    def _eventos(animal, timeline):
+        """Linha do tempo única, do mais recente para o mais antigo."""
+        eventos = [{'data': animal.data_nascimento, 'tipo': 'nascimento', 'titulo': 'Nascimento', 'detalhe': ''}]
+        for pesagem in timeline['pesagens']:
+            eventos.append({
+                'data': pesagem.data_pesagem, 'tipo': 'pesagem',
+                'titulo': f"Pesagem: {pesagem.peso_kg} kg", 'detalhe': pesagem.evento,
+            })
+        for mov in timeline['movimentacoes_pasto']:
+            eventos.append({
+                'data': mov.data_entrada, 'tipo': 'pasto',
+                'titulo': f"Entrada no pasto {mov.pasto_destino.nome}", 'detalhe': mov.motivo or '',
+            })
+        for tratamento in timeline['tratamentos']:
+            eventos.append({
+                'data': tratamento.data_tratamento, 'tipo': 'saude',
+                'titulo': f"{tratamento.get_tipo_tratamento_display()}: {tratamento.produto}", 'detalhe': tratamento.dose or '',
+            })
+        for repro in timeline['reproducoes']:
+            eventos.append({
+                'data': repro.data_cio, 'tipo': 'reproducao',
+                'titulo': f"{repro.get_tipo_display()} ({repro.get_resultado_display()})",
+                'detalhe': f"Bezerro {repro.bezerro.identificacao}" if repro.bezerro else '',
+            })
+        eventos.sort(key=lambda evento: evento['data'] or date.min, reverse=True)
+        return eventos
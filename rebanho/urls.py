@@ -1,6 +1,6 @@
 from django.urls import path, include
 from . import views
-from .views import  AnaliseDesempenhoLotesCBV, AnimalViewSet, AnalisePorIdadeView,  AnimalCreateView, AnimalUpdateView,  AnimalListView, AnimalDetailView, BaixaAnimalCreateView, DesmameListView
+from .views import  AnaliseDesempenhoLotesCBV, AnimalViewSet, AnalisePorIdadeView,  AnimalCreateView, AnimalUpdateView,  AnimalListView, AnimalBuscaView, AnimalDetailView, BaixaAnimalCreateView, DesmameListView, EstoqueRebanhoView, SafraAnaliseView, AvaliacaoGeneticaView
 from infraestrutura.views import MovimentacaoPastoCreateView
 from rest_framework.routers import DefaultRouter
 
@@ -14,7 +14,11 @@ app_name = 'rebanho'
 
 urlpatterns = [
     path('analise/idade/', AnalisePorIdadeView.as_view(), name='analise_por_idade'),
+    path('estoque/', EstoqueRebanhoView.as_view(), name='estoque'),
+    path('safras/', SafraAnaliseView.as_view(), name='safras'),
+    path('avaliacao_genetica/', AvaliacaoGeneticaView.as_view(), name='avaliacao_genetica'),
     path('animais/', AnimalListView.as_view(), name='animal_list'),
+    path('animais/busca/', AnimalBuscaView.as_view(), name='animal_busca'),
     path('animal/<int:pk>/', AnimalDetailView.as_view(), name='animal_detail'), 
     path('animal/novo/', AnimalCreateView.as_view(), name='animal_create'),
     path('animal/<int:pk>/editar/', AnimalUpdateView.as_view(), name='animal_update'),
@@ -3,11 +3,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy, reverse
 from django.contrib import messages, auth
+from django.http import JsonResponse
+from django.views import View
 from django.views.generic import ListView, DetailView, TemplateView, CreateView, UpdateView, FormView
 from django.contrib.auth.decorators import login_required # Importe o decorador
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db import models
-from django.db.models import Avg, F, Q, Count, Sum, Count, Case, When, IntegerField, ExpressionWrapper, FloatField
+from django.db.models import Avg, F, Q, Count, Count, Case, When, IntegerField, ExpressionWrapper, FloatField
 from django.db.models.functions import Coalesce, Extract, ExtractDay
 from datetime import date, timedelta
 from django.utils import timezone
@@ -20,11 +22,20 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from core.datas import ler_data
+from core.exportacao import ExportacaoMixin
+from core.processamento import enfileirar
 from core.services import ZootecnicoService
+from manejo.ganho import GanhoPesoService
 
 from .serializers import AnimalSerializer 
+from .busca import buscar_animais
 from .filters import AnimalFilter
-from .models import Animal,  Lote,  BaixaAnimal
+from .models import Animal,  Lote,  BaixaAnimal, AvaliacaoGenetica
+from .estoque import EstoqueService
+from .genetica import AvaliacaoGeneticaService
+from .safra import AGRUPAMENTOS as AGRUPAMENTOS_SAFRA, SafraService
+from .timeline import TimelineAnimalService
 from .forms import AnimalForm, BaixaAnimalForm
 
 # -----------------------------------------------
@@ -87,13 +98,45 @@ class AnimalUpdateView(LoginRequiredMixin, UpdateView):
 # ListViews do projeto de Pecuária
 # --------------------------------
 
-class AnimalListView(ListView):
+class AnimalBuscaView(View):
+    """Typeahead: top N animais para o termo digitado (?q=, ?limite=, ?vivos=1)."""
+    LIMITE_MAXIMO = 50
+
+    def get(self, request, *args, **kwargs):
+        try:
+            limite = min(int(request.GET.get('limite', 10)), self.LIMITE_MAXIMO)
+        except ValueError:
+            limite = 10
+
+        resultados = buscar_animais(
+            request.GET.get('q', ''),
+            limite=max(limite, 1),
+            somente_vivos=request.GET.get('vivos') == '1',
+        )
+        return JsonResponse({'resultados': resultados})
+
+
+class AnimalListView(ExportacaoMixin, ListView):
     model = Animal
     template_name = 'rebanho/animal_list.html'
     context_object_name = 'animais'
     # Filtra apenas os animais ativos por padrão
     queryset = Animal.objects.filter(situacao='VIVO')
     paginate_by = 25 # Opção para paginar os resultados
+    nome_arquivo_exportacao = 'animais'
+    colunas_exportacao = [
+        ('identificacao', 'Identificação'),
+        ('nome', 'Nome'),
+        ('sexo', 'Sexo'),
+        ('data_nascimento', 'Nascimento'),
+        ('situacao', 'Situação'),
+        ('lote_atual__nome', 'Lote'),
+        ('pasto_atual__nome', 'Pasto'),
+        ('mae__identificacao', 'Mãe'),
+        ('pai__identificacao', 'Pai'),
+        ('peso_atual', 'Peso Atual (kg)'),
+        ('data_ultima_pesagem', 'Última Pesagem'),
+    ]
     
     def get_queryset(self):
         # 1. Obtém o queryset base (todos os animais)
@@ -130,6 +173,7 @@ class AnimalDetailView( DetailView):
     model = Animal
     template_name = 'rebanho/animal_detail.html'
     context_object_name = 'animal'
+    queryset = Animal.objects.select_related('pasto_atual', 'lote_atual', 'mae', 'pai')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -142,84 +186,84 @@ class AnimalDetailView( DetailView):
             context['idade_anos'] = idade_dias // 365
             context['idade_meses'] = (idade_dias % 365) // 30
 
-        # --- 2. Histórico de Pesagem (GPMD) ---
-        pesagens = animal.historico_pesagens.all().order_by('-data_pesagem')
-        context['pesagens'] = pesagens
-        
-        # Última Pesagem
-        if pesagens.exists():
-            context['ultima_pesagem'] = pesagens.first()
-            
-            # Usa o método que você já criou para calcular os dados de GPMD
-            dados_gpmd = self.calcular_gpmd(pesagens)
-            context['gpmd_medio'] = animal.calcular_gpmd_animal()
-            context['gpmd_recente'] = dados_gpmd['gpmd'] # GPMD em gramas entre as duas últimas pesagens
-            context['detalhe_gpmd'] = dados_gpmd # Contém dias, peso anterior, etc.
-        else:
-            context['ultima_pesagem'] = None
-            context['gpmd_recente'] = 0
+        # --- 2. Históricos (pesagem/GPMD, pastos, custos, reprodução e saúde) ---
+        # Montados de uma vez (consultas fixas) e guardados em cache até a próxima gravação do animal
+        context.update(TimelineAnimalService.obter(animal))
+        return context
 
-        # --- 3. Histórico de Movimentação de Pasto ---
-        context['movimentacoes_pasto'] = animal.movimentacoes_pasto.all().order_by('-data_entrada')
 
-        # --- 4. Histórico Financeiro (Custo Acumulado) ---
-        # Soma todos os detalhes de custo alocados a este animal
-        custo_acumulado = animal.custos_alocados.aggregate(total=Sum('valor_alocado'))['total']
-        context['custo_acumulado'] = custo_acumulado or 0.00
-        
-        # Detalhe dos custos (para a tabela)
-        context['custos_detalhados'] = animal.custos_alocados.all().order_by('-registro_de_custo__data_pagamento')
+class EstoqueRebanhoView(LoginRequiredMixin, TemplateView):
+    """Estoque em uma data (?data=) e movimento mensal do período (?inicio=&fim=)."""
+    template_name = 'rebanho/estoque.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        hoje = timezone.localdate()
+        data = ler_data(self.request.GET.get('data'), date(hoje.year - 1, 12, 31))
+        fim = ler_data(self.request.GET.get('fim'), data)
+        inicio = ler_data(self.request.GET.get('inicio'), date(fim.year, 1, 1))
+        if inicio > fim:
+            inicio, fim = fim, inicio
+
+        context.update({
+            'estoque': EstoqueService.inventario(data),
+            'serie': EstoqueService.serie_mensal(inicio, fim),
+            'inicio': inicio,
+            'fim': fim,
+        })
+        return context
 
-        # --- 5. Histórico de Reprodução (Se existir o modelo) ---
-        try:
-            context['reproducoes'] = animal.reproducoes_matriz.all().order_by('-data_cio')
-        except:
-             context['reproducoes'] = []
 
-        # --- 6. Histórico de Saúde (Se existir o modelo) ---
+class SafraAnaliseView(LoginRequiredMixin, TemplateView):
+    """Safras de ?inicio= a ?fim= (anos de nascimento) agrupadas por ?agrupar=."""
+    template_name = 'rebanho/safras.html'
+    ANOS_PADRAO = 5
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        hoje = timezone.localdate()
+        agrupar = self.request.GET.get('agrupar')
+        if agrupar not in AGRUPAMENTOS_SAFRA:
+            agrupar = 'safra'
         try:
-             context['tratamentos'] = animal.tratamentos.all().order_by('-data_tratamento')
-        except:
-             context['tratamentos'] = []
+            fim = int(self.request.GET.get('fim') or hoje.year - 1)
+            inicio = int(self.request.GET.get('inicio') or fim - self.ANOS_PADRAO + 1)
+        except ValueError:
+            fim, inicio = hoje.year - 1, hoje.year - self.ANOS_PADRAO
+        if inicio > fim:
+            inicio, fim = fim, inicio
 
+        context.update({
+            'linhas': SafraService.analisar(range(inicio, fim + 1), agrupar),
+            'agrupar': agrupar,
+            'agrupamentos': AGRUPAMENTOS_SAFRA,
+            'rotulo': AGRUPAMENTOS_SAFRA[agrupar],
+            'inicio': inicio,
+            'fim': fim,
+        })
         return context
 
-    def calcular_gpmd(self, pesagens):
-        # Apenas tenta calcular se houver pelo menos 2 pesagens
-        if pesagens.count() >= 2:
-            # Pega as duas últimas pesagens
-            pesagem_recente = pesagens.last()
-            pesagem_anterior = pesagens[pesagens.count() - 2] 
 
-            peso_recente = pesagem_recente.peso_kg
-            data_recente = pesagem_recente.data_pesagem
-            
-            peso_anterior = pesagem_anterior.peso_kg
-            data_anterior = pesagem_anterior.data_pesagem
-            
-            # Cálculo da Diferença
-            diferenca_peso = peso_recente - peso_anterior
-            diferenca_dias = (data_recente - data_anterior).days
-
-            # Evita divisão por zero
-            if diferenca_dias > 0:
-                gpmd = diferenca_peso / diferenca_dias
-            else:
-                gpmd = None # Não é possível calcular
-                
-            return {
-                'gpmd_dias': diferenca_dias,
-                'gpmd_peso_anterior': peso_anterior,
-                'gpmd_data_anterior': data_anterior,
-                'gpmd_peso_recente': peso_recente,
-                'gpmd': round(gpmd * 1000) if gpmd else None # GPMD em gramas
-            }
-        
-        return {
-            'gpmd_dias': 0, 
-            'gpmd': None,
-            'gpmd_peso_recente': pesagens.last().peso_kg if pesagens.count() == 1 else None # Mostra 1ª pesagem
-        }
+class AvaliacaoGeneticaView(LoginRequiredMixin, TemplateView):
+    """Ranking de touros e novilhas pela DEP de P205 (valores gravados em AvaliacaoGenetica)."""
+    template_name = 'rebanho/avaliacao_genetica.html'
+    TAMANHO_RANKING = 50
+
+    def post(self, request, *args, **kwargs):
+        processamento = enfileirar('rebanho.avaliacao_genetica', usuario=request.user)
+        return redirect(processamento)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        touros = AvaliacaoGeneticaService.ranking_touros()
+        context.update({
+            'rankings': [
+                ('Touros', touros[:self.TAMANHO_RANKING]),
+                ('Novilhas', AvaliacaoGeneticaService.ranking_novilhas()[:self.TAMANHO_RANKING]),
+            ],
+            'avaliada_em': AvaliacaoGenetica.objects.aggregate(ultima=models.Max('avaliada_em'))['ultima'],
+        })
+        return context
 
 
 class AnalisePorIdadeView(TemplateView):
@@ -321,91 +365,38 @@ class AnalisePorIdadeView(TemplateView):
     
 
 class AnaliseDesempenhoLotesCBV(TemplateView):
+    """GPMD dos animais vivos de cada lote nos últimos DIAS_ANALISE dias (intervalos entre pesagens)."""
     template_name = 'rebanho/analise_lotes.html'
-    
+    DIAS_ANALISE = 365
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # 1. Obter todos os lotes (usando Pasto como Lote)
-        lotes = Lote.objects.all()
-        
-        dados_lotes = []
-        
-        for lote in lotes:
-            animais_no_lote = Animal.objects.filter(lote_atual=lote, situacao='VIVO')
-            
-            gpmds_dos_animais = []
-            
-            # 2. Calcular o GPMD Médio individualmente (em Python)
-            for animal in animais_no_lote:
-                gpmd_animal = animal.calcular_gpmd_animal()
-                if gpmd_animal is not None:
-                    gpmds_dos_animais.append(gpmd_animal)
-            
-            gpmd_medio = None
-            if gpmds_dos_animais:
-                gpmd_medio = sum(gpmds_dos_animais) / len(gpmds_dos_animais)
-            
-            # 3. Reunir os dados
-            dados_lotes.append({
-                'lote': lote,
-                'pasto_atual': lote.nome, 
-                'total_animais': animais_no_lote.count(),
-                'gpmd_medio': round(gpmd_medio, 2) if gpmd_medio is not None else 'N/A'
-            })
-
-        # 4. Ordenação
-        dados_lotes.sort(key=lambda x: x['gpmd_medio'] if x['gpmd_medio'] != 'N/A' else -1, reverse=True)
-
-        context.update({
-            'dados_lotes': dados_lotes,
-        })
-        
-        return context
-    
+        inicio = timezone.localdate() - timedelta(days=self.DIAS_ANALISE)
 
+        ganho = GanhoPesoService.relatorio(
+            agrupar='lote', periodo='ano', inicio=inicio, animais=Animal.objects.filter(situacao='VIVO')
+        )
+        gpmd_por_lote = {linha['chave']: linha['total']['gpmd'] for linha in ganho['linhas']}
 
-class AnaliseDesempenhoLotesCBV(TemplateView):
-    template_name = 'rebanho/analise_lotes.html'
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        # 1. Obter todos os lotes (usando Pasto como Lote)
-        lotes = Lote.objects.all()
-        
+        lotes = Lote.objects.select_related('pasto_atual').annotate(
+            total_animais=Count('animais', filter=Q(animais__situacao='VIVO'))
+        )
         dados_lotes = []
-        
         for lote in lotes:
-            animais_no_lote = Animal.objects.filter(lote_atual=lote, situacao='VIVO')
-            
-            gpmds_dos_animais = []
-            
-            # 2. Calcular o GPMD Médio individualmente (em Python)
-            for animal in animais_no_lote:
-                gpmd_animal = animal.calcular_gpmd_animal()
-                if gpmd_animal is not None:
-                    gpmds_dos_animais.append(gpmd_animal)
-            
-            gpmd_medio = None
-            if gpmds_dos_animais:
-                gpmd_medio = sum(gpmds_dos_animais) / len(gpmds_dos_animais)
-            
-            # 3. Reunir os dados
+            gpmd_medio = gpmd_por_lote.get(lote.pk)
             dados_lotes.append({
                 'lote': lote,
-                'pasto_atual': lote.nome, 
-                'total_animais': animais_no_lote.count(),
-                'gpmd_medio': round(gpmd_medio, 2) if gpmd_medio is not None else 'N/A'
+                'pasto_atual': lote.pasto_atual.nome if lote.pasto_atual else '-',
+                'total_animais': lote.total_animais,
+                'gpmd_medio': gpmd_medio if gpmd_medio is not None else 'N/A'
             })
 
-        # 4. Ordenação
         dados_lotes.sort(key=lambda x: x['gpmd_medio'] if x['gpmd_medio'] != 'N/A' else -1, reverse=True)
 
         context.update({
             'dados_lotes': dados_lotes,
+            'inicio': inicio,
         })
-        
         return context
 
 